@@ -5,7 +5,7 @@ from .market import market_price_agent
 from .residual import residual_value_agent
 from .news import news_policy_agent
 from .carsxe import carsxe_agent
-from .rag import rag_vector_agent
+from .rag import rag_retrieval_agent, rag_vector_agent
 from .summary import summary_agent
 from .consistency import consistency_agent
 from .early_rag import early_rag_agent
@@ -16,6 +16,7 @@ __all__ = [
     "residual_value_agent",
     "news_policy_agent",
     "carsxe_agent",
+    "rag_retrieval_agent",
     "rag_vector_agent",
     "summary_agent",
     "consistency_agent",
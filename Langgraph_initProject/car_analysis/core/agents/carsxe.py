@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from car_analysis.core.models import CarAnalysisState
 from car_analysis.core.agent_logging import (
     log_agent_start,
     log_agent_complete,
     log_agent_error,
 )
-from car_analysis.tools.carsxe_api import carsxe_client
+from car_analysis.tools.carsxe_api import async_carsxe_client, carsxe_client
 from .condition import _basic_car_context
 
 
@@ -18,7 +20,7 @@ async def carsxe_agent(state: CarAnalysisState) -> CarAnalysisState:
     logs = log_agent_start("carsxe_market", payload=_basic_car_context(state))
     car = state.get("current_car", {}) or {}
 
-    if not carsxe_client.available:
+    if not (async_carsxe_client.available or carsxe_client.available):
         return {
             **logs,
             "rag_insights": {
@@ -31,12 +33,17 @@ async def carsxe_agent(state: CarAnalysisState) -> CarAnalysisState:
         }
 
     try:
-        response = carsxe_client.fetch_market_value_by_trim(
+        query = dict(
             make=car.get("make"),
             model=car.get("model"),
             year=car.get("year"),
             mileage=car.get("mileage"),
         )
+        if async_carsxe_client.available:
+            response = await async_carsxe_client.fetch_market_value_by_trim(**query)
+        else:
+            # Without httpx keep the blocking client off the event loop
+            response = await asyncio.to_thread(carsxe_client.fetch_market_value_by_trim, **query)
         return {
             **logs,
             "rag_insights": {
@@ -56,10 +56,22 @@ def _issues_numeric(state: CarAnalysisState) -> List[Dict[str, Any]]:
                 "action": "Revisit market comps or regenerate LLM opinion"
             })
 
-    # 2) Residual value inconsistent with market median
+    # 2) Residual value inconsistent with market median: outside the model's
+    #    p10-p90 spread when it reports one, else a fixed 20% gap
     if isinstance(residual_price, (int, float)) and isinstance(median, (int, float)) and median > 0:
         gap_pct = (residual_price - median) / median * 100
-        if abs(gap_pct) >= 20:
+        quantiles = residual.get("price_quantiles") or {}
+        low, high = quantiles.get("p10"), quantiles.get("p90")
+        if isinstance(low, (int, float)) and isinstance(high, (int, float)):
+            if not low <= median <= high:
+                issues.append({
+                    "type": "residual_vs_market",
+                    "severity": "medium",
+                    "details": (f"Market {median:,.0f} outside residual p10-p90 "
+                                f"[{low:,.0f}, {high:,.0f}] (residual {residual_price:,.0f}, {gap_pct:+.1f}%)"),
+                    "action": "Check model features or market comps; verify mileage normalization"
+                })
+        elif abs(gap_pct) >= 20:
             issues.append({
                 "type": "residual_vs_market",
                 "severity": "medium",
@@ -39,17 +39,17 @@ async def market_price_agent(state: CarAnalysisState) -> CarAnalysisState:
         llm_update = await llm_opinion_worker(working_state)
         working_state.update(llm_update)
 
-        price_research = working_state.get("price_research", {})
         price_comparison = working_state.get("price_comparison", {})
         deal_score = working_state.get("deal_score", {})
         llm_opinion = working_state.get("llm_opinion", {})
 
         summary = {
-            "success": bool(price_research.get("success")) and bool(price_comparison.get("success")),
+            "success": bool(price_comparison.get("success")),
             "market_median": price_comparison.get("market_median"),
             "price_delta": price_comparison.get("price_delta"),
             "price_delta_pct": price_comparison.get("price_delta_pct"),
             "deal_category": price_comparison.get("verdict_category"),
+            "baseline": price_comparison.get("baseline"),
             "rule_score": deal_score.get("score"),
             "rule_verdict": deal_score.get("verdict"),
             "llm_score": llm_opinion.get("score"),
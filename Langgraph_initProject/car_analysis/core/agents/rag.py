@@ -1,7 +1,14 @@
-"""RAG vector retrieval agent."""
+"""RAG vector agents.
+
+``rag_retrieval_agent`` runs in the early fan-out and only does retrieval
+(vector store / GraphRAG / DB lookups, no LLM).  ``rag_vector_agent`` runs
+after the join, next to ``consistency_agent``, and issues the two generation
+calls (enhanced analysis + similar-case analysis) concurrently.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any, Dict, Optional
 
@@ -33,8 +40,37 @@ def _get_rag_system() -> Optional[RAGSystem]:
     return _RAG_SYSTEM
 
 
+async def rag_retrieval_agent(state: CarAnalysisState) -> CarAnalysisState:
+    """Retrieval half of the RAG step; results go to ``state['rag_context']``."""
+
+    logs = log_agent_start("rag_retrieval", payload=_basic_car_context(state))
+    rag_system = _get_rag_system()
+    if rag_system is None:
+        return {
+            **logs,
+            "rag_context": {"success": False, "error": "RAG system unavailable"},
+            **log_agent_complete("rag_retrieval", payload={"available": False}),
+        }
+
+    car = state.get("current_car", {}) or {}
+    try:
+        # Vector store and DB clients are synchronous; keep the event loop free
+        retrieved = await asyncio.to_thread(rag_system.retrieve_car_context, car)
+        return {
+            **logs,
+            "rag_context": {"success": True, **retrieved},
+            **log_agent_complete("rag_retrieval", payload={"cases_found": retrieved.get("cases_count", 0)}),
+        }
+    except Exception as exc:
+        return {
+            **logs,
+            "rag_context": {"success": False, "error": str(exc)},
+            **log_agent_error("rag_retrieval", exc),
+        }
+
+
 async def rag_vector_agent(state: CarAnalysisState) -> CarAnalysisState:
-    """Retrieve similar cases and enhanced analysis via RAG system."""
+    """Generate enhanced and similar-case analyses from the retrieved RAG context."""
 
     logs = log_agent_start("rag_vector", payload=_basic_car_context(state))
     rag_system = _get_rag_system()
@@ -64,23 +100,26 @@ async def rag_vector_agent(state: CarAnalysisState) -> CarAnalysisState:
     analysis_context = ". ".join(analysis_context_parts) or None
 
     try:
-        similar_cases = rag_system.find_similar_cases(car)
-        enhanced = rag_system.enhance_car_analysis(car, analysis_context=analysis_context)
+        retrieved = state.get("rag_context", {}) or {}
+        if not retrieved.get("success"):
+            # Early retrieval missing or failed: retrieve now
+            retrieved = await asyncio.to_thread(rag_system.retrieve_car_context, car)
+        insights = await rag_system.agenerate_car_insights(car, retrieved, analysis_context=analysis_context)
         return {
             **logs,
             "rag_insights": {
                 "vector": {
                     "success": True,
-                    "similar_cases": similar_cases.get("similar_cases"),
-                    "cases_analysis": similar_cases.get("analysis"),
-                    "enhanced_analysis": enhanced.get("enhanced_analysis"),
-                    "retrieved_info": enhanced.get("retrieved_info"),
-                    "confidence": enhanced.get("rag_confidence"),
+                    "similar_cases": insights.get("similar_cases"),
+                    "cases_analysis": insights.get("cases_analysis"),
+                    "enhanced_analysis": insights.get("enhanced_analysis"),
+                    "retrieved_info": insights.get("retrieved_info"),
+                    "confidence": insights.get("rag_confidence"),
                 }
             },
             **log_agent_complete(
                 "rag_vector",
-                payload={"cases_found": len(similar_cases.get("similar_cases", []))},
+                payload={"cases_found": len(insights.get("similar_cases") or [])},
             ),
         }
     except Exception as exc:
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
 
 from car_analysis.core.models import CarAnalysisState
 from car_analysis.core.agent_logging import (
@@ -10,9 +13,84 @@ from car_analysis.core.agent_logging import (
     log_agent_complete,
     log_agent_error,
 )
-from car_analysis.tools.ml_predictor import ml_predictor
+from car_analysis.tools.ml_predictor import PredictionBatcher, ml_predictor, row_quantiles
 from .condition import _basic_car_context
 
+# Collection window for batched mode (0 = predict each car on its own)
+RESIDUAL_BATCH_WINDOW_MS = float(os.getenv("CAR_RESIDUAL_BATCH_WINDOW_MS", "0"))
+RESIDUAL_MAX_BATCH = 256
+
+_batcher: Optional[PredictionBatcher] = None
+
+
+def enable_residual_batching(window_ms: Optional[float] = None,
+                             max_batch: int = RESIDUAL_MAX_BATCH) -> PredictionBatcher:
+    """Route residual predictions of concurrently analysed cars through one batcher.
+
+    A batch is predicted once ``max_batch`` cars are waiting or ``window_ms``
+    after the first one arrived (default ``CAR_RESIDUAL_BATCH_WINDOW_MS`` or 5 ms).
+    """
+
+    global _batcher
+    window_ms = window_ms if window_ms is not None else (RESIDUAL_BATCH_WINDOW_MS or 5.0)
+    _batcher = PredictionBatcher(ml_predictor, window_s=window_ms / 1000.0, max_batch=max_batch)
+    return _batcher
+
+
+def disable_residual_batching() -> None:
+    global _batcher
+    _batcher = None
+
+
+@contextmanager
+def residual_batching(window_ms: Optional[float] = None,
+                      max_batch: int = RESIDUAL_MAX_BATCH) -> Iterator[PredictionBatcher]:
+    """Batch residual predictions for the duration of a run, then restore the previous batcher."""
+
+    global _batcher
+    previous = _batcher
+    try:
+        yield enable_residual_batching(window_ms, max_batch)
+    finally:
+        _batcher = previous
+
+
+if RESIDUAL_BATCH_WINDOW_MS > 0:
+    enable_residual_batching()
+
+
+def preload_residual_model() -> None:
+    """Begin loading the residual model in the background (call at startup)."""
+
+    ml_predictor.preload(background=True)
+
+
+def _residual_features(car: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "year": car.get("year"),
+        "mileage": car.get("mileage"),
+        "hp": car.get("hp") or car.get("horsepower"),
+        "engine_displacement": car.get("engine_displacement") or car.get("engine_liters"),
+        "fuel_type": car.get("fuel_type"),
+        "transmission": car.get("transmission"),
+        "is_v_engine": car.get("is_v_engine"),
+        "clean_title": car.get("clean_title"),
+    }
+
+
+def predict_residual_values(cars: List[Dict[str, Any]], workers: int = 1) -> List[Dict[str, Any]]:
+    """Residual reports for many cars with one batched predictor call (offline / bulk use)."""
+
+    if not ml_predictor.available:
+        raise RuntimeError("ML predictor unavailable; ensure joblib model is loaded")
+    features = [_residual_features(car or {}) for car in cars]
+    predictions = ml_predictor.predict_quantiles(features, workers=workers)
+    return [{
+        "success": True,
+        "predicted_price": float(price),
+        "price_quantiles": row_quantiles(predictions, i),
+    } for i, price in enumerate(predictions["predicted_price"])]
+
 
 async def residual_value_agent(state: CarAnalysisState) -> CarAnalysisState:
     """Residual / resale value projection using the ML predictor tool."""
@@ -21,24 +99,21 @@ async def residual_value_agent(state: CarAnalysisState) -> CarAnalysisState:
     car = state.get("current_car", {}) or {}
 
     try:
-        if not ml_predictor.available:
+        # Off the event loop: the first call may still be waiting on the (pre)load
+        if not await asyncio.to_thread(lambda: ml_predictor.available):
             raise RuntimeError("ML predictor unavailable; ensure joblib model is loaded")
 
-        features = {
-            "year": car.get("year"),
-            "mileage": car.get("mileage"),
-            "hp": car.get("hp") or car.get("horsepower"),
-            "engine_displacement": car.get("engine_displacement") or car.get("engine_liters"),
-            "fuel_type": car.get("fuel_type"),
-            "transmission": car.get("transmission"),
-            "is_v_engine": car.get("is_v_engine"),
-            "clean_title": car.get("clean_title"),
-        }
+        features = _residual_features(car)
 
-        result = ml_predictor.predict_price(features)
+        if _batcher is not None:
+            result = await _batcher.predict_price(features)
+        else:
+            result = ml_predictor.predict_price(features)
         report = {
             "success": True,
             "predicted_price": result.get("predicted_price"),
+            # p10/p50/p90 across the forest's trees (None for non-forest models)
+            "price_quantiles": result.get("price_quantiles"),
             "features_used": result.get("features_used"),
         }
 
@@ -0,0 +1,111 @@
+"""Vectorized price comparison and deal scoring over NumPy arrays.
+
+Evaluates the rule tables in ``scoring_rules`` for many cars at once and
+returns the same values ``price_comparison_worker`` / ``deal_scoring_worker``
+produce one car at a time.  Used by ``utils.rescore_analyses`` to re-score
+the historical database after thresholds change.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from . import scoring_rules as rules
+
+
+def _as_float(values: Any, default: float) -> np.ndarray:
+    """Float array with None/NaN replaced by ``default``."""
+    arr = np.asarray(values, dtype=object)
+    arr = np.where(np.equal(arr, None), default, arr).astype(float)
+    return np.where(np.isnan(arr), default, arr)
+
+
+def _bands(x: np.ndarray, bands: Sequence[tuple], default: Any, dtype: Any) -> np.ndarray:
+    """Vector form of ``rules.band_value`` (first band with ``x <= upper`` wins)."""
+    return np.select([x <= upper for upper, _ in bands],
+                     [value for _, value in bands], default=default).astype(dtype)
+
+
+def compare_prices(price_paid: Any,
+                   median_price: Any,
+                   range_min: Any = None,
+                   range_max: Any = None) -> Dict[str, np.ndarray]:
+    """Batch equivalent of the price_comparison_worker arithmetic.
+
+    Missing ``range_min`` / ``range_max`` default to 0 / 1 like the worker's
+    ``price_range.get`` fallbacks.
+    """
+    paid = _as_float(price_paid, 0.0)
+    median = _as_float(median_price, 0.0)
+    lo = _as_float(np.zeros_like(paid) if range_min is None else range_min, 0.0)
+    hi = _as_float(np.ones_like(paid) if range_max is None else range_max, 1.0)
+
+    delta = paid - median
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta_pct = np.where(median > 0, delta / np.where(median > 0, median, 1.0) * 100, 0.0)
+
+    conditions = [paid < lo]
+    for ratio, inclusive, _ in rules.COMPARISON_BANDS:
+        limit = median * ratio
+        conditions.append(paid <= limit if inclusive else paid < limit)
+    categories = [rules.BELOW_RANGE_CATEGORY] + [c for _, _, c in rules.COMPARISON_BANDS]
+    category = np.select(conditions, categories, default=rules.COMPARISON_ELSE).astype(object)
+
+    denom = np.maximum(1e-9, hi - lo)
+    percentile = np.clip((paid - lo) / denom * 100.0, 0.0, 100.0)
+
+    return {
+        "price_delta": delta,
+        "price_delta_pct": delta_pct,
+        "verdict_category": category,
+        "percentile": percentile,
+    }
+
+
+def score_deals(price_delta_pct: Any,
+                mileage: Any,
+                year: Any,
+                sample_count: Any = None,
+                search_method: Any = None,
+                current_year: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Batch equivalent of deal_scoring_worker.
+
+    Missing mileage / year fall back to the worker defaults; a missing
+    ``search_method`` never earns the data-quality bonus.
+    """
+    pct = _as_float(price_delta_pct, 0.0)
+    n = pct.shape[0]
+    miles = _as_float(mileage, rules.DEFAULT_MILEAGE)
+    years = _as_float(year, rules.DEFAULT_YEAR)
+    samples = _as_float(np.zeros(n) if sample_count is None else sample_count, 0.0)
+    methods = np.asarray([None] * n if search_method is None else search_method, dtype=object)
+    current_year = datetime.now().year if current_year is None else current_year
+
+    car_age = current_year - years
+    mileage_delta = miles - car_age * rules.MILES_PER_YEAR
+
+    bonus = np.where(np.isin(methods, rules.DATA_QUALITY_METHODS)
+                     & (samples >= rules.DATA_QUALITY_MIN_SAMPLES),
+                     rules.DATA_QUALITY_BONUS, 0)
+    age = np.select([car_age <= rules.NEW_CAR_MAX_AGE, car_age >= rules.OLD_CAR_MIN_AGE],
+                    [rules.NEW_CAR_BONUS, rules.OLD_CAR_PENALTY], default=0)
+
+    score = (rules.BASE_SCORE
+             + _bands(pct, rules.PRICE_DELTA_BANDS, rules.PRICE_DELTA_ELSE, np.int64)
+             + _bands(mileage_delta, rules.MILEAGE_DELTA_BANDS, rules.MILEAGE_DELTA_ELSE, np.int64)
+             + age + bonus)
+    score = np.clip(score, 0, 100).astype(np.int64)
+
+    verdict = np.select([score >= minimum for minimum, _ in rules.VERDICT_BANDS],
+                        [v for _, v in rules.VERDICT_BANDS], default=rules.VERDICT_ELSE).astype(object)
+
+    return {
+        "score": score,
+        "verdict": verdict,
+        "car_age": car_age,
+        "mileage_delta": mileage_delta,
+        "data_quality_bonus": bonus,
+    }
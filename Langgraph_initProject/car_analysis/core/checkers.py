@@ -12,12 +12,10 @@ async def price_research_checker(state: CarAnalysisState) -> CarAnalysisState:
 
     research = state.get("price_research", {})
     retries = state.get("retries", {})
-    analysis_errors = state.get("analysis_errors", [])
 
     # Check for successful research with adequate data (increased minimum for better accuracy)
     if research.get("success") and research.get("sample_count", 0) >= 5:
         return {
-            **state,
             "research_ok": True,
             "dbg_logs": ["Price research validation passed"]
         }
@@ -27,28 +25,23 @@ async def price_research_checker(state: CarAnalysisState) -> CarAnalysisState:
     if retry_count >= MAX_PRICE_RESEARCH_RETRIES:
         # Permanent failure - record error
         error_msg = f"TAVILY_SEARCH_FAILED: Unable to fetch market data after {MAX_PRICE_RESEARCH_RETRIES} attempts. {research.get('error', 'Unknown search error')}"
-        analysis_errors.append(error_msg)
-
         return {
-            **state,
             "research_ok": False,
             "research_final": True,
             "failed_permanently": True,
-            "analysis_errors": analysis_errors,
+            "analysis_errors": [*state.get("analysis_errors", []), error_msg],
             "dbg_logs": [f"Price research permanently failed: {error_msg}"]
         }
 
-    retries["price_research"] = retry_count + 1
     await asyncio.sleep(0.2)  # Brief backoff
 
     print(f"   🔄 Retrying price research: attempt {retry_count + 1}/{MAX_PRICE_RESEARCH_RETRIES}")
 
+    # retries is merge_dict-reduced: send only the counter that changed
     return {
-        **state,
         "research_ok": False,
         "research_final": False,
-        "retries": retries,
-        "analysis_errors": analysis_errors,
+        "retries": {"price_research": retry_count + 1},
         "dbg_logs": [f"Price research retry {retry_count + 1}/{MAX_PRICE_RESEARCH_RETRIES}"]
     }
 
@@ -70,13 +63,12 @@ async def comparison_checker(state: CarAnalysisState) -> CarAnalysisState:
             "dbg_logs": ["Price comparison failed after max retries"]
         }
 
-    retries["price_comparison"] = retry_count + 1
     await asyncio.sleep(0.1)
 
     return {
         "comparison_ok": False,
         "comparison_final": False,
-        "retries": retries,
+        "retries": {"price_comparison": retry_count + 1},
         "dbg_logs": [f"Price comparison retry {retry_count + 1}"]
     }
 
@@ -98,13 +90,12 @@ async def scoring_checker(state: CarAnalysisState) -> CarAnalysisState:
             "dbg_logs": ["Deal scoring failed after max retries"]
         }
 
-    retries["deal_scoring"] = retry_count + 1
     await asyncio.sleep(0.1)
 
     return {
         "scoring_ok": False,
         "scoring_final": False,
-        "retries": retries,
+        "retries": {"deal_scoring": retry_count + 1},
         "dbg_logs": [f"Deal scoring retry {retry_count + 1}"]
     }
 
@@ -131,13 +122,11 @@ async def join_scores(state: CarAnalysisState) -> CarAnalysisState:
         # Small backoff to avoid a tight loop
         await asyncio.sleep(0.05)
         return {
-            **state,
             "awaiting_scores": True,
             "dbg_logs": ["Waiting for parallel scoring branches to complete"]
         }
 
     return {
-        **state,
         "awaiting_scores": False,
         "dbg_logs": ["Both scoring branches present"]
     }
@@ -150,17 +139,13 @@ def score_disagreement_checker(state: CarAnalysisState) -> CarAnalysisState:
     rule_score = state.get("deal_score", {}).get("score", 0)
     llm_score = state.get("llm_opinion", {}).get("score", 0)
     retries = state.get("retries", {})
-    analysis_errors = state.get("analysis_errors", [])
 
     # At this stage we expect both scores to be present because of the join node
     if not rule_score or not llm_score:
         print("   ⚠️  Missing scores at score_check (unexpected)")
         return {
-            **state,
             "llm_retry": False,
             "score_disagree_retry": False,
-            "retries": retries,
-            "analysis_errors": analysis_errors,
         }
 
     rule_level = verdict_score(rule_score)
@@ -178,29 +163,23 @@ def score_disagreement_checker(state: CarAnalysisState) -> CarAnalysisState:
     if major_disagreement:
         llm_retries = retries.get("llm_opinion", 0)
         if llm_retries < MAX_LLM_RETRIES:
-            retries["llm_opinion"] = llm_retries + 1
             print(f"   🔄 Major disagreement - retrying LLM opinion {llm_retries + 1}/{MAX_LLM_RETRIES}")
             return {
-                **state,
                 "awaiting_scores": False,
                 "llm_retry": True,
                 "score_disagree_retry": False,
-                "retries": retries,
-                "analysis_errors": analysis_errors,
+                "retries": {"llm_opinion": llm_retries + 1},
             }
         else:
             # LLM retries exhausted — consider refreshing market research, with cap
             prev = retries.get("score_disagreement", 0)
             if prev < MAX_RESEARCH_REFRESH_RETRIES:
-                retries["score_disagreement"] = prev + 1
                 print("   🔁 LLM retries exhausted — falling back to price research")
                 return {
-                    **state,
                     "awaiting_scores": False,
                     "llm_retry": False,
                     "score_disagree_retry": True,
-                    "retries": retries,
-                    "analysis_errors": analysis_errors,
+                    "retries": {"score_disagreement": prev + 1},
                 }
             else:
                 # Give up after refresh attempt — mark permanently failed with explanation
@@ -208,25 +187,19 @@ def score_disagreement_checker(state: CarAnalysisState) -> CarAnalysisState:
                     f"DISAGREEMENT_PERSISTENT: Rule-based score ({rule_score}) and LLM score ({llm_score}) "
                     f"disagree after LLM retries ({MAX_LLM_RETRIES}) and research refresh ({MAX_RESEARCH_REFRESH_RETRIES})"
                 )
-                analysis_errors.append(err)
                 print(f"   ❌ {err}")
                 return {
-                    **state,
                     "awaiting_scores": False,
                     "llm_retry": False,
                     "score_disagree_retry": False,
                     "failed_permanently": True,
-                    "retries": retries,
-                    "analysis_errors": analysis_errors,
+                    "analysis_errors": [*state.get("analysis_errors", []), err],
                 }
 
     # Within acceptable range — proceed to report
     print("   ✅ Scores within acceptable range")
     return {
-        **state,
         "awaiting_scores": False,
         "llm_retry": False,
         "score_disagree_retry": False,
-        "retries": retries,
-        "analysis_errors": analysis_errors,
     }
@@ -11,11 +11,28 @@ from .agents import (
     residual_value_agent,
     news_policy_agent,
     carsxe_agent,
+    rag_retrieval_agent,
     rag_vector_agent,
     summary_agent,
+    consistency_agent,
+    early_rag_agent,
 )
 from .rag_enhanced_workers import save_analysis_to_database
 from .orchestrator import aggregate_car_reports
+from .node_validation import checked_node
+
+
+def _add_node(workflow: StateGraph, name: str, fn) -> None:
+    # CAR_DEBUG_STATE_UPDATES=1 flags nodes that echo unchanged state keys
+    workflow.add_node(name, checked_node(name, fn))
+
+
+# Agents started in parallel after condition_agent; each runs exactly once
+FAN_OUT_AGENTS = ("market_agent", "residual_agent", "news_agent", "carsxe_agent", "early_rag_agent",
+                  "rag_retrieval_agent")
+
+# Run side by side after the fan-out join; summary waits for both
+POST_JOIN_AGENTS = ("consistency_agent", "rag_agent")
 
 
 def build_car_analysis_graph():
@@ -25,8 +42,8 @@ def build_car_analysis_graph():
     workflow = StateGraph(CarAnalysisState)
 
     # Add nodes
-    workflow.add_node("extract_cars", extract_cars_from_pdf)
-    workflow.add_node("generate_report", aggregate_car_reports)
+    _add_node(workflow, "extract_cars", extract_cars_from_pdf)
+    _add_node(workflow, "generate_report", aggregate_car_reports)
 
     # Set entry point
     workflow.set_entry_point("extract_cars")
@@ -43,56 +60,30 @@ def build_single_car_graph():
 
     workflow = StateGraph(CarAnalysisState)
 
-    workflow.add_node("condition_agent", condition_agent)
-    workflow.add_node("market_agent", market_price_agent)
-    workflow.add_node("residual_agent", residual_value_agent)
-    workflow.add_node("early_rag_agent", early_rag_agent)
-    workflow.add_node("news_agent", news_policy_agent)
-    workflow.add_node("carsxe_agent", carsxe_agent)
-    workflow.add_node("rag_agent", rag_vector_agent)
-    workflow.add_node("consistency_agent", consistency_agent)
-    workflow.add_node("summary_agent", summary_agent)
-    workflow.add_node("save_to_database", save_analysis_to_database)
-    workflow.add_node("generate_report", aggregate_car_reports)
+    _add_node(workflow, "condition_agent", condition_agent)
+    _add_node(workflow, "market_agent", market_price_agent)
+    _add_node(workflow, "residual_agent", residual_value_agent)
+    _add_node(workflow, "early_rag_agent", early_rag_agent)
+    _add_node(workflow, "news_agent", news_policy_agent)
+    _add_node(workflow, "carsxe_agent", carsxe_agent)
+    _add_node(workflow, "rag_retrieval_agent", rag_retrieval_agent)
+    _add_node(workflow, "rag_agent", rag_vector_agent)
+    _add_node(workflow, "consistency_agent", consistency_agent)
+    _add_node(workflow, "summary_agent", summary_agent)
+    _add_node(workflow, "save_to_database", save_analysis_to_database)
+    _add_node(workflow, "generate_report", aggregate_car_reports)
 
     workflow.set_entry_point("condition_agent")
 
-    # condition completes first
-    workflow.add_edge("condition_agent", "market_agent")
-    workflow.add_edge("condition_agent", "residual_agent")
-    workflow.add_edge("condition_agent", "news_agent")
-    workflow.add_edge("condition_agent", "carsxe_agent")
-    workflow.add_edge("condition_agent", "early_rag_agent")
-
-    # fan-in before rag/summary once all parallel agents done
-    workflow.add_conditional_edges(
-        "market_agent",
-        lambda state: "carsxe_agent" if state.get("market_analysis") else "market_agent",
-        {"carsxe_agent": "carsxe_agent", "market_agent": "market_agent"}
-    )
-    workflow.add_conditional_edges(
-        "residual_agent",
-        lambda state: "carsxe_agent" if state.get("residual_analysis") else "residual_agent",
-        {"carsxe_agent": "carsxe_agent", "residual_agent": "residual_agent"}
-    )
-    workflow.add_conditional_edges(
-        "news_agent",
-        lambda state: "carsxe_agent",
-        {"carsxe_agent": "carsxe_agent"}
-    )
-
-    workflow.add_conditional_edges(
-        "carsxe_agent",
-        lambda state: (
-            "consistency_agent"
-            if all(state.get(k) is not None for k in ("market_analysis", "residual_analysis", "news_analysis"))
-            else "carsxe_agent"
-        ),
-        {"consistency_agent": "consistency_agent", "carsxe_agent": "carsxe_agent"}
-    )
-
-    workflow.add_edge("consistency_agent", "rag_agent")
-    workflow.add_edge("rag_agent", "summary_agent")
+    # condition completes first, then the independent agents fan out
+    for agent in FAN_OUT_AGENTS:
+        workflow.add_edge("condition_agent", agent)
+
+    # Join barrier: consistency and the RAG generation calls start once every
+    # fan-out agent has finished, and run concurrently
+    for agent in POST_JOIN_AGENTS:
+        workflow.add_edge(list(FAN_OUT_AGENTS), agent)
+    workflow.add_edge(list(POST_JOIN_AGENTS), "summary_agent")
     workflow.add_edge("summary_agent", "save_to_database")
     workflow.add_edge("save_to_database", "generate_report")
     workflow.add_edge("generate_report", END)
@@ -0,0 +1,170 @@
+"""Bounded log channel for ``dbg_logs`` / ``agent_logs``.
+
+``append_list`` copies both lists on every merge and happily re-appends the
+whole log when a node echoes ``{**state, ...}`` back.  ``bounded_log`` is a
+drop-in reducer that instead:
+
+* returns a new ``BoundedLog`` with the new entries appended and never
+  modifies the one already in state, so parallel branches handed the same
+  log each keep a stable snapshot (copying is bounded by ``cap``);
+* drops replayed entries - every accepted entry is wrapped in a ``LogLine`` /
+  ``LogEntry`` owned by the log, so an entry handed back from state is
+  recognised by identity while a fresh, equal-looking entry is still kept;
+* keeps at most ``cap`` entries in state and spills older ones to a per-run
+  JSONL file (``{spill_dir}/{run_id}.jsonl``, one record per entry tagged
+  with its channel and spill batch).
+
+``BoundedLog.read_all()`` returns the spilled and in-state entries in order.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+
+# Entries kept in state per channel; once exceeded the oldest are spilled
+# down to half of this
+DEFAULT_LOG_CAP = int(os.getenv("CAR_LOG_STATE_CAP", "200"))
+LOG_SPILL_DIR = os.getenv("CAR_LOG_SPILL_DIR", "outputs/logs")
+
+
+def new_run_id() -> str:
+    return f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+class LogLine(str):
+    """A ``dbg_logs`` line owned by a ``BoundedLog``."""
+
+
+class LogEntry(dict):
+    """An ``agent_logs`` entry owned by a ``BoundedLog``."""
+
+
+def _own(entry: Any) -> Any:
+    if isinstance(entry, str):
+        return LogLine(entry)
+    if isinstance(entry, dict):
+        return LogEntry(entry)
+    return entry
+
+
+class BoundedLog(list):
+    """In-state window of a run's log; older entries live in the spill file."""
+
+    def __init__(self, entries: Iterable[Any] = (), *, channel: str = "log",
+                 run_id: Optional[str] = None, cap: int = DEFAULT_LOG_CAP,
+                 spill_dir: Optional[str] = None):
+        super().__init__()
+        self.channel = channel
+        self.run_id = run_id or new_run_id()
+        self.cap = max(2, cap)
+        self.spill_dir = spill_dir or LOG_SPILL_DIR
+        self.spilled = 0
+        self.replayed = 0
+        # Each spill batch names the batch before it, so forks of one log that
+        # spill to the same file read back only their own history
+        self._spill_token: Optional[str] = None
+        self._ids: set = set()
+        # Recently spilled entries stay referenced so their ids can't be reused
+        # and a stale replay of them is still recognised
+        self._recent: Deque[Any] = deque()
+        self.extend_new(entries)
+
+    @property
+    def spill_path(self) -> str:
+        return os.path.join(self.spill_dir, f"{self.run_id}.jsonl")
+
+    def extend_new(self, entries: Iterable[Any]) -> int:
+        """Append entries not already owned by this log; returns how many were added."""
+        added = 0
+        for entry in entries or ():
+            if id(entry) in self._ids:
+                self.replayed += 1
+                continue
+            owned = _own(entry)
+            list.append(self, owned)
+            self._ids.add(id(owned))
+            added += 1
+        if len(self) > self.cap:
+            self._spill(len(self) - self.cap // 2)
+        return added
+
+    def merged(self, entries: Iterable[Any]) -> "BoundedLog":
+        """This log plus the entries it does not own yet, as a new log; ``self`` is unchanged."""
+        entries = list(entries or ())
+        fresh = [entry for entry in entries if id(entry) not in self._ids]
+        if not fresh:
+            return self
+        clone = self._fork()
+        clone.replayed += len(entries) - len(fresh)
+        clone.extend_new(fresh)
+        return clone
+
+    def _fork(self) -> "BoundedLog":
+        clone = BoundedLog(channel=self.channel, run_id=self.run_id, cap=self.cap, spill_dir=self.spill_dir)
+        list.extend(clone, self)
+        clone.spilled = self.spilled
+        clone.replayed = self.replayed
+        clone._spill_token = self._spill_token
+        clone._ids = set(self._ids)
+        clone._recent = deque(self._recent)
+        return clone
+
+    def _spill(self, count: int) -> None:
+        old = self[:count]
+        token = uuid.uuid4().hex[:12]
+        os.makedirs(self.spill_dir, exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for offset, entry in enumerate(old):
+                record = {"channel": self.channel, "seq": self.spilled + offset, "spill": token,
+                          "prev": self._spill_token, "entry": entry}
+                f.write(json.dumps(record, default=str) + "\n")
+        self._spill_token = token
+        del self[:count]
+        self.spilled += count
+        self._recent.extend(old)
+        while len(self._recent) > self.cap:
+            self._ids.discard(id(self._recent.popleft()))
+
+    def read_all(self) -> List[Any]:
+        """Spilled entries of this channel followed by the in-state ones."""
+        batches: Dict[str, List[Any]] = {}
+        previous: Dict[str, Optional[str]] = {}
+        if self._spill_token and os.path.exists(self.spill_path):
+            with open(self.spill_path, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record.get("channel") == self.channel:
+                        batches.setdefault(record["spill"], []).append(record["entry"])
+                        previous[record["spill"]] = record["prev"]
+        chain: List[List[Any]] = []
+        token = self._spill_token
+        while token:
+            chain.append(batches.get(token, []))
+            token = previous.get(token)
+        entries: List[Any] = [entry for batch in reversed(chain) for entry in batch]
+        return entries + list(self)
+
+
+def bounded_log(channel: str, cap: int = DEFAULT_LOG_CAP) -> Callable[[Any, Any], BoundedLog]:
+    """LangGraph reducer for a bounded log channel named ``channel``."""
+
+    def reduce(current: Any, update: Any) -> BoundedLog:
+        if isinstance(current, BoundedLog):
+            if update is current:
+                return current
+            return current.merged(update)
+        # First merge: adopt a BoundedLog seeded by the caller, else start one
+        if isinstance(update, BoundedLog) and not current:
+            return update
+        log = BoundedLog(current or (), channel=channel, cap=cap)
+        log.extend_new(update)
+        return log
+
+    reduce.__name__ = f"bounded_log_{channel}"
+    return reduce
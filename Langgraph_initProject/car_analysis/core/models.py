@@ -6,6 +6,8 @@ from typing import Optional, TypedDict, Any, List, Dict
 from typing_extensions import Annotated
 from dataclasses import dataclass
 
+from .log_channel import bounded_log
+
 
 def merge_dict(a: dict[str, Any] | None, b: dict[str, Any] | None) -> dict[str, Any]:
     out = dict(a or {})
@@ -39,11 +41,13 @@ class CarAnalysisState(TypedDict, total=False):
     # Primary worker / agent outputs
     price_research: dict[str, Any]
     price_comparison: dict[str, Any]
+    market_prior: Optional[dict[str, Any]]  # market_priors segment stats for current_car
     # Allow safe overwrites even if concurrent branches re-enter the scorer
     deal_score: Annotated[dict[str, Any], merge_dict]
 
     # Final analysis
     car_reports: Annotated[list[dict[str, Any]], append_list]
+    report_summary: dict[str, Any]  # ReportSummary.to_state() counters for car_reports
     llm_opinion: Annotated[Optional[dict[str, Any]], merge_dict]  # LLM 输出的打分、判断
     score_disagree_retry: Optional[bool]   # 是否触发 retry
 
@@ -53,7 +57,17 @@ class CarAnalysisState(TypedDict, total=False):
     residual_analysis: Annotated[dict[str, Any], merge_dict]
     news_analysis: Annotated[dict[str, Any], merge_dict]
     rag_insights: Annotated[dict[str, Any], merge_dict]
+    early_rag: Annotated[dict[str, Any], merge_dict]
+    rag_context: Annotated[dict[str, Any], merge_dict]  # retrieval-only RAG results (early fan-out)
+    consistency_report: Annotated[dict[str, Any], merge_dict]
     summary_report: Annotated[dict[str, Any], merge_dict]
+    markdown_refined: Optional[str]
+
+    # Persistence (save_to_database queues the record in the write-behind journal)
+    database_queued: bool
+    database_journal_seq: int
+    database_saved: bool
+    database_error: str
 
     # Error tracking
     analysis_errors: list[str]  # Track all errors encountered
@@ -61,8 +75,9 @@ class CarAnalysisState(TypedDict, total=False):
 
     # Shared fields for LangGraph
     retries: Annotated[dict[str, int], merge_dict]
-    dbg_logs: Annotated[list[str], append_list]
-    agent_logs: Annotated[List[Dict[str, Any]], append_list]
+    # Bounded in-state window; older entries are spilled to outputs/logs/<run_id>.jsonl
+    dbg_logs: Annotated[list[str], bounded_log("dbg_logs")]
+    agent_logs: Annotated[List[Dict[str, Any]], bounded_log("agent_logs")]
 
     # Validation and routing
     research_ok: bool
@@ -0,0 +1,79 @@
+"""Debug-mode check that LangGraph nodes return deltas, not state echoes.
+
+A node returning ``{**state, ...}`` makes LangGraph run every reducer over the
+whole state.  With ``CAR_DEBUG_STATE_UPDATES=1`` the graph builders wrap each
+node with ``checked_node`` and log a warning naming any key whose returned
+value is the unchanged state value (same object, or equal for non-log keys);
+``CAR_DEBUG_STATE_UPDATES=strict`` raises ``EchoedStateError`` instead.
+Otherwise ``checked_node`` returns the node untouched.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import logging
+import os
+from typing import Any, Callable, Dict, List, Mapping
+
+logger = logging.getLogger(__name__)
+
+# Reducer-backed append channels: an equal value here is still new content
+_APPEND_KEYS = frozenset({"dbg_logs", "agent_logs", "cars", "car_reports"})
+
+
+class EchoedStateError(ValueError):
+    """A node update re-sent state keys it did not change (strict debug mode)."""
+
+
+def debug_mode() -> str:
+    return os.getenv("CAR_DEBUG_STATE_UPDATES", "").strip().lower()
+
+
+def find_echoed_keys(state: Mapping[str, Any], update: Mapping[str, Any] | None) -> List[str]:
+    """Keys of ``update`` that carry the state's current value unchanged."""
+    echoed = []
+    for key, value in (update or {}).items():
+        if key not in state:
+            continue
+        current = state[key]
+        if value is current:
+            echoed.append(key)
+        elif key not in _APPEND_KEYS and value is not None and value == current:
+            echoed.append(key)
+    return echoed
+
+
+def _report(name: str, state: Mapping[str, Any], update: Dict[str, Any] | None, strict: bool) -> None:
+    if not isinstance(update, Mapping) or not isinstance(state, Mapping):
+        return
+    echoed = find_echoed_keys(state, update)
+    if not echoed:
+        return
+    message = f"Node '{name}' echoed unchanged state keys: {', '.join(sorted(echoed))}"
+    if strict:
+        raise EchoedStateError(message)
+    logger.warning(message)
+
+
+def checked_node(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``fn`` with the echo check when debug mode is on; otherwise return it as is."""
+    mode = debug_mode()
+    if mode not in ("1", "true", "yes", "strict"):
+        return fn
+    strict = mode == "strict"
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state, *args, **kwargs):
+            update = await fn(state, *args, **kwargs)
+            _report(name, state, update, strict)
+            return update
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state, *args, **kwargs):
+        update = fn(state, *args, **kwargs)
+        _report(name, state, update, strict)
+        return update
+    return wrapper
@@ -2,7 +2,10 @@
 
 import os
 import sys
-from typing import Dict, Any, Optional
+import atexit
+import threading
+import uuid
+from typing import Dict, Any, List, Optional
 import logging
 
 # 添加项目路径
@@ -16,6 +19,7 @@ from .workers import (
     llm_opinion_worker as original_llm_opinion_worker
 )
 from database.manager import DatabaseManager
+from database.write_behind import DEFAULT_JOURNAL_PATH, WriteBehindQueue
 from rag.rag_system import RAGSystem
 from car_analysis.graph.graph_service import GraphService
 
@@ -62,7 +66,7 @@ async def rag_enhanced_price_research_worker(state: CarAnalysisState) -> CarAnal
             car = state.get("current_car", {})
 
             # 查找相似车辆案例
-            similar_cases = rag_enhanced.rag_system.find_similar_cases(car)
+            similar_cases = await rag_enhanced.rag_system.afind_similar_cases(car)
 
             if similar_cases.get('similar_cases'):
                 print(f"   🔍 Found {len(similar_cases['similar_cases'])} similar cases for context")
@@ -110,7 +114,7 @@ async def rag_enhanced_llm_opinion_worker(state: CarAnalysisState) -> CarAnalysi
             analysis_context = _build_analysis_context(state)
 
             # 使用RAG增强汽车分析
-            rag_result = rag_enhanced.rag_system.enhance_car_analysis(
+            rag_result = await rag_enhanced.rag_system.aenhance_car_analysis(
                 car_data=car,
                 analysis_context=analysis_context
             )
@@ -269,88 +273,135 @@ def _score_to_verdict(score: int) -> str:
 
 # =============== 数据持久化工作器 ===============
 
-async def save_analysis_to_database(state: CarAnalysisState) -> CarAnalysisState:
-    """保存分析结果到数据库"""
-    if not rag_enhanced.rag_system:
-        print("   ⚠️ RAG system not available, skipping database save")
-        return state
+_PERSIST_QUEUE: Optional[WriteBehindQueue] = None
+_PERSIST_QUEUE_LOCK = threading.Lock()
 
-    try:
-        car = state.get("current_car", {})
-
-        # 保存汽车数据
-        car_id = rag_enhanced.rag_system.db_manager.save_car(
-            car_data=car,
-            session_id=state.get("session_id")
-        )
-
-        # 收集分析数据
-        analysis_data = {
-            "rule_based_score": state.get("deal_score", {}).get("score"),
-            "rule_based_verdict": state.get("deal_score", {}).get("verdict"),
-            "llm_score": state.get("llm_opinion", {}).get("score"),
-            "llm_verdict": state.get("llm_opinion", {}).get("verdict"),
-            "llm_reasoning": state.get("llm_opinion", {}).get("reasoning"),
-            "market_median_price": state.get("price_comparison", {}).get("market_median_price"),
-            "price_delta": state.get("price_comparison", {}).get("price_delta"),
-            "price_delta_percent": state.get("price_comparison", {}).get("price_delta_percent"),
-            "deal_category": state.get("price_comparison", {}).get("verdict"),
-            "data_source": state.get("price_research", {}).get("data_source"),
-            "comparable_count": state.get("price_research", {}).get("comparable_count"),
-            "research_quality": state.get("price_research", {}).get("research_quality"),
-            "success": state.get("deal_score", {}).get("success", False),
-            "analysis_version": "2.0_rag_enhanced"
-        }
 
-        # 保存分析结果
-        analysis_id = rag_enhanced.rag_system.db_manager.save_analysis(car_id, analysis_data)
-
-        # 保存市场数据（如果有）
-        market_data = state.get("price_research", {}).get("comparable_prices", [])
-        if market_data:
-            # 转换格式
-            formatted_market_data = []
-            for price_info in market_data:
-                formatted_data = {
-                    "search_query": f"{car.get('year')} {car.get('make')} {car.get('model')}",
-                    "price": price_info.get("price", 0),
-                    "url": price_info.get("url", ""),
-                    "source": price_info.get("source", "tavily"),
-                    "similarity_score": 1.0
+def _persist_analysis_batch(records: List[Dict[str, Any]]) -> None:
+    """Write-behind sink：批量写入 SQLite、向量库与图数据库"""
+    rag_system = rag_enhanced.rag_system
+    if not rag_system:
+        # 抛出异常让队列保留记录并稍后重试
+        raise RuntimeError("RAG system not available for persistence")
+
+    # 记录自带 source_key：重放或部分失败后重试时已提交的行会被跳过（duplicate），不会重复插入
+    saved = rag_system.db_manager.save_analysis_records(records)
+
+    # 同步到向量存储（一次嵌入调用 / 集合，按 id upsert，可重复执行）
+    # add_*_batch 失败时返回 0 而不抛异常；这里抛出让整批留在日志中等待重试
+    cars = [(row["car_id"], row["car"]) for row in saved]
+    written = rag_system.vector_manager.add_cars_batch(cars)
+    if written != len(cars):
+        raise RuntimeError(f"Vector store wrote {written}/{len(cars)} cars")
+    analyses = [(row["analysis_id"], row["car_id"], row["analysis"]) for row in saved]
+    written = rag_system.vector_manager.add_analyses_batch(analyses)
+    if written != len(analyses):
+        raise RuntimeError(f"Vector store wrote {written}/{len(analyses)} analyses")
+
+    # 同步到图数据库（可选）
+    try:
+        graph = getattr(rag_system, "graph_service", None)
+        if graph and isinstance(graph, GraphService) and graph.available:
+            graph.upsert_car_analyses([
+                {
+                    "car_id": row["car_id"],
+                    "analysis_id": row["analysis_id"],
+                    "car": record.get("car", {}),
+                    "analysis": record.get("analysis", {}),
                 }
-                formatted_market_data.append(formatted_data)
+                for record, row in zip(records, saved)
+            ])
+            print(f"   🕸️ Synced {len(saved)} nodes/edges to graph")
+    except Exception as ge:
+        logger.warning(f"Graph sync skipped: {ge}")
+
+    print(f"   ✅ Flushed {len(saved)} analyses to database")
+
+
+def get_persist_queue() -> WriteBehindQueue:
+    """获取全局 write-behind 队列（首次调用时重放日志并启动刷新线程）"""
+    global _PERSIST_QUEUE
+    with _PERSIST_QUEUE_LOCK:
+        if _PERSIST_QUEUE is None:
+            _PERSIST_QUEUE = WriteBehindQueue(
+                sink=_persist_analysis_batch,
+                journal_path=os.getenv("CAR_PERSIST_JOURNAL", DEFAULT_JOURNAL_PATH),
+                batch_size=int(os.getenv("CAR_PERSIST_BATCH_SIZE", "32")),
+            )
+            atexit.register(_PERSIST_QUEUE.close, 30.0)
+        return _PERSIST_QUEUE
 
-            rag_enhanced.rag_system.db_manager.save_market_data(car_id, formatted_market_data)
 
-        # 同步到向量存储
-        rag_enhanced.rag_system.sync_car_to_vector_store(car_id)
-        rag_enhanced.rag_system.sync_analysis_to_vector_store(analysis_id, car_id)
+def flush_persistence(timeout: Optional[float] = None) -> bool:
+    """等待所有已入队的分析结果落库（测试与退出前调用）"""
+    if _PERSIST_QUEUE is None:
+        return True
+    return _PERSIST_QUEUE.flush(timeout)
 
-        # 同步到图数据库（可选）
-        try:
-            graph = getattr(rag_enhanced.rag_system, "graph_service", None)
-            if graph and isinstance(graph, GraphService) and graph.available:
-                # 使用现有 car/analysis 数据进行 upsert
-                graph.upsert_car(car_id, car)
-                graph.upsert_analysis(analysis_id, analysis_data)
-                graph.link_car_analysis(car_id, analysis_id)
-                print("   🕸️ Synced nodes/edges to graph")
-        except Exception as ge:
-            logger.warning(f"Graph sync skipped: {ge}")
-
-        print(f"   ✅ Analysis saved to database (Car ID: {car_id}, Analysis ID: {analysis_id})")
+
+def _build_persist_record(state: CarAnalysisState) -> Dict[str, Any]:
+    """从状态中提取需要落库的数据"""
+    car = state.get("current_car", {})
+
+    # 收集分析数据
+    analysis_data = {
+        "rule_based_score": state.get("deal_score", {}).get("score"),
+        "rule_based_verdict": state.get("deal_score", {}).get("verdict"),
+        "llm_score": state.get("llm_opinion", {}).get("score"),
+        "llm_verdict": state.get("llm_opinion", {}).get("verdict"),
+        "llm_reasoning": state.get("llm_opinion", {}).get("reasoning"),
+        "market_median_price": state.get("price_comparison", {}).get("market_median"),
+        "price_delta": state.get("price_comparison", {}).get("price_delta"),
+        "price_delta_percent": state.get("price_comparison", {}).get("price_delta_pct"),
+        "deal_category": state.get("price_comparison", {}).get("verdict_category"),
+        # 保留价格区间，批量重新评分（utils/rescore_analyses.py）需要它
+        "price_range": state.get("price_comparison", {}).get("price_range"),
+        "data_source": state.get("price_research", {}).get("search_method"),
+        "comparable_count": state.get("price_research", {}).get("sample_count"),
+        "research_quality": state.get("price_research", {}).get("research_quality"),
+        "success": state.get("deal_score", {}).get("success", False),
+        "analysis_version": "2.0_rag_enhanced"
+    }
+
+    # 市场数据（如果有）转换格式
+    formatted_market_data = []
+    for price_info in state.get("price_research", {}).get("comparable_prices", []):
+        formatted_market_data.append({
+            "search_query": f"{car.get('year')} {car.get('make')} {car.get('model')}",
+            "price": price_info.get("price", 0),
+            "url": price_info.get("url", ""),
+            "source": price_info.get("source", "tavily"),
+            "similarity_score": 1.0
+        })
+
+    return {
+        "car": car,
+        "analysis": analysis_data,
+        "market_data": formatted_market_data,
+        "session_id": state.get("session_id"),
+        # 稳定的幂等键：随记录写入日志，重放时 save_analysis_records 据此跳过已提交的行
+        "source_key": f"analysis:{uuid.uuid4().hex}",
+    }
+
+
+async def save_analysis_to_database(state: CarAnalysisState) -> CarAnalysisState:
+    """将分析结果写入 write-behind 队列，落库在后台批量完成"""
+    if not rag_enhanced.rag_system:
+        print("   ⚠️ RAG system not available, skipping database save")
+        return {}
+
+    try:
+        seq = get_persist_queue().put(_build_persist_record(state))
+        print(f"   📝 Analysis queued for persistence (journal seq {seq})")
 
         return {
-            **state,
-            "database_car_id": car_id,
-            "database_analysis_id": analysis_id,
-            "database_saved": True
+            "database_queued": True,
+            "database_journal_seq": seq,
         }
 
     except Exception as e:
-        logger.error(f"Error saving to database: {e}")
+        logger.error(f"Error queueing analysis for database: {e}")
         return {
-            **state,
             "database_saved": False,
             "database_error": str(e)
         }
@@ -365,6 +416,8 @@ __all__ = [
     'rag_enhanced_llm_opinion_worker',
     'rag_enhanced_deal_scoring_worker',
     'save_analysis_to_database',
+    'get_persist_queue',
+    'flush_persistence',
 
     # 原始工作器（向后兼容）
     'price_research_worker',
@@ -0,0 +1,190 @@
+"""Online summary statistics over car reports.
+
+``ReportSummary`` folds reports in one at a time (O(1) work per report, no
+report list kept) and renders the ``summary`` dict of either
+``generate_final_report`` or, with ``by_status=True``, the per-graph
+``aggregate_car_reports``.  ``to_state`` / ``from_state`` carry the counters
+through LangGraph state as a plain JSON-safe dict.  That dict holds counts
+only, never the error messages, so a fold costs the same for the first car
+and the thousandth; the detailed error list is kept by summaries built in one
+place over all reports (``generate_final_report``, the streaming run).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+
+class ReportSummary:
+    """Running counterpart of the orchestrator's summary sections.
+
+    By default a car counts as successful when ``deal_score.success`` is set
+    (``generate_final_report``).  ``by_status=True`` follows
+    ``aggregate_car_reports`` instead: success comes from
+    ``analysis_status.success``, only successful cars feed scores and verdict
+    histograms, and the summary omits the agreement statistics.
+
+    With ``keep_errors=False`` (summaries restored from state) only error
+    counts are tracked and ``detailed_errors`` is left out of the summary.
+    """
+
+    _COUNTERS = ("total_cars", "successful", "rule_score_sum", "rule_score_count",
+                 "llm_score_sum", "llm_score_count", "rule_categories", "llm_categories",
+                 "agreements", "disagreements", "error_count", "error_types")
+
+    def __init__(self, by_status: bool = False, keep_errors: bool = True) -> None:
+        self.by_status = by_status
+        self.keep_errors = keep_errors
+        self.total_cars = 0
+        self.successful = 0
+        self.rule_score_sum = 0
+        self.rule_score_count = 0
+        self.llm_score_sum = 0
+        self.llm_score_count = 0
+        self.rule_categories: Dict[str, int] = {}
+        self.llm_categories: Dict[str, int] = {}
+        self.agreements = 0
+        self.disagreements = 0
+        self.error_count = 0
+        self.errors: List[str] = []
+        self.error_types: Dict[str, int] = {}
+
+    @classmethod
+    def from_state(cls, data: Dict[str, Any] | None, by_status: bool = False) -> "ReportSummary":
+        summary = cls(by_status=by_status, keep_errors=False)
+        for name in cls._COUNTERS:
+            if data and name in data:
+                value = data[name]
+                setattr(summary, name, dict(value) if isinstance(value, dict) else value)
+        return summary
+
+    def to_state(self) -> Dict[str, Any]:
+        """Counters as a JSON-safe dict (copies, so later ``add`` calls don't leak into it).
+
+        Only scalars and the small category / error-type histograms; the error
+        messages themselves stay out of state.
+        """
+        data = {name: getattr(self, name) for name in self._COUNTERS}
+        return {name: dict(v) if isinstance(v, dict) else v for name, v in data.items()}
+
+    def add(self, report: Dict[str, Any]) -> None:
+        if self.by_status:
+            self._add_by_status(report)
+            return
+
+        deal_score = report.get("deal_score", {})
+        llm_opinion = report.get("llm_opinion", {})
+
+        self.total_cars += 1
+        if deal_score.get("success"):
+            self.successful += 1
+            self.rule_score_sum += deal_score.get("score", 0)
+            self.rule_score_count += 1
+        if llm_opinion.get("score"):
+            self.llm_score_sum += llm_opinion.get("score", 0)
+            self.llm_score_count += 1
+
+        verdict = deal_score.get("verdict", "Unknown")
+        self.rule_categories[verdict] = self.rule_categories.get(verdict, 0) + 1
+        llm_verdict = llm_opinion.get("verdict", "Unknown")
+        self.llm_categories[llm_verdict] = self.llm_categories.get(llm_verdict, 0) + 1
+
+        rule_score = deal_score.get("score", 0)
+        llm_score = llm_opinion.get("score", 0)
+        if rule_score and llm_score:
+            if abs(rule_score - llm_score) <= 20:  # Within 20 points
+                self.agreements += 1
+            else:
+                self.disagreements += 1
+
+        new_errors: List[str] = []
+        status = report.get("analysis_status", {})
+        if status and not status.get("success", True):
+            new_errors.extend(status.get("errors", []))
+        if report.get("error"):
+            new_errors.append(str(report.get("error")))
+        for e in new_errors:
+            et = e.split(":")[0] if isinstance(e, str) and ":" in e else (e or "UNKNOWN_ERROR")
+            self.error_types[et] = self.error_types.get(et, 0) + 1
+        self._record_errors(new_errors)
+
+    def _add_by_status(self, report: Dict[str, Any]) -> None:
+        status = report.get("analysis_status", {})
+        deal_score = report.get("deal_score", {})
+        llm_opinion = report.get("llm_opinion", {})
+
+        self.total_cars += 1
+        if status.get("success", False):
+            self.successful += 1
+            if deal_score.get("success"):
+                self.rule_score_sum += deal_score.get("score", 0)
+                self.rule_score_count += 1
+            if llm_opinion.get("score"):
+                self.llm_score_sum += llm_opinion.get("score", 0)
+                self.llm_score_count += 1
+            verdict = deal_score.get("verdict", "Unknown")
+            self.rule_categories[verdict] = self.rule_categories.get(verdict, 0) + 1
+            llm_verdict = llm_opinion.get("verdict", "Unknown")
+            self.llm_categories[llm_verdict] = self.llm_categories.get(llm_verdict, 0) + 1
+
+        errors = status.get("errors", [])
+        for error in errors:
+            error_type = error.split(":")[0] if ":" in error else "UNKNOWN_ERROR"
+            self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+        self._record_errors(errors)
+
+    def _record_errors(self, errors: List[str]) -> None:
+        self.error_count += len(errors)
+        if self.keep_errors:
+            self.errors.extend(errors)
+
+    def _error_analysis(self) -> Dict[str, Any]:
+        analysis: Dict[str, Any] = {
+            "total_errors": self.error_count,
+            "error_types": dict(self.error_types),
+        }
+        if self.keep_errors:
+            analysis["detailed_errors"] = list(self.errors)
+        return analysis
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.total_cars
+        avg_rule_score = self.rule_score_sum / self.rule_score_count if self.rule_score_count else 0
+        avg_llm_score = self.llm_score_sum / self.llm_score_count if self.llm_score_count else 0
+        compared = self.agreements + self.disagreements
+        agreement_rate = (self.agreements / compared * 100) if compared > 0 else 0
+
+        if self.by_status:
+            return {
+                "total_cars_analyzed": total,
+                "successful_analyses": self.successful,
+                "failed_analyses": total - self.successful,
+                "success_rate": round((self.successful / total * 100) if total > 0 else 0, 1),
+                "scoring_comparison": {
+                    "average_rule_score": round(avg_rule_score, 1),
+                    "average_llm_score": round(avg_llm_score, 1)
+                },
+                "rule_based_categories": dict(self.rule_categories),
+                "llm_opinion_categories": dict(self.llm_categories),
+                "error_analysis": self._error_analysis()
+            }
+
+        return {
+            "total_cars_analyzed": total,
+            "successful_analyses": self.successful,
+            "failed_analyses": total - self.successful,
+            "success_rate": round((self.successful / total * 100) if total > 0 else 0, 1),
+            # Backward-compat keys expected by test scripts
+            "average_deal_score": round(avg_rule_score, 1),
+            "deal_categories": dict(self.rule_categories),
+            "scoring_comparison": {
+                "average_rule_score": round(avg_rule_score, 1),
+                "average_llm_score": round(avg_llm_score, 1),
+                "agreement_rate": round(agreement_rate, 1),
+                "agreements": self.agreements,
+                "disagreements": self.disagreements
+            },
+            "rule_based_categories": dict(self.rule_categories),
+            "llm_opinion_categories": dict(self.llm_categories),
+            "error_analysis": self._error_analysis(),
+        }
@@ -0,0 +1,91 @@
+"""Rule tables shared by the per-car workers and the batch scoring engine.
+
+``price_comparison_worker`` / ``deal_scoring_worker`` evaluate these tables
+one car at a time; ``batch_scoring`` evaluates the same tables over NumPy
+arrays.  Tweak thresholds here and both paths follow.
+
+Bands are ``(upper_bound, value)`` pairs checked in order with ``<=``; the
+first matching band wins and ``*_ELSE`` applies above the last bound.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Sequence, Tuple
+
+# ---- price comparison (price_paid vs market median) ----
+BELOW_RANGE_CATEGORY = "Exceptional Deal"          # price_paid < price_range.min
+# (ratio of median, inclusive, category): paid < / <= median * ratio
+COMPARISON_BANDS: Tuple[Tuple[float, bool, str], ...] = (
+    (0.95, False, "Good Deal"),
+    (1.05, True, "Fair Price"),
+    (1.15, True, "Slightly Overpaid"),
+)
+COMPARISON_ELSE = "Overpaid"
+
+# ---- deal score ----
+BASE_SCORE = 50
+PRICE_DELTA_BANDS = ((-20, 40), (-10, 30), (-5, 20), (5, 10), (15, -15))   # price_delta_pct
+PRICE_DELTA_ELSE = -30
+
+MILES_PER_YEAR = 12000
+MILEAGE_DELTA_BANDS = ((-20000, 15), (-10000, 10), (10000, 5), (30000, -5))  # mileage - expected
+MILEAGE_DELTA_ELSE = -15
+
+NEW_CAR_MAX_AGE, NEW_CAR_BONUS = 3, 5
+OLD_CAR_MIN_AGE, OLD_CAR_PENALTY = 10, -5
+
+DATA_QUALITY_METHODS = ("tavily_real_web_search", "market_prior")
+DATA_QUALITY_MIN_SAMPLES = 10
+DATA_QUALITY_BONUS = 10
+
+# (minimum score, verdict), checked in order
+VERDICT_BANDS = (
+    (90, "Exceptional Deal ⭐⭐⭐"),
+    (75, "Good Deal ⭐⭐"),
+    (60, "Fair Deal ⭐"),
+    (40, "Poor Deal ⚠️"),
+)
+VERDICT_ELSE = "Bad Deal ❌"
+
+# Defaults the scorer uses for missing car fields
+DEFAULT_MILEAGE = 100000
+DEFAULT_YEAR = 2010
+
+
+def band_value(x: float, bands: Sequence[Tuple[float, Any]], default: Any) -> Any:
+    """Value of the first ``(upper, value)`` band with ``x <= upper``."""
+    for upper, value in bands:
+        if x <= upper:
+            return value
+    return default
+
+
+def comparison_category(price_paid: float, median_price: float, range_min: float) -> str:
+    if price_paid < range_min:
+        return BELOW_RANGE_CATEGORY
+    for ratio, inclusive, category in COMPARISON_BANDS:
+        limit = median_price * ratio
+        if price_paid <= limit if inclusive else price_paid < limit:
+            return category
+    return COMPARISON_ELSE
+
+
+def age_adjustment(car_age: int) -> int:
+    if car_age <= NEW_CAR_MAX_AGE:
+        return NEW_CAR_BONUS
+    if car_age >= OLD_CAR_MIN_AGE:
+        return OLD_CAR_PENALTY
+    return 0
+
+
+def data_quality_bonus(search_method: str, sample_count: int) -> int:
+    if search_method in DATA_QUALITY_METHODS and sample_count >= DATA_QUALITY_MIN_SAMPLES:
+        return DATA_QUALITY_BONUS
+    return 0
+
+
+def verdict_for_score(score: int) -> str:
+    for minimum, verdict in VERDICT_BANDS:
+        if score >= minimum:
+            return verdict
+    return VERDICT_ELSE
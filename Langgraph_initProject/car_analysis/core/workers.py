@@ -4,8 +4,9 @@ import os
 import re
 import asyncio
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .models import CarAnalysisState
+from . import scoring_rules as rules
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from ..nodes.tools import get_llm
@@ -24,6 +25,12 @@ MILEAGE_WINDOW_PCT = 0.40  # allow ±40% mileage window
 IQR_MULTIPLIER = 2.0       # trim only extreme outliers
 IQR_MIN_SAMPLES = 12       # apply IQR only when enough samples
 
+# Historical-sales priors (database/market_priors.py): skip Tavily when the
+# segment has at least this many sales; smaller segments are still used as a
+# baseline if web research fails
+MARKET_PRIOR_MIN_SAMPLES = int(os.getenv("MARKET_PRIOR_MIN_SAMPLES", "20"))
+MARKET_PRIOR_BASELINE_MIN_SAMPLES = 5
+
 llm_opinion_prompt = ChatPromptTemplate.from_template("""
 You are a professional car market analyst. Evaluate the fairness of this used car deal:
 
@@ -54,10 +61,48 @@ def _get_llm_chain():
         _LLM_CHAIN = llm_opinion_prompt | llm | StrOutputParser()
     return _LLM_CHAIN
 
+_PRIORS_DB = None
+
+
+def _get_priors_db():
+    global _PRIORS_DB
+    if _PRIORS_DB is None:
+        from ..database.manager import DatabaseManager
+        _PRIORS_DB = DatabaseManager()
+    return _PRIORS_DB
+
+
+def lookup_market_prior(car: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Segment prior for ``car`` from the market_priors table, or None."""
+    try:
+        return _get_priors_db().get_market_prior(
+            car.get("make"), car.get("model"), car.get("year"), car.get("mileage"), car.get("location")
+        )
+    except Exception as e:
+        print(f"   ⚠️ Market prior lookup failed: {e}")
+        return None
+
+
+def _research_from_prior(prior: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a market prior like a price_research result."""
+    return {
+        "success": True,
+        "search_queries": [],
+        "extracted_prices": [],
+        "median_price": prior["price_median"],
+        "price_range": {"min": prior["price_p10"], "max": prior["price_p90"]},
+        "sample_count": prior["sample_count"],
+        "search_method": "market_prior",
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 async def price_research_worker(state: CarAnalysisState) -> CarAnalysisState:
-    """Worker 1: Search online prices via Tavily web search"""
-    print("🔍 Researching market prices with Tavily...")
+    """Worker 1: Search online prices via Tavily web search
 
+    Segments with enough historical sales in market_priors are answered from
+    the table without calling Tavily.
+    """
     car = state.get("current_car", {})
     if not car:
         return {"price_research": {"success": False, "error": "No current car"}}
@@ -67,6 +112,21 @@ async def price_research_worker(state: CarAnalysisState) -> CarAnalysisState:
     year = car.get("year", 0)
     mileage = car.get("mileage", 0)
 
+    # Off the event loop: a SQLAlchemy query (and, on first use, opening the DB)
+    prior = await asyncio.to_thread(lookup_market_prior, car)
+    if prior and prior["sample_count"] >= MARKET_PRIOR_MIN_SAMPLES and prior.get("price_median"):
+        print(f"📚 Market prior: {prior['sample_count']} historical sales "
+              f"({prior['region']}), median ${prior['price_median']:,.0f}; skipping Tavily")
+        return {
+            "market_prior": prior,
+            "price_research": _research_from_prior(prior),
+            "dbg_logs": [f"Price research for {year} {make} {model} served from market prior "
+                         f"({prior['sample_count']} sales)"]
+        }
+
+    print("🔍 Researching market prices with Tavily...")
+    prior_update = {"market_prior": prior} if prior else {}
+
     try:
         # Initialize Tavily client
         from tavily import TavilyClient
@@ -280,6 +340,7 @@ async def price_research_worker(state: CarAnalysisState) -> CarAnalysisState:
             }
 
         return {
+            **prior_update,
             "price_research": research_result,
             "dbg_logs": [f"Price research completed for {year} {make} {model} via {research_result['search_method']}"]
         }
@@ -287,6 +348,7 @@ async def price_research_worker(state: CarAnalysisState) -> CarAnalysisState:
     except Exception as e:
         print(f"   ❌ Price research failed: {e}")
         return {
+            **prior_update,
             "price_research": {"success": False, "error": str(e)},
             "dbg_logs": [f"Price research failed: {e}"]
         }
@@ -298,9 +360,16 @@ async def price_comparison_worker(state: CarAnalysisState) -> CarAnalysisState:
 
     car = state.get("current_car", {})
     research = state.get("price_research", {})
+    prior = state.get("market_prior") or {}
 
+    baseline = "market_prior" if research.get("search_method") == "market_prior" else "web_research"
     if not research.get("success"):
-        return {"price_comparison": {"success": False, "error": "No price research data"}}
+        # Fall back to the historical-sales baseline when web research came up empty
+        if prior.get("price_median") and prior.get("sample_count", 0) >= MARKET_PRIOR_BASELINE_MIN_SAMPLES:
+            research = _research_from_prior(prior)
+            baseline = "market_prior"
+        else:
+            return {"price_comparison": {"success": False, "error": "No price research data"}}
 
     try:
         price_paid = car.get("price_paid", 0)
@@ -312,16 +381,7 @@ async def price_comparison_worker(state: CarAnalysisState) -> CarAnalysisState:
         price_delta_pct = (price_delta / median_price * 100) if median_price > 0 else 0
 
         # Determine if overpaid/underpaid
-        if price_paid < price_range.get("min", 0):
-            verdict_category = "Exceptional Deal"
-        elif price_paid < median_price * 0.95:
-            verdict_category = "Good Deal"
-        elif price_paid <= median_price * 1.05:
-            verdict_category = "Fair Price"
-        elif price_paid <= median_price * 1.15:
-            verdict_category = "Slightly Overpaid"
-        else:
-            verdict_category = "Overpaid"
+        verdict_category = rules.comparison_category(price_paid, median_price, price_range.get("min", 0))
 
         # Avoid divide-by-zero and clamp percentile to [0,100]
         denom = max(1e-9, (price_range.get("max", 1) - price_range.get("min", 0)))
@@ -335,10 +395,21 @@ async def price_comparison_worker(state: CarAnalysisState) -> CarAnalysisState:
             "price_delta": price_delta,
             "price_delta_pct": price_delta_pct,
             "verdict_category": verdict_category,
+            "price_range": {"min": price_range.get("min", 0), "max": price_range.get("max", 1)},
             "market_position": {
                 "percentile": percentile
-            }
+            },
+            "baseline": baseline
         }
+        if prior:
+            comparison_result["market_prior"] = {
+                "sample_count": prior.get("sample_count"),
+                "region": prior.get("region"),
+                "median": prior.get("price_median"),
+                "p10": prior.get("price_p10"),
+                "p90": prior.get("price_p90"),
+                "mmr_delta_pct_median": prior.get("mmr_delta_pct_median"),
+            }
 
         print(f"   💰 Paid: ${price_paid:,.0f}")
         print(f"   📈 Market: ${median_price:,.0f}")
@@ -371,78 +442,43 @@ async def deal_scoring_worker(state: CarAnalysisState) -> CarAnalysisState:
 
     try:
         price_delta_pct = comparison.get("price_delta_pct", 0)
-        mileage = car.get("mileage", 100000)
-        year = car.get("year", 2010)
+        mileage = car.get("mileage", rules.DEFAULT_MILEAGE)
+        year = car.get("year", rules.DEFAULT_YEAR)
         current_year = datetime.now().year
         car_age = current_year - year
         sample_count = research.get("sample_count", 0)
         search_method = research.get("search_method", "unknown")
 
-        # Scoring algorithm (0-100)
-        score = 50  # Base score
+        # Scoring algorithm (0-100); thresholds live in scoring_rules
+        score = rules.BASE_SCORE
 
         # Price delta impact (most important factor)
-        if price_delta_pct <= -20:  # 20%+ under market
-            score += 40
-        elif price_delta_pct <= -10:  # 10-20% under market
-            score += 30
-        elif price_delta_pct <= -5:   # 5-10% under market
-            score += 20
-        elif price_delta_pct <= 5:    # Within 5% of market
-            score += 10
-        elif price_delta_pct <= 15:   # 5-15% over market
-            score -= 15
-        else:  # 15%+ over market
-            score -= 30
+        score += rules.band_value(price_delta_pct, rules.PRICE_DELTA_BANDS, rules.PRICE_DELTA_ELSE)
 
         # Mileage factor
-        expected_mileage = car_age * 12000  # 12k miles/year
+        expected_mileage = car_age * rules.MILES_PER_YEAR
         mileage_delta = mileage - expected_mileage
-
-        if mileage_delta <= -20000:  # Low mileage
-            score += 15
-        elif mileage_delta <= -10000:
-            score += 10
-        elif mileage_delta <= 10000:
-            score += 5
-        elif mileage_delta <= 30000:
-            score -= 5
-        else:  # High mileage
-            score -= 15
+        score += rules.band_value(mileage_delta, rules.MILEAGE_DELTA_BANDS, rules.MILEAGE_DELTA_ELSE)
 
         # Age factor
-        if car_age <= 3:
-            score += 5
-        elif car_age >= 10:
-            score -= 5
+        score += rules.age_adjustment(car_age)
 
-        # Data quality bonus for real Tavily data
-        data_quality_bonus = 0
-        if search_method == "tavily_real_web_search" and sample_count >= 10:
-            data_quality_bonus = 10
-            score += data_quality_bonus
+        # Data quality bonus for real Tavily / historical-sales data
+        data_quality_bonus = rules.data_quality_bonus(search_method, sample_count)
+        score += data_quality_bonus
 
         # Ensure score is 0-100
         score = max(0, min(100, score))
 
         # Final verdict
-        if score >= 90:
-            verdict = "Exceptional Deal ⭐⭐⭐"
-        elif score >= 75:
-            verdict = "Good Deal ⭐⭐"
-        elif score >= 60:
-            verdict = "Fair Deal ⭐"
-        elif score >= 40:
-            verdict = "Poor Deal ⚠️"
-        else:
-            verdict = "Bad Deal ❌"
+        verdict = rules.verdict_for_score(score)
 
         scoring_result = {
             "success": True,
             "score": score,
             "verdict": verdict,
             "data_source": search_method,
-            "confidence": "high" if search_method == "tavily_real_web_search" else "medium",
+            "confidence": "high" if search_method in rules.DATA_QUALITY_METHODS else "medium",
             "scoring_breakdown": {
                 "price_impact": price_delta_pct,
                 "mileage_vs_expected": mileage_delta,
@@ -482,7 +518,6 @@ async def llm_opinion_worker(state: CarAnalysisState) -> CarAnalysisState:
     if not comparison.get("success") or not comparison.get("verdict_category"):
         print("   ⚠️  Price comparison not ready, skipping LLM opinion")
         return {
-            **state,
             "llm_opinion": {
                 "score": 0,
                 "verdict": "Unknown",
@@ -537,7 +572,6 @@ async def llm_opinion_worker(state: CarAnalysisState) -> CarAnalysisState:
             }
 
         return {
-            **state,
             "llm_opinion": llm_json,
             "dbg_logs": [f"LLM opinion: {llm_json.get('score', 0)}/100 - {llm_json.get('verdict', 'Unknown')}"]
         }
@@ -545,7 +579,6 @@ async def llm_opinion_worker(state: CarAnalysisState) -> CarAnalysisState:
     except Exception as e:
         print(f"   ❌ LLM opinion failed: {e}")
         return {
-            **state,
             "llm_opinion": {
                 "score": 0,
                 "verdict": "Error",
@@ -2,11 +2,13 @@
 
 from .models import (
     Base, Car, CarAnalysis, MarketData, AnalysisSession,
-    KnowledgeBase, UserQuery, DatabaseHelper
+    KnowledgeBase, UserQuery, IngestCheckpoint, IngestedRow, MarketPrior, DatabaseHelper
 )
 from .manager import DatabaseManager
+from .write_behind import WriteBehindQueue
 
 __all__ = [
     'Base', 'Car', 'CarAnalysis', 'MarketData', 'AnalysisSession',
-    'KnowledgeBase', 'UserQuery', 'DatabaseHelper', 'DatabaseManager'
+    'KnowledgeBase', 'UserQuery', 'IngestCheckpoint', 'IngestedRow', 'MarketPrior',
+    'DatabaseHelper', 'DatabaseManager', 'WriteBehindQueue'
 ]
\ No newline at end of file
@@ -3,14 +3,18 @@
 import os
 import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from sqlalchemy import create_engine, desc, func
+from itertools import repeat
+from typing import List, Dict, Any, Iterator, Optional
+from sqlalchemy import Boolean, Float, Integer, create_engine, desc, func, select, update
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from .models import (
     Base, Car, CarAnalysis, MarketData, AnalysisSession,
-    KnowledgeBase, UserQuery, DatabaseHelper
+    KnowledgeBase, UserQuery, IngestCheckpoint, IngestedRow, MarketPrior, DatabaseHelper
+)
+from .market_priors import (
+    ALL_REGIONS, PRIOR_SOURCES, group_sales, merge_samples, segment_key, summarize_samples
 )
 
 
@@ -174,6 +178,357 @@ class DatabaseManager:
                 print(f"❌ Error saving analysis: {e}")
                 raise
 
+    def save_analysis_records(self,
+                              records: List[Dict[str, Any]],
+                              checkpoint: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """批量保存汽车 + 分析 + 市场数据（单个事务）
+
+        Args:
+            records: 记录列表，每条包含 car、analysis，可选 market_data / session_id /
+                knowledge（同事务写入知识库）/ source_key（自然键，已导入则跳过）
+            checkpoint: 可选断点 {source, dataset, committed_row}，与数据同事务提交
+
+        历史成交记录（analysis.data_source 属于 PRIOR_SOURCES）在同一事务中增量刷新
+        market_priors 表。
+
+        Returns:
+            与输入顺序一致的列表，每项包含 car_id、analysis_id、knowledge_id 及落库后的
+            car / analysis 字典；按 source_key 判定为重复的记录带 duplicate=True
+        """
+        with self.get_session() as session:
+            try:
+                keys = [r['source_key'] for r in records if r.get('source_key')]
+                known = self._load_ingested_rows(session, keys) if keys else {}
+
+                rows = []
+                for record in records:
+                    key = record.get('source_key')
+                    if key and key in known:
+                        rows.append((record, None, None))
+                        continue
+
+                    car_data = record.get('car', {}) or {}
+                    car = Car(
+                        make=car_data.get('make', ''),
+                        model=car_data.get('model', ''),
+                        year=car_data.get('year', 0),
+                        mileage=car_data.get('mileage', 0),
+                        price_paid=car_data.get('price_paid', 0.0),
+                        trim=car_data.get('trim'),
+                        color=car_data.get('color'),
+                        transmission=car_data.get('transmission'),
+                        engine=car_data.get('engine'),
+                        fuel_type=car_data.get('fuel_type'),
+                        condition=car_data.get('condition'),
+                        location=car_data.get('location'),
+                        pdf_source=car_data.get('pdf_source'),
+                        pdf_page=car_data.get('pdf_page'),
+                        raw_text=car_data.get('raw_text', '')
+                    )
+                    session.add(car)
+
+                    knowledge = None
+                    entry = record.get('knowledge')
+                    if entry:
+                        knowledge = KnowledgeBase(
+                            title=entry.get('title'),
+                            content=entry.get('content'),
+                            content_type=entry.get('content_type', 'general'),
+                            category=entry.get('category'),
+                            tags=entry.get('tags') or [],
+                            source=entry.get('source'),
+                            reliability_score=entry.get('reliability_score', 1.0)
+                        )
+                        session.add(knowledge)
+
+                    rows.append((record, car, knowledge))
+                    if key:
+                        # 同一批次内的重复键只写一次
+                        known[key] = None
+
+                # 一次 flush 拿到全部 car.id
+                session.flush()
+
+                results = []
+                for record, car, knowledge in rows:
+                    if car is None:
+                        results.append((record, None, None, None))
+                        continue
+                    analysis_data = record.get('analysis', {}) or {}
+                    analysis = CarAnalysis(
+                        car_id=car.id,
+                        rule_based_score=analysis_data.get('rule_based_score'),
+                        rule_based_verdict=analysis_data.get('rule_based_verdict'),
+                        llm_score=analysis_data.get('llm_score'),
+                        llm_verdict=analysis_data.get('llm_verdict'),
+                        llm_reasoning=analysis_data.get('llm_reasoning'),
+                        market_median_price=analysis_data.get('market_median_price'),
+                        price_delta=analysis_data.get('price_delta'),
+                        price_delta_percent=analysis_data.get('price_delta_percent'),
+                        deal_category=analysis_data.get('deal_category'),
+                        data_source=analysis_data.get('data_source'),
+                        comparable_count=analysis_data.get('comparable_count'),
+                        research_quality=analysis_data.get('research_quality'),
+                        success=analysis_data.get('success', False),
+                        error_message=analysis_data.get('error_message'),
+                        analysis_version=analysis_data.get('analysis_version', '1.0'),
+                        full_analysis_data=analysis_data
+                    )
+                    session.add(analysis)
+
+                    for data in record.get('market_data') or []:
+                        session.add(MarketData(
+                            car_id=car.id,
+                            search_query=data.get('search_query'),
+                            search_engine=data.get('search_engine', 'tavily'),
+                            comparable_make=data.get('make'),
+                            comparable_model=data.get('model'),
+                            comparable_year=data.get('year'),
+                            comparable_mileage=data.get('mileage'),
+                            comparable_price=data.get('price'),
+                            comparable_url=data.get('url'),
+                            comparable_source=data.get('source'),
+                            similarity_score=data.get('similarity_score', 1.0)
+                        ))
+                    results.append((record, car, analysis, knowledge))
+
+                session.flush()
+
+                for record, car, analysis, knowledge in results:
+                    if car is not None and record.get('source_key'):
+                        session.add(IngestedRow(
+                            source_key=record['source_key'],
+                            dataset=(checkpoint or {}).get('dataset'),
+                            car_id=car.id,
+                            analysis_id=analysis.id,
+                            knowledge_id=knowledge.id if knowledge is not None else None
+                        ))
+
+                if checkpoint:
+                    self._set_checkpoint(session, checkpoint['source'], checkpoint['dataset'],
+                                         committed_row=checkpoint.get('committed_row'))
+
+                # 新写入的历史成交并入市场先验（重复记录不会重复计数）
+                self._refresh_market_priors(session, [
+                    (record.get('car', {}) or {}, record.get('analysis', {}) or {})
+                    for record, car, _, _ in results if car is not None
+                ])
+
+                # 提交前序列化，避免 commit 后属性过期导致逐行重新查询
+                session.flush()
+                saved = []
+                duplicate_keys = []
+                for record, car, analysis, knowledge in results:
+                    if car is None:
+                        saved.append(None)
+                        duplicate_keys.append(record['source_key'])
+                        continue
+                    saved.append({
+                        'car_id': car.id,
+                        'analysis_id': analysis.id,
+                        'knowledge_id': knowledge.id if knowledge is not None else None,
+                        'car': DatabaseHelper.car_to_dict(car),
+                        'analysis': DatabaseHelper.analysis_to_dict(analysis),
+                    })
+
+                session.commit()
+
+                if duplicate_keys:
+                    existing = self.find_ingested_rows(duplicate_keys)
+                    for i, (record, car, _, _) in enumerate(results):
+                        if car is None:
+                            saved[i] = {**existing[record['source_key']], 'duplicate': True}
+
+                inserted = sum(1 for item in saved if not item.get('duplicate'))
+                print(f"✅ Saved {inserted} cars with analyses in one batch"
+                      + (f" ({len(duplicate_keys)} duplicates skipped)" if duplicate_keys else ""))
+                return saved
+
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"❌ Error saving analysis batch: {e}")
+                raise
+
+    def save_analysis_columns(self,
+                              cars: Dict[str, Any],
+                              analyses: Dict[str, Any],
+                              knowledge: Optional[Dict[str, Any]] = None,
+                              source_keys: Optional[List[Optional[str]]] = None,
+                              checkpoint: Optional[Dict[str, Any]] = None) -> Dict[str, List[Any]]:
+        """按列批量保存汽车 + 分析 + 知识库（单个事务，供列式导入使用）
+
+        各表数据以 {列名: 值列表} 给出（所有行相同的列可直接给单个值），逐行拼成
+        参数元组后 executemany 写入，不构造 ORM 对象或逐行字典；full_analysis_data
+        由 SQLite json_object 在插入时按分析列生成，与 save_analysis_records 写入的
+        内容一致。
+
+        Args:
+            cars: cars 表的列
+            analyses: car_analyses 表的列（car_id 由本方法填写）
+            knowledge: 可选 knowledge_base 表的列，与 cars 逐行对应
+            source_keys: 可选自然键列表（None 表示该行无自然键），已导入的行跳过
+            checkpoint: 可选断点 {source, dataset, committed_row}，与数据同事务提交
+
+        Returns:
+            与输入行一一对应的列：car_id、analysis_id、knowledge_id、duplicate
+        """
+        count = len(source_keys) if source_keys is not None else max(
+            len(values) for values in cars.values() if isinstance(values, list)
+        )
+        keys = source_keys if source_keys is not None else [None] * count
+
+        with self.get_session() as session:
+            try:
+                known = self._load_ingested_rows(session, [key for key in keys if key])
+
+                # 已导入的键与批次内重复的键都不再写入
+                seen = set(known)
+                keep = []
+                for position, key in enumerate(keys):
+                    if key and key in seen:
+                        continue
+                    if key:
+                        seen.add(key)
+                    keep.append(position)
+                if len(keep) < count:
+                    cars, analyses = self._take_columns(cars, keep), self._take_columns(analyses, keep)
+                    knowledge = self._take_columns(knowledge, keep) if knowledge else knowledge
+
+                conn = session.connection()
+                now = datetime.utcnow()
+                inserted = len(keep)
+                car_ids = self._insert_columns(conn, Car.__table__, cars, inserted,
+                                               created_at=now, updated_at=now)
+                analysis_ids = self._insert_columns(conn, CarAnalysis.__table__, analyses, inserted,
+                                                    car_id=car_ids, created_at=now, json_column='full_analysis_data')
+                knowledge_ids = self._insert_columns(conn, KnowledgeBase.__table__, knowledge, inserted,
+                                                     created_at=now, updated_at=now) if knowledge else [None] * inserted
+
+                new_keys = [keys[position] for position in keep]
+                ingested = [
+                    (key, car_id, analysis_id, knowledge_id)
+                    for key, car_id, analysis_id, knowledge_id in zip(new_keys, car_ids, analysis_ids, knowledge_ids)
+                    if key
+                ]
+                if ingested:
+                    ingested_keys, ingested_cars, ingested_analyses, ingested_knowledge = map(list, zip(*ingested))
+                    self._insert_columns(conn, IngestedRow.__table__, {
+                        'source_key': ingested_keys,
+                        'dataset': (checkpoint or {}).get('dataset'),
+                        'car_id': ingested_cars,
+                        'analysis_id': ingested_analyses,
+                        'knowledge_id': ingested_knowledge,
+                    }, len(ingested), created_at=now)
+
+                if checkpoint:
+                    self._set_checkpoint(session, checkpoint['source'], checkpoint['dataset'],
+                                         committed_row=checkpoint.get('committed_row'))
+
+                # 新写入的历史成交并入市场先验
+                sources = self._column_values(analyses, 'data_source', inserted)
+                if any(source in PRIOR_SOURCES for source in set(sources)):
+                    sales = zip(*(self._column_values(cars, name, inserted)
+                                  for name in ('make', 'model', 'year', 'mileage', 'location', 'price_paid')),
+                                self._column_values(analyses, 'market_median_price', inserted))
+                    grouped, _ = group_sales(
+                        sale for sale, source in zip(sales, sources) if source in PRIOR_SOURCES
+                    )
+                    self._merge_market_priors(session, grouped)
+
+                # 提交前取出重复行的主键，避免 commit 后属性过期逐行重新查询
+                result = {'car_id': [None] * count, 'analysis_id': [None] * count,
+                          'knowledge_id': [None] * count, 'duplicate': [True] * count}
+                saved_ids = {key: (row.car_id, row.analysis_id, row.knowledge_id) for key, row in known.items()}
+                for position, key, *ids in zip(keep, new_keys, car_ids, analysis_ids, knowledge_ids):
+                    result['car_id'][position], result['analysis_id'][position], result['knowledge_id'][position] = ids
+                    result['duplicate'][position] = False
+                    if key:
+                        saved_ids[key] = tuple(ids)
+                for position, key in enumerate(keys):
+                    if result['duplicate'][position]:
+                        (result['car_id'][position], result['analysis_id'][position],
+                         result['knowledge_id'][position]) = saved_ids[key]
+
+                session.commit()
+
+                duplicates = count - inserted
+                print(f"✅ Saved {inserted} cars with analyses in one columnar batch"
+                      + (f" ({duplicates} duplicates skipped)" if duplicates else ""))
+                return result
+
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"❌ Error saving columnar analysis batch: {e}")
+                raise
+
+    @staticmethod
+    def _column_values(columns: Dict[str, Any], name: str, count: int) -> List[Any]:
+        values = columns.get(name)
+        return values if isinstance(values, list) else [values] * count
+
+    @staticmethod
+    def _take_columns(columns: Dict[str, Any], positions: List[int]) -> Dict[str, Any]:
+        return {
+            name: [values[i] for i in positions] if isinstance(values, list) else values
+            for name, values in columns.items()
+        }
+
+    @staticmethod
+    def _insert_columns(conn, table, columns: Dict[str, Any], count: int,
+                        json_column: Optional[str] = None, **extra: Any) -> List[Any]:
+        """把 {列名: 值列表或单值} executemany 写入 table，返回新行主键（按插入顺序）
+
+        extra 为方法补充的列；json_column 指定的 JSON 列由 json_object 按 columns 中
+        的列在 SQLite 内生成。
+        """
+        if count == 0:
+            return []
+        dialect = conn.dialect
+        quote = dialect.identifier_preparer.quote
+        names = list(columns) + list(extra)
+        params = []
+        for name in names:
+            column = table.c[name]
+            values = columns[name] if name in columns else extra[name]
+            process = column.type.bind_processor(dialect)
+            if isinstance(values, list):
+                params.append(list(map(process, values)) if process else values)
+            else:
+                params.append(repeat(process(values) if process else values, count))
+
+        placeholders = [f"?{i}" for i in range(1, len(names) + 1)]
+        if json_column:
+            pairs = []
+            for i, name in enumerate(columns, start=1):
+                value = f"?{i}"
+                column_type = table.c[name].type
+                if isinstance(column_type, Boolean):
+                    # SQLite 布尔存为 0/1，转回 JSON true/false
+                    value = f"CASE WHEN {value} IS NULL THEN NULL WHEN {value} THEN json('true') ELSE json('false') END"
+                elif isinstance(column_type, Float):
+                    # json_object 只保留 15 位有效数字，浮点数按 Python repr 传入以保持精度
+                    values = columns[name]
+                    params.append([None if v is None else repr(v) for v in values] if isinstance(values, list)
+                                  else repeat(None if values is None else repr(values), count))
+                    value = f"json(?{len(params)})"
+                pairs.append(f"'{name}', {value}")
+            names.append(json_column)
+            placeholders.append(f"json_object({', '.join(pairs)})")
+
+        conn.exec_driver_sql(
+            f"INSERT INTO {quote(table.name)} ({', '.join(quote(name) for name in names)}) "
+            f"VALUES ({', '.join(placeholders)})",
+            list(zip(*params)),
+        )
+        primary_key = table.primary_key.columns.values()[0]
+        if not isinstance(primary_key.type, Integer):
+            return []
+        # 写事务内没有其他写入者，SQLite 依次分配 max(id)+1，新主键连续
+        last_id = conn.exec_driver_sql(
+            f"SELECT max({quote(primary_key.name)}) FROM {quote(table.name)}"
+        ).scalar()
+        return list(range(last_id - count + 1, last_id + 1))
+
     def get_car_with_analysis(self, car_id: int) -> Optional[Dict[str, Any]]:
         """获取汽车及其分析数据"""
         with self.get_session() as session:
@@ -274,6 +629,46 @@ class DatabaseManager:
                 print(f"❌ Error adding knowledge: {e}")
                 raise
 
+    def add_knowledge_batch(self, entries: List[Dict[str, Any]]) -> List[int]:
+        """批量添加知识库条目（单个事务）
+
+        Args:
+            entries: 知识数据列表，字段同 add_knowledge，可选 reliability_score
+
+        Returns:
+            与输入顺序一致的 knowledge_id 列表
+        """
+        if not entries:
+            return []
+
+        with self.get_session() as session:
+            try:
+                rows = []
+                for entry in entries:
+                    knowledge = KnowledgeBase(
+                        title=entry.get('title'),
+                        content=entry.get('content'),
+                        content_type=entry.get('content_type', 'general'),
+                        category=entry.get('category'),
+                        tags=entry.get('tags') or [],
+                        source=entry.get('source'),
+                        reliability_score=entry.get('reliability_score', 1.0)
+                    )
+                    session.add(knowledge)
+                    rows.append(knowledge)
+
+                session.flush()
+                knowledge_ids = [kb.id for kb in rows]
+                session.commit()
+
+                print(f"✅ Added {len(knowledge_ids)} knowledge entries in one batch")
+                return knowledge_ids
+
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"❌ Error adding knowledge batch: {e}")
+                raise
+
     def search_knowledge(self,
                         query: str = None,
                         content_type: str = None,
@@ -317,6 +712,292 @@ class DatabaseManager:
                 'created_at': kb.created_at.isoformat() if kb.created_at else None
             } for kb in results]
 
+    # =============== 导入断点与去重 ===============
+
+    def get_ingest_checkpoint(self, source: str, dataset: str) -> Optional[Dict[str, Any]]:
+        """获取数据源的导入断点
+
+        Returns:
+            {committed_row, embedded_row}，无记录时返回 None
+        """
+        with self.get_session() as session:
+            checkpoint = session.query(IngestCheckpoint).filter(
+                IngestCheckpoint.source == source,
+                IngestCheckpoint.dataset == dataset
+            ).first()
+            if not checkpoint:
+                return None
+            return {
+                'committed_row': checkpoint.committed_row or 0,
+                'embedded_row': checkpoint.embedded_row or 0,
+            }
+
+    def update_ingest_checkpoint(self,
+                                 source: str,
+                                 dataset: str,
+                                 committed_row: Optional[int] = None,
+                                 embedded_row: Optional[int] = None):
+        """更新导入断点（行号只前进不后退）"""
+        with self.get_session() as session:
+            try:
+                self._set_checkpoint(session, source, dataset,
+                                     committed_row=committed_row, embedded_row=embedded_row)
+                session.commit()
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"❌ Error updating ingest checkpoint: {e}")
+                raise
+
+    def reset_ingest_checkpoint(self, source: str, dataset: str):
+        """删除数据源的导入断点（已导入行的自然键保留，仍然去重）"""
+        with self.get_session() as session:
+            session.query(IngestCheckpoint).filter(
+                IngestCheckpoint.source == source,
+                IngestCheckpoint.dataset == dataset
+            ).delete()
+            session.commit()
+
+    def find_ingested_rows(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """按自然键查找已导入的行
+
+        Returns:
+            {source_key: {car_id, analysis_id, knowledge_id, car, analysis, knowledge}}
+        """
+        if not keys:
+            return {}
+
+        with self.get_session() as session:
+            found = {}
+            for key, row in self._load_ingested_rows(session, keys).items():
+                car = session.query(Car).filter(Car.id == row.car_id).first()
+                analysis = session.query(CarAnalysis).filter(
+                    CarAnalysis.id == row.analysis_id
+                ).first() if row.analysis_id else None
+                knowledge = session.query(KnowledgeBase).filter(
+                    KnowledgeBase.id == row.knowledge_id
+                ).first() if row.knowledge_id else None
+                found[key] = {
+                    'car_id': row.car_id,
+                    'analysis_id': row.analysis_id,
+                    'knowledge_id': row.knowledge_id,
+                    'car': DatabaseHelper.car_to_dict(car) if car else {},
+                    'analysis': DatabaseHelper.analysis_to_dict(analysis) if analysis else {},
+                    'knowledge': {
+                        'title': knowledge.title,
+                        'content': knowledge.content,
+                        'content_type': knowledge.content_type,
+                        'category': knowledge.category,
+                        'tags': knowledge.tags,
+                        'source': knowledge.source,
+                        'reliability_score': knowledge.reliability_score,
+                    } if knowledge else None,
+                }
+            return found
+
+    @staticmethod
+    def _load_ingested_rows(session: Session, keys: List[str]) -> Dict[str, IngestedRow]:
+        rows = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # SQLite 单条语句的参数个数有限，分批查询
+        for i in range(0, len(unique_keys), 500):
+            for row in session.query(IngestedRow).filter(
+                IngestedRow.source_key.in_(unique_keys[i:i + 500])
+            ):
+                rows[row.source_key] = row
+        return rows
+
+    @staticmethod
+    def _set_checkpoint(session: Session,
+                        source: str,
+                        dataset: str,
+                        committed_row: Optional[int] = None,
+                        embedded_row: Optional[int] = None):
+        checkpoint = session.query(IngestCheckpoint).filter(
+            IngestCheckpoint.source == source,
+            IngestCheckpoint.dataset == dataset
+        ).first()
+        if not checkpoint:
+            checkpoint = IngestCheckpoint(source=source, dataset=dataset,
+                                          committed_row=0, embedded_row=0)
+            session.add(checkpoint)
+        if committed_row is not None:
+            checkpoint.committed_row = max(checkpoint.committed_row or 0, committed_row)
+        if embedded_row is not None:
+            checkpoint.embedded_row = max(checkpoint.embedded_row or 0, embedded_row)
+
+    # =============== 市场先验 ===============
+
+    def get_market_prior(self,
+                         make: str,
+                         model: str,
+                         year: int,
+                         mileage: int,
+                         region: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """查询细分市场先验：优先本地区，没有时回退到跨地区汇总
+
+        Returns:
+            先验统计字典（见 DatabaseHelper.market_prior_to_dict），无数据时返回 None
+        """
+        key = segment_key(make, model, year, mileage, region)
+        if key is None:
+            return None
+        with self.get_session() as session:
+            rows = session.query(MarketPrior).filter(
+                MarketPrior.make == key[0],
+                MarketPrior.model == key[1],
+                MarketPrior.year == key[2],
+                MarketPrior.mileage_bucket == key[3],
+                MarketPrior.region.in_({key[4], ALL_REGIONS})
+            ).all()
+            if not rows:
+                return None
+            row = next((r for r in rows if r.region == key[4]), rows[0])
+            return DatabaseHelper.market_prior_to_dict(row)
+
+    def rebuild_market_priors(self, batch_size: int = 5000) -> int:
+        """由 cars / car_analyses 全量重建 market_priors（用于已有数据的回填）
+
+        Returns:
+            计入先验的成交条数
+        """
+        with self.get_session() as session:
+            try:
+                session.query(MarketPrior).delete()
+                query = session.query(Car, CarAnalysis).join(
+                    CarAnalysis, CarAnalysis.car_id == Car.id
+                ).filter(CarAnalysis.data_source.in_(PRIOR_SOURCES)).order_by(Car.id)
+
+                total = 0
+                batch = []
+                for car, analysis in query.yield_per(batch_size):
+                    batch.append((DatabaseHelper.car_to_dict(car), DatabaseHelper.analysis_to_dict(analysis)))
+                    if len(batch) >= batch_size:
+                        total += self._refresh_market_priors(session, batch)
+                        batch = []
+                total += self._refresh_market_priors(session, batch)
+                session.commit()
+                print(f"✅ Rebuilt market priors from {total} historical sales")
+                return total
+
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"❌ Error rebuilding market priors: {e}")
+                raise
+
+    @staticmethod
+    def _refresh_market_priors(session: Session, sales: List[tuple]) -> int:
+        """把 (car, analysis) 成交并入涉及的细分市场并重算统计（调用方负责提交）"""
+        grouped, counted = group_sales(
+            (car_data.get('make'), car_data.get('model'), car_data.get('year'), car_data.get('mileage'),
+             car_data.get('location'), car_data.get('price_paid'), analysis_data.get('market_median_price'))
+            for car_data, analysis_data in sales
+            if (analysis_data or {}).get('data_source') in PRIOR_SOURCES
+        )
+        DatabaseManager._merge_market_priors(session, grouped)
+        return counted
+
+    @staticmethod
+    def _merge_market_priors(session: Session, grouped: Dict[tuple, List[list]]):
+        """把按细分市场分组的样本合并进 market_priors 行"""
+        # 按 (品牌, 型号) 一次取回涉及的全部细分市场行
+        existing: Dict[tuple, MarketPrior] = {}
+        for make, model in {key[:2] for key in grouped}:
+            years = {key[2] for key in grouped if key[:2] == (make, model)}
+            for prior in session.query(MarketPrior).filter(
+                MarketPrior.make == make,
+                MarketPrior.model == model,
+                MarketPrior.year.in_(years)
+            ):
+                existing[(prior.make, prior.model, prior.year, prior.mileage_bucket, prior.region)] = prior
+
+        for key, samples in grouped.items():
+            make, model, year, bucket, region = key
+            prior = existing.get(key)
+            if prior is None:
+                prior = MarketPrior(make=make, model=model, year=year, mileage_bucket=bucket,
+                                    region=region, sample_count=0, mmr_count=0, samples=[])
+                session.add(prior)
+            seen = prior.sample_count or 0
+            prior.samples = merge_samples(prior.samples or [], samples, seen, seed=f"{key}:{seen}")
+            prior.sample_count = seen + len(samples)
+            prior.mmr_count = (prior.mmr_count or 0) + sum(1 for s in samples if s[1])
+            for field, value in summarize_samples(prior.samples).items():
+                setattr(prior, field, value)
+        if grouped:
+            session.flush()
+
+    # =============== 批量重新评分 ===============
+
+    def iter_scoring_inputs(self, chunk_size: int = 50000) -> Iterator[List[Dict[str, Any]]]:
+        """按主键分块读取重新评分所需的字段（只含市场中位价与成交价都有效的分析）
+
+        price_range 由 SQLite json_extract 直接从 full_analysis_data 中取出，
+        避免逐行反序列化整段 JSON。
+
+        Yields:
+            每块为字典列表：analysis_id、price_paid、mileage、year、market_median_price、
+            comparable_count、data_source、range_min、range_max
+        """
+        range_min = func.json_extract(CarAnalysis.full_analysis_data, '$.price_range.min')
+        range_max = func.json_extract(CarAnalysis.full_analysis_data, '$.price_range.max')
+        last_id = 0
+        with self.get_session() as session:
+            while True:
+                rows = session.execute(
+                    select(CarAnalysis.id, Car.price_paid, Car.mileage, Car.year,
+                           CarAnalysis.market_median_price, CarAnalysis.comparable_count,
+                           CarAnalysis.data_source, range_min.label('range_min'),
+                           range_max.label('range_max'))
+                    .join(Car, Car.id == CarAnalysis.car_id)
+                    .where(CarAnalysis.id > last_id,
+                           CarAnalysis.market_median_price > 0,
+                           Car.price_paid > 0)
+                    .order_by(CarAnalysis.id)
+                    .limit(chunk_size)
+                ).all()
+                if not rows:
+                    return
+                last_id = rows[-1][0]
+                yield [{
+                    'analysis_id': row[0],
+                    'price_paid': row[1],
+                    'mileage': row[2],
+                    'year': row[3],
+                    'market_median_price': row[4],
+                    'comparable_count': row[5],
+                    'data_source': row[6],
+                    'range_min': row[7],
+                    'range_max': row[8],
+                } for row in rows]
+
+    def update_analysis_scores(self, updates: List[Dict[str, Any]]) -> int:
+        """按主键批量更新分析的评分字段（单个事务）
+
+        Args:
+            updates: 每项包含 id 及要更新的列（rule_based_score、rule_based_verdict、
+                price_delta、price_delta_percent、可选 deal_category）
+
+        Returns:
+            更新的行数
+        """
+        if not updates:
+            return 0
+        # executemany 要求同一批参数的列一致，按列集合分组
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for item in updates:
+            groups.setdefault(tuple(sorted(item)), []).append(item)
+        with self.get_session() as session:
+            try:
+                for params in groups.values():
+                    session.execute(update(CarAnalysis), params)
+                session.commit()
+                return len(updates)
+
+            except SQLAlchemyError as e:
+                session.rollback()
+                print(f"❌ Error updating analysis scores: {e}")
+                raise
+
     # =============== 分析会话管理 ===============
 
     def create_session(self, pdf_path: str = None) -> str:
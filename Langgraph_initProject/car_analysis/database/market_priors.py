@@ -0,0 +1,142 @@
+"""市场先验：历史成交按细分市场聚合的纯函数（分段键、分位数、统计汇总）
+
+细分市场键为 (品牌, 型号, 年份, 里程分桶, 地区)。每条历史成交同时计入本地区
+与跨地区（'*'）两个细分市场。DatabaseManager 在导入事务中调用这些函数增量刷新
+``market_priors`` 表。
+"""
+
+from __future__ import annotations
+
+import random
+from statistics import fmean
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+MILEAGE_BUCKET_SIZE = 20000       # 里程分桶宽度（英里）
+ALL_REGIONS = "*"
+PRIOR_SOURCES = ("car_prices_csv",)  # 只有真实历史成交（带 MMR）计入先验
+MAX_SEGMENT_SAMPLES = 2000        # 单个细分市场保留的样本上限（超过后蓄水池抽样）
+
+SegmentKey = Tuple[str, str, int, int, str]
+
+
+def mileage_bucket(mileage: Any) -> int:
+    try:
+        return max(0, int(float(mileage or 0)) // MILEAGE_BUCKET_SIZE)
+    except (TypeError, ValueError):
+        return 0
+
+
+def normalize_region(location: Any) -> str:
+    region = str(location or "").strip().upper()
+    return region or ALL_REGIONS
+
+
+def segment_key(make: Any, model: Any, year: Any, mileage: Any, region: Any = None) -> Optional[SegmentKey]:
+    """规范化的细分市场键；品牌/型号/年份缺失时返回 None"""
+    make = str(make or "").strip().lower()
+    model = str(model or "").strip().lower()
+    try:
+        year = int(year or 0)
+    except (TypeError, ValueError):
+        year = 0
+    if not make or not model or year <= 0:
+        return None
+    return (make, model, year, mileage_bucket(mileage), normalize_region(region))
+
+
+def segment_keys_for_sale(car: Dict[str, Any]) -> List[SegmentKey]:
+    """一条成交计入的细分市场：本地区 + 跨地区"""
+    return _sale_segment_keys(car.get("make"), car.get("model"), car.get("year"),
+                              car.get("mileage"), car.get("location"))
+
+
+def _sale_segment_keys(make: Any, model: Any, year: Any, mileage: Any, location: Any) -> List[SegmentKey]:
+    key = segment_key(make, model, year, mileage, location)
+    if key is None:
+        return []
+    keys = [key[:4] + (ALL_REGIONS,)]
+    if key[4] != ALL_REGIONS:
+        keys.insert(0, key)
+    return keys
+
+
+def _price_sample(price: Any, mmr: Any) -> Optional[List[Optional[float]]]:
+    """[成交价, MMR]；成交价无效时返回 None"""
+    try:
+        price = float(price or 0)
+    except (TypeError, ValueError):
+        return None
+    if price <= 0:
+        return None
+    try:
+        mmr = float(mmr) if mmr is not None and float(mmr) > 0 else None
+    except (TypeError, ValueError):
+        mmr = None
+    return [price, mmr]
+
+
+def group_sales(sales: Iterable[Sequence[Any]]) -> Tuple[Dict[SegmentKey, List[List[Optional[float]]]], int]:
+    """把成交 (品牌, 型号, 年份, 里程, 地区, 成交价, MMR) 按细分市场分组（调用方负责筛选先验来源）
+
+    Returns:
+        (细分市场键 -> 样本列表, 计入的成交条数)
+    """
+    grouped: Dict[SegmentKey, List[List[Optional[float]]]] = {}
+    counted = 0
+    for make, model, year, mileage, location, price, mmr in sales:
+        sample = _price_sample(price, mmr)
+        if sample is None:
+            continue
+        counted += 1
+        for key in _sale_segment_keys(make, model, year, mileage, location):
+            grouped.setdefault(key, []).append(sample)
+    return grouped, counted
+
+
+def merge_samples(existing: Sequence[Sequence[Optional[float]]],
+                  new: Sequence[Sequence[Optional[float]]],
+                  seen: int,
+                  seed: Any = None) -> List[List[Optional[float]]]:
+    """把新样本并入已有样本；总数（含已淘汰）为 seen，超过上限时做蓄水池抽样"""
+    samples = [list(s) for s in existing]
+    rng = random.Random(seed)
+    for sample in new:
+        seen += 1
+        if len(samples) < MAX_SEGMENT_SAMPLES:
+            samples.append(list(sample))
+        else:
+            slot = rng.randrange(seen)
+            if slot < MAX_SEGMENT_SAMPLES:
+                samples[slot] = list(sample)
+    return samples
+
+
+def quantile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """线性插值分位数（与 numpy 默认方法一致）"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize_samples(samples: Sequence[Sequence[Optional[float]]]) -> Dict[str, Any]:
+    """由样本计算价格分位数与 MMR 差价统计（不含 sample_count，计数由调用方维护）"""
+    prices = sorted(float(s[0]) for s in samples)
+    with_mmr = [(float(s[0]), float(s[1])) for s in samples if s[1]]
+    deltas = sorted(price - mmr for price, mmr in with_mmr)
+    delta_pcts = sorted((price - mmr) / mmr * 100 for price, mmr in with_mmr)
+    return {
+        "price_mean": fmean(prices) if prices else None,
+        "price_median": quantile(prices, 0.5),
+        "price_p10": quantile(prices, 0.10),
+        "price_p25": quantile(prices, 0.25),
+        "price_p75": quantile(prices, 0.75),
+        "price_p90": quantile(prices, 0.90),
+        "mmr_median": quantile(sorted(mmr for _, mmr in with_mmr), 0.5),
+        "mmr_delta_mean": fmean(deltas) if deltas else None,
+        "mmr_delta_median": quantile(deltas, 0.5),
+        "mmr_delta_pct_mean": fmean(delta_pcts) if delta_pcts else None,
+        "mmr_delta_pct_median": quantile(delta_pcts, 0.5),
+    }
@@ -1,6 +1,6 @@
 """Database models for car analysis system with RAG support"""
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -204,6 +204,73 @@ class UserQuery(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class IngestCheckpoint(Base):
+    """导入断点表 - 记录每个数据源已写库 / 已嵌入到的行号，用于断点续传"""
+    __tablename__ = 'ingest_checkpoints'
+    __table_args__ = (UniqueConstraint('source', 'dataset', name='uq_ingest_checkpoint_source'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(500), nullable=False)  # 源文件绝对路径
+    dataset = Column(String(100), nullable=False)  # 数据集标识
+
+    # 行号均为"下一行"语义（0 表示尚未处理）
+    committed_row = Column(Integer, default=0)  # 已写库
+    embedded_row = Column(Integer, default=0)  # 已完成向量同步
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class IngestedRow(Base):
+    """已导入行表 - 以自然键（VIN / 行哈希）去重，保证每行只落库一次"""
+    __tablename__ = 'ingested_rows'
+
+    source_key = Column(String(200), primary_key=True)  # 自然键
+    dataset = Column(String(100), index=True)
+    car_id = Column(Integer, ForeignKey('cars.id'), nullable=False)
+    analysis_id = Column(Integer, ForeignKey('car_analyses.id'))
+    knowledge_id = Column(Integer, ForeignKey('knowledge_base.id'))
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MarketPrior(Base):
+    """市场先验表 - 按 (品牌, 型号, 年份, 里程分桶, 地区) 聚合的历史成交统计
+
+    region 为 '*' 的行是跨地区汇总。samples 保存 [成交价, MMR] 样本，导入时增量合并后重算统计。
+    """
+    __tablename__ = 'market_priors'
+    __table_args__ = (
+        UniqueConstraint('make', 'model', 'year', 'mileage_bucket', 'region', name='uq_market_prior_segment'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    make = Column(String(50), nullable=False)  # 小写品牌
+    model = Column(String(100), nullable=False)  # 小写型号
+    year = Column(Integer, nullable=False)
+    mileage_bucket = Column(Integer, nullable=False)  # 里程分桶序号
+    region = Column(String(100), nullable=False, default='*')  # 大写地区，'*' 表示全部
+
+    # 成交价统计
+    sample_count = Column(Integer, default=0)
+    price_mean = Column(Float)
+    price_median = Column(Float)
+    price_p10 = Column(Float)
+    price_p25 = Column(Float)
+    price_p75 = Column(Float)
+    price_p90 = Column(Float)
+
+    # 相对 MMR 的差价统计
+    mmr_count = Column(Integer, default=0)
+    mmr_median = Column(Float)
+    mmr_delta_mean = Column(Float)
+    mmr_delta_median = Column(Float)
+    mmr_delta_pct_mean = Column(Float)
+    mmr_delta_pct_median = Column(Float)
+
+    samples = Column(JSON)  # [[price, mmr_or_null], ...]，超过上限时为蓄水池抽样
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # 数据库操作助手类
 class DatabaseHelper:
     """数据库操作助手"""
@@ -252,4 +319,29 @@ class DatabaseHelper:
             'comparable_count': analysis.comparable_count,
             'success': analysis.success,
             'created_at': analysis.created_at.isoformat() if analysis.created_at else None
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def market_prior_to_dict(prior: MarketPrior) -> Dict[str, Any]:
+        """将MarketPrior对象转换为字典（不含样本）"""
+        return {
+            'make': prior.make,
+            'model': prior.model,
+            'year': prior.year,
+            'mileage_bucket': prior.mileage_bucket,
+            'region': prior.region,
+            'sample_count': prior.sample_count or 0,
+            'price_mean': prior.price_mean,
+            'price_median': prior.price_median,
+            'price_p10': prior.price_p10,
+            'price_p25': prior.price_p25,
+            'price_p75': prior.price_p75,
+            'price_p90': prior.price_p90,
+            'mmr_count': prior.mmr_count or 0,
+            'mmr_median': prior.mmr_median,
+            'mmr_delta_mean': prior.mmr_delta_mean,
+            'mmr_delta_median': prior.mmr_delta_median,
+            'mmr_delta_pct_mean': prior.mmr_delta_pct_mean,
+            'mmr_delta_pct_median': prior.mmr_delta_pct_median,
+            'updated_at': prior.updated_at.isoformat() if prior.updated_at else None
+        }
@@ -0,0 +1,281 @@
+"""Write-behind persistence queue backed by an append-only journal
+
+设计要点：
+- `put()` 先把记录追加写入本地 JSONL 日志（fsync 后返回），调用方无需等待
+  SQLite / Chroma / Neo4j 写入即可继续
+- 后台刷新线程按 `batch_size` / `flush_interval` 聚合记录，一次性交给 sink 批量落库
+- sink 成功后追加 `ack` 行；进程崩溃后重新创建队列会自动重放未确认的记录
+- `flush()` 等待当前积压全部落库（供测试使用），`close()` 排空并停止线程（供退出使用）
+
+日志格式（每行一个 JSON）::
+
+    {"op": "put", "seq": 12, "record": {...}}
+    {"op": "ack", "seqs": [11, 12]}
+
+语义为 at-least-once：若 sink 已提交但 ack 尚未写入时崩溃，重放会再次交付该记录，
+因此 sink 需要幂等（例如按记录自带的 source_key 跳过已写入的行）。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+BatchSink = Callable[[List[Dict[str, Any]]], None]
+
+# 与工作目录无关：固定放在本包的 database/ 目录下
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "persist_journal.jsonl")
+
+
+class WriteBehindQueue:
+    """带持久化日志的异步写入队列"""
+
+    def __init__(self,
+                 sink: BatchSink,
+                 journal_path: str = DEFAULT_JOURNAL_PATH,
+                 batch_size: int = 32,
+                 flush_interval: float = 0.5,
+                 max_retry_delay: float = 30.0,
+                 fsync: bool = True,
+                 autostart: bool = True):
+        """初始化写入队列
+
+        Args:
+            sink: 批量落库回调，接收记录列表；抛出异常表示整批失败并稍后重试
+            journal_path: 日志文件路径
+            batch_size: 单批最大记录数
+            flush_interval: 刷新线程空闲轮询间隔（秒）
+            max_retry_delay: sink 连续失败时的最大退避时间（秒）
+            fsync: 每次 put 后是否 fsync 日志
+            autostart: 是否立即启动后台刷新线程
+        """
+        self.sink = sink
+        self.journal_path = journal_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retry_delay = max_retry_delay
+        self.fsync = fsync
+
+        journal_dir = os.path.dirname(journal_path)
+        if journal_dir:
+            os.makedirs(journal_dir, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[int, Dict[str, Any]]] = []
+        self._in_flight = 0
+        self._next_seq = 1
+        self._closed = False
+        self._failures = 0
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {"enqueued": 0, "flushed": 0, "batches": 0, "failures": 0, "replayed": 0}
+
+        self._replay()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+        if autostart:
+            self.start()
+
+    # =============== 日志读写 ===============
+
+    def _replay(self):
+        """读取日志，恢复未确认的记录"""
+        if not os.path.exists(self.journal_path):
+            return
+
+        records: Dict[int, Dict[str, Any]] = {}
+        max_seq = 0
+        with open(self.journal_path, "r", encoding="utf-8") as fh:
+            for line_no, line in enumerate(fh, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时可能留下半行，忽略即可
+                    logger.warning("Skipping corrupt journal line %s in %s", line_no, self.journal_path)
+                    continue
+
+                if entry.get("op") == "put":
+                    seq = int(entry["seq"])
+                    records[seq] = entry.get("record") or {}
+                    max_seq = max(max_seq, seq)
+                elif entry.get("op") == "ack":
+                    for seq in entry.get("seqs", []):
+                        records.pop(int(seq), None)
+
+        self._next_seq = max_seq + 1
+        self._pending = sorted(records.items())
+        self.stats["replayed"] = len(self._pending)
+
+        # 压缩日志：只保留未确认的记录
+        self._rewrite_journal(self._pending)
+
+        if self._pending:
+            print(f"♻️ Replaying {len(self._pending)} unflushed records from {self.journal_path}")
+
+    def _rewrite_journal(self, pending: List[Tuple[int, Dict[str, Any]]]):
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for seq, record in pending:
+                fh.write(json.dumps({"op": "put", "seq": seq, "record": record},
+                                    ensure_ascii=False, default=str) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _append(self, entry: Dict[str, Any]):
+        self._journal.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    # =============== 公共接口 ===============
+
+    def put(self, record: Dict[str, Any]) -> int:
+        """写入日志并入队，立即返回序号
+
+        Args:
+            record: 可 JSON 序列化的记录
+
+        Returns:
+            seq: 日志序号
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindQueue is closed")
+
+            seq = self._next_seq
+            self._next_seq += 1
+            # 以日志中的形式入队，保证重放与首次交付的数据一致
+            record = json.loads(json.dumps(record, ensure_ascii=False, default=str))
+            self._append({"op": "put", "seq": seq, "record": record})
+            self._pending.append((seq, record))
+            self.stats["enqueued"] += 1
+            self._cond.notify_all()
+            return seq
+
+    def pending_count(self) -> int:
+        """尚未落库的记录数（含正在写入的批次）"""
+        with self._cond:
+            return len(self._pending) + self._in_flight
+
+    def start(self):
+        """启动后台刷新线程"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+            self._thread.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待当前积压全部落库
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            是否在超时前排空
+        """
+        if self._thread is None or not self._thread.is_alive():
+            # 未启动线程时在调用线程内同步排空
+            while self._flush_once():
+                pass
+            return self.pending_count() == 0
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else self.flush_interval)
+            return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """排空积压并停止后台线程
+
+        Returns:
+            是否全部落库；未落库的记录保留在日志中，下次启动时重放
+        """
+        drained = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # 刷新线程仍在写入，日志句柄交由它继续使用
+                return False
+        self._journal.close()
+        return drained
+
+    drain = close
+
+    # =============== 后台刷新 ===============
+
+    def _take_batch(self) -> List[Tuple[int, Dict[str, Any]]]:
+        batch = self._pending[:self.batch_size]
+        del self._pending[:len(batch)]
+        self._in_flight = len(batch)
+        return batch
+
+    def _deliver(self, batch: List[Tuple[int, Dict[str, Any]]]) -> bool:
+        try:
+            self.sink([record for _, record in batch])
+        except Exception as e:
+            logger.error(f"Write-behind sink failed for {len(batch)} records: {e}")
+            with self._cond:
+                # 放回队首，保持顺序
+                self._pending[:0] = batch
+                self._in_flight = 0
+                self._failures += 1
+                self.stats["failures"] += 1
+                self._cond.notify_all()
+            return False
+
+        with self._cond:
+            self._append({"op": "ack", "seqs": [seq for seq, _ in batch]})
+            self._in_flight = 0
+            self._failures = 0
+            self.stats["flushed"] += len(batch)
+            self.stats["batches"] += 1
+            if not self._pending:
+                # 全部确认后截断日志，避免无限增长
+                self._journal.close()
+                self._rewrite_journal([])
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._cond.notify_all()
+        return True
+
+    def _flush_once(self) -> bool:
+        with self._cond:
+            if not self._pending:
+                return False
+            batch = self._take_batch()
+        return self._deliver(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if not self._pending and self._closed:
+                    return
+                # 给同一时刻到达的记录一点聚合时间
+                if len(self._pending) < self.batch_size and not self._closed:
+                    self._cond.wait(min(self.flush_interval, 0.05))
+                batch = self._take_batch()
+
+            if not self._deliver(batch):
+                if self._closed:
+                    return
+                delay = min(self.max_retry_delay, self.flush_interval * (2 ** min(self._failures, 6)))
+                time.sleep(delay)
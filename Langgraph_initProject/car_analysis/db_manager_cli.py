@@ -224,6 +224,7 @@ class DatabaseManagerCLI:
 
             success = self.rag_system.vector_manager.add_knowledge(knowledge_id, knowledge_data)
             if success:
+                self.rag_system.context_builder.invalidate()
                 print(f"✅ Knowledge added successfully (ID: {knowledge_id})")
             else:
                 print(f"⚠️ Knowledge added to DB but failed to sync to vector store")
@@ -317,7 +318,8 @@ class DatabaseManagerCLI:
                 answer = result.get('answer', 'No answer generated')
                 confidence = result.get('confidence', 0)
 
-                print(f"\n🤖 Answer (confidence: {confidence:.2f}):")
+                cached = " (cached)" if result.get('cached') else ""
+                print(f"\n🤖 Answer (confidence: {confidence:.2f}){cached}:")
                 print(f"{answer}")
 
                 # 显示检索信息（可选）
@@ -407,6 +409,7 @@ class DatabaseManagerCLI:
             for entry in knowledge_entries:
                 if self.rag_system.vector_manager.add_knowledge(entry['id'], entry):
                     knowledge_success_count += 1
+            self.rag_system.context_builder.invalidate()
 
             print(f"\n✅ Sync completed:")
             print(f"   Cars: {car_success_count}/{len(cars)}")
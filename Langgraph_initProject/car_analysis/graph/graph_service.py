@@ -119,6 +119,47 @@ class GraphService:
         with self._driver.session() as s:
             s.run(q, car_id=int(car_id), analysis_id=int(analysis_id))
 
+    def upsert_car_analyses(self, rows: List[Dict[str, Any]]) -> None:
+        """Batch variant of upsert_car + upsert_analysis + link_car_analysis.
+
+        Each row carries ``car_id``, ``analysis_id``, ``car`` and ``analysis``;
+        everything is written with a single UNWIND statement.
+        """
+        if not self.available or not rows:
+            return
+        q = (
+            "UNWIND $rows AS row "
+            "MERGE (c:Car {id: row.car_id}) "
+            "SET c.make=row.make, c.model=row.model, c.year=row.year, c.mileage=row.mileage, "
+            "    c.price_paid=row.price_paid "
+            "MERGE (a:Analysis {id: row.analysis_id}) "
+            "SET a += row.analysis "
+            "MERGE (c)-[:HAS_ANALYSIS]->(a)"
+        )
+        keys = [
+            "rule_based_score", "rule_based_verdict", "llm_score", "llm_verdict",
+            "market_median_price", "price_delta", "price_delta_percent", "deal_category",
+            "research_quality",
+        ]
+        params = []
+        for row in rows:
+            car = row.get("car") or {}
+            analysis = row.get("analysis") or {}
+            props = {k: analysis.get(k) for k in keys if analysis.get(k) is not None}
+            props["success"] = bool(analysis.get("success", False))
+            params.append({
+                "car_id": int(row["car_id"]),
+                "analysis_id": int(row["analysis_id"]),
+                "make": car.get("make"),
+                "model": car.get("model"),
+                "year": int(car.get("year") or 0),
+                "mileage": int(car.get("mileage") or 0),
+                "price_paid": float(car.get("price_paid") or 0.0),
+                "analysis": props,
+            })
+        with self._driver.session() as s:
+            s.run(q, rows=params)
+
     # ---------- Retrieval ----------
     def context_for_car(self, car: Dict[str, Any], limit: int = 8) -> str:
         """Return a small, human-readable context from graph for a given car.
@@ -19,7 +19,7 @@ try:
 except ImportError:
     print("⚠️ python-dotenv not installed. Make sure OPENAI_API_KEY and TAVILY_API_KEY are set.")
 
-from core.orchestrator import analyze_car_deals
+from core.orchestrator import analyze_car_deals, analyze_car_deals_streaming
 
 
 async def main():
@@ -31,9 +31,12 @@ async def main():
     print()
 
     # Check for PDF argument
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    stream = "--stream" in sys.argv
+    if not args:
         print("📖 Usage:")
-        print("  python main.py <car_deals.pdf>")
+        print("  python main.py <car_deals.pdf> [--stream]")
+        print("    --stream  analyze cars as they are extracted, writing JSONL incrementally")
         print()
         print("📋 Example:")
         print("  python main.py sample_car_deals.pdf")
@@ -44,7 +47,7 @@ async def main():
         print("  • Install: pip install langgraph tavily-python openai")
         sys.exit(1)
 
-    pdf_path = sys.argv[1]
+    pdf_path = args[0]
 
     # Validate PDF file exists
     if not os.path.exists(pdf_path):
@@ -67,7 +70,10 @@ async def main():
 
     try:
         # Run the analysis
-        result = await analyze_car_deals(pdf_path)
+        if stream:
+            result = await analyze_car_deals_streaming(pdf_path)
+        else:
+            result = await analyze_car_deals(pdf_path)
 
         if "error" in result:
             print(f"❌ Analysis failed: {result['error']}")
@@ -81,6 +87,8 @@ async def main():
         print(f"   📊 Cars analyzed: {summary.get('total_cars_analyzed', 0)}")
         print(f"   📈 Average score: {summary.get('average_deal_score', 0)}/100")
         print(f"   🔍 Real market data via Tavily search")
+        if result.get("reports_path"):
+            print(f"   📁 Car reports (JSONL): {result['reports_path']}")
 
         # Scoring comparison
         scoring = summary.get("scoring_comparison", {})
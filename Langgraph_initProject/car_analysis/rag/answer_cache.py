@@ -0,0 +1,120 @@
+"""问答语义缓存：相似问题直接复用已生成的回答
+
+``RAGSystem.answer_question`` 每次都要跨集合检索并调用 LLM。``SemanticAnswerCache``
+保存 (问题嵌入, 知识版本, 回答)；新问题的嵌入与缓存条目的余弦相似度超过阈值、
+且知识版本未变化时直接返回缓存回答。完全相同的问题（规范化后）不需要重新嵌入。
+缓存采用 LRU + TTL 淘汰；知识版本变化后旧条目在查询时被清除。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SIZE = 256
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("RAG_ANSWER_CACHE_TTL", "3600"))
+
+
+def normalize_question(question: str) -> str:
+    """规范化问题文本（大小写、空白、结尾标点），用于精确匹配"""
+    text = re.sub(r"\s+", " ", (question or "").strip().lower())
+    return text.rstrip("?？!！。. ")
+
+
+@dataclass
+class _Entry:
+    question: str
+    embedding: np.ndarray      # 已归一化
+    version: Hashable
+    created_at: float
+    result: Dict[str, Any]
+
+
+class SemanticAnswerCache:
+    """按问题嵌入相似度查找的回答缓存（LRU + TTL + 知识版本失效）"""
+
+    def __init__(self,
+                 threshold: float = ANSWER_CACHE_THRESHOLD,
+                 max_entries: int = ANSWER_CACHE_SIZE,
+                 ttl: float = ANSWER_CACHE_TTL_SECONDS):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidated": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_exact(self, question: str, version: Hashable) -> Optional[Dict[str, Any]]:
+        """规范化文本完全相同的问题：无需嵌入即可命中"""
+        key = normalize_question(question)
+        with self._lock:
+            self._expire(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["exact_hits"] += 1
+            return entry.result
+
+    def lookup(self, embedding: Sequence[float], version: Hashable) -> Optional[Dict[str, Any]]:
+        """返回相似度最高且不低于阈值的缓存回答"""
+        query = _unit(embedding)
+        with self._lock:
+            self._expire(version)
+            if query is None or not self._entries:
+                self.stats["misses"] += 1
+                return None
+            keys: List[str] = list(self._entries)
+            matrix = np.stack([self._entries[key].embedding for key in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(keys[best])
+            self.stats["semantic_hits"] += 1
+            return self._entries[keys[best]].result
+
+    def store(self, question: str, embedding: Sequence[float], version: Hashable,
+              result: Dict[str, Any]) -> None:
+        vector = _unit(embedding)
+        if vector is None:  # 嵌入失败（零向量）时不缓存
+            return
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = _Entry(question, vector, version, time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _expire(self, version: Hashable) -> None:
+        """移除过期或知识版本已变化的条目（调用方持有锁）"""
+        now = time.monotonic()
+        stale = [key for key, entry in self._entries.items()
+                 if entry.version != version or now - entry.created_at > self.ttl]
+        for key in stale:
+            del self._entries[key]
+        self.stats["invalidated"] += len(stale)
+
+
+def _unit(embedding: Sequence[float]) -> Optional[np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+    if norm == 0.0:
+        return None
+    return vector / norm
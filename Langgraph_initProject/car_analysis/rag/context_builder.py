@@ -0,0 +1,186 @@
+"""RAG 提示上下文构建：去重、排序、按 token 预算打包，并按车辆缓存
+
+检索阶段会返回大量重复或近似重复的条目（同一知识条目被多个查询命中、同一
+分析同时出现在不同集合）。``ContextBuilder`` 先按 id 和近似文本去重，再按
+``similarity × reliability_score`` 排序，最后在 token 预算内贪心装入，
+保证提示长度有上界。打包结果可按车辆键缓存（LRU + TTL）。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+try:
+    import tiktoken
+except Exception:  # pragma: no cover - optional
+    tiktoken = None
+
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "1500"))
+NEAR_DUPLICATE_THRESHOLD = 0.85   # 字符 shingle 的 Jaccard 相似度阈值
+CONTEXT_CACHE_SIZE = 256
+CONTEXT_CACHE_TTL_SECONDS = 600.0
+
+_SHINGLE_SIZE = 5
+_CJK = re.compile(r"[　-鿿＀-￯]")
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """本地 tokenizer（tiktoken）；不可用时返回 None，改用估算"""
+    global _encoder
+    if _encoder is not None or tiktoken is None:
+        return _encoder or None
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                _encoder = tiktoken.encoding_for_model("gpt-4o")
+            except Exception:
+                try:
+                    _encoder = tiktoken.get_encoding("cl100k_base")
+                except Exception:  # 无网络时编码表可能无法下载
+                    _encoder = False
+    return _encoder or None
+
+
+def count_tokens(text: str) -> int:
+    """计算文本 token 数；无 tiktoken 时按 CJK 每字 1 token、其余每 4 字符 1 token 估算"""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    cjk = len(_CJK.findall(text))
+    return cjk + max(1, (len(text) - cjk + 3) // 4)
+
+
+def _shingles(text: str) -> set:
+    normalized = re.sub(r"\s+", " ", (text or "").lower()).strip()
+    if len(normalized) <= _SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + _SHINGLE_SIZE] for i in range(len(normalized) - _SHINGLE_SIZE + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def item_score(item: Dict[str, Any]) -> float:
+    """排序分数：相似度 × 可靠性（缺省 1.0）"""
+    metadata = item.get("metadata") or {}
+    try:
+        reliability = float(metadata.get("reliability_score", 1.0))
+    except (TypeError, ValueError):
+        reliability = 1.0
+    return float(item.get("similarity") or 0.0) * reliability
+
+
+def _item_key(item: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    item_id = item.get("id")
+    if item_id is None:
+        return None
+    metadata = item.get("metadata") or {}
+    return (str(metadata.get("type", "")), str(item_id))
+
+
+class ContextBuilder:
+    """去重 + 排序 + token 预算打包，并缓存每辆车的打包结果"""
+
+    def __init__(self,
+                 token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET,
+                 near_duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 cache_size: int = CONTEXT_CACHE_SIZE,
+                 cache_ttl: float = CONTEXT_CACHE_TTL_SECONDS):
+        self.token_budget = token_budget
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: "OrderedDict[Hashable, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"items_in": 0, "duplicates": 0, "dropped_for_budget": 0,
+                      "cache_hits": 0, "cache_misses": 0}
+
+    def deduplicate(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按 id 与近似文本去重，保留排序分数最高的一条；结果按分数降序"""
+        ranked = sorted(items, key=item_score, reverse=True)
+        kept: List[Dict[str, Any]] = []
+        kept_shingles: List[set] = []
+        seen_keys = set()
+        for item in ranked:
+            key = _item_key(item)
+            if key is not None and key in seen_keys:
+                self.stats["duplicates"] += 1
+                continue
+            shingles = _shingles(item.get("document", ""))
+            if any(_jaccard(shingles, other) >= self.near_duplicate_threshold for other in kept_shingles):
+                self.stats["duplicates"] += 1
+                continue
+            if key is not None:
+                seen_keys.add(key)
+            kept.append(item)
+            kept_shingles.append(shingles)
+        return kept
+
+    def pack(self,
+             items: List[Dict[str, Any]],
+             format_item: Callable[[int, Dict[str, Any]], str],
+             token_budget: Optional[int] = None,
+             separator: str = "\n") -> str:
+        """贪心装入：按分数依次尝试，放不下的跳过（较短的后续条目仍可装入）"""
+        budget = self.token_budget if token_budget is None else token_budget
+        self.stats["items_in"] += len(items)
+        parts: List[str] = []
+        used = 0
+        separator_tokens = count_tokens(separator)
+        for item in self.deduplicate(items):
+            text = format_item(len(parts) + 1, item)
+            cost = count_tokens(text) + (separator_tokens if parts else 0)
+            if used + cost > budget:
+                self.stats["dropped_for_budget"] += 1
+                continue
+            parts.append(text)
+            used += cost
+        return separator.join(parts)
+
+    # =============== 按车辆缓存 ===============
+
+    def get_cached(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.cache_ttl:
+                if entry is not None:
+                    del self._cache[key]
+                self.stats["cache_misses"] += 1
+                return None
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return entry[1]
+
+    def put_cached(self, key: Hashable, context: str) -> None:
+        with self._lock:
+            self._cache[key] = (time.monotonic(), context)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """向量库有新数据写入后清空缓存"""
+        with self._lock:
+            self._cache.clear()
+
+
+def car_context_key(car_data: Dict[str, Any]) -> Tuple[Any, str, str]:
+    """车辆上下文缓存键：检索查询只依赖年份、品牌、车型"""
+    return (
+        car_data.get("year"),
+        str(car_data.get("make") or "").strip().lower(),
+        str(car_data.get("model") or "").strip().lower(),
+    )
@@ -1,5 +1,6 @@
 """RAG (Retrieval-Augmented Generation) 系统核心实现"""
 
+import asyncio
 import os
 import sys
 from typing import List, Dict, Any, Optional, Tuple
@@ -15,11 +16,18 @@ from langchain_core.output_parsers import StrOutputParser
 
 from .vector_store import VectorStoreManager
 from .embeddings import EmbeddingManager
+from .answer_cache import SemanticAnswerCache
+from .context_builder import ContextBuilder, DEFAULT_CONTEXT_TOKEN_BUDGET, car_context_key, count_tokens
 from database.manager import DatabaseManager
 from car_analysis.graph.graph_service import GraphService
 
 logger = logging.getLogger(__name__)
 
+GENERATION_ERROR_MESSAGE = "抱歉，生成回复时出现错误。"
+QA_COLLECTIONS = ["knowledge", "analyses", "cars"]
+# 车辆分析上下文检索的集合；其版本戳是上下文缓存键的一部分
+CONTEXT_COLLECTIONS = ["knowledge", "analyses"]
+
 
 class RAGSystem:
     """RAG系统主类"""
@@ -29,7 +37,8 @@ class RAGSystem:
                  vector_manager: Optional[VectorStoreManager] = None,
                  embedding_manager: Optional[EmbeddingManager] = None,
                  llm_model: str = "gpt-4o",
-                 temperature: float = 0.3):
+                 temperature: float = 0.3,
+                 context_token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET):
         """初始化RAG系统
 
         Args:
@@ -38,6 +47,7 @@ class RAGSystem:
             embedding_manager: 嵌入管理器
             llm_model: LLM模型名称
             temperature: LLM温度参数
+            context_token_budget: 检索上下文的 token 预算
         """
         # 初始化组件
         self.db_manager = db_manager or DatabaseManager()
@@ -57,8 +67,17 @@ class RAGSystem:
             logger.error(f"Failed to initialize LLM: {e}")
             raise
 
-        # 创建提示模板
+        # 创建提示模板，并为每个模板预先构建 template | llm | parser 链
         self._create_prompt_templates()
+        self._chains: Dict[int, Any] = {
+            id(template): template | self.llm | StrOutputParser()
+            for template in (self.car_analysis_template, self.qa_template, self.similar_cases_template)
+        }
+
+        # 检索上下文：去重、排序、按 token 预算打包，并按车辆缓存
+        self.context_builder = ContextBuilder(token_budget=context_token_budget)
+        # 问答语义缓存：相似问题且知识未变化时直接复用回答
+        self.answer_cache = SemanticAnswerCache()
 
         # 初始化图服务（可选）
         try:
@@ -139,25 +158,36 @@ class RAGSystem:
             # 1. 检索相关信息（GraphRAG 子图 + 向量检索融合）
             retrieved_info = self._retrieve_for_car_analysis(car_data)
 
-            # 2. 构建查询
-            car_description = self.embedding_manager.create_car_description(car_data)
-            query = f"""
-请分析以下车辆：
-{car_description}
+            # 2. 构建查询并生成增强回复
+            enhanced_response = self._generate_response(
+                template=self.car_analysis_template,
+                query=self._car_analysis_query(car_data, analysis_context),
+                retrieved_context=retrieved_info
+            )
 
-已知信息：
-- 购买价格: ${car_data.get('price_paid', 0):,.0f}
-- 里程数: {car_data.get('mileage', 0):,} miles
+            return {
+                "enhanced_analysis": enhanced_response,
+                "retrieved_info": retrieved_info,
+                "rag_confidence": self._calculate_confidence(retrieved_info)
+            }
 
-{analysis_context if analysis_context else ''}
+        except Exception as e:
+            logger.error(f"Error in enhance_car_analysis: {e}")
+            return {
+                "enhanced_analysis": "无法生成增强分析",
+                "error": str(e)
+            }
 
-请提供详细的价格分析和购买建议。
-"""
+    async def aenhance_car_analysis(self,
+                                    car_data: Dict[str, Any],
+                                    analysis_context: str = None) -> Dict[str, Any]:
+        """enhance_car_analysis 的异步版本：检索放到线程中，生成用 ainvoke"""
+        try:
+            retrieved_info = await asyncio.to_thread(self._retrieve_for_car_analysis, car_data)
 
-            # 3. 生成增强回复
-            enhanced_response = self._generate_response(
+            enhanced_response = await self._agenerate_response(
                 template=self.car_analysis_template,
-                query=query,
+                query=self._car_analysis_query(car_data, analysis_context),
                 retrieved_context=retrieved_info
             )
 
@@ -168,7 +198,7 @@ class RAGSystem:
             }
 
         except Exception as e:
-            logger.error(f"Error in enhance_car_analysis: {e}")
+            logger.error(f"Error in aenhance_car_analysis: {e}")
             return {
                 "enhanced_analysis": "无法生成增强分析",
                 "error": str(e)
@@ -182,11 +212,22 @@ class RAGSystem:
             context: 额外上下文
 
         Returns:
-            回答结果
+            回答结果（命中语义缓存时带 cached=True）
         """
         try:
-            # 1. 检索相关信息
-            retrieved_info = self._retrieve_for_question(question)
+            # 0. 语义缓存：相同/相似问题且知识版本未变化时直接返回
+            version = self.vector_manager.collection_version(QA_COLLECTIONS)
+            cached = self.answer_cache.get_exact(question, version)
+            embedding = None
+            if cached is None:
+                embedding = self.embedding_manager.embed_text(question)
+                cached = self.answer_cache.lookup(embedding, version)
+            if cached is not None:
+                self._save_user_query(question, cached["retrieved_info"], cached["answer"], context)
+                return {**cached, "cached": True}
+
+            # 1. 检索相关信息（复用问题嵌入）
+            retrieved_info = self._retrieve_for_question(question, query_embedding=embedding)
 
             # 2. 生成回答
             answer = self._generate_response(
@@ -198,11 +239,14 @@ class RAGSystem:
             # 3. 保存用户查询（用于改进系统）
             self._save_user_query(question, retrieved_info, answer, context)
 
-            return {
+            result = {
                 "answer": answer,
                 "retrieved_info": retrieved_info,
                 "confidence": self._calculate_confidence(retrieved_info)
             }
+            if answer != GENERATION_ERROR_MESSAGE:
+                self.answer_cache.store(question, embedding, version, result)
+            return result
 
         except Exception as e:
             logger.error(f"Error in answer_question: {e}")
@@ -211,6 +255,45 @@ class RAGSystem:
                 "error": str(e)
             }
 
+    async def aanswer_question(self, question: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """answer_question 的异步版本"""
+        try:
+            version = await asyncio.to_thread(self.vector_manager.collection_version, QA_COLLECTIONS)
+            cached = self.answer_cache.get_exact(question, version)
+            embedding = None
+            if cached is None:
+                embedding = await asyncio.to_thread(self.embedding_manager.embed_text, question)
+                cached = self.answer_cache.lookup(embedding, version)
+            if cached is not None:
+                self._save_user_query(question, cached["retrieved_info"], cached["answer"], context)
+                return {**cached, "cached": True}
+
+            retrieved_info = await asyncio.to_thread(self._retrieve_for_question, question, embedding)
+
+            answer = await self._agenerate_response(
+                template=self.qa_template,
+                query=question,
+                retrieved_context=retrieved_info
+            )
+
+            self._save_user_query(question, retrieved_info, answer, context)
+
+            result = {
+                "answer": answer,
+                "retrieved_info": retrieved_info,
+                "confidence": self._calculate_confidence(retrieved_info)
+            }
+            if answer != GENERATION_ERROR_MESSAGE:
+                self.answer_cache.store(question, embedding, version, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"Error in aanswer_question: {e}")
+            return {
+                "answer": "抱歉，无法回答这个问题。",
+                "error": str(e)
+            }
+
     def find_similar_cases(self,
                           car_data: Dict[str, Any],
                           analysis_type: str = "all") -> Dict[str, Any]:
@@ -224,42 +307,40 @@ class RAGSystem:
             相似案例分析
         """
         try:
-            # 1. 查找相似汽车
-            similar_cars = self.vector_manager.search_similar_cars(
-                query_car=car_data,
-                limit=10,
-                similarity_threshold=0.7
+            # 1-2. 查找相似汽车及其分析结果
+            similar_analyses = self._retrieve_similar_analyses(car_data)
+
+            # 3-5. 构建查询、格式化相似案例并生成分析
+            analysis = self._generate_response(
+                template=self.similar_cases_template,
+                query=self._similar_cases_query(car_data),
+                retrieved_context=self._format_similar_cases(similar_analyses)
             )
 
-            # 2. 获取相似汽车的分析结果
-            similar_analyses = []
-            for car in similar_cars:
-                car_id = car['metadata'].get('car_id')
-                if car_id:
-                    car_with_analysis = self.db_manager.get_car_with_analysis(car_id)
-                    if car_with_analysis and car_with_analysis.get('analysis'):
-                        similar_analyses.append({
-                            'car': car_with_analysis,
-                            'similarity': car['similarity']
-                        })
-
-            # 3. 构建查询
-            car_description = self.embedding_manager.create_car_description(car_data)
-            query = f"""
-用户询问关于这辆车的信息：
-{car_description}
+            return {
+                "analysis": analysis,
+                "similar_cases": similar_analyses,
+                "cases_count": len(similar_analyses)
+            }
 
-请基于相似案例分析，提供市场洞察和建议。
-"""
+        except Exception as e:
+            logger.error(f"Error in find_similar_cases: {e}")
+            return {
+                "analysis": "无法找到相似案例",
+                "error": str(e)
+            }
 
-            # 4. 格式化相似案例信息
-            cases_context = self._format_similar_cases(similar_analyses)
+    async def afind_similar_cases(self,
+                                  car_data: Dict[str, Any],
+                                  analysis_type: str = "all") -> Dict[str, Any]:
+        """find_similar_cases 的异步版本"""
+        try:
+            similar_analyses = await asyncio.to_thread(self._retrieve_similar_analyses, car_data)
 
-            # 5. 生成分析
-            analysis = self._generate_response(
+            analysis = await self._agenerate_response(
                 template=self.similar_cases_template,
-                query=query,
-                retrieved_context=cases_context
+                query=self._similar_cases_query(car_data),
+                retrieved_context=self._format_similar_cases(similar_analyses)
             )
 
             return {
@@ -269,15 +350,114 @@ class RAGSystem:
             }
 
         except Exception as e:
-            logger.error(f"Error in find_similar_cases: {e}")
+            logger.error(f"Error in afind_similar_cases: {e}")
             return {
                 "analysis": "无法找到相似案例",
                 "error": str(e)
             }
 
+    # =============== 检索 / 生成拆分（供图中并发执行） ===============
+
+    def retrieve_car_context(self, car_data: Dict[str, Any]) -> Dict[str, Any]:
+        """只做检索、不调用 LLM：返回车辆分析上下文与相似案例
+
+        图中在早期并发阶段调用，生成部分由 agenerate_car_insights 完成。
+        """
+        retrieved_info = self._retrieve_for_car_analysis(car_data)
+        similar_analyses = self._retrieve_similar_analyses(car_data)
+        return {
+            "retrieved_info": retrieved_info,
+            "rag_confidence": self._calculate_confidence(retrieved_info),
+            "similar_cases": similar_analyses,
+            "cases_count": len(similar_analyses),
+        }
+
+    async def agenerate_car_insights(self,
+                                     car_data: Dict[str, Any],
+                                     retrieved: Dict[str, Any],
+                                     analysis_context: str = None) -> Dict[str, Any]:
+        """基于 retrieve_car_context 的结果，并发生成增强分析与相似案例分析
+
+        两次 LLM 调用互不依赖，通过 ainvoke 同时发出。
+        """
+        similar_analyses = retrieved.get("similar_cases") or []
+        enhanced, cases_analysis = await asyncio.gather(
+            self._agenerate_response(
+                template=self.car_analysis_template,
+                query=self._car_analysis_query(car_data, analysis_context),
+                retrieved_context=retrieved.get("retrieved_info") or "无可用参考信息"
+            ),
+            self._agenerate_response(
+                template=self.similar_cases_template,
+                query=self._similar_cases_query(car_data),
+                retrieved_context=self._format_similar_cases(similar_analyses)
+            ),
+        )
+        return {
+            "enhanced_analysis": enhanced,
+            "cases_analysis": cases_analysis,
+            "retrieved_info": retrieved.get("retrieved_info"),
+            "rag_confidence": retrieved.get("rag_confidence"),
+            "similar_cases": similar_analyses,
+        }
+
+    def _car_analysis_query(self, car_data: Dict[str, Any], analysis_context: str = None) -> str:
+        car_description = self.embedding_manager.create_car_description(car_data)
+        return f"""
+请分析以下车辆：
+{car_description}
+
+已知信息：
+- 购买价格: ${car_data.get('price_paid', 0):,.0f}
+- 里程数: {car_data.get('mileage', 0):,} miles
+
+{analysis_context if analysis_context else ''}
+
+请提供详细的价格分析和购买建议。
+"""
+
+    def _similar_cases_query(self, car_data: Dict[str, Any]) -> str:
+        car_description = self.embedding_manager.create_car_description(car_data)
+        return f"""
+用户询问关于这辆车的信息：
+{car_description}
+
+请基于相似案例分析，提供市场洞察和建议。
+"""
+
+    def _retrieve_similar_analyses(self, car_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """查找相似汽车，并取回其中已有分析结果的车辆"""
+        similar_cars = self.vector_manager.search_similar_cars(
+            query_car=car_data,
+            limit=10,
+            similarity_threshold=0.7
+        )
+
+        similar_analyses = []
+        for car in similar_cars:
+            car_id = car['metadata'].get('car_id')
+            if car_id:
+                car_with_analysis = self.db_manager.get_car_with_analysis(car_id)
+                if car_with_analysis and car_with_analysis.get('analysis'):
+                    similar_analyses.append({
+                        'car': car_with_analysis,
+                        'similarity': car['similarity']
+                    })
+        return similar_analyses
+
     def _retrieve_for_car_analysis(self, car_data: Dict[str, Any]) -> str:
-        """为汽车分析检索相关信息"""
+        """为汽车分析检索相关信息（按车辆缓存打包后的上下文）
+
+        缓存键带集合版本戳：写入侧（write-behind、ingest、seeder）直接调用
+        vector_manager 时不会经过 invalidate()，版本变化后旧上下文自然失效。
+        """
         try:
+            version = self.vector_manager.collection_version(CONTEXT_COLLECTIONS)
+            cache_key = (car_context_key(car_data), version)
+            cached = self.context_builder.get_cached(cache_key)
+            if cached is not None:
+                return cached
+
             # 构建搜索查询
             make = car_data.get('make', '')
             model = car_data.get('model', '')
@@ -316,51 +496,58 @@ class RAGSystem:
                 retrieved_items.extend(knowledge_results)
                 retrieved_items.extend(analysis_results)
 
-            # 格式化检索结果 + 拼接图上下文
-            vect_text = self._format_retrieved_info(retrieved_items)
+            # 打包检索结果 + 拼接图上下文（图上下文占用同一预算）
             if graph_context:
-                return f"[Graph Context]\n{graph_context}\n\n[Vector Context]\n{vect_text}"
-            return vect_text
+                budget = max(0, self.context_builder.token_budget - count_tokens(graph_context))
+                vect_text = self._pack_retrieved_info(retrieved_items, token_budget=budget)
+                context = f"[Graph Context]\n{graph_context}\n\n[Vector Context]\n{vect_text}"
+            else:
+                context = self._pack_retrieved_info(retrieved_items)
+            self.context_builder.put_cached(cache_key, context)
+            return context
 
         except Exception as e:
             logger.error(f"Error retrieving for car analysis: {e}")
             return "无可用参考信息"
 
-    def _retrieve_for_question(self, question: str) -> str:
+    def _retrieve_for_question(self, question: str, query_embedding: Optional[List[float]] = None) -> str:
         """为问题回答检索相关信息"""
         try:
             # 跨集合搜索
             search_results = self.vector_manager.semantic_search(
                 query_text=question,
-                collections=["knowledge", "analyses", "cars"],
-                limit=5
+                collections=QA_COLLECTIONS,
+                limit=5,
+                query_embedding=query_embedding
             )
 
             retrieved_items = []
             for collection, items in search_results.items():
                 retrieved_items.extend(items)
 
-            # 按相似度排序
-            retrieved_items.sort(key=lambda x: x['similarity'], reverse=True)
-
-            # 格式化检索结果
-            return self._format_retrieved_info(retrieved_items[:10])
+            # 去重、排序并按预算打包
+            return self._pack_retrieved_info(retrieved_items)
 
         except Exception as e:
             logger.error(f"Error retrieving for question: {e}")
             return "无可用参考信息"
 
+    def _chain_for(self, template: ChatPromptTemplate):
+        """取模板对应的预构建链；未登记的模板首次使用时构建并缓存"""
+        chain = self._chains.get(id(template))
+        if chain is None:
+            chain = template | self.llm | StrOutputParser()
+            self._chains[id(template)] = chain
+        return chain
+
     def _generate_response(self,
                           template: ChatPromptTemplate,
                           query: str,
                           retrieved_context: str) -> str:
         """生成RAG回复"""
         try:
-            # 构建链
-            chain = template | self.llm | StrOutputParser()
-
-            # 生成回复
-            response = chain.invoke({
+            # 生成回复（使用预构建的链）
+            response = self._chain_for(template).invoke({
                 "query": query,
                 "retrieved_context": retrieved_context
             })
@@ -369,41 +556,58 @@ class RAGSystem:
 
         except Exception as e:
             logger.error(f"Error generating response: {e}")
-            return "抱歉，生成回复时出现错误。"
+            return GENERATION_ERROR_MESSAGE
+
+    async def _agenerate_response(self,
+                                  template: ChatPromptTemplate,
+                                  query: str,
+                                  retrieved_context: str) -> str:
+        """_generate_response 的异步版本（chain.ainvoke，不阻塞事件循环）"""
+        try:
+            return await self._chain_for(template).ainvoke({
+                "query": query,
+                "retrieved_context": retrieved_context
+            })
+
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            return GENERATION_ERROR_MESSAGE
 
-    def _format_retrieved_info(self, retrieved_items: List[Dict[str, Any]]) -> str:
-        """格式化检索到的信息"""
+    def _pack_retrieved_info(self,
+                             retrieved_items: List[Dict[str, Any]],
+                             token_budget: Optional[int] = None) -> str:
+        """去重、按 相似度×可靠性 排序，并在 token 预算内格式化检索结果"""
         if not retrieved_items:
             return "无相关参考信息"
+        packed = self.context_builder.pack(retrieved_items, self._format_retrieved_item,
+                                           token_budget=token_budget)
+        return packed or "无相关参考信息"
 
-        formatted_parts = []
-        for i, item in enumerate(retrieved_items, 1):
-            metadata = item.get('metadata', {})
-            document = item.get('document', '')
-            similarity = item.get('similarity', 0)
-
-            # 根据不同类型格式化
-            item_type = metadata.get('type', 'unknown')
+    def _format_retrieved_item(self, i: int, item: Dict[str, Any]) -> str:
+        """格式化单条检索结果"""
+        metadata = item.get('metadata', {})
+        document = item.get('document', '')
+        similarity = item.get('similarity', 0)
 
-            if item_type == 'knowledge':
-                title = metadata.get('title', f'参考信息 {i}')
-                formatted_parts.append(f"【{title}】(相似度: {similarity:.2f})\n{document}\n")
+        # 根据不同类型格式化
+        item_type = metadata.get('type', 'unknown')
 
-            elif item_type == 'analysis_result':
-                car_id = metadata.get('car_id', 'unknown')
-                score = metadata.get('rule_based_score', 'N/A')
-                formatted_parts.append(f"【分析案例 {car_id}】(相似度: {similarity:.2f}, 评分: {score})\n{document}\n")
+        if item_type == 'knowledge':
+            title = metadata.get('title', f'参考信息 {i}')
+            return f"【{title}】(相似度: {similarity:.2f})\n{document}\n"
 
-            elif item_type == 'car_data':
-                make = metadata.get('make', '')
-                model = metadata.get('model', '')
-                year = metadata.get('year', '')
-                formatted_parts.append(f"【{year} {make} {model}】(相似度: {similarity:.2f})\n{document}\n")
+        if item_type == 'analysis_result':
+            car_id = metadata.get('car_id', 'unknown')
+            score = metadata.get('rule_based_score', 'N/A')
+            return f"【分析案例 {car_id}】(相似度: {similarity:.2f}, 评分: {score})\n{document}\n"
 
-            else:
-                formatted_parts.append(f"【参考信息 {i}】(相似度: {similarity:.2f})\n{document}\n")
+        if item_type == 'car_data':
+            make = metadata.get('make', '')
+            model = metadata.get('model', '')
+            year = metadata.get('year', '')
+            return f"【{year} {make} {model}】(相似度: {similarity:.2f})\n{document}\n"
 
-        return "\n".join(formatted_parts)
+        return f"【参考信息 {i}】(相似度: {similarity:.2f})\n{document}\n"
 
     def _format_similar_cases(self, similar_analyses: List[Dict[str, Any]]) -> str:
         """格式化相似案例"""
@@ -479,7 +683,10 @@ class RAGSystem:
         try:
             car_data = self.db_manager.get_car(car_id)
             if car_data:
-                return self.vector_manager.add_car(car_id, car_data)
+                added = self.vector_manager.add_car(car_id, car_data)
+                if added:
+                    self.context_builder.invalidate()
+                return added
             return False
 
         except Exception as e:
@@ -492,7 +699,10 @@ class RAGSystem:
             car_with_analysis = self.db_manager.get_car_with_analysis(car_id)
             if car_with_analysis and car_with_analysis.get('analysis'):
                 analysis_data = car_with_analysis['analysis']
-                return self.vector_manager.add_analysis(analysis_id, car_id, analysis_data)
+                added = self.vector_manager.add_analysis(analysis_id, car_id, analysis_data)
+                if added:
+                    self.context_builder.invalidate()
+                return added
             return False
 
         except Exception as e:
@@ -51,6 +51,9 @@ class VectorStoreManager:
         # 创建集合（使用版本化物理名称）
         self._ensure_collections()
 
+        # 本进程内每个集合的写入计数，配合 count() 构成知识版本戳
+        self._versions: Dict[str, int] = {}
+
     # ---------- 内部工具 ----------
 
     def _safe_model_tag(self, model_id: str) -> str:
@@ -69,6 +72,24 @@ class VectorStoreManager:
     def _physical_name(self, logical_name: str) -> str:
         return f"{logical_name}__{self._embedder_id()}"
 
+    def _bump_version(self, collection_name: str) -> None:
+        self._versions[collection_name] = self._versions.get(collection_name, 0) + 1
+
+    def collection_version(self, collections: List[str]) -> Tuple[Tuple[str, int, int], ...]:
+        """集合版本戳：(集合名, 本进程写入次数, 条目数)
+
+        本进程写入通过计数感知；其他进程（如 ingest 流水线）新增条目通过 count() 感知。
+        """
+        stamp = []
+        for collection_name in collections:
+            try:
+                count = getattr(self, f"{collection_name}_collection").count()
+            except Exception as e:
+                logger.error(f"Error counting collection {collection_name}: {e}")
+                count = -1
+            stamp.append((collection_name, self._versions.get(collection_name, 0), count))
+        return tuple(stamp)
+
     def _ensure_collections(self):
         """确保所有必要的集合存在"""
         try:
@@ -177,6 +198,7 @@ class VectorStoreManager:
                 documents=[description],
                 metadatas=[metadata]
             )
+            self._bump_version("cars")
 
             print(f"✅ Added car to vector store: {car_data.get('year')} {car_data.get('make')} {car_data.get('model')}")
             return True
@@ -185,6 +207,44 @@ class VectorStoreManager:
             logger.error(f"Error adding car to vector store: {e}")
             return False
 
+    def add_cars_batch(self, cars: List[Tuple[int, Dict[str, Any]]]) -> int:
+        """批量写入汽车数据（一次嵌入调用 + 一次 upsert）
+
+        Args:
+            cars: (car_id, car_data) 列表
+
+        Returns:
+            写入条数
+        """
+        if not cars:
+            return 0
+        try:
+            descriptions = [self.embedding_manager.create_car_description(car) for _, car in cars]
+            embeddings = self.embedding_manager.embed_texts(descriptions)
+            metadatas = [{
+                "car_id": car_id,
+                "make": car.get('make', ''),
+                "model": car.get('model', ''),
+                "year": car.get('year', 0),
+                "price_paid": car.get('price_paid', 0.0),
+                "mileage": car.get('mileage', 0),
+                "type": "car_data"
+            } for car_id, car in cars]
+
+            self.cars_collection.upsert(
+                ids=[f"car_{car_id}" for car_id, _ in cars],
+                embeddings=embeddings,
+                documents=descriptions,
+                metadatas=metadatas
+            )
+            self._bump_version("cars")
+            print(f"✅ Added {len(cars)} cars to vector store")
+            return len(cars)
+
+        except Exception as e:
+            logger.error(f"Error adding car batch to vector store: {e}")
+            return 0
+
     def search_similar_cars(self,
                            query_car: Dict[str, Any],
                            limit: int = 10,
@@ -273,6 +333,7 @@ class VectorStoreManager:
                 documents=[description],
                 metadatas=[metadata]
             )
+            self._bump_version("analyses")
 
             print(f"✅ Added analysis to vector store: Analysis ID {analysis_id}")
             return True
@@ -281,6 +342,49 @@ class VectorStoreManager:
             logger.error(f"Error adding analysis to vector store: {e}")
             return False
 
+    def add_analyses_batch(self, analyses: List[Tuple[int, int, Dict[str, Any]]]) -> int:
+        """批量写入分析结果（一次嵌入调用 + 一次 upsert）
+
+        Args:
+            analyses: (analysis_id, car_id, analysis_data) 列表
+
+        Returns:
+            写入条数
+        """
+        if not analyses:
+            return 0
+        try:
+            descriptions = [
+                self.embedding_manager.create_analysis_description(data)
+                for _, _, data in analyses
+            ]
+            embeddings = self.embedding_manager.embed_texts(descriptions)
+            # Chroma 元数据不接受 None
+            metadatas = [{
+                "analysis_id": analysis_id,
+                "car_id": car_id,
+                "rule_based_score": data.get('rule_based_score') or 0,
+                "llm_score": data.get('llm_score') or 0,
+                "market_median_price": data.get('market_median_price') or 0.0,
+                "deal_category": data.get('deal_category') or '',
+                "success": bool(data.get('success', False)),
+                "type": "analysis_result"
+            } for analysis_id, car_id, data in analyses]
+
+            self.analyses_collection.upsert(
+                ids=[f"analysis_{analysis_id}" for analysis_id, _, _ in analyses],
+                embeddings=embeddings,
+                documents=descriptions,
+                metadatas=metadatas
+            )
+            self._bump_version("analyses")
+            print(f"✅ Added {len(analyses)} analyses to vector store")
+            return len(analyses)
+
+        except Exception as e:
+            logger.error(f"Error adding analysis batch to vector store: {e}")
+            return 0
+
     def search_similar_analyses(self,
                               query_text: str,
                               limit: int = 10) -> List[Dict[str, Any]]:
@@ -361,6 +465,7 @@ class VectorStoreManager:
                 documents=[text],
                 metadatas=[metadata]
             )
+            self._bump_version("knowledge")
 
             print(f"✅ Added knowledge to vector store: {knowledge_data.get('title')}")
             return True
@@ -369,6 +474,44 @@ class VectorStoreManager:
             logger.error(f"Error adding knowledge to vector store: {e}")
             return False
 
+    def add_knowledge_batch(self, entries: List[Tuple[int, Dict[str, Any]]]) -> int:
+        """批量写入知识库条目（一次嵌入调用 + 一次 upsert）
+
+        Args:
+            entries: (knowledge_id, knowledge_data) 列表
+
+        Returns:
+            写入条数
+        """
+        if not entries:
+            return 0
+        try:
+            texts = [self.embedding_manager.create_knowledge_text(data) for _, data in entries]
+            embeddings = self.embedding_manager.embed_texts(texts)
+            metadatas = [{
+                "knowledge_id": knowledge_id,
+                "title": data.get('title') or '',
+                "content_type": data.get('content_type') or '',
+                "category": data.get('category') or '',
+                "source": data.get('source') or '',
+                "reliability_score": data.get('reliability_score', 1.0),
+                "type": "knowledge"
+            } for knowledge_id, data in entries]
+
+            self.knowledge_collection.upsert(
+                ids=[f"knowledge_{knowledge_id}" for knowledge_id, _ in entries],
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas
+            )
+            self._bump_version("knowledge")
+            print(f"✅ Added {len(entries)} knowledge entries to vector store")
+            return len(entries)
+
+        except Exception as e:
+            logger.error(f"Error adding knowledge batch to vector store: {e}")
+            return 0
+
     def search_knowledge(self,
                         query_text: str,
                         content_type: str = None,
@@ -429,13 +572,15 @@ class VectorStoreManager:
     def semantic_search(self,
                        query_text: str,
                        collections: List[str] = None,
-                       limit: int = 20) -> Dict[str, List[Dict[str, Any]]]:
+                       limit: int = 20,
+                       query_embedding: Optional[List[float]] = None) -> Dict[str, List[Dict[str, Any]]]:
         """跨集合语义搜索
 
         Args:
             query_text: 查询文本
             collections: 要搜索的集合列表
             limit: 每个集合的结果限制
+            query_embedding: 已计算好的查询嵌入（省去一次嵌入调用）
 
         Returns:
             按集合分组的搜索结果
@@ -446,7 +591,8 @@ class VectorStoreManager:
         results = {}
 
         # 生成查询嵌入
-        query_embedding = self.embedding_manager.embed_text(query_text)
+        if query_embedding is None:
+            query_embedding = self.embedding_manager.embed_text(query_text)
 
         for collection_name in collections:
             try:
@@ -515,6 +661,7 @@ class VectorStoreManager:
         try:
             collection = getattr(self, f"{collection_name}_collection")
             collection.delete(ids=[item_id])
+            self._bump_version(collection_name)
             print(f"✅ Deleted item {item_id} from {collection_name}")
             return True
 
@@ -543,6 +690,7 @@ class VectorStoreManager:
 
             # 更新实例变量
             setattr(self, f"{collection_name}_collection", collection)
+            self._bump_version(collection_name)
 
             print(f"✅ Cleared collection: {collection_name}")
             return True
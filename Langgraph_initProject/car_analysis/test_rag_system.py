@@ -12,6 +12,7 @@ sys.path.insert(0, project_root)
 
 from core.models import CarAnalysisState
 from core.graph import build_single_car_graph
+from core.rag_enhanced_workers import flush_persistence
 from database.manager import DatabaseManager
 from rag.rag_system import RAGSystem
 
@@ -102,10 +103,10 @@ async def test_single_car_analysis():
                 print(f"   💭 Reasoning: {llm_opinion.get('reasoning', '')[:100]}...")
 
         # 数据库保存结果
-        if result.get("database_saved"):
-            car_id = result.get("database_car_id")
-            analysis_id = result.get("database_analysis_id")
-            print(f"💾 Database: Saved (Car ID: {car_id}, Analysis ID: {analysis_id})")
+        if result.get("database_queued"):
+            seq = result.get("database_journal_seq")
+            flushed = flush_persistence(timeout=60)
+            print(f"💾 Database: Queued (journal seq {seq}), flushed: {flushed}")
 
         print("\n✅ Single car analysis test completed successfully!")
         return True
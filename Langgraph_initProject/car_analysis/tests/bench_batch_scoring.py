@@ -0,0 +1,137 @@
+"""Benchmark: per-car worker scoring vs the vectorized batch engine.
+
+Generates ``--rows`` synthetic (price, median, range, mileage, year, data
+source) records and scores them
+
+* ``per-car`` - ``price_comparison_worker`` + ``deal_scoring_worker`` for a
+                ``--sample`` of rows (stdout suppressed), extrapolated;
+* ``batch``   - ``compare_prices`` + ``score_deals`` over the full arrays;
+
+reporting rows per minute, and checks that both paths agree on the sample.
+``--db`` additionally times ``rescore_database`` end to end against a
+SQLite file (I/O included).
+
+Usage:
+  python -m car_analysis.tests.bench_batch_scoring --rows 2000000 --sample 2000
+  python -m car_analysis.tests.bench_batch_scoring --rows 200000 --db /tmp/rescore_bench.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from car_analysis.core import workers
+from car_analysis.core.batch_scoring import compare_prices, score_deals
+
+METHODS = np.array(["tavily_real_web_search", "market_prior", "car_prices_csv", "used_cars_csv"], dtype=object)
+
+
+def _synthetic(rows: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    now = datetime.now().year
+    median = rng.uniform(5000, 60000, rows).round(2)
+    paid = (median * rng.uniform(0.7, 1.35, rows)).round(2)
+    year = rng.integers(now - 20, now + 1, rows)
+    mileage = np.maximum(0, (now - year) * 12000 + rng.normal(0, 25000, rows)).astype(np.int64)
+    return {
+        "price_paid": paid,
+        "median": median,
+        "range_min": (median * 0.8).round(2),
+        "range_max": (median * 1.3).round(2),
+        "mileage": mileage,
+        "year": year,
+        "sample_count": rng.integers(0, 40, rows),
+        "search_method": METHODS[rng.integers(0, len(METHODS), rows)],
+    }
+
+
+def _batch(data, current_year):
+    comparison = compare_prices(data["price_paid"], data["median"], data["range_min"], data["range_max"])
+    scores = score_deals(comparison["price_delta_pct"], data["mileage"], data["year"],
+                         data["sample_count"], data["search_method"], current_year)
+    return comparison, scores
+
+
+def _per_car(data, i):
+    state = {
+        "current_car": {"year": int(data["year"][i]), "mileage": int(data["mileage"][i]),
+                        "price_paid": float(data["price_paid"][i])},
+        "price_research": {"success": True, "median_price": float(data["median"][i]),
+                           "price_range": {"min": float(data["range_min"][i]), "max": float(data["range_max"][i])},
+                           "sample_count": int(data["sample_count"][i]),
+                           "search_method": data["search_method"][i]},
+    }
+    state.update(asyncio.run(workers.price_comparison_worker(state)))
+    state.update(asyncio.run(workers.deal_scoring_worker(state)))
+    return state["deal_score"]["score"]
+
+
+def _bench_db(path: str, rows: int) -> None:
+    from car_analysis.database.manager import DatabaseManager
+    from car_analysis.utils.rescore_analyses import rescore_database
+
+    if os.path.exists(path):
+        os.remove(path)
+    data = _synthetic(rows, seed=3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(db_path=path)
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO cars (id, make, model, year, mileage, price_paid) VALUES (?, 'Kia', 'Sorento', ?, ?, ?)",
+            [(i + 1, int(data["year"][i]), int(data["mileage"][i]), float(data["price_paid"][i])) for i in range(rows)],
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO car_analyses (id, car_id, market_median_price, comparable_count, data_source, "
+            "full_analysis_data) VALUES (?, ?, ?, ?, ?, ?)",
+            [(i + 1, i + 1, float(data["median"][i]), int(data["sample_count"][i]), data["search_method"][i],
+              f'{{"price_range": {{"min": {data["range_min"][i]}, "max": {data["range_max"][i]}}}}}')
+             for i in range(rows)],
+        )
+    result = rescore_database(db)
+    print(f"db rescore  rows={result['rescored']:>9,}  {result['seconds']:7.2f}s  "
+          f"{result['rescored'] / result['seconds'] * 60:>13,.0f} rows/min (read + score + update)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--sample", type=int, default=2000, help="Rows scored through the per-car workers")
+    parser.add_argument("--db", default=None, help="Also time the rescore CLI path against this SQLite file")
+    args = parser.parse_args()
+
+    current_year = datetime.now().year
+    data = _synthetic(args.rows)
+
+    started = time.perf_counter()
+    comparison, scores = _batch(data, current_year)
+    batch_s = time.perf_counter() - started
+
+    sample = min(args.sample, args.rows)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        per_car = [_per_car(data, i) for i in range(sample)]
+    per_car_s = time.perf_counter() - started
+
+    mismatches = int(np.sum(np.asarray(per_car) != scores["score"][:sample]))
+    per_car_rate = sample / per_car_s * 60
+    batch_rate = args.rows / batch_s * 60
+    print(f"per-car     rows={sample:>9,}  {per_car_s:7.2f}s  {per_car_rate:>13,.0f} rows/min")
+    print(f"batch       rows={args.rows:>9,}  {batch_s:7.2f}s  {batch_rate:>13,.0f} rows/min  "
+          f"({batch_rate / per_car_rate:,.0f}x)")
+    print(f"parity on sample: {sample - mismatches}/{sample} scores identical; "
+          f"categories={len(set(comparison['verdict_category']))} verdicts={len(set(scores['verdict']))}")
+
+    if args.db:
+        _bench_db(args.db, min(args.rows, 500_000))
+
+
+if __name__ == "__main__":
+    main()
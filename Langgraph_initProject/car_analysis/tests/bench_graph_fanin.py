@@ -0,0 +1,123 @@
+"""Benchmark: single-car graph latency and node executions, join barrier vs legacy self-loops.
+
+Runs ``build_single_car_graph`` with stand-in agents that only sleep (latencies
+roughly proportional to the real Tavily / CarsXE / LLM calls, scaled by
+``--scale``) and counts node executions.  The legacy wiring - conditional
+edges routing market / residual / news into ``carsxe_agent`` and looping
+``carsxe_agent`` until sibling outputs appear - is rebuilt here from the same
+stand-ins for comparison.
+
+Usage:
+  python -m car_analysis.tests.bench_graph_fanin --cars 5 --scale 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Callable, Dict
+
+from langgraph.graph import END, StateGraph
+
+from car_analysis.core import graph
+from car_analysis.core.models import CarAnalysisState
+
+
+# graph module attribute -> (node name, state key written, seconds at scale 1.0)
+STAND_INS = {
+    "condition_agent": ("condition_agent", "condition_report", 0.2),
+    "market_price_agent": ("market_agent", "market_analysis", 6.0),
+    "residual_value_agent": ("residual_agent", "residual_analysis", 0.5),
+    "news_policy_agent": ("news_agent", "news_analysis", 2.0),
+    "carsxe_agent": ("carsxe_agent", "rag_insights", 1.5),
+    "early_rag_agent": ("early_rag_agent", "early_rag", 1.0),
+    "consistency_agent": ("consistency_agent", "consistency_report", 0.3),
+    "rag_retrieval_agent": ("rag_retrieval_agent", "rag_context", 1.0),
+    "rag_vector_agent": ("rag_agent", "rag_insights", 3.0),
+    "summary_agent": ("summary_agent", "summary_report", 3.0),
+    "save_analysis_to_database": ("save_to_database", "database_queued", 0.0),
+    "aggregate_car_reports": ("generate_report", "car_reports", 0.0),
+}
+
+
+def _install_stand_ins(calls: Counter, scale: float) -> Dict[str, Callable]:
+    nodes = {}
+    for attr, (name, key, seconds) in STAND_INS.items():
+        def make(name=name, key=key, seconds=seconds):
+            async def node(state):
+                calls[name] += 1
+                await asyncio.sleep(seconds * scale)
+                value: Any = [{"car": state.get("current_car")}] if key == "car_reports" else {name: True}
+                return {key: value}
+            return node
+        nodes[name] = make()
+        setattr(graph, attr, nodes[name])
+    return nodes
+
+
+def build_legacy_graph(nodes: Dict[str, Callable]):
+    """The pre-barrier wiring of ``build_single_car_graph``."""
+    workflow = StateGraph(CarAnalysisState)
+    for name, fn in nodes.items():
+        if name != "rag_retrieval_agent":  # not part of the legacy graph
+            workflow.add_node(name, fn)
+    workflow.set_entry_point("condition_agent")
+    for agent in ("market_agent", "residual_agent", "news_agent", "carsxe_agent", "early_rag_agent"):
+        workflow.add_edge("condition_agent", agent)
+    workflow.add_conditional_edges(
+        "market_agent",
+        lambda state: "carsxe_agent" if state.get("market_analysis") else "market_agent",
+        {"carsxe_agent": "carsxe_agent", "market_agent": "market_agent"})
+    workflow.add_conditional_edges(
+        "residual_agent",
+        lambda state: "carsxe_agent" if state.get("residual_analysis") else "residual_agent",
+        {"carsxe_agent": "carsxe_agent", "residual_agent": "residual_agent"})
+    workflow.add_conditional_edges("news_agent", lambda state: "carsxe_agent", {"carsxe_agent": "carsxe_agent"})
+    workflow.add_conditional_edges(
+        "carsxe_agent",
+        lambda state: (
+            "consistency_agent"
+            if all(state.get(k) is not None for k in ("market_analysis", "residual_analysis", "news_analysis"))
+            else "carsxe_agent"
+        ),
+        {"consistency_agent": "consistency_agent", "carsxe_agent": "carsxe_agent"})
+    workflow.add_edge("consistency_agent", "rag_agent")
+    workflow.add_edge("rag_agent", "summary_agent")
+    workflow.add_edge("summary_agent", "save_to_database")
+    workflow.add_edge("save_to_database", "generate_report")
+    workflow.add_edge("generate_report", END)
+    return workflow.compile()
+
+
+async def _run(workflow, cars: int) -> float:
+    start = time.perf_counter()
+    for i in range(cars):
+        await workflow.ainvoke({"current_car": {"index": i}, "retries": {}}, {"recursion_limit": 100})
+    return (time.perf_counter() - start) / cars
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Graph fan-in benchmark")
+    parser.add_argument("--cars", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=0.1, help="Multiplier on the stand-in latencies")
+    args = parser.parse_args()
+
+    results = {}
+    for label in ("legacy self-loops", "join barrier"):
+        calls: Counter = Counter()
+        nodes = _install_stand_ins(calls, args.scale)
+        workflow = build_legacy_graph(nodes) if label == "legacy self-loops" else graph.build_single_car_graph()
+        per_car = asyncio.run(_run(workflow, args.cars))
+        results[label] = (per_car, {name: count / args.cars for name, count in calls.items()})
+
+    print(f"{args.cars} cars, latency scale {args.scale}")
+    for label, (per_car, counts) in results.items():
+        total = sum(counts.values())
+        print(f"{label:18s} {per_car * 1000:8.0f} ms/car  {total:5.1f} node runs/car")
+        print("    " + ", ".join(f"{name} x{count:g}" for name, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Benchmark: row-loop vs columnar (pandas) ingestion of the car_prices CSV.
+
+Times read + parse + bulk insert into a fresh SQLite database for each mode
+(single process, no embeddings): the row loop saves per-row dicts through
+``save_analysis_records``, the columnar mode hands each ``ColumnBatch`` to
+``save_analysis_columns``.
+
+Usage:
+  python -m car_analysis.tests.bench_ingest_columnar --csv car_prices.csv
+  python -m car_analysis.tests.bench_ingest_columnar --synthetic 550000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from car_analysis.database.manager import DatabaseManager
+from car_analysis.utils.ingest_columnar import columnar_available, parse_car_prices_frame, read_frames
+from car_analysis.utils.ingest_csv import parse_car_prices_row
+from car_analysis.utils.ingest_pipeline import parse_chunk, read_chunks
+
+
+FIELDS = [
+    "year", "make", "model", "trim", "body", "transmission", "vin", "state",
+    "condition", "odometer", "color", "interior", "seller", "mmr", "sellingprice", "saledate",
+]
+
+
+def write_synthetic(path: Path, rows: int) -> None:
+    rng = random.Random(7)
+    makes = [("Toyota", "Camry"), ("Honda", "Accord"), ("Ford", "F-150"), ("BMW", "3 Series")]
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=FIELDS)
+        writer.writeheader()
+        for i in range(rows):
+            make, model = rng.choice(makes)
+            mmr = rng.randrange(3000, 40000, 25)
+            writer.writerow({
+                "year": rng.randint(2000, 2015),
+                "make": make,
+                "model": model,
+                "trim": "Base",
+                "body": "Sedan",
+                "transmission": "automatic",
+                "vin": f"1HGCM{i:012d}",
+                "state": "ca",
+                "condition": rng.randint(1, 49),
+                "odometer": rng.randint(1000, 200000),
+                "color": "black",
+                "interior": "gray",
+                "seller": "dealer",
+                "mmr": mmr,
+                "sellingprice": int(mmr * rng.uniform(0.8, 1.2)),
+                "saledate": "Tue Dec 16 2014 12:30:00 GMT-0800 (PST)",
+            })
+
+
+PARITY_SAMPLE = 20_000
+
+
+def _ingest(chunks, save, db_path: Path):
+    """Parse and insert every chunk; returns (rows, sampled chunks, parse seconds, db seconds)."""
+    db = DatabaseManager(str(db_path))
+    rows, sampled, sample = 0, 0, []
+    parse_seconds = db_seconds = 0.0
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for parsed in chunks:
+            parsed_at = time.perf_counter()
+            parse_seconds += parsed_at - started
+            save(db, parsed)
+            started = time.perf_counter()
+            db_seconds += started - parsed_at
+            rows += len(parsed)
+            # Keep whole chunks for the parity check; converted after timing
+            if sampled < PARITY_SAMPLE:
+                sample.append(parsed)
+                sampled += len(parsed)
+    return rows, sample, parse_seconds, db_seconds
+
+
+def bench_rows(path: Path, limit: int, batch_size: int, db_path: Path):
+    rows, sample, parse_seconds, db_seconds = _ingest(
+        (parse_chunk(parse_car_prices_row, str(path), chunk)
+         for chunk in read_chunks(path, limit=limit, offset=0, batch_size=batch_size)),
+        lambda db, records: db.save_analysis_records(records),
+        db_path,
+    )
+    return rows, [record for records in sample for record in records][:PARITY_SAMPLE], parse_seconds, db_seconds
+
+
+def bench_columnar(path: Path, limit: int, batch_size: int, db_path: Path):
+    rows, sample, parse_seconds, db_seconds = _ingest(
+        (parse_car_prices_frame(str(path), frame)
+         for frame in read_frames(path, limit=limit, offset=0, batch_size=batch_size)),
+        lambda db, batch: db.save_analysis_columns(batch.cars, batch.analyses, batch.knowledge, batch.source_keys),
+        db_path,
+    )
+    return rows, [record for batch in sample for record in batch.records()][:PARITY_SAMPLE], parse_seconds, db_seconds
+
+
+def check_parity(row_records, col_records) -> int:
+    """Count sampled records whose MMR-derived fields or raw_text differ between the two paths."""
+    mismatches = 0
+    for a, b in zip(row_records, col_records):
+        if a["car"]["raw_text"] != b["car"]["raw_text"]:
+            mismatches += 1
+        for key in ("price_delta", "price_delta_percent"):
+            x, y = a["analysis"][key], b["analysis"][key]
+            if (x is None) != (y is None) or (x is not None and abs(x - y) > 1e-6):
+                mismatches += 1
+        if a["analysis"]["deal_category"] != b["analysis"]["deal_category"]:
+            mismatches += 1
+    return mismatches + abs(len(row_records) - len(col_records))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Row vs columnar CSV ingest benchmark")
+    parser.add_argument("--csv", type=Path, help="Kaggle car_prices.csv")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate N synthetic rows instead")
+    parser.add_argument("--limit", type=int, default=10**9)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    if not columnar_available():
+        raise SystemExit("pandas is not installed; columnar mode unavailable")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.csv
+        if path is None:
+            path = Path(tmp) / "car_prices_synthetic.csv"
+            write_synthetic(path, args.synthetic or 100_000)
+
+        rows, row_sample, row_parse, row_db = bench_rows(path, args.limit, args.batch_size, Path(tmp) / "rows.db")
+        col_rows, col_sample, col_parse, col_db = bench_columnar(
+            path, args.limit, args.batch_size, Path(tmp) / "columnar.db",
+        )
+
+    row_seconds, col_seconds = row_parse + row_db, col_parse + col_db
+    print(f"rows ingested   : {rows:,} (row loop) / {col_rows:,} (columnar)")
+    print(f"row loop        : {row_seconds:8.2f}s  {rows / row_seconds:12,.0f} rows/sec"
+          f"  (parse {row_parse:.2f}s, db {row_db:.2f}s)")
+    print(f"columnar        : {col_seconds:8.2f}s  {col_rows / col_seconds:12,.0f} rows/sec"
+          f"  (parse {col_parse:.2f}s, db {col_db:.2f}s)")
+    print(f"speedup         : {row_seconds / col_seconds:8.2f}x")
+    print(f"parity mismatch : {check_parity(row_sample, col_sample)} (first {len(row_sample):,} rows)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark: residual-model load time, RSS, first-car latency and worker memory.
+
+Fits a random-forest pipeline with the production feature schema
+(``--trees`` fully grown trees on ``--rows`` synthetic rows), dumps it
+compressed and uncompressed, then measures in fresh child processes (so
+sklearn import and page-cache state do not leak between runs):
+
+* ``load``        - ``PricePredictor.load`` wall time and RSS growth for the
+                    compressed file, the uncompressed file and the
+                    uncompressed file with ``mmap_mode="r"``;
+* ``first car``   - latency of the first ``predict_price`` after
+                    ``--startup-ms`` of other startup work, cold (lazy load in
+                    the first call) vs ``preload()`` started at startup;
+* ``workers``     - summed PSS of ``--workers`` pool processes that each load
+                    their own copy vs ``process_pool`` forking after one load.
+
+Usage:
+  python -m car_analysis.tests.bench_ml_loading --trees 100 --rows 60000 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+def _rss_mb(pid: str = "self") -> float:
+    with open(f"/proc/{pid}/status") as handle:
+        for line in handle:
+            if line.startswith("VmRSS"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _pss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/smaps_rollup") as handle:
+        for line in handle:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _build(path_dir: Path, trees: int, rows: int):
+    """Production-shaped preprocessor in front of a large, fully grown forest."""
+    import joblib
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+
+    from car_analysis.tests.test_ml_predictor import _cars, fit_synthetic_pipeline
+    from car_analysis.tools.ml_predictor import build_feature_frame
+
+    pipeline = fit_synthetic_pipeline(path_dir / "small.joblib")
+    width = pipeline.named_steps["preprocessor"].transform(build_feature_frame(_cars(50))).shape[1]
+    rng = np.random.default_rng(0)
+    forest = RandomForestRegressor(n_estimators=trees, n_jobs=-1, random_state=0)
+    forest.fit(rng.normal(size=(rows, width)), rng.normal(10, 1, rows))
+    pipeline.steps[-1] = ("model", forest)
+
+    plain, compressed = path_dir / "rf.joblib", path_dir / "rf_z.joblib"
+    joblib.dump(pipeline, plain)
+    joblib.dump(pipeline, compressed, compress=3)
+    return plain, compressed
+
+
+def _child(args) -> None:
+    """Runs inside a fresh interpreter; prints one JSON line."""
+    import sklearn.compose  # noqa: F401  (import cost is not load cost)
+    import sklearn.ensemble  # noqa: F401
+    import sklearn.pipeline  # noqa: F401
+
+    from car_analysis.tests.test_ml_predictor import _cars
+    from car_analysis.tools import ml_predictor as mp
+
+    mmap_mode = None if args.mmap == "none" else args.mmap
+    car = _cars(1)[0]
+    result = {}
+
+    if args.child == "load":
+        before = _rss_mb()
+        predictor = mp.PricePredictor(args.path, mmap_mode=mmap_mode)
+        predictor.load()
+        result = {"seconds": predictor.load_seconds, "rss_mb": _rss_mb() - before, "mmap": predictor.mmap_used}
+
+    elif args.child in ("cold", "preload"):
+        predictor = mp.PricePredictor(args.path, mmap_mode=mmap_mode)
+        if args.child == "preload":
+            predictor.preload()
+        time.sleep(args.startup_ms / 1000.0)  # PDF extraction, graph build, ...
+        started = time.perf_counter()
+        predictor.predict_price(car)
+        result = {"first_car_seconds": time.perf_counter() - started}
+
+    elif args.child in ("private", "shared"):
+        predictor = mp.PricePredictor(args.path, mmap_mode=mmap_mode)
+        if args.child == "shared":
+            pool = predictor.process_pool(args.workers)
+        else:
+            # spawned workers that each load their own copy
+            pool = ProcessPoolExecutor(max_workers=args.workers, initializer=mp._init_pool_worker,
+                                       initargs=(args.path, mmap_mode),
+                                       mp_context=multiprocessing.get_context("spawn"))
+        with pool:
+            predictor.predict_many(_cars(args.workers * 64), chunk_size=64, pool=pool)
+            pids = list(pool._processes)
+            result = {"workers_pss_mb": sum(_pss_mb(pid) for pid in pids), "workers": len(pids)}
+
+    print(json.dumps(result))
+
+
+def _run_child(mode: str, path: Path, **extra) -> dict:
+    cmd = [sys.executable, "-m", "car_analysis.tests.bench_ml_loading", "--child", mode, "--path", str(path)]
+    for key, value in extra.items():
+        cmd += [f"--{key.replace('_', '-')}", str(value)]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=60000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--startup-ms", type=float, default=1500.0)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--path", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--mmap", default="r", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, compressed = _build(Path(tmp), args.trees, args.rows)
+        print(f"artefact: {plain.stat().st_size / 1e6:,.0f} MB uncompressed, "
+              f"{compressed.stat().st_size / 1e6:,.0f} MB compressed ({args.trees} trees)")
+
+        for label, path, mmap in (("compressed", compressed, "r"), ("uncompressed", plain, "none"),
+                                  ("uncompressed+mmap", plain, "r")):
+            r = _run_child("load", path, mmap=mmap)
+            print(f"load  {label:<18} {r['seconds']:6.2f}s  RSS +{r['rss_mb']:7,.0f} MB  mmap={r['mmap']}")
+
+        for mode in ("cold", "preload"):
+            r = _run_child(mode, plain, startup_ms=args.startup_ms, mmap="r")
+            print(f"first car  {mode:<8} {r['first_car_seconds'] * 1000:8.1f} ms "
+                  f"(after {args.startup_ms:.0f} ms startup)")
+
+        for mode in ("private", "shared"):
+            r = _run_child(mode, plain, workers=args.workers, mmap="r")
+            print(f"workers    {mode:<8} {r['workers']} procs  PSS {r['workers_pss_mb']:8,.0f} MB total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark: residual-model throughput, per-car predict_price loop vs predict_many.
+
+Fits a random-forest pipeline with the production feature schema on
+synthetic rows (``--trees`` estimators), dumps it with joblib and scores
+``--rows`` cars three ways:
+
+* ``loop``     - ``predict_price`` per car (feature dict + pipeline call each);
+* ``batch``    - ``predict_many`` with one pipeline call per ``--chunk`` rows;
+* ``threaded`` - ``predict_many`` with chunks spread over ``--workers`` threads.
+
+Usage:
+  python -m car_analysis.tests.bench_ml_predictor --rows 5000 --trees 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from car_analysis.tests.test_ml_predictor import _cars, fit_synthetic_pipeline
+from car_analysis.tools.ml_predictor import PricePredictor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--chunk", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--loop-sample", type=int, default=1000, help="Cars scored through the per-car loop")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rf.joblib"
+        fit_synthetic_pipeline(path, rows=5000, n_estimators=args.trees)
+        predictor = PricePredictor(model_path=str(path))
+        predictor.load()
+        cars = _cars(args.rows)
+
+        sample = cars[:min(args.loop_sample, args.rows)]
+        started = time.perf_counter()
+        loop = np.array([predictor.predict_price(car)["predicted_price"] for car in sample])
+        loop_s = time.perf_counter() - started
+        loop_rate = len(sample) / loop_s
+
+        results = {}
+        for name, workers in (("batch", 1), ("threaded", args.workers)):
+            started = time.perf_counter()
+            prices = predictor.predict_many(cars, chunk_size=args.chunk, workers=workers)
+            results[name] = (time.perf_counter() - started, prices)
+
+    print(f"loop      rows={len(sample):>7,}  {loop_s:7.3f}s  {loop_rate:>10,.0f} cars/s")
+    for name, (seconds, prices) in results.items():
+        rate = args.rows / seconds
+        drift = float(np.max(np.abs(prices[:len(sample)] - loop) / loop))
+        print(f"{name:<9} rows={args.rows:>7,}  {seconds:7.3f}s  {rate:>10,.0f} cars/s  "
+              f"({rate / loop_rate:,.0f}x, max rel diff {drift:.1e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: cost of per-tree p10/p50/p90 on top of the point prediction.
+
+Fits a random-forest pipeline with the production feature schema
+(``--trees`` estimators), exports it to the compact format and, for the
+joblib pipeline and the compact export, times
+
+* ``single`` - median latency of one car: ``predict_many`` (point only) vs
+               ``predict_quantiles`` (point + p10/p50/p90);
+* ``batch``  - throughput over ``--rows`` cars for the same two calls;
+
+and reports the mean p10-p90 width relative to the point prediction.
+
+Usage:
+  python -m car_analysis.tests.bench_ml_quantiles --trees 200 --rows 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from car_analysis.tests.test_ml_predictor import _cars, fit_synthetic_pipeline
+from car_analysis.tools.ml_predictor import PricePredictor
+from car_analysis.tools.model_export import export_model
+
+
+def _median_ms(fn, cars) -> float:
+    timings = []
+    for car in cars:
+        started = time.perf_counter()
+        fn([car])
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+def _seconds(fn, cars) -> float:
+    started = time.perf_counter()
+    fn(cars)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single", type=int, default=300, help="Cars timed one at a time")
+    args = parser.parse_args()
+
+    cars = _cars(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rf.joblib"
+        fit_synthetic_pipeline(path, rows=5000, n_estimators=args.trees)
+        export_model(path, ("compact",))
+
+        for fmt in ("joblib", "compact"):
+            predictor = PricePredictor(str(path), model_format=fmt)
+            predictor.load()
+            sample = cars[:args.single]
+            point_ms = _median_ms(predictor.predict_many, sample)
+            quant_ms = _median_ms(predictor.predict_quantiles, sample)
+            point_s = _seconds(predictor.predict_many, cars)
+            quant_s = _seconds(predictor.predict_quantiles, cars)
+
+            result = predictor.predict_quantiles(cars)
+            width = float(np.mean((result["p90"] - result["p10"]) / result["predicted_price"]))
+            print(f"{predictor.loaded_format:<8} single  point {point_ms:6.2f} ms  +quantiles {quant_ms:6.2f} ms "
+                  f"({(quant_ms / point_ms - 1) * 100:+5.1f}%)")
+            print(f"{'':<8} batch   point {args.rows / point_s:>9,.0f} cars/s  +quantiles "
+                  f"{args.rows / quant_s:>9,.0f} cars/s ({(quant_s / point_s - 1) * 100:+5.1f}%)  "
+                  f"mean p10-p90 width {width:.1%}")
+
+
+if __name__ == "__main__":
+    main()
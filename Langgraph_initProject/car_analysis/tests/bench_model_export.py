@@ -0,0 +1,114 @@
+"""Benchmark: joblib sklearn pipeline vs the compact (and ONNX, if installed) export.
+
+Builds the same production-shaped forest as ``bench_ml_loading``
+(``--trees`` fully grown trees on ``--rows`` synthetic rows), exports it with
+``model_export.export_model`` and measures each format in a fresh child
+process:
+
+* ``load``    - wall time and RSS growth of ``PricePredictor.load``,
+                *including* the imports the format needs (sklearn for joblib,
+                numpy only for compact);
+* ``single``  - median ``predict_price`` latency for one car;
+* ``batch``   - ``predict_many`` throughput over ``--cars`` cars;
+* ``drift``   - max relative difference to the joblib prices.
+
+Usage:
+  python -m car_analysis.tests.bench_model_export --trees 100 --rows 60000 --cars 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _child(args) -> None:
+    """Runs inside a fresh interpreter; prints one JSON line."""
+    import numpy as np
+
+    from car_analysis.tests.bench_ml_loading import _rss_mb
+    from car_analysis.tools import ml_predictor as mp
+
+    predictor = mp.PricePredictor(args.path, model_format=args.child)
+    before = _rss_mb()
+    started = time.perf_counter()
+    predictor.load()
+    load_s = time.perf_counter() - started
+    rss = _rss_mb() - before
+    sklearn_imported = "sklearn" in sys.modules  # before the test helpers pull it in
+
+    from car_analysis.tests.test_ml_predictor import _cars
+
+    cars = _cars(args.cars)
+
+    latencies = []
+    for car in cars[:200]:
+        t0 = time.perf_counter()
+        predictor.predict_price(car)
+        latencies.append(time.perf_counter() - t0)
+    started = time.perf_counter()
+    prices = predictor.predict_many(cars)
+    batch_s = time.perf_counter() - started
+
+    np.save(args.out, prices)
+    print(json.dumps({"load_seconds": load_s, "rss_mb": rss, "format": predictor.loaded_format,
+                      "sklearn_imported": sklearn_imported,
+                      "single_ms": float(np.median(latencies)) * 1000, "batch_seconds": batch_s}))
+
+
+def _run_child(fmt: str, path: Path, cars: int, out: Path) -> dict:
+    cmd = [sys.executable, "-m", "car_analysis.tests.bench_model_export", "--child", fmt,
+           "--path", str(path), "--cars", str(cars), "--out", str(out)]
+    stdout = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=60000)
+    parser.add_argument("--cars", type=int, default=20000)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--path", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    import numpy as np
+
+    from car_analysis.tests.bench_ml_loading import _build
+    from car_analysis.tools.model_export import export_model, exported_paths
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        plain, _ = _build(tmp, args.trees, args.rows)
+        exported = export_model(plain, ("compact", "onnx"))
+        paths = exported_paths(plain)
+        print(f"artefact: joblib {plain.stat().st_size / 1e6:,.0f} MB, "
+              f"compact {paths['compact'].stat().st_size / 1e6:,.0f} MB ({args.trees} trees)")
+        if "error" in exported["onnx"]:
+            print(f"onnx skipped: {exported['onnx']['error']}")
+
+        formats = ["joblib", "compact"] + ([] if "error" in exported["onnx"] else ["onnx"])
+        baseline = None
+        for fmt in formats:
+            out = tmp / f"{fmt}.npy"
+            r = _run_child(fmt, plain, args.cars, out)
+            prices = np.load(out)
+            baseline = prices if baseline is None else baseline
+            drift = float(np.max(np.abs(prices - baseline) / baseline))
+            print(f"{r['format']:<8} load {r['load_seconds']:6.2f}s  RSS +{r['rss_mb']:7,.0f} MB  "
+                  f"sklearn={'yes' if r['sklearn_imported'] else 'no '}  single {r['single_ms']:6.2f} ms  "
+                  f"batch {args.cars / r['batch_seconds']:>10,.0f} cars/s  max rel diff {drift:.1e}")
+
+
+if __name__ == "__main__":
+    main()
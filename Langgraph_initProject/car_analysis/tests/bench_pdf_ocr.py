@@ -0,0 +1,88 @@
+"""Benchmark: whole-document OCR vs selective per-page OCR on a mixed PDF.
+
+The fixture interleaves native-text pages with "scanned" pages (a text page
+rasterised at 150 DPI and embedded as an image).  Compared:
+
+* ``full``      - ``read_by_ocr`` on every page at 300 DPI
+* ``selective`` - ``PDFProcessor.process_financial_document`` (native text,
+  OCR only for pages without a text layer, adaptive DPI, process pool)
+* ``cached``    - the selective run repeated against its OCR cache
+
+Requires the ``tesseract`` binary (PyMuPDF's OCR backend).
+
+Usage:
+  python -m car_analysis.tests.bench_pdf_ocr --pages 40 --scanned-every 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from car_analysis.tools.pdf_functions import read_by_ocr
+from car_analysis.tools.pdf_processor import PDFProcessor
+from car_analysis.tests.bench_pdf_text import write_synthetic_pdf
+
+
+def write_mixed_pdf(path: Path, pages: int, scanned_every: int) -> int:
+    source = path.with_suffix(".text.pdf")
+    write_synthetic_pdf(source, pages, lines_per_page=25)
+    src = fitz.open(str(source))
+    out = fitz.open()
+    scanned = 0
+    for idx, page in enumerate(src):
+        if idx % scanned_every == scanned_every - 1:
+            pix = page.get_pixmap(dpi=150)
+            new = out.new_page(width=page.rect.width, height=page.rect.height)
+            new.insert_image(new.rect, pixmap=pix)
+            scanned += 1
+        else:
+            out.insert_pdf(src, from_page=idx, to_page=idx)
+    out.save(str(path))
+    out.close()
+    src.close()
+    return scanned
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Selective OCR benchmark")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--scanned-every", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    if shutil.which("tesseract") is None:
+        raise SystemExit("tesseract is not installed; OCR benchmark unavailable")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "mixed.pdf"
+        scanned = write_mixed_pdf(path, args.pages, args.scanned_every)
+
+        started = time.perf_counter()
+        full = read_by_ocr(str(path), dpi=300)
+        full_s = time.perf_counter() - started
+
+        processor = PDFProcessor(workers=args.workers, cache_path=str(Path(tmp) / "cache.db"))
+        started = time.perf_counter()
+        selective = processor.process_financial_document(str(path))
+        selective_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        processor.process_financial_document(str(path))
+        cached_s = time.perf_counter() - started
+
+    print(f"pages           : {args.pages} ({scanned} scanned) workers={args.workers}")
+    print(f"full OCR        : {full_s:8.2f}s  {args.pages} pages OCR'd, {len(full['text']):,} chars")
+    print(f"selective OCR   : {selective_s:8.2f}s  {len(selective['ocr_pages'])} pages OCR'd, "
+          f"{selective['content_length']:,} chars ({full_s / selective_s:.1f}x)")
+    print(f"selective cached: {cached_s:8.2f}s  ({full_s / cached_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: serial vs process-pool vs cached PDF text extraction.
+
+Synthetic dealer-listing PDFs (100 and 1000 pages by default) are generated
+with PyMuPDF, then extracted three ways through ``PDFProcessor.extract_text``:
+one process, a ``--workers`` process pool, and a second (cache hit) run.
+
+Usage:
+  python -m car_analysis.tests.bench_pdf_text
+  python -m car_analysis.tests.bench_pdf_text --pages 100 1000 5000 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from car_analysis.tools.pdf_processor import PDFProcessor
+
+
+MAKES = [("Toyota", "Camry"), ("Honda", "Accord"), ("Ford", "F-150"), ("BMW", "3 Series"), ("Kia", "Sorento")]
+
+
+def write_synthetic_pdf(path: Path, pages: int, lines_per_page: int = 40) -> None:
+    rng = random.Random(11)
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        lines = []
+        for _ in range(lines_per_page):
+            make, model = rng.choice(MAKES)
+            lines.append(
+                f"{rng.randint(2008, 2023)} {make} {model}  {rng.randint(5, 180) * 1000:,} mi  "
+                f"${rng.randint(40, 450) * 100:,}  stock #{page_no:05d}"
+            )
+        page.insert_text((36, 40), "\n".join(lines), fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+def _time_extract(processor: PDFProcessor, path: Path):
+    started = time.perf_counter()
+    result = processor.extract_text(str(path))
+    elapsed = time.perf_counter() - started
+    if not result["success"]:
+        raise SystemExit(result["error"])
+    return result, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PDF text extraction benchmark")
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()} workers={args.workers}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = Path(tmp) / f"listing_{pages}.pdf"
+            write_synthetic_pdf(path, pages)
+
+            serial, serial_s = _time_extract(PDFProcessor(workers=1, cache_path=None), path)
+            pooled, pooled_s = _time_extract(PDFProcessor(workers=args.workers, cache_path=None), path)
+            cached_proc = PDFProcessor(workers=args.workers, cache_path=str(Path(tmp) / f"cache_{pages}.db"))
+            _time_extract(cached_proc, path)
+            cached, cached_s = _time_extract(cached_proc, path)
+
+            same = serial["combined_text"] == pooled["combined_text"] == cached["combined_text"]
+            print(f"{pages:>6} pages | serial {serial_s:7.3f}s | pool {pooled_s:7.3f}s "
+                  f"({serial_s / pooled_s:5.2f}x) | cache hit {cached_s:7.4f}s "
+                  f"({serial_s / cached_s:7.1f}x) | identical={same}")
+
+
+if __name__ == "__main__":
+    main()
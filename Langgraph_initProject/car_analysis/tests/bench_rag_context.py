@@ -0,0 +1,154 @@
+"""Benchmark: RAG car-analysis prompt size and generation latency, raw concatenation vs context builder.
+
+A synthetic vector store answers the four ``_retrieve_for_car_analysis``
+queries the way Chroma does on a small corpus: the same top knowledge entries
+and analyses come back for every query, some entries are near-duplicates of
+each other, and forum-grade sources carry a low ``reliability_score``.  For
+each car the benchmark builds the ``car_analysis_template`` prompt
+
+* ``raw``     - every retrieved item formatted and joined (previous behaviour);
+* ``packed``  - deduplicated, ranked by similarity x reliability and packed
+                into ``--budget`` tokens, cached per (year, make, model);
+
+and reports prompt tokens, vector searches and generation latency.  Latency is
+modelled as ``--base-ms`` plus ``--ms-per-1k`` per 1k prompt tokens; with
+``--live`` (needs OPENAI_API_KEY) each prompt is also sent to the real model.
+
+Usage:
+  python -m car_analysis.tests.bench_rag_context --cars 20 --budget 1500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+from car_analysis.rag.context_builder import ContextBuilder, count_tokens
+from car_analysis.rag.rag_system import RAGSystem
+
+WORDS = ("resale depreciation margin trim mileage warranty recall auction lease insurance maintenance "
+         "transmission hybrid battery financing incentive inventory demand seasonality regional certified "
+         "ownership reliability title accident rust tires brakes valuation dealer private listing").split()
+MODELS = [(2019, "Toyota", "Camry"), (2018, "Honda", "Civic"), (2020, "Ford", "F-150"),
+          (2017, "BMW", "3 Series"), (2021, "Tesla", "Model 3")]
+
+
+class _SyntheticStore:
+    """Returns overlapping top-k hits for every query, like a small Chroma corpus."""
+
+    def __init__(self, seed: int = 7):
+        rng = random.Random(seed)
+        self.searches = 0
+        self.knowledge: List[Dict[str, Any]] = []
+        for i in range(8):
+            text = f"Market guide {i}: " + " ".join(rng.choice(WORDS) for _ in range(90))
+            reliability = 0.3 if i % 4 == 3 else 1.0
+            self.knowledge.append({"id": f"k{i}", "document": text,
+                                   "metadata": {"type": "knowledge", "title": f"Guide {i}",
+                                                "reliability_score": reliability}})
+            if i % 3 == 0:  # re-ingested copy under a new id
+                self.knowledge.append({"id": f"k{i}-copy", "document": text + " (mirror)",
+                                       "metadata": {"type": "knowledge", "title": f"Guide {i} mirror",
+                                                    "reliability_score": reliability}})
+        self.analyses = [{"id": f"a{i}",
+                          "document": (f"Car {i}: paid {18000 + 250 * i}, market median {19000 + 200 * i}, "
+                                       f"score {rng.randint(30, 90)}. " + " ".join(rng.choice(WORDS) for _ in range(50))),
+                          "metadata": {"type": "analysis_result", "car_id": i,
+                                       "rule_based_score": rng.randint(30, 90), "reliability_score": 0.8}}
+                         for i in range(10)]
+        self._rng = rng
+
+    def _top(self, pool: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        self.searches += 1
+        picks = pool[:limit + 1]
+        self._rng.shuffle(picks)
+        return [{**item, "similarity": round(0.6 + 0.35 * self._rng.random(), 3)} for item in picks[:limit]]
+
+    def collection_version(self, collections):
+        return ()
+
+    def search_knowledge(self, query_text, limit=3):
+        return self._top(self.knowledge, limit)
+
+    def search_similar_analyses(self, query_text, limit=3):
+        return self._top(self.analyses, limit)
+
+
+class _BenchRAGSystem(RAGSystem):
+    """RAGSystem without DB / LLM clients; only the retrieval and prompt paths."""
+
+    def __init__(self, store: _SyntheticStore, budget: int, packed: bool):  # no DB / LLM clients
+        self.vector_manager = store
+        self.graph_service = None
+        self.packed = packed
+        self.context_builder = ContextBuilder(token_budget=budget)
+        self._create_prompt_templates()
+
+    def _pack_retrieved_info(self, retrieved_items, token_budget=None):
+        if self.packed:
+            return super()._pack_retrieved_info(retrieved_items, token_budget)
+        return "\n".join(self._format_retrieved_item(i, item) for i, item in enumerate(retrieved_items, 1))
+
+    def _retrieve_for_car_analysis(self, car_data):
+        if not self.packed:
+            self.context_builder.invalidate()  # previous behaviour: retrieve every time
+        return super()._retrieve_for_car_analysis(car_data)
+
+
+def _prompt_tokens(system: RAGSystem, car: Dict[str, Any], context: str) -> int:
+    messages = system.car_analysis_template.format_messages(
+        query=f"{car['year']} {car['make']} {car['model']}", retrieved_context=context)
+    return sum(count_tokens(message.content) for message in messages)
+
+
+async def _live_latency(system: RAGSystem, car: Dict[str, Any], context: str) -> float:
+    from langchain_openai import ChatOpenAI
+    from langchain_core.output_parsers import StrOutputParser
+
+    chain = system.car_analysis_template | ChatOpenAI(model="gpt-4o", temperature=0.3) | StrOutputParser()
+    start = time.perf_counter()
+    await chain.ainvoke({"query": f"{car['year']} {car['make']} {car['model']}", "retrieved_context": context})
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RAG context builder benchmark")
+    parser.add_argument("--cars", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=1500, help="Context token budget")
+    parser.add_argument("--base-ms", type=float, default=600.0, help="Modelled fixed generation latency")
+    parser.add_argument("--ms-per-1k", type=float, default=180.0, help="Modelled latency per 1k prompt tokens")
+    parser.add_argument("--live", action="store_true", help="Also time real gpt-4o calls (OPENAI_API_KEY)")
+    args = parser.parse_args()
+
+    cars = [{"year": y, "make": mk, "model": md, "price_paid": 20000, "mileage": 40000}
+            for y, mk, md in (MODELS[i % len(MODELS)] for i in range(args.cars))]
+    print(f"{args.cars} cars over {len(MODELS)} models, budget {args.budget} tokens, "
+          f"modelled latency {args.base_ms:.0f} ms + {args.ms_per_1k:.0f} ms/1k tokens")
+    for label, packed in (("raw", False), ("packed", True)):
+        store = _SyntheticStore()
+        system = _BenchRAGSystem(store, args.budget, packed)
+        tokens, build_ms, live = [], [], []
+        for car in cars:
+            start = time.perf_counter()
+            context = system._retrieve_for_car_analysis(car)
+            build_ms.append((time.perf_counter() - start) * 1000)
+            tokens.append(_prompt_tokens(system, car, context))
+            if args.live:
+                live.append(asyncio.run(_live_latency(system, car, context)))
+        modelled = [args.base_ms + args.ms_per_1k * t / 1000 for t in tokens]
+        line = (f"{label:7s} prompt tokens mean {statistics.mean(tokens):6.0f} max {max(tokens):6d}  "
+                f"vector searches {store.searches:4d}  context build {statistics.mean(build_ms):6.2f} ms/car  "
+                f"modelled generation {statistics.mean(modelled):6.0f} ms/car")
+        if live:
+            line += f"  live generation {statistics.mean(live) * 1000:6.0f} ms/car"
+        print(line)
+        if packed:
+            print(f"        builder stats: {system.context_builder.stats}")
+
+
+if __name__ == "__main__":
+    main()
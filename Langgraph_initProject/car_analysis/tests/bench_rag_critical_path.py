@@ -0,0 +1,151 @@
+"""Benchmark: per-car critical path of the RAG step, sequential vs split retrieval / concurrent generation.
+
+The real ``rag_retrieval_agent`` / ``rag_vector_agent`` run against a
+``RAGSystem`` whose retrieval and LLM calls are replaced by sleeps
+(``--retrieval`` / ``--llm`` seconds); the other agents are the sleeping
+stand-ins from ``bench_graph_fanin``.  The previous layout (consistency ->
+rag -> summary, with ``find_similar_cases`` then ``enhance_car_analysis``
+each retrieving and blocking on ``chain.invoke``) is rebuilt for comparison.
+Every node is traced and the timeline of one car is printed.
+
+Usage:
+  python -m car_analysis.tests.bench_rag_critical_path --llm 0.4 --retrieval 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Tuple
+
+from langgraph.graph import END, StateGraph
+
+from car_analysis.core import graph
+from car_analysis.core.agents import rag as rag_agents
+from car_analysis.core.models import CarAnalysisState
+from car_analysis.rag.rag_system import RAGSystem
+from car_analysis.tests.bench_graph_fanin import _install_stand_ins
+
+
+class _SleepingRAGSystem(RAGSystem):
+    """RAGSystem with retrieval / generation replaced by fixed sleeps."""
+
+    def __init__(self, retrieval_s: float, llm_s: float):  # no DB / vector store / LLM clients
+        self.retrieval_s = retrieval_s
+        self.llm_s = llm_s
+        self.embedding_manager = self
+        self.car_analysis_template = self.similar_cases_template = None
+
+    def create_car_description(self, car: Dict[str, Any]) -> str:
+        return f"{car.get('year')} {car.get('make')} {car.get('model')}"
+
+    def _retrieve_for_car_analysis(self, car_data):
+        time.sleep(self.retrieval_s)
+        return "context " * 50
+
+    def _retrieve_similar_analyses(self, car_data):
+        time.sleep(self.retrieval_s)
+        return []
+
+    def _generate_response(self, template, query, retrieved_context):
+        time.sleep(self.llm_s)
+        return "analysis"
+
+    async def _agenerate_response(self, template, query, retrieved_context):
+        await asyncio.sleep(self.llm_s)
+        return "analysis"
+
+
+async def _legacy_rag_agent(state):
+    """The previous rag_vector_agent body: two retrieve-then-generate calls in sequence."""
+    rag_system = rag_agents._get_rag_system()
+    car = state.get("current_car", {}) or {}
+    similar = rag_system.find_similar_cases(car)
+    enhanced = rag_system.enhance_car_analysis(car)
+    return {"rag_insights": {"vector": {"success": True, "cases_analysis": similar.get("analysis"),
+                                        "enhanced_analysis": enhanced.get("enhanced_analysis")}}}
+
+
+def _traced(name: str, fn: Callable, spans: List[Tuple[str, float, float]]) -> Callable:
+    async def node(state):
+        start = time.perf_counter()
+        try:
+            return await fn(state)
+        finally:
+            spans.append((name, start, time.perf_counter()))
+    return node
+
+
+def _legacy_graph(nodes: Dict[str, Callable]):
+    workflow = StateGraph(CarAnalysisState)
+    for name, fn in nodes.items():
+        if name != "rag_retrieval_agent":
+            workflow.add_node(name, fn)
+    workflow.set_entry_point("condition_agent")
+    fan_out = ("market_agent", "residual_agent", "news_agent", "carsxe_agent", "early_rag_agent")
+    for agent in fan_out:
+        workflow.add_edge("condition_agent", agent)
+    workflow.add_edge(list(fan_out), "consistency_agent")
+    workflow.add_edge("consistency_agent", "rag_agent")
+    workflow.add_edge("rag_agent", "summary_agent")
+    workflow.add_edge("summary_agent", "save_to_database")
+    workflow.add_edge("save_to_database", "generate_report")
+    workflow.add_edge("generate_report", END)
+    return workflow.compile()
+
+
+def _run_variant(label: str, args) -> Tuple[float, List[Tuple[str, float, float]]]:
+    rag_agents._RAG_SYSTEM = _SleepingRAGSystem(args.retrieval, args.llm)
+    spans: List[Tuple[str, float, float]] = []
+    nodes = _install_stand_ins(Counter(), args.scale)
+    nodes["rag_retrieval_agent"] = rag_agents.rag_retrieval_agent
+    nodes["rag_agent"] = _legacy_rag_agent if label == "sequential" else rag_agents.rag_vector_agent
+    nodes = {name: _traced(name, fn, spans) for name, fn in nodes.items()}
+
+    if label == "sequential":
+        workflow = _legacy_graph(nodes)
+    else:
+        attrs = {"condition_agent": "condition_agent", "market_agent": "market_price_agent",
+                 "residual_agent": "residual_value_agent", "news_agent": "news_policy_agent",
+                 "carsxe_agent": "carsxe_agent", "early_rag_agent": "early_rag_agent",
+                 "rag_retrieval_agent": "rag_retrieval_agent", "rag_agent": "rag_vector_agent",
+                 "consistency_agent": "consistency_agent", "summary_agent": "summary_agent",
+                 "save_to_database": "save_analysis_to_database", "generate_report": "aggregate_car_reports"}
+        for name, attr in attrs.items():
+            setattr(graph, attr, nodes[name])
+        workflow = graph.build_single_car_graph()
+
+    async def run():
+        start = time.perf_counter()
+        for i in range(args.cars):
+            if i == args.cars - 1:
+                spans.clear()
+                start_last = time.perf_counter()
+            await workflow.ainvoke({"current_car": {"index": i, "make": "Toyota", "model": "Camry"},
+                                    "retries": {}})
+        return (time.perf_counter() - start) / args.cars, start_last
+
+    per_car, t0 = asyncio.run(run())
+    return per_car, [(name, s - t0, e - t0) for name, s, e in spans]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RAG critical path benchmark")
+    parser.add_argument("--cars", type=int, default=3)
+    parser.add_argument("--llm", type=float, default=0.4, help="Seconds per RAG LLM call")
+    parser.add_argument("--retrieval", type=float, default=0.1, help="Seconds per retrieval pass")
+    parser.add_argument("--scale", type=float, default=0.05, help="Multiplier on the stand-in agent latencies")
+    args = parser.parse_args()
+
+    results = {label: _run_variant(label, args) for label in ("sequential", "split + concurrent")}
+    print(f"{args.cars} cars; RAG LLM call {args.llm}s, retrieval {args.retrieval}s, stand-in scale {args.scale}")
+    for label, (per_car, spans) in results.items():
+        print(f"\n{label}: {per_car * 1000:.0f} ms/car")
+        for name, start, end in sorted(spans, key=lambda span: span[1]):
+            print(f"    {name:20s} {start * 1000:7.0f} -> {end * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
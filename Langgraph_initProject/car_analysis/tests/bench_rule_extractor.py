@@ -0,0 +1,137 @@
+"""Benchmark: throughput and accuracy of the rule-based car extractor.
+
+Builds a fixture corpus of synthetic listing PDFs in three layouts (prose
+purchase records, one-line listings, header tables) with known ground truth,
+plus ``sample_cars_textual.pdf`` when present (a small share of listings use
+makes outside the lexicon), then runs the span-based rule
+pass on every document.  Reports pages/sec, cars/sec, precision / recall on
+exact (year, make, model, mileage, price) tuples and the share of pages that
+would still be routed to the LLM.
+
+Usage:
+  python -m car_analysis.tests.bench_rule_extractor --docs 60 --pages 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import fitz  # PyMuPDF
+
+from car_analysis.utils.rule_extractor import MAKE_MODELS, extract_pages, read_layout_pages
+
+
+SAMPLE_PDF = Path(__file__).resolve().parents[1] / "sample_cars_textual.pdf"
+SAMPLE_TRUTH = [
+    (2020, "Toyota", "Camry", 35000, 22500.0), (2019, "Honda", "Civic", 42000, 18200.0),
+    (2021, "Ford", "F-150", 28000, 31800.0), (2018, "BMW", "3 Series", 50000, 27400.0),
+    (2021, "Tesla", "Model 3", 15000, 39900.0), (2017, "Chevrolet", "Malibu", 60000, 14800.0),
+    (2018, "Nissan", "Altima", 45000, 16700.0), (2022, "Mercedes-Benz", "C-Class", 12000, 44500.0),
+]
+
+Car = Tuple[int, str, str, int, float]
+
+
+# Makes outside the lexicon, which the rules must not claim to have handled
+OFF_LEXICON = [("Zastava", "Yugo"), ("Lada", "Niva"), ("Saab", "9-3")]
+
+
+def _random_car(rng: random.Random, unknown_rate: float = 0.0) -> Car:
+    if rng.random() < unknown_rate:
+        make, model = rng.choice(OFF_LEXICON)
+    else:
+        make = rng.choice(sorted(MAKE_MODELS))
+        model = rng.choice(MAKE_MODELS[make])
+    return rng.randint(2005, 2023), make, model, rng.randint(3, 190) * 1000, float(rng.randint(40, 600) * 100)
+
+
+def _prose(car: Car, rng: random.Random) -> str:
+    year, make, model, miles, price = car
+    opener = rng.choice(["In 2021,", "Last spring,", "Recently,", "During 2019,"])
+    return f"{opener} a {make} {model} ({year} model year) with {miles:,} miles was purchased for ${price:,.0f}."
+
+
+def _line(car: Car, rng: random.Random) -> str:
+    year, make, model, miles, price = car
+    return rng.choice([
+        f"{year} {make} {model} - {miles:,} mi - ${price:,.0f}",
+        f"{year} {make} {model}, {miles // 1000}k miles, asking ${price:,.0f} (or ${price / 60:,.0f}/mo)",
+    ])
+
+
+def write_corpus(directory: Path, docs: int, pages: int, per_page: int = 8, unknown_rate: float = 0.02,
+                 seed: int = 5) -> List[Tuple[Path, List[Car]]]:
+    rng = random.Random(seed)
+    corpus = []
+    for doc_idx in range(docs):
+        layout = ("prose", "line", "table")[doc_idx % 3]
+        doc = fitz.open()
+        truth: List[Car] = []
+        for _ in range(pages):
+            page = doc.new_page()
+            cars = [_random_car(rng, unknown_rate) for _ in range(per_page)]
+            truth.extend(cars)
+            if layout == "table":
+                header = ["Year", "Make", "Model", "Mileage", "Price"]
+                for r, values in enumerate([header] + [[str(c[0]), c[1], c[2], f"{c[3]:,}", f"${c[4]:,.0f}"] for c in cars]):
+                    for x, value in zip([36, 90, 190, 300, 390], values):
+                        page.insert_text((x, 60 + r * 16), value, fontsize=10)
+            else:
+                render = _prose if layout == "prose" else _line
+                page.insert_textbox(fitz.Rect(36, 36, 560, 800), "\n".join(render(c, rng) for c in cars), fontsize=10)
+        path = directory / f"{layout}_{doc_idx:03d}.pdf"
+        doc.save(str(path))
+        doc.close()
+        corpus.append((path, truth))
+    if SAMPLE_PDF.exists():
+        corpus.append((SAMPLE_PDF, list(SAMPLE_TRUTH)))
+    return corpus
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rule-based extractor benchmark")
+    parser.add_argument("--docs", type=int, default=60)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--unknown-rate", type=float, default=0.02, help="Share of off-lexicon makes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = write_corpus(Path(tmp), args.docs, args.pages, unknown_rate=args.unknown_rate)
+        total_pages = confident_pages = found = correct = expected = 0
+        shipped = shipped_correct = 0
+        started = time.perf_counter()
+        for path, truth in corpus:
+            results = extract_pages(read_layout_pages(str(path)))
+            total_pages += len(results)
+            expected += len(truth)
+            remaining = list(truth)
+            for result in results:
+                confident = result.confident()
+                confident_pages += confident
+                for c in result.cars:
+                    car = (c["year"], c["make"], c["model"], c["mileage"], c["price_paid"])
+                    hit = car in remaining
+                    if hit:
+                        remaining.remove(car)
+                    found += 1
+                    correct += hit
+                    shipped += confident
+                    shipped_correct += confident and hit
+        elapsed = time.perf_counter() - started
+
+    print(f"documents       : {len(corpus)} ({total_pages} pages, {expected} cars)")
+    print(f"throughput      : {total_pages / elapsed:8.0f} pages/sec  {found / elapsed:8.0f} cars/sec "
+          f"({elapsed * 1000 / total_pages:.2f} ms/page incl. span layout)")
+    print(f"precision (all) : {correct / found if found else 0:.3f}  recall {correct / expected if expected else 0:.3f}")
+    print(f"precision (kept): {shipped_correct / shipped if shipped else 0:.3f}  "
+          f"({shipped} cars from confident pages, used without an LLM call)")
+    print(f"LLM fallback    : {total_pages - confident_pages} / {total_pages} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark: per-node state merge cost, full-state echo vs minimal delta.
+
+Builds a CarAnalysisState holding 50 accumulated car reports (nested market /
+RAG payloads, per-car dbg_logs and agent_logs) and applies node updates the
+way LangGraph does: each returned key goes through its reducer (``append_list``,
+``merge_dict``, ``bounded_log``) or replaces the value.  Three variants are
+timed for the nodes touched by the echo cleanup:
+
+* ``echo/append_list`` - the old ``{**state, ...}`` returns with the old list
+  reducer (logs and car_reports re-appended on every step);
+* ``echo/bounded_log`` - the old returns against today's log channel;
+* ``delta``            - the minimal updates the nodes return now.
+
+Usage:
+  python -m car_analysis.tests.bench_state_merge --cars 50 --steps 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import typing
+from typing import Any, Callable, Dict
+
+from car_analysis.core.log_channel import BoundedLog
+from car_analysis.core.models import CarAnalysisState, append_list
+
+
+def _reducers(log_reducer: Callable | None = None) -> Dict[str, Callable]:
+    hints = typing.get_type_hints(CarAnalysisState, include_extras=True)
+    reducers = {}
+    for key, hint in hints.items():
+        metadata = getattr(hint, "__metadata__", ())
+        if metadata:
+            reducers[key] = metadata[0]
+    if log_reducer is not None:
+        reducers["dbg_logs"] = reducers["agent_logs"] = log_reducer
+    return reducers
+
+
+def _merge(state: Dict[str, Any], update: Dict[str, Any], reducers: Dict[str, Callable]) -> None:
+    for key, value in update.items():
+        reducer = reducers.get(key)
+        state[key] = reducer(state.get(key), value) if reducer else value
+
+
+def _car_report(i: int) -> Dict[str, Any]:
+    comps = [{"title": f"listing {j}", "price": 18000 + 37 * j, "mileage": 30000 + 411 * j,
+              "url": f"https://example.com/{i}/{j}"} for j in range(20)]
+    return {
+        "car": {"index": i, "year": 2015 + i % 8, "make": "Toyota", "model": "Camry",
+                "mileage": 40000 + i * 900, "price_paid": 19000 + i * 120},
+        "market_analysis": {"success": True, "market_median": 20500, "comps": comps},
+        "deal_score": {"success": True, "score": 40 + i % 50, "verdict": "Fair Deal"},
+        "llm_opinion": {"score": 45 + i % 40, "verdict": "Fair", "reasoning": "x" * 600},
+        "rag_insights": {"vector": {"similar_cases": [{"text": "case " * 60}] * 5}},
+        "summary": {"analysis_text": "summary " * 120},
+        "analysis_status": {"success": True, "errors": [], "error_count": 0},
+    }
+
+
+def _state(cars: int, log_channel: bool) -> Dict[str, Any]:
+    dbg = [f"[car {i}] step {k}" for i in range(cars) for k in range(30)]
+    agent = [{"timestamp": "2025-01-01T00:00:00Z", "agent": f"agent_{k}", "event": "complete",
+              "message": "complete", "payload": {"car": i}} for i in range(cars) for k in range(10)]
+    state: Dict[str, Any] = {
+        "current_car": _car_report(cars)["car"],
+        "car_reports": [_car_report(i) for i in range(cars)],
+        "retries": {"price_research": 1},
+        "analysis_errors": [],
+        "price_research": {"success": True, "sample_count": 12},
+        "price_comparison": {"success": True, "verdict_category": "Fair Deal", "price_paid": 21000,
+                             "market_median": 20500},
+        "deal_score": {"success": True, "score": 61, "verdict": "Fair Deal"},
+        "llm_opinion": {"score": 58, "verdict": "Fair", "reasoning": "x" * 600},
+        "market_analysis": _car_report(cars)["market_analysis"],
+        "rag_insights": _car_report(cars)["rag_insights"],
+        "summary_report": _car_report(cars)["summary"],
+    }
+    if log_channel:
+        spill_dir = tempfile.mkdtemp(prefix="bench_state_merge_")
+        state["dbg_logs"] = BoundedLog(dbg, channel="dbg_logs", run_id="bench", spill_dir=spill_dir)
+        state["agent_logs"] = BoundedLog(agent, channel="agent_logs", run_id="bench", spill_dir=spill_dir)
+    else:
+        state["dbg_logs"], state["agent_logs"] = dbg, agent
+    return state
+
+
+# Minimal updates of the nodes that used to echo the whole state
+DELTAS = {
+    "llm_opinion_worker": lambda: {"llm_opinion": {"score": 58, "verdict": "Fair", "reasoning": "ok"},
+                                   "dbg_logs": ["LLM opinion: 58/100 - Fair"]},
+    "price_research_checker": lambda: {"research_ok": True, "dbg_logs": ["Price research validation passed"]},
+    "join_scores": lambda: {"awaiting_scores": False, "dbg_logs": ["Both scoring branches present"]},
+    "score_disagreement_checker": lambda: {"awaiting_scores": False, "llm_retry": False,
+                                           "score_disagree_retry": False},
+    "save_analysis_to_database": lambda: {"database_queued": True, "database_journal_seq": 1},
+}
+
+
+def _time_node(cars: int, steps: int, make_update: Callable[[], Dict[str, Any]], echo: bool,
+               log_channel: bool) -> tuple:
+    reducers = _reducers(None if log_channel else append_list)
+    state = _state(cars, log_channel)
+    base = {key: state[key] for key in ("dbg_logs", "agent_logs", "car_reports")}
+    elapsed = 0.0
+    added = 0
+    for _ in range(steps):
+        before = len(state["dbg_logs"]) + state["dbg_logs"].spilled if log_channel else len(state["dbg_logs"])
+        delta = make_update()
+        update = {**state, **delta} if echo else delta
+        t0 = time.perf_counter()
+        _merge(state, update, reducers)
+        elapsed += time.perf_counter() - t0
+        after = len(state["dbg_logs"]) + state["dbg_logs"].spilled if log_channel else len(state["dbg_logs"])
+        added += after - before
+        # An echo through append_list doubles the list every step; measure each
+        # merge against the same accumulated state instead of letting it explode
+        state["car_reports"] = base["car_reports"]
+        if not log_channel:
+            state["dbg_logs"], state["agent_logs"] = base["dbg_logs"], base["agent_logs"]
+    return elapsed / steps * 1e6, added / steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="State merge cost benchmark")
+    parser.add_argument("--cars", type=int, default=50, help="Accumulated car reports in state")
+    parser.add_argument("--steps", type=int, default=200, help="Node invocations per variant")
+    args = parser.parse_args()
+
+    variants = [("echo/append_list", True, False), ("echo/bounded_log", True, True), ("delta", False, True)]
+    print(f"state: {args.cars} car reports, {args.steps} invocations per node")
+    print(f"{'node':28s} " + " ".join(f"{name:>26s}" for name, _, _ in variants))
+    for node, make_update in DELTAS.items():
+        cells = []
+        for _, echo, log_channel in variants:
+            us, added = _time_node(args.cars, args.steps, make_update, echo, log_channel)
+            cells.append(f"{us:9.1f}us +{added:6.0f} logs")
+        print(f"{node:28s} " + " ".join(f"{c:>26s}" for c in cells))
+    print("(mean time per merge; '+N logs' = dbg_logs entries added per merge)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Tests for the semantic answer cache and its use in RAGSystem.answer_question.
+
+Usage:
+  python -m pytest car_analysis/tests/test_answer_cache.py -q
+"""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from car_analysis.rag.answer_cache import SemanticAnswerCache, normalize_question
+
+V1 = (("knowledge", 0, 10),)
+V2 = (("knowledge", 1, 11),)
+
+
+def _result(text):
+    return {"answer": text, "retrieved_info": "info", "confidence": 0.5}
+
+
+def test_semantic_hit_above_threshold_only():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store("Is a 2019 Civic at $18k fair?", [1.0, 0.0, 0.0], V1, _result("yes"))
+    assert cache.lookup([0.95, 0.2, 0.0], V1)["answer"] == "yes"   # cos ~0.98
+    assert cache.lookup([0.6, 0.8, 0.0], V1) is None               # cos 0.6
+    assert cache.lookup([0.0, 0.0, 0.0], V1) is None               # failed embedding
+    assert cache.stats["semantic_hits"] == 1 and cache.stats["misses"] == 2
+
+
+def test_exact_match_skips_embedding_and_normalizes():
+    cache = SemanticAnswerCache()
+    cache.store("What matters for Civic resale?", [0.0, 1.0], V1, _result("mileage"))
+    assert normalize_question("  what matters for  CIVIC resale？ ") == "what matters for civic resale"
+    assert cache.get_exact("what matters for civic resale", V1)["answer"] == "mileage"
+    assert cache.get_exact("what matters for accord resale", V1) is None
+
+
+def test_version_change_invalidates_entries():
+    cache = SemanticAnswerCache()
+    cache.store("q", [1.0, 0.0], V1, _result("old"))
+    assert cache.lookup([1.0, 0.0], V2) is None
+    assert len(cache) == 0 and cache.stats["invalidated"] == 1
+
+
+def test_lru_and_ttl_eviction():
+    cache = SemanticAnswerCache(max_entries=2, ttl=600)
+    cache.store("a", [1.0, 0.0, 0.0], V1, _result("a"))
+    cache.store("b", [0.0, 1.0, 0.0], V1, _result("b"))
+    assert cache.get_exact("a", V1)                 # a becomes most recent
+    cache.store("c", [0.0, 0.0, 1.0], V1, _result("c"))
+    assert cache.get_exact("b", V1) is None
+    assert cache.get_exact("a", V1) and cache.get_exact("c", V1)
+
+    cache.ttl = 0.0
+    time.sleep(0.001)
+    assert cache.lookup([1.0, 0.0, 0.0], V1) is None
+    assert len(cache) == 0
+
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from car_analysis.rag import rag_system as rag_module  # noqa: E402
+
+
+class _Store:
+    """Vector / embedding stand-in: paraphrases of the same question share a direction."""
+
+    def __init__(self):
+        self.version = 0
+        self.searches = 0
+
+    def embed_text(self, text):
+        text = text.lower()
+        return [1.0 if "civic" in text else 0.0, 1.0 if "accord" in text else 0.0, 0.2]
+
+    def collection_version(self, collections):
+        return (("knowledge", self.version, 3),)
+
+    def semantic_search(self, query_text, collections=None, limit=5, query_embedding=None):
+        self.searches += 1
+        return {"knowledge": [{"id": "k1", "document": "Civic resale holds well.",
+                               "metadata": {"type": "knowledge", "title": "Civic"}, "similarity": 0.8}]}
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    calls = []
+
+    def invoke(prompt):
+        calls.append(prompt)
+        time.sleep(0.05)
+        return AIMessage(content=f"reply {len(calls)}")
+
+    monkeypatch.setattr(rag_module, "ChatOpenAI", lambda **kwargs: RunnableLambda(invoke))
+    monkeypatch.setattr(rag_module, "GraphService", lambda: (_ for _ in ()).throw(RuntimeError("no graph")))
+    store = _Store()
+    system = rag_module.RAGSystem(db_manager=store, vector_manager=store, embedding_manager=store)
+    return system, store, calls
+
+
+def test_answer_question_reuses_answer_for_paraphrase(rag):
+    system, store, calls = rag
+    first = system.answer_question("Is the Civic a good resale car?")
+    assert "cached" not in first and len(calls) == 1
+
+    start = time.perf_counter()
+    again = system.answer_question("Does a Civic hold resale value well?")
+    assert (time.perf_counter() - start) < 0.01
+    assert again["cached"] and again["answer"] == first["answer"]
+    assert len(calls) == 1 and store.searches == 1
+
+    other = system.answer_question("Is the Accord a good resale car?")
+    assert "cached" not in other and len(calls) == 2
+
+
+def test_answer_question_recomputes_after_knowledge_changes(rag):
+    system, store, calls = rag
+    system.answer_question("Is the Civic a good resale car?")
+    store.version += 1
+    refreshed = system.answer_question("Is the Civic a good resale car?")
+    assert "cached" not in refreshed and len(calls) == 2
@@ -0,0 +1,120 @@
+"""Parity tests for the vectorized scoring engine and the rescore CLI.
+
+Usage:
+  python -m pytest car_analysis/tests/test_batch_scoring.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import itertools
+from datetime import datetime
+
+import pytest
+
+from car_analysis.core import workers
+from car_analysis.core.batch_scoring import compare_prices, score_deals
+from car_analysis.database.manager import DatabaseManager
+from car_analysis.database.models import CarAnalysis
+from car_analysis.utils.rescore_analyses import rescore_database
+
+MEDIAN = 20000.0
+PRICE_RANGE = {"min": 16000.0, "max": 26000.0}
+# Prices hitting every comparison and price-delta band edge (±1 dollar around each)
+PRICES = sorted({MEDIAN * (1 + pct / 100) + d
+                 for pct in (-25, -20, -10, -5, 0, 5, 15, 20)
+                 for d in (-1, 0, 1)} | {MEDIAN * r for r in (0.95, 1.05, 1.15)} | {15000.0, 16000.0})
+YEARS_AGO = (0, 3, 4, 9, 10, 15)
+MILEAGE_OFFSETS = (-20000, -10000, 10000, 30000, -20001, 30001, 0)
+DATA = (("tavily_real_web_search", 10), ("tavily_real_web_search", 9), ("market_prior", 25), ("used_cars_csv", 50))
+
+
+def _run_workers(car, research):
+    state = {"current_car": car, "price_research": research}
+    with contextlib.redirect_stdout(io.StringIO()):
+        state.update(asyncio.run(workers.price_comparison_worker(state)))
+        state.update(asyncio.run(workers.deal_scoring_worker(state)))
+    return state["price_comparison"], state["deal_score"]
+
+
+def _grid():
+    now = datetime.now().year
+    for price, ago, offset, (method, samples) in itertools.product(PRICES, YEARS_AGO, MILEAGE_OFFSETS, DATA):
+        year = now - ago
+        car = {"make": "Kia", "model": "Sorento", "year": year,
+               "mileage": max(0, ago * 12000 + offset), "price_paid": price}
+        research = {"success": True, "median_price": MEDIAN, "price_range": PRICE_RANGE,
+                    "sample_count": samples, "search_method": method}
+        yield car, research
+
+
+def test_batch_engine_matches_per_car_workers():
+    cases = list(_grid())
+    cars = [c for c, _ in cases]
+    research = [r for _, r in cases]
+    comparison = compare_prices([c["price_paid"] for c in cars], [MEDIAN] * len(cars),
+                                [PRICE_RANGE["min"]] * len(cars), [PRICE_RANGE["max"]] * len(cars))
+    scores = score_deals(comparison["price_delta_pct"], [c["mileage"] for c in cars], [c["year"] for c in cars],
+                         [r["sample_count"] for r in research], [r["search_method"] for r in research],
+                         current_year=datetime.now().year)
+
+    # Workers print and hit no network for this input; run a stride of the grid to keep it quick
+    for i in range(0, len(cases), 7):
+        expected_cmp, expected_score = _run_workers(*cases[i])
+        assert comparison["price_delta"][i] == expected_cmp["price_delta"]
+        assert comparison["price_delta_pct"][i] == expected_cmp["price_delta_pct"]
+        assert comparison["verdict_category"][i] == expected_cmp["verdict_category"]
+        assert comparison["percentile"][i] == expected_cmp["market_position"]["percentile"]
+        assert scores["score"][i] == expected_score["score"]
+        assert scores["verdict"][i] == expected_score["verdict"]
+        assert scores["data_quality_bonus"][i] == expected_score["scoring_breakdown"]["data_quality_bonus"]
+
+    # The grid exercises every verdict and comparison category
+    assert len(set(scores["verdict"])) == 5
+    assert len(set(comparison["verdict_category"])) == 5
+
+
+def test_missing_values_use_worker_defaults():
+    comparison = compare_prices([18000.0, 5000.0], [0.0, None])
+    assert comparison["price_delta_pct"].tolist() == [0.0, 0.0]
+    scores = score_deals([None, -30.0], [None, 1000], [None, 2024], current_year=2025)
+    # default mileage 100000 / year 2010 -> age 15, mileage delta -80000; second row clamps at 100
+    assert scores["score"].tolist() == [50 + 10 + 15 - 5, 100]
+    assert scores["data_quality_bonus"].tolist() == [0, 0]
+
+
+def test_rescore_cli_updates_stored_analyses(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "db" / "rescore.db"))
+    year = datetime.now().year - 5
+    records = [
+        {"car": {"make": "Kia", "model": "Sorento", "year": year, "mileage": 60000, "price_paid": 15500.0},
+         "analysis": {"market_median_price": MEDIAN, "data_source": "tavily_real_web_search",
+                      "comparable_count": 12, "price_range": PRICE_RANGE, "deal_category": "stale",
+                      "rule_based_score": 1}},
+        {"car": {"make": "Kia", "model": "Sorento", "year": year, "mileage": 60000, "price_paid": 23500.0},
+         "analysis": {"market_median_price": MEDIAN, "data_source": "car_prices_csv",
+                      "deal_category": "Overpriced"}},
+        {"car": {"make": "Kia", "model": "Sorento", "year": year, "mileage": 60000, "price_paid": 9000.0},
+         "analysis": {"market_median_price": None, "data_source": "used_cars_csv"}},  # nothing to score
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        saved = db.save_analysis_records(records)
+
+    assert rescore_database(db, chunk_size=1, dry_run=True)["rescored"] == 2
+    result = rescore_database(db, chunk_size=1)
+    assert result["rescored"] == 2
+
+    with db.get_session() as session:
+        rows = {a.id: a for a in session.query(CarAnalysis)}
+    graph_row, sale_row, listing_row = (rows[s["analysis_id"]] for s in saved)
+
+    # below price_range.min: 50 + 40 (-22.5%) + 5 (mileage on track) + 10 (12 Tavily comps)
+    assert graph_row.rule_based_score == 100 and graph_row.rule_based_verdict == "Exceptional Deal ⭐⭐⭐"
+    assert graph_row.deal_category == "Exceptional Deal"
+    assert graph_row.price_delta_percent == pytest.approx(-22.5)
+    # +17.5% over MMR: 50 - 30 + 5 = 25; ingest category kept
+    assert sale_row.rule_based_score == 25 and sale_row.rule_based_verdict == "Bad Deal ❌"
+    assert sale_row.deal_category == "Overpriced"
+    assert listing_row.rule_based_score is None
@@ -0,0 +1,192 @@
+"""Tests for the async CarsXE client (retries, circuit breaker, latency histograms).
+
+Usage:
+  python -m pytest car_analysis/tests/test_carsxe_async.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from car_analysis.tools.carsxe_api import AsyncCarsXEClient, CarsXEUnavailable  # noqa: E402
+from car_analysis.tools.resilience import CircuitBreaker, LatencyHistogram  # noqa: E402
+
+
+@pytest.fixture
+def scripted_stub():
+    """Stub server replying with a scripted list of status codes (then 200)."""
+
+    script = []
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            hits.append(self.path)
+            status = script.pop(0) if script else 200
+            body = json.dumps({"average_market_price": 20000} if status == 200 else {"error": status}).encode()
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", script, hits
+    server.shutdown()
+
+
+def _client(base_url, **kwargs):
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_cap", 0.01)
+    return AsyncCarsXEClient(api_key="test", base_url=base_url, **kwargs)
+
+
+async def _lookup(client):
+    try:
+        return await client.fetch_market_value_by_trim(make="Toyota", model="Camry", year=2019, mileage=30000)
+    finally:
+        await client.aclose()
+
+
+def test_retries_429_and_5xx_then_succeeds(scripted_stub):
+    base_url, script, hits = scripted_stub
+    script.extend([429, 503, 500])
+    client = _client(base_url, max_retries=3)
+
+    assert asyncio.run(_lookup(client)) == {"average_market_price": 20000}
+    assert len(hits) == 4
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.latency_snapshot()["/v1/ymm"]["count"] == 4
+
+
+def test_client_errors_are_not_retried(scripted_stub):
+    base_url, script, hits = scripted_stub
+    script.append(404)
+    client = _client(base_url)
+
+    with pytest.raises(RuntimeError, match="404"):
+        asyncio.run(_lookup(client))
+    assert len(hits) == 1
+    assert client.breaker.failures == 0
+
+
+def test_breaker_opens_and_short_circuits(scripted_stub):
+    base_url, script, hits = scripted_stub
+    script.extend([503] * 4)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = _client(base_url, max_retries=1, breaker=breaker)
+
+    async def run():
+        errors = []
+        for _ in range(3):
+            try:
+                await client.fetch_market_value_by_trim(make="Honda", model="Civic", year=2020)
+            except Exception as exc:
+                errors.append(exc)
+        await client.aclose()
+        return errors
+
+    errors = asyncio.run(run())
+    assert len(hits) == 4  # two calls x (1 try + 1 retry); the third never reaches the server
+    assert breaker.state == CircuitBreaker.OPEN
+    assert isinstance(errors[-1], CarsXEUnavailable)
+
+    # After the cooldown a single probe is admitted and closes the breaker
+    breaker.reset_timeout = 0
+    assert asyncio.run(_lookup(client)) == {"average_market_price": 20000}
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def _half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_failed_or_cancelled_probe_frees_the_breaker(scripted_stub, monkeypatch):
+    base_url, _, _ = scripted_stub
+    breaker = _half_open_breaker()
+    client = _client(base_url, breaker=breaker)
+
+    async def broken_get(self, url, **kwargs):
+        raise ValueError("unexpected")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", broken_get)
+    with pytest.raises(ValueError):
+        asyncio.run(_lookup(client))
+    assert breaker.failures == 2 and not breaker._probing
+
+    async def hanging_get(self, url, **kwargs):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", hanging_get)
+
+    async def cancel_probe():
+        task = asyncio.create_task(_lookup(client))
+        await asyncio.sleep(0.01)
+        assert breaker._probing
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    assert breaker.failures == 2 and not breaker._probing
+    assert breaker.allow()
+
+
+def test_client_from_previous_loop_is_closed(scripted_stub):
+    base_url, _, _ = scripted_stub
+    client = _client(base_url)
+
+    async def lookup():
+        await client.fetch_market_value_by_trim(make="Toyota", model="Camry", year=2019)
+        return client._http
+
+    first = asyncio.run(lookup())
+    second = asyncio.run(lookup())
+    assert first is not second
+    assert first.is_closed and not second.is_closed
+    asyncio.run(client.aclose())
+
+
+def test_latency_histogram_buckets():
+    hist = LatencyHistogram(buckets_ms=(10, 100))
+    for seconds in (0.005, 0.05, 0.05, 0.5):
+        hist.observe(seconds)
+    snap = hist.snapshot()
+    assert snap["count"] == 4
+    assert snap["buckets"] == {"<=10ms": 1, "<=100ms": 2, ">100ms": 1}
+    assert snap["p50_ms"] == 100.0
+    assert snap["p95_ms"] == pytest.approx(500.0)
+
+
+def test_seed_lookup_awaits_async_client(scripted_stub):
+    from car_analysis.utils.seed_carsxe_data import CarsXELookup
+
+    base_url, _, hits = scripted_stub
+    lookup = CarsXELookup(_client(base_url))
+
+    async def run():
+        results = await asyncio.gather(*[
+            lookup.fetch(make="Toyota", model="Camry", year=2019, mileage=31000 + i * 1000) for i in range(5)
+        ])
+        await lookup.client.aclose()
+        return results
+
+    assert asyncio.run(run()) == [{"average_market_price": 20000}] * 5
+    assert lookup.api_calls == len(hits) == 1
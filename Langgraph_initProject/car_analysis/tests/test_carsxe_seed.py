@@ -0,0 +1,150 @@
+"""Tests for concurrent CarsXE seeding against a local HTTP stub.
+
+Usage:
+  python -m pytest car_analysis/tests/test_carsxe_seed.py -q
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from car_analysis.database.manager import DatabaseManager
+from car_analysis.tools.carsxe_api import CarsXEClient
+from car_analysis.utils.seed_carsxe_data import seed_from_csv, ymm_cache_key
+
+
+class _StubVectors:
+    def __init__(self):
+        self.cars = []
+
+    def add_cars_batch(self, rows):
+        self.cars.extend(rows)
+        return len(rows)
+
+    def add_analyses_batch(self, rows):
+        return len(rows)
+
+    def add_knowledge_batch(self, rows):
+        return len(rows)
+
+
+@pytest.fixture
+def carsxe_stub():
+    requests_seen = []
+    failing_makes = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            requests_seen.append(query)
+            if query.get("make", "").lower() in failing_makes:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps({"average_market_price": 20000 + int(query.get("mileage", 0)) // 100}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests_seen, failing_makes
+    server.shutdown()
+
+
+def _write_used_cars(path, rows):
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=["brand", "model", "model_year", "milage", "price", "engine"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+ROWS = [
+    # Same year/make/model/mileage bucket -> one API call
+    {"brand": "Toyota", "model": "Camry", "model_year": "2019", "milage": "31,000 mi.", "price": "$18,000"},
+    {"brand": "toyota", "model": "camry", "model_year": "2019", "milage": "38,500 mi.", "price": "$17,500"},
+    {"brand": "Toyota", "model": "Camry", "model_year": "2019", "milage": "35,000 mi.", "price": "$19,900"},
+    # Different bucket / model
+    {"brand": "Toyota", "model": "Camry", "model_year": "2019", "milage": "61,000 mi.", "price": "$15,000"},
+    {"brand": "Honda", "model": "Civic", "model_year": "2020", "milage": "12,000 mi.", "price": "$21,000"},
+    {"brand": "Honda", "model": "Civic", "model_year": "2020", "milage": "14,000 mi.", "price": "$20,500"},
+]
+
+
+def test_ymm_cache_key_buckets_mileage():
+    key, mileage = ymm_cache_key(2019, " Toyota", "Camry ", 31000, 10000)
+    assert key == "carsxe:ymm:2019:toyota:camry:3"
+    assert mileage == 35000
+    assert ymm_cache_key(2019, "Toyota", "Camry", None, 10000) == ("carsxe:ymm:2019:toyota:camry:na", None)
+
+
+def test_concurrent_seed_dedupes_lookups_and_persists_cache(tmp_path, carsxe_stub):
+    base_url, seen, _ = carsxe_stub
+    client = CarsXEClient(api_key="test", base_url=base_url)
+    cache_path = str(tmp_path / "carsxe_cache.db")
+    csv_path = tmp_path / "used_cars.csv"
+    _write_used_cars(csv_path, ROWS)
+
+    db = DatabaseManager(db_path=str(tmp_path / "db" / "seed.db"))
+    vectors = _StubVectors()
+    counts = seed_from_csv(
+        csv_path, limit=100, offset=0, workers=4, rps=200,
+        cache_path=cache_path, client=client, db_manager=db, vector_manager=vectors,
+    )
+
+    assert counts["successes"] == len(ROWS)
+    assert counts["api_calls"] == len(seen) == 3
+    assert db.get_stats()["total_cars"] == len(ROWS)
+    assert len(vectors.cars) == len(ROWS)
+
+    # A fresh database with the same cache path costs no API calls
+    other_db = DatabaseManager(db_path=str(tmp_path / "db" / "other.db"))
+    counts = seed_from_csv(
+        csv_path, limit=100, offset=0, workers=2, rps=200,
+        cache_path=cache_path, client=client, db_manager=other_db, vector_manager=_StubVectors(),
+    )
+    assert counts["api_calls"] == 0
+    assert len(seen) == 3
+
+    # Re-running against the first database resumes past every row
+    counts = seed_from_csv(
+        csv_path, limit=100, offset=0, workers=2, rps=200,
+        cache_path=cache_path, client=client, db_manager=db, vector_manager=_StubVectors(),
+    )
+    assert counts["processed"] == 0
+    assert db.get_stats()["total_cars"] == len(ROWS)
+
+
+def test_failed_rows_hold_the_checkpoint_and_are_retried(tmp_path, carsxe_stub):
+    base_url, seen, failing_makes = carsxe_stub
+    client = CarsXEClient(api_key="test", base_url=base_url)
+    csv_path = tmp_path / "used_cars.csv"
+    _write_used_cars(csv_path, ROWS)
+    db = DatabaseManager(db_path=str(tmp_path / "db" / "seed.db"))
+    options = dict(limit=100, offset=0, workers=3, rps=200, cache_path=str(tmp_path / "cache.db"),
+                   client=client, db_manager=db)
+
+    failing_makes.add("honda")  # CarsXE errors for the last two rows
+    counts = seed_from_csv(csv_path, vector_manager=_StubVectors(), **options)
+    assert counts["successes"] == 4 and counts["failures"] == 2
+    checkpoint = db.get_ingest_checkpoint(str(csv_path.resolve()), "carsxe_seed")
+    assert checkpoint["committed_row"] == checkpoint["embedded_row"] == 4
+
+    failing_makes.clear()
+    counts = seed_from_csv(csv_path, vector_manager=_StubVectors(), **options)
+    assert counts["processed"] == 2 and counts["successes"] == 2
+    assert db.get_stats()["total_cars"] == len(ROWS)
+    assert db.get_ingest_checkpoint(str(csv_path.resolve()), "carsxe_seed")["embedded_row"] == len(ROWS)
@@ -0,0 +1,94 @@
+"""Tests for the single-car graph's fan-out / join barrier.
+
+Usage:
+  python -m pytest car_analysis/tests/test_graph_fanin.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from car_analysis.core import graph  # noqa: E402
+
+
+# Node name in the graph -> (module attribute, state key written, delay seconds)
+FAKE_AGENTS = {
+    "condition_agent": ("condition_agent", "condition_report", 0.0),
+    "market_agent": ("market_price_agent", "market_analysis", 0.12),
+    "residual_agent": ("residual_value_agent", "residual_analysis", 0.02),
+    "news_agent": ("news_policy_agent", "news_analysis", 0.05),
+    "carsxe_agent": ("carsxe_agent", "rag_insights", 0.01),
+    "early_rag_agent": ("early_rag_agent", "early_rag", 0.03),
+    "rag_retrieval_agent": ("rag_retrieval_agent", "rag_context", 0.02),
+    "rag_agent": ("rag_vector_agent", "rag_insights", 0.05),
+    "summary_agent": ("summary_agent", "summary_report", 0.0),
+}
+
+
+@pytest.fixture
+def counted_graph(monkeypatch):
+    calls = Counter()
+    seen_by_consistency = {}
+    spans = {}
+
+    def fake(name, key, delay):
+        async def node(state):
+            calls[name] += 1
+            start = time.perf_counter()
+            await asyncio.sleep(delay)
+            spans[name] = (start, time.perf_counter())
+            return {key: {name: True}, "dbg_logs": [f"{name} done"]}
+        return node
+
+    for name, (attr, key, delay) in FAKE_AGENTS.items():
+        monkeypatch.setattr(graph, attr, fake(name, key, delay))
+
+    async def consistency(state):
+        calls["consistency_agent"] += 1
+        start = time.perf_counter()
+        seen_by_consistency.update({k: state.get(k) for k in (
+            "market_analysis", "residual_analysis", "news_analysis", "rag_insights", "early_rag", "rag_context")})
+        await asyncio.sleep(0.05)
+        spans["consistency_agent"] = (start, time.perf_counter())
+        return {"consistency_report": {"issue_count": 0}}
+
+    async def save(state):
+        calls["save_to_database"] += 1
+        return {}
+
+    async def report(state):
+        calls["generate_report"] += 1
+        return {"car_reports": [{"car": state.get("current_car")}]}
+
+    monkeypatch.setattr(graph, "consistency_agent", consistency)
+    monkeypatch.setattr(graph, "save_analysis_to_database", save)
+    monkeypatch.setattr(graph, "aggregate_car_reports", report)
+    return graph.build_single_car_graph(), calls, seen_by_consistency, spans
+
+
+def test_every_agent_runs_exactly_once(counted_graph):
+    workflow, calls, seen, spans = counted_graph
+    final = asyncio.run(workflow.ainvoke({"current_car": {"make": "Toyota"}, "retries": {}}))
+
+    expected = set(FAKE_AGENTS) | {"consistency_agent", "save_to_database", "generate_report"}
+    assert set(calls) == expected
+    assert all(count == 1 for count in calls.values()), calls
+
+    # The barrier released consistency only after the slowest branch (market) finished
+    assert seen["market_analysis"] == {"market_agent": True}
+    assert seen["rag_insights"] == {"carsxe_agent": True}
+    assert seen["early_rag"] == {"early_rag_agent": True}
+    assert seen["rag_context"] == {"rag_retrieval_agent": True}
+    assert final["consistency_report"] == {"issue_count": 0}
+    assert len(final["car_reports"]) == 1
+
+    # RAG generation runs alongside consistency, and summary waits for both
+    rag, consistency, summary = spans["rag_agent"], spans["consistency_agent"], spans["summary_agent"]
+    assert rag[0] < consistency[1] and consistency[0] < rag[1]
+    assert summary[0] >= max(rag[1], consistency[1])
@@ -0,0 +1,174 @@
+"""Parity tests for the columnar (pandas) CSV ingestion path.
+
+Usage:
+  python -m pytest car_analysis/tests/test_ingest_columnar.py -q
+"""
+
+from __future__ import annotations
+
+import csv
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from car_analysis.database.manager import DatabaseManager  # noqa: E402
+from car_analysis.database.models import Car, CarAnalysis, KnowledgeBase  # noqa: E402
+from car_analysis.utils.ingest_columnar import (  # noqa: E402
+    COLUMNAR_PARSERS,
+    clean_numeric,
+    deal_category_array,
+    read_frames,
+)
+from car_analysis.utils.ingest_csv import (  # noqa: E402
+    _parse_float,
+    parse_car_prices_row,
+    parse_used_cars_data_row,
+    parse_used_cars_row,
+)
+from car_analysis.utils.ingest_pipeline import parse_chunk, read_chunks, run_ingest_pipeline  # noqa: E402
+
+
+ROWS = [
+    {"year": "2014", "make": "Kia", "model": "Sorento", "vin": "5xyktca69fg566472", "odometer": "16639", "mmr": "20500", "sellingprice": "21500"},
+    {"year": "2012", "make": "BMW", "model": "3 Series", "vin": "", "odometer": "1,331 mi.", "mmr": "$31,900", "sellingprice": "$27,500"},
+    {"year": "2015", "make": "Ford", "model": "Fusion", "vin": "x", "odometer": "", "mmr": "", "sellingprice": "9000"},
+    {"year": "bad", "make": "Ford", "model": "Focus", "vin": "y", "odometer": "5", "mmr": "100", "sellingprice": "100"},
+    {"year": "2013", "make": "Audi", "model": "A4", "vin": "z", "odometer": "20 miles", "mmr": "10000", "sellingprice": "10400"},
+    {"year": "2011", "make": "Nissan", "model": "Altima", "vin": "w", "odometer": "7", "mmr": "10000", "sellingprice": "10800"},
+    {"year": "2010", "make": "Honda", "model": "Civic", "vin": "v", "odometer": "7", "mmr": "10000", "sellingprice": "9600"},
+]
+
+USED_CARS_ROWS = [
+    {"brand": "Ford", "model": "Utility Police", "model_year": "2013", "milage": "51,000 mi.", "engine": "3.7L V6",
+     "ext_col": "Black", "accident": "At least 1 accident reported", "clean_title": "Yes", "price": "$10,300"},
+    {"brand": "Hyundai", "model": 'Palisade "SEL"', "model_year": "2021", "milage": "34,742 mi.",
+     "engine": "3.8L\tV6 / AWD", "ext_col": "Moonlight Cloud", "price": "$38,005"},
+    {"brand": "Kia", "model": "Soul", "model_year": "20x", "price": "$1"},
+]
+
+USED_CARS_DATA_ROWS = [
+    {"vin": "ZACNJABB5KPJ92081", "listing_id": "237132766", "year": "2019", "make_name": "Jeep",
+     "model_name": "Renegade", "mileage": "7", "price": "23141.0", "trim_name": "Latitude FWD",
+     "city": "Bayamon", "daysonmarket": "522", "seller_rating": "3.4470588235294117"},
+    {"year": " 2018 ", "make_name": "Land Rover", "model_name": "Discovery", "price": "46500.0",
+     "city": "San Juan", "seller_rating": "3.0"},
+]
+
+DATASETS = {
+    "car_prices": (parse_car_prices_row, ROWS),
+    "used_cars": (parse_used_cars_row, USED_CARS_ROWS),
+    "used_cars_data": (parse_used_cars_data_row, USED_CARS_DATA_ROWS),
+}
+
+
+def _write(path, rows=ROWS):
+    fields = list(dict.fromkeys(name for row in rows for name in row))
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+class _Vectors:
+    def __init__(self):
+        self.cars, self.analyses, self.knowledge = [], [], []
+
+    def add_cars_batch(self, rows):
+        self.cars.extend(rows)
+        return len(rows)
+
+    def add_analyses_batch(self, rows):
+        self.analyses.extend(rows)
+        return len(rows)
+
+    def add_knowledge_batch(self, rows):
+        self.knowledge.extend(rows)
+        return len(rows)
+
+
+def test_clean_numeric_matches_parse_float():
+    import pandas as pd
+
+    values = ["$1,234", "12 mi.", "7 miles", "", "  ", "abc", "3.5"]
+    cleaned = clean_numeric(pd.Series(values)).tolist()
+    for value, got in zip(values, cleaned):
+        expected = _parse_float(value)
+        assert (expected is None and got != got) or expected == got
+
+
+def test_deal_category_array_thresholds():
+    assert deal_category_array([-12, -5, -2, 4, 8, 20, float("nan")]).tolist() == [
+        "Exceptional Deal", "Good Deal", "Fair Deal", "Fair Deal",
+        "Slightly Overpriced", "Overpriced", None,
+    ]
+
+
+@pytest.mark.parametrize("dataset", DATASETS)
+def test_columnar_records_match_row_parser(tmp_path, dataset):
+    parse_row, rows = DATASETS[dataset]
+    path = tmp_path / f"{dataset}.csv"
+    _write(path, rows)
+
+    row_records = []
+    for chunk in read_chunks(path, limit=100, offset=0, batch_size=2):
+        row_records.extend(parse_chunk(parse_row, str(path), chunk))
+    col_records = []
+    for frame in read_frames(path, limit=100, offset=0, batch_size=2):
+        col_records.extend(COLUMNAR_PARSERS[dataset](str(path), frame).records())
+
+    assert row_records and len(col_records) == len(row_records)
+    for expected, got in zip(row_records, col_records):
+        assert got["analysis"] == pytest.approx(expected["analysis"])
+        assert got["knowledge"] == expected["knowledge"]
+        assert (got["row"], got["source_key"]) == (expected["row"], expected["source_key"])
+        # Every stored car column, raw_text included, is identical
+        for key, value in got["car"].items():
+            assert value == expected["car"].get(key), key
+
+
+def test_raw_text_matches_json_dumps(tmp_path):
+    path = tmp_path / "used_cars.csv"
+    _write(path, USED_CARS_ROWS)
+
+    (frame,) = read_frames(path, limit=100, offset=0, batch_size=100)
+    raw_text = COLUMNAR_PARSERS["used_cars"](str(path), frame).cars["raw_text"]
+
+    # The row path stores json.dumps of the csv row: unescaped "/", spaced separators
+    expected = [row["car"]["raw_text"] for row in parse_chunk(
+        parse_used_cars_row, str(path), next(read_chunks(path, limit=100, offset=0, batch_size=100)))]
+    assert raw_text == expected
+    assert '"engine": "3.8L\\tV6 / AWD"' in raw_text[1]
+
+
+def test_columnar_pipeline_writes_same_rows_as_row_path(tmp_path):
+    path = tmp_path / "car_prices.csv"
+    _write(path)
+
+    def ingest(db, **options):
+        return run_ingest_pipeline(
+            path, limit=100, offset=0, db_manager=db, vector_manager=_Vectors(), workers=1,
+            batch_size=3, dataset="car_prices", resume=False, **options,
+        )
+
+    row_db = DatabaseManager(str(tmp_path / "rows" / "cars.db"))
+    ingest(row_db, parse_row=parse_car_prices_row)
+    col_db = DatabaseManager(str(tmp_path / "columns" / "cars.db"))
+    report = ingest(col_db, reader=read_frames, chunk_parser=lambda frame: COLUMNAR_PARSERS["car_prices"](str(path), frame))
+
+    def stored(db):
+        with db.get_session() as session:
+            return (
+                [(c.make, c.model, c.year, c.mileage, c.price_paid, c.raw_text) for c in session.query(Car)],
+                [(a.car_id, a.deal_category, a.success, a.full_analysis_data) for a in session.query(CarAnalysis)],
+                [(k.title, k.content, k.tags) for k in session.query(KnowledgeBase)],
+            )
+
+    assert stored(col_db) == stored(row_db)
+    assert report.stages["embed"].rows == 6
+    assert col_db.get_market_prior("Kia", "Sorento", 2014, 16639, None)["sample_count"] == 1
+
+    # A rerun only finds duplicates
+    again = ingest(col_db, reader=read_frames, chunk_parser=lambda frame: COLUMNAR_PARSERS["car_prices"](str(path), frame))
+    assert again.stages["db"].skipped == 6 and again.stages["embed"].rows == 0
+    assert len(stored(col_db)[0]) == 6
@@ -0,0 +1,230 @@
+"""Tests for the staged CSV ingestion pipeline.
+
+Usage:
+  python -m pytest car_analysis/tests/test_ingest_pipeline.py -q
+"""
+
+from __future__ import annotations
+
+import csv
+
+import pytest
+
+from car_analysis.database.manager import DatabaseManager
+from car_analysis.utils.ingest_csv import parse_car_prices_row
+from car_analysis.utils.ingest_pipeline import natural_key, read_chunks, run_ingest_pipeline
+
+
+class _RecordingDB:
+    def __init__(self):
+        self.batches = []
+        self._next_id = 1
+
+    def save_analysis_records(self, records, checkpoint=None):
+        self.batches.append(len(records))
+        saved = []
+        for record in records:
+            saved.append({
+                "car_id": self._next_id,
+                "analysis_id": self._next_id,
+                "knowledge_id": self._next_id,
+                "car": record["car"],
+                "analysis": record["analysis"],
+            })
+            self._next_id += 1
+        return saved
+
+
+class _RecordingVectors:
+    def __init__(self, fail_after_batches=None):
+        self.cars = []
+        self.analyses = []
+        self.knowledge = []
+        self._batches = 0
+        self._fail_after = fail_after_batches
+
+    def add_cars_batch(self, rows):
+        self._batches += 1
+        if self._fail_after is not None and self._batches > self._fail_after:
+            raise RuntimeError("simulated crash")
+        self.cars.extend(rows)
+        return len(rows)
+
+    def add_analyses_batch(self, rows):
+        self.analyses.extend(rows)
+        return len(rows)
+
+    def add_knowledge_batch(self, rows):
+        self.knowledge.extend(rows)
+        return len(rows)
+
+
+def _write_car_prices(path, rows):
+    fields = ["year", "make", "model", "trim", "vin", "odometer", "sellingprice", "mmr", "saledate"]
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields)
+        writer.writeheader()
+        for i in range(rows):
+            writer.writerow({
+                "year": 2015 if i != 3 else "n/a",
+                "make": "Toyota",
+                "model": "Camry",
+                "trim": "LE",
+                "vin": f"VIN{i:05d}",
+                "odometer": 50000 + i,
+                "sellingprice": 9000,
+                "mmr": 10000,
+                "saledate": "2015-01-01",
+            })
+
+
+def test_read_chunks_honours_offset_and_limit(tmp_path):
+    csv_path = tmp_path / "car_prices.csv"
+    _write_car_prices(csv_path, 20)
+
+    chunks = list(read_chunks(csv_path, limit=7, offset=5, batch_size=3))
+
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert [idx for chunk in chunks for idx, _ in chunk] == list(range(5, 12))
+
+
+def test_parse_car_prices_row_matches_mmr_rules():
+    record = parse_car_prices_row(
+        0,
+        {"year": "2015", "make": "Toyota", "model": "Camry", "sellingprice": "9,000", "mmr": "10000"},
+        "car_prices.csv",
+    )
+
+    assert record["analysis"]["price_delta"] == -1000
+    assert record["analysis"]["deal_category"] == "Exceptional Deal"
+    assert record["knowledge"]["reliability_score"] == 0.7
+    assert parse_car_prices_row(1, {"year": "n/a"}, "car_prices.csv") is None
+
+
+def test_pipeline_batches_db_and_vector_writes(tmp_path):
+    csv_path = tmp_path / "car_prices.csv"
+    _write_car_prices(csv_path, 25)
+    db, vectors = _RecordingDB(), _RecordingVectors()
+
+    report = run_ingest_pipeline(
+        csv_path,
+        parse_row=parse_car_prices_row,
+        limit=25,
+        offset=0,
+        db_manager=db,
+        vector_manager=vectors,
+        workers=2,
+        batch_size=10,
+    )
+
+    # Row 3 has an invalid year and is dropped during parsing
+    assert sum(db.batches) == 24
+    assert len(db.batches) == 3
+    assert len(vectors.cars) == len(vectors.analyses) == len(vectors.knowledge) == 24
+    assert report.stages["read"].rows == 25
+    assert report.stages["embed"].rows == 24
+
+
+def test_natural_key_prefers_identity_columns():
+    row = {"vin": "abc123", "saledate": "2015-01-01", "mmr": "100"}
+    assert natural_key("car_prices", row, ("vin", "saledate")) == "car_prices:ABC123|2015-01-01"
+    hashed = natural_key("car_prices", {**row, "vin": ""}, ("vin", "saledate"))
+    assert hashed.startswith("car_prices:sha1:")
+    assert hashed == natural_key("car_prices", {"mmr": "100", "saledate": "2015-01-01", "vin": ""})
+
+
+def test_resume_after_crash_is_exactly_once(tmp_path):
+    csv_path = tmp_path / "car_prices.csv"
+    _write_car_prices(csv_path, 40)
+    db = DatabaseManager(db_path=str(tmp_path / "db" / "ingest.db"))
+    options = dict(
+        parse_row=parse_car_prices_row, limit=40, offset=0, db_manager=db,
+        workers=1, batch_size=10, dataset="car_prices",
+    )
+
+    # Crash while embedding the second chunk: later chunks may already be committed
+    crashed = _RecordingVectors(fail_after_batches=1)
+    with pytest.raises(RuntimeError):
+        run_ingest_pipeline(csv_path, vector_manager=crashed, **options)
+    checkpoint = db.get_ingest_checkpoint(str(csv_path.resolve()), "car_prices")
+    assert checkpoint["embedded_row"] == 10
+    assert checkpoint["committed_row"] >= 20
+
+    resumed = _RecordingVectors()
+    report = run_ingest_pipeline(csv_path, vector_manager=resumed, **options)
+
+    # 39 valid rows (row 3 has a bad year), each inserted exactly once
+    assert db.get_stats()["total_cars"] == 39
+    embedded_ids = {car_id for car_id, _ in crashed.cars + resumed.cars}
+    assert len(embedded_ids) == 39
+    assert report.stages["read"].rows == 30  # resumed at row 10
+
+    # A third run has nothing left to read
+    again = _RecordingVectors()
+    run_ingest_pipeline(csv_path, vector_manager=again, **options)
+    assert again.cars == []
+    assert db.get_stats()["total_cars"] == 39
+
+
+class _SwallowingVectors(_RecordingVectors):
+    """Reports 0 rows written, like VectorStoreManager when Chroma is down."""
+
+    def add_cars_batch(self, rows):
+        return 0
+
+
+def test_swallowed_vector_failure_is_not_checkpointed(tmp_path):
+    csv_path = tmp_path / "car_prices.csv"
+    _write_car_prices(csv_path, 20)
+    db = DatabaseManager(db_path=str(tmp_path / "db" / "ingest.db"))
+    options = dict(
+        parse_row=parse_car_prices_row, limit=20, offset=0, db_manager=db,
+        workers=1, batch_size=10, dataset="car_prices",
+    )
+
+    with pytest.raises(RuntimeError, match="0/"):
+        run_ingest_pipeline(csv_path, vector_manager=_SwallowingVectors(), **options)
+    assert db.get_ingest_checkpoint(str(csv_path.resolve()), "car_prices")["embedded_row"] == 0
+
+    resumed = _RecordingVectors()
+    run_ingest_pipeline(csv_path, vector_manager=resumed, **options)
+    assert len({car_id for car_id, _ in resumed.cars}) == 19
+    assert db.get_stats()["total_cars"] == 19
+
+
+class _FlakyRowDB:
+    """Fails bulk inserts containing ``bad_row`` and that row on its own, once per run."""
+
+    def __init__(self, db, bad_row):
+        self.db = db
+        self.bad_row = bad_row
+
+    def save_analysis_records(self, records, checkpoint=None):
+        if self.bad_row is not None and any(r.get("row") == self.bad_row for r in records):
+            raise RuntimeError("row rejected")
+        return self.db.save_analysis_records(records, checkpoint=checkpoint)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+def test_failed_row_holds_checkpoint_until_retried(tmp_path):
+    csv_path = tmp_path / "car_prices.csv"
+    _write_car_prices(csv_path, 30)
+    db = DatabaseManager(db_path=str(tmp_path / "db" / "ingest.db"))
+    options = dict(parse_row=parse_car_prices_row, limit=30, offset=0, workers=1, batch_size=10,
+                   dataset="car_prices")
+
+    first = _RecordingVectors()
+    report = run_ingest_pipeline(csv_path, db_manager=_FlakyRowDB(db, bad_row=15), vector_manager=first, **options)
+    assert report.stages["db"].errors == 1
+    checkpoint = db.get_ingest_checkpoint(str(csv_path.resolve()), "car_prices")
+    assert checkpoint["committed_row"] == checkpoint["embedded_row"] == 15
+    assert db.get_stats()["total_cars"] == 28  # row 3 unparseable, row 15 rejected
+
+    retry = _RecordingVectors()
+    run_ingest_pipeline(csv_path, db_manager=db, vector_manager=retry, **options)
+    assert db.get_stats()["total_cars"] == 29
+    assert db.get_ingest_checkpoint(str(csv_path.resolve()), "car_prices")["embedded_row"] == 30
+    embedded_ids = {car_id for car_id, _ in first.cars + retry.cars}
+    assert len(embedded_ids) == 29
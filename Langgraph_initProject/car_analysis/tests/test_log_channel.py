@@ -0,0 +1,83 @@
+"""Tests for the bounded dbg_logs / agent_logs channel.
+
+Usage:
+  python -m pytest car_analysis/tests/test_log_channel.py -q
+"""
+
+from __future__ import annotations
+
+import json
+
+from car_analysis.core.agent_logging import log_agent_complete, log_agent_start
+from car_analysis.core.log_channel import BoundedLog, bounded_log
+
+
+def _merge(state, update, reducers):
+    for key, reducer in reducers.items():
+        if key in update:
+            state[key] = reducer(state.get(key), update[key])
+    return state
+
+
+def test_state_size_stays_flat_and_nothing_is_lost(tmp_path):
+    cap = 40
+    reducers = {"dbg_logs": bounded_log("dbg_logs", cap), "agent_logs": bounded_log("agent_logs", cap)}
+    state = {
+        "dbg_logs": BoundedLog(channel="dbg_logs", run_id="run_test", cap=cap, spill_dir=str(tmp_path)),
+        "agent_logs": BoundedLog(channel="agent_logs", run_id="run_test", cap=cap, spill_dir=str(tmp_path)),
+    }
+
+    sizes = []
+    for step in range(1000):
+        if step % 3 == 0:
+            # A node echoing the whole state back plus its own entries
+            update = {**state, **log_agent_start(f"agent_{step}")}
+            update["dbg_logs"] = state["dbg_logs"] + update["dbg_logs"]
+        elif step % 3 == 1:
+            update = {**state}
+        else:
+            update = {**log_agent_complete(f"agent_{step}"), "dbg_logs": ["Validation passed"]}
+        state = _merge(state, update, reducers)
+        sizes.append(len(json.dumps(state)))
+
+    assert max(len(state["dbg_logs"]), len(state["agent_logs"])) <= cap
+    assert max(sizes[-300:]) <= max(sizes[100:400]) * 1.05
+
+    dbg = state["dbg_logs"].read_all()
+    agent = state["agent_logs"].read_all()
+    expected_agents = [f"agent_{s}" for s in range(1000) if s % 3 != 1]
+    assert [e["agent"] for e in agent] == expected_agents
+    # Replays are dropped, but a repeated literal from a fresh update is kept
+    assert dbg.count("Validation passed") == len([s for s in range(1000) if s % 3 == 2])
+    assert len(dbg) == len(expected_agents)
+    assert state["dbg_logs"].spill_path == str(tmp_path / "run_test.jsonl")
+
+
+def test_reducer_upgrades_plain_lists(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reduce = bounded_log("dbg_logs", cap=4)
+    log = reduce(["a", "b"], ["c"])
+    assert isinstance(log, BoundedLog) and log == ["a", "b", "c"]
+    assert reduce(log, list(log)) is log
+    merged = reduce(log, list(log) + ["d", "e"])
+    assert merged == ["d", "e"] and merged.spilled == 3
+    assert merged.read_all() == ["a", "b", "c", "d", "e"]
+    assert log == ["a", "b", "c"] and log.spilled == 0
+
+
+def test_parallel_branches_do_not_share_a_mutable_log(tmp_path):
+    reduce = bounded_log("dbg_logs", cap=6)
+    base = BoundedLog(["start"], channel="dbg_logs", run_id="run_test", cap=6, spill_dir=str(tmp_path))
+
+    # Both branches were handed ``base``; their updates are merged one after the other
+    after_a = reduce(base, list(base) + ["a1", "a2"])
+    after_b = reduce(after_a, ["b1"] + list(base))
+    assert base == ["start"]
+    assert after_a == ["start", "a1", "a2"]
+    assert after_b == ["start", "a1", "a2", "b1"] and after_b.replayed == 2
+
+    # Two forks of one log spill to the same file but each reads back only its own history
+    left = reduce(after_b, [f"l{i}" for i in range(4)])
+    right = reduce(after_b, [f"r{i}" for i in range(4)])
+    assert left.read_all() == after_b + [f"l{i}" for i in range(4)]
+    assert right.read_all() == after_b + [f"r{i}" for i in range(4)]
@@ -0,0 +1,113 @@
+"""Tests for the market_priors table and its use by the price workers.
+
+Usage:
+  python -m pytest car_analysis/tests/test_market_priors.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from car_analysis.core import workers
+from car_analysis.database.manager import DatabaseManager
+from car_analysis.database.market_priors import quantile, segment_keys_for_sale
+from car_analysis.tests.test_ingest_pipeline import _RecordingVectors, _write_car_prices
+from car_analysis.utils.ingest_csv import parse_car_prices_row
+from car_analysis.utils.ingest_pipeline import run_ingest_pipeline
+
+
+def _sale(i, price, region="ca", mmr=20000.0, source="car_prices_csv"):
+    return {
+        "car": {"make": "Kia", "model": "Sorento", "year": 2015, "mileage": 30000 + i,
+                "price_paid": price, "location": region},
+        "analysis": {"data_source": source, "market_median_price": mmr, "success": True},
+        "source_key": f"sale-{region}-{i}",
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(db_path=str(tmp_path / "db" / "priors.db"))
+
+
+def test_segment_keys_and_quantiles():
+    car = {"make": " Kia", "model": "SORENTO", "year": "2015", "mileage": 45000, "location": "ca "}
+    assert segment_keys_for_sale(car) == [("kia", "sorento", 2015, 2, "CA"), ("kia", "sorento", 2015, 2, "*")]
+    assert segment_keys_for_sale({**car, "location": None}) == [("kia", "sorento", 2015, 2, "*")]
+    assert segment_keys_for_sale({**car, "make": ""}) == []
+    assert quantile([10.0, 20.0, 30.0, 40.0], 0.5) == 25.0
+    assert quantile([10.0, 20.0, 30.0, 40.0], 0.9) == pytest.approx(37.0)
+
+
+def test_priors_refresh_incrementally_on_save(db):
+    db.save_analysis_records([_sale(i, 18000 + 100 * i) for i in range(10)])
+    db.save_analysis_records([_sale(i, 19000.0, region="tx") for i in range(4)]
+                             + [_sale(0, 1.0)]                                  # duplicate key: ignored
+                             + [_sale(99, 50000.0, source="used_cars_csv")])    # listing, not a sale
+
+    ca = db.get_market_prior("KIA", "sorento", 2015, 31000, "CA")
+    assert ca["region"] == "CA" and ca["sample_count"] == 10
+    assert ca["price_median"] == 18450.0
+    assert ca["price_p10"] == pytest.approx(18090.0) and ca["price_p90"] == pytest.approx(18810.0)
+    assert ca["mmr_count"] == 10 and ca["mmr_delta_median"] == pytest.approx(-1550.0)
+    assert ca["mmr_delta_pct_median"] == pytest.approx(-7.75)
+
+    everywhere = db.get_market_prior("kia", "sorento", 2015, 31000, "NV")  # no NV segment: rollup
+    assert everywhere["region"] == "*" and everywhere["sample_count"] == 14
+    assert db.get_market_prior("kia", "sorento", 2015, 90000) is None
+
+    assert db.rebuild_market_priors() == 14
+    assert db.get_market_prior("kia", "sorento", 2015, 31000, "CA")["price_median"] == 18450.0
+
+
+def test_ingest_pipeline_populates_priors(tmp_path, db):
+    csv_path = tmp_path / "car_prices.csv"
+    _write_car_prices(csv_path, 12)
+    run_ingest_pipeline(csv_path, parse_row=parse_car_prices_row, limit=12, offset=0, db_manager=db,
+                        vector_manager=_RecordingVectors(), workers=1, batch_size=5, dataset="car_prices")
+    prior = db.get_market_prior("Toyota", "Camry", 2015, 50005)
+    assert prior["sample_count"] == 11  # row 3 has a bad year
+    assert prior["price_median"] == 9000 and prior["mmr_delta_pct_median"] == pytest.approx(-10.0)
+
+
+def test_research_worker_skips_tavily_for_dense_segments(db, monkeypatch):
+    db.save_analysis_records([_sale(i, 18000 + 100 * i) for i in range(25)])
+    monkeypatch.setattr(workers, "_PRIORS_DB", db)
+    monkeypatch.setattr(workers, "MARKET_PRIOR_MIN_SAMPLES", 20)
+    monkeypatch.setenv("TAVILY_API_KEY", "")  # a Tavily call would fail
+
+    car = {"make": "Kia", "model": "Sorento", "year": 2015, "mileage": 30500, "location": "CA",
+           "price_paid": 18000}
+    lookup_threads = []
+    lookup = workers.lookup_market_prior
+    monkeypatch.setattr(workers, "lookup_market_prior",
+                        lambda c: lookup_threads.append(threading.get_ident()) or lookup(c))
+    research = asyncio.run(workers.price_research_worker({"current_car": car}))
+    assert lookup_threads and lookup_threads[0] != threading.get_ident()  # kept off the event loop
+    assert research["price_research"]["search_method"] == "market_prior"
+    assert research["price_research"]["sample_count"] == 25
+
+    comparison = asyncio.run(workers.price_comparison_worker({"current_car": car, **research}))
+    result = comparison["price_comparison"]
+    assert result["success"] and result["baseline"] == "market_prior"
+    assert result["market_median"] == 19200.0 and result["verdict_category"] == "Exceptional Deal"  # below p10
+
+
+def test_sparse_segment_is_a_fallback_baseline(db, monkeypatch):
+    db.save_analysis_records([_sale(i, 20000.0) for i in range(6)])
+    monkeypatch.setattr(workers, "_PRIORS_DB", db)
+    monkeypatch.setattr(workers, "MARKET_PRIOR_MIN_SAMPLES", 20)
+    monkeypatch.delenv("TAVILY_API_KEY", raising=False)
+
+    car = {"make": "Kia", "model": "Sorento", "year": 2015, "mileage": 30500, "price_paid": 21000}
+    research = asyncio.run(workers.price_research_worker({"current_car": car}))
+    assert not research["price_research"]["success"]  # went to Tavily, which is not configured
+    assert research["market_prior"]["sample_count"] == 6
+
+    comparison = asyncio.run(workers.price_comparison_worker({"current_car": car, **research}))
+    result = comparison["price_comparison"]
+    assert result["success"] and result["baseline"] == "market_prior"
+    assert result["market_median"] == 20000.0 and result["market_prior"]["region"] == "*"
@@ -0,0 +1,230 @@
+"""Tests for batched residual-model inference and per-tree price quantiles.
+
+A small scikit-learn pipeline with the production feature schema is fitted on
+synthetic rows and dumped with joblib, so the tests exercise the real
+load / predict path without the (version-pinned) bundled artefact.
+
+Usage:
+  python -m pytest car_analysis/tests/test_ml_predictor.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+joblib = pytest.importorskip("joblib")
+
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from car_analysis.core.agents import residual
+from car_analysis.core.agents.consistency import _issues_numeric
+from car_analysis.tools.ml_predictor import (
+    FEATURE_DEFAULTS,
+    PredictionBatcher,
+    PricePredictor,
+    build_feature_frame,
+    feature_adapter,
+    is_compressed_artefact,
+)
+from car_analysis.tools.model_export import export_model
+
+NUMERIC = ["hp", "engine displacement", "Vehicle_Age", "Mileage_per_Year", "is_v_engine", "clean_title"]
+CATEGORICAL = ["fuel_type", "transmission"]
+
+
+def fit_synthetic_pipeline(path, rows: int = 400, n_estimators: int = 10, seed: int = 0):
+    """Fit and dump a pipeline shaped like the production residual model."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "hp": rng.uniform(100, 450, rows),
+        "engine displacement": rng.uniform(1.2, 5.5, rows),
+        "Vehicle_Age": rng.integers(0, 20, rows),
+        "Mileage_per_Year": rng.uniform(3000, 25000, rows),
+        "fuel_type": rng.choice(["Gasoline", "Hybrid", "Diesel", "OTHER"], rows),
+        "transmission": rng.choice(["Automatic", "Manual", "OTHER"], rows),
+        "is_v_engine": rng.integers(0, 2, rows),
+        "clean_title": rng.integers(0, 2, rows),
+    })
+    target = np.log1p(60000 * np.exp(-0.09 * frame["Vehicle_Age"]) + 40 * frame["hp"])
+    pipeline = Pipeline([
+        ("preprocessor", ColumnTransformer([
+            ("num", StandardScaler(), NUMERIC),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CATEGORICAL),
+        ])),
+        ("model", RandomForestRegressor(n_estimators=n_estimators, max_depth=8, random_state=seed)),
+    ])
+    pipeline.fit(frame, target)
+    joblib.dump(pipeline, path)
+    return pipeline
+
+
+def _cars(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    fuels = ["Gasoline", "Hybrid", "Diesel", "Electric", None]
+    return [{
+        "year": int(rng.integers(2005, 2025)),
+        "mileage": int(rng.integers(0, 200000)),
+        "hp": float(rng.uniform(90, 500)),
+        "engine_displacement": float(rng.uniform(1.0, 6.0)),
+        "fuel_type": fuels[i % len(fuels)],
+        "transmission": "Automatic" if i % 3 else "Manual",
+        "is_v_engine": i % 2,
+        "clean_title": 1,
+    } for i in range(n)]
+
+
+@pytest.fixture
+def predictor(tmp_path):
+    path = tmp_path / "model.joblib"
+    fit_synthetic_pipeline(path)
+    return PricePredictor(model_path=str(path))
+
+
+def test_feature_frame_matches_feature_adapter():
+    rows = _cars(20) + [
+        {"year": "2019", "mileage": None},           # non-numeric year, missing mileage
+        {"year": 2030, "mileage": 5000.0},           # future year: age clamps to 0
+        {"mileage": 42000, "fuel_type": "Hybrid"},   # no year: mileage passes through
+        {},
+    ]
+    frame = build_feature_frame(rows)
+    assert list(frame.columns) == list(FEATURE_DEFAULTS)
+    for i, raw in enumerate(rows):
+        expected = feature_adapter(raw)
+        got = frame.iloc[i].to_dict()
+        for column, value in expected.items():
+            if value is None or got[column] is None:
+                assert value is None and got[column] is None, column
+            else:
+                assert got[column] == pytest.approx(value), column
+
+
+def test_predict_many_matches_single_predictions(predictor):
+    cars = _cars(300)
+    predictor.load()
+    loop = np.array([float(np.expm1(predictor._pipeline.predict(pd.DataFrame([feature_adapter(car)]))[0]))
+                     for car in cars])
+
+    np.testing.assert_allclose(predictor.predict_many(cars), loop, rtol=1e-9)
+    np.testing.assert_allclose(predictor.predict_many(cars, chunk_size=64, workers=4), loop, rtol=1e-9)
+    np.testing.assert_allclose(predictor.predict_many(pd.DataFrame(cars), chunk_size=50), loop, rtol=1e-9)
+    assert predictor.predict_price(cars[7])["predicted_price"] == pytest.approx(loop[7])
+    assert predictor.predict_many([]).shape == (0,)
+
+
+def test_batcher_coalesces_concurrent_requests(predictor):
+    cars = _cars(12)
+    expected = predictor.predict_many(cars)
+    batcher = PredictionBatcher(predictor, window_s=0.05, max_batch=8)
+
+    async def run():
+        return await asyncio.gather(*(batcher.predict_price(car) for car in cars))
+
+    results = asyncio.run(run())
+    assert batcher.requests == 12 and batcher.batches == 2  # 8 at max_batch, 4 when the window closes
+    assert [r["predicted_price"] for r in results] == pytest.approx(expected.tolist())
+    assert results[0]["features_used"] == feature_adapter(cars[0])
+
+
+def test_residual_agent_batched_mode(predictor, monkeypatch):
+    monkeypatch.setattr(residual, "ml_predictor", predictor)
+    cars = _cars(6)
+    single = [asyncio.run(residual.residual_value_agent({"current_car": car}))["residual_analysis"] for car in cars]
+
+    residual.enable_residual_batching(window_ms=20, max_batch=6)
+    try:
+        async def run():
+            return await asyncio.gather(*(residual.residual_value_agent({"current_car": car}) for car in cars))
+        batched = [update["residual_analysis"] for update in asyncio.run(run())]
+        assert residual._batcher.batches == 1
+    finally:
+        residual.disable_residual_batching()
+
+    assert [b["predicted_price"] for b in batched] == pytest.approx([s["predicted_price"] for s in single])
+    bulk = residual.predict_residual_values(cars)
+    assert [b["predicted_price"] for b in bulk] == pytest.approx([s["predicted_price"] for s in single])
+
+
+def test_mmap_applies_to_uncompressed_artefacts_only(tmp_path, predictor):
+    cars = _cars(20)
+    expected = predictor.predict_many(cars)
+    assert predictor.mmap_used and not is_compressed_artefact(predictor.model_path)
+
+    compressed = tmp_path / "model_z.joblib"
+    joblib.dump(predictor._pipeline, compressed, compress=3)
+    assert is_compressed_artefact(compressed)
+    plain = PricePredictor(model_path=str(compressed))
+    np.testing.assert_allclose(plain.predict_many(cars), expected)
+    assert not plain.mmap_used
+
+
+def test_background_preload_loads_once(predictor, monkeypatch):
+    calls = []
+    real_load = joblib.load
+
+    def slow_load(*args, **kwargs):
+        calls.append(kwargs.get("mmap_mode"))
+        time.sleep(0.2)
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr("car_analysis.tools.ml_predictor.joblib.load", slow_load)
+    thread = predictor.preload()
+    assert thread is not None and thread.is_alive()
+    assert predictor.available  # waits for the in-flight load instead of starting another
+    assert calls == ["r"] and predictor.load_seconds >= 0.2
+    assert predictor.preload() is None
+
+
+def test_process_pool_shares_loaded_pipeline(predictor):
+    cars = _cars(200)
+    expected = predictor.predict_many(cars)
+    with predictor.process_pool(2) as pool:
+        np.testing.assert_allclose(predictor.predict_many(cars, chunk_size=50, pool=pool), expected)
+
+
+def test_quantiles_come_from_the_same_tree_pass(predictor):
+    cars = _cars(120)
+    result = predictor.predict_quantiles(cars)
+    np.testing.assert_allclose(result["predicted_price"], predictor.predict_many(cars), rtol=1e-12)
+
+    pipeline = predictor._pipeline
+    X = pipeline[:-1].transform(build_feature_frame(cars)).astype(np.float32)
+    per_tree = np.expm1(np.stack([tree.predict(X) for tree in pipeline[-1].estimators_]))
+    np.testing.assert_allclose(result["p10"], np.quantile(per_tree, 0.1, axis=0))
+    np.testing.assert_allclose(result["p90"], np.quantile(per_tree, 0.9, axis=0))
+    assert np.all((result["p10"] <= result["p50"]) & (result["p50"] <= result["p90"]))
+
+    single = predictor.predict_price(cars[5])["price_quantiles"]
+    assert single == pytest.approx({"p10": result["p10"][5], "p50": result["p50"][5], "p90": result["p90"][5]})
+
+    export_model(predictor.model_path, ("compact",))
+    compact = PricePredictor(str(predictor.model_path)).predict_quantiles(cars)
+    for key, values in result.items():
+        np.testing.assert_allclose(compact[key], values, rtol=1e-12)
+
+
+def test_consistency_uses_residual_interval(predictor, monkeypatch):
+    monkeypatch.setattr(residual, "ml_predictor", predictor)
+    report = asyncio.run(residual.residual_value_agent({"current_car": _cars(1)[0]}))["residual_analysis"]
+    low, high = report["price_quantiles"]["p10"], report["price_quantiles"]["p90"]
+
+    def issues(median, analysis=report):
+        return [i for i in _issues_numeric({"market_analysis": {"market_median": median},
+                                            "residual_analysis": analysis})
+                if i["type"] == "residual_vs_market"]
+
+    assert not issues((low + high) / 2)
+    assert issues(low * 0.99) and issues(high * 1.01)
+    # without quantiles (non-forest model) the fixed 20% gap still applies
+    point_only = {**report, "price_quantiles": None}
+    assert not issues(report["predicted_price"] * 1.1, point_only)
+    assert issues(report["predicted_price"] * 1.5, point_only)
@@ -0,0 +1,96 @@
+"""Tests for the compact residual-model export and the predictor's export loading.
+
+Usage:
+  python -m pytest car_analysis/tests/test_model_export.py -q
+"""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+joblib = pytest.importorskip("joblib")
+
+from sklearn.linear_model import Ridge
+
+from car_analysis.tests.test_ml_predictor import _cars, fit_synthetic_pipeline
+from car_analysis.tools.ml_predictor import PricePredictor, build_feature_frame
+from car_analysis.tools.model_export import (
+    CompactPipeline,
+    ExportError,
+    export_compact,
+    export_model,
+    exported_paths,
+    probe_frame,
+)
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    path = tmp_path / "model.joblib"
+    fit_synthetic_pipeline(path, n_estimators=20)
+    return path
+
+
+def test_compact_pipeline_matches_sklearn(tmp_path, model_path):
+    pipeline = joblib.load(model_path)
+    compact = CompactPipeline.load(export_compact(pipeline, tmp_path / "m.compact.npz"))
+
+    frame = build_feature_frame(_cars(400) + [
+        {"year": 2015, "mileage": None, "hp": None, "fuel_type": None},  # NaN numerics, missing category
+        {"year": 2012, "fuel_type": "Hydrogen", "transmission": "CVT"},  # categories unseen in training
+    ])
+    np.testing.assert_array_equal(compact.predict(frame), pipeline.predict(frame))
+
+    probe = probe_frame(pipeline)
+    probe.loc[::7, "hp"] = np.nan
+    np.testing.assert_array_equal(compact.predict(probe), pipeline.predict(probe))
+    assert compact.n_trees == 20 and compact.nbytes < model_path.stat().st_size
+
+
+def test_predictor_loads_compact_export(model_path):
+    cars = _cars(150)
+    expected = PricePredictor(str(model_path), model_format="joblib").predict_many(cars)
+
+    result = export_model(model_path, ("compact",))
+    assert result["compact"]["max_rel_diff"] == 0.0
+
+    predictor = PricePredictor(str(model_path))
+    np.testing.assert_array_equal(predictor.predict_many(cars), expected)
+    assert predictor.loaded_format == "compact" and isinstance(predictor._pipeline, CompactPipeline)
+
+    model_path.unlink()  # the export and its probe are enough to serve predictions
+    served = PricePredictor(str(model_path))
+    assert served.predict_price(cars[3])["predicted_price"] == pytest.approx(expected[3])
+
+
+def test_failed_parity_falls_back_to_joblib(model_path):
+    export_model(model_path, ("compact",))
+    probe = exported_paths(model_path)["probe"]
+    payload = json.loads(probe.read_text())
+    payload["expected"] = [value * 1.01 for value in payload["expected"]]
+    probe.write_text(json.dumps(payload))
+
+    predictor = PricePredictor(str(model_path))
+    predictor.load()
+    assert predictor.loaded_format == "joblib"
+    assert not isinstance(predictor._pipeline, CompactPipeline)
+
+
+def test_unsupported_estimator_is_rejected(tmp_path):
+    pipeline = fit_synthetic_pipeline(tmp_path / "rf.joblib")
+    frame = build_feature_frame(_cars(50))
+    pipeline.steps[-1] = ("model", Ridge().fit(pipeline[:-1].transform(frame), np.arange(50.0)))
+    path = tmp_path / "ridge.joblib"
+    joblib.dump(pipeline, path)
+
+    with pytest.raises(ExportError):
+        export_compact(pipeline, tmp_path / "ridge.compact.npz")
+    result = export_model(path, ("compact",))
+    assert "Ridge" in result["compact"]["error"]
+    assert not exported_paths(path)["compact"].exists()
+    assert PricePredictor(str(path)).predict_many(_cars(5)).shape == (5,)
+    assert PricePredictor(str(path)).predict_price(_cars(1)[0])["price_quantiles"] is None
@@ -0,0 +1,79 @@
+"""Tests that graph nodes return minimal deltas, and for the debug echo validator.
+
+Usage:
+  python -m pytest car_analysis/tests/test_node_updates.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from car_analysis.core import checkers
+from car_analysis.core.node_validation import EchoedStateError, checked_node, find_echoed_keys
+
+
+def _state(**overrides):
+    state = {
+        "current_car": {"year": 2019, "make": "Honda", "model": "Civic"},
+        "price_research": {"success": True, "sample_count": 8},
+        "deal_score": {"success": True, "score": 70, "verdict": "Good Deal"},
+        "llm_opinion": {"score": 72, "verdict": "Good"},
+        "retries": {"price_comparison": 2},
+        "analysis_errors": ["EARLIER: kept"],
+        "dbg_logs": ["a", "b"],
+        "car_reports": [{"car": {}}],
+    }
+    state.update(overrides)
+    return state
+
+
+def _run(node, state):
+    result = node(state)
+    return asyncio.run(result) if asyncio.iscoroutine(result) else result
+
+
+@pytest.mark.parametrize("node, overrides", [
+    (checkers.price_research_checker, {}),
+    (checkers.price_research_checker, {"price_research": {"success": False}}),
+    (checkers.price_research_checker, {"price_research": {"success": False}, "retries": {"price_research": 3}}),
+    (checkers.join_scores, {}),
+    (checkers.join_scores, {"llm_opinion": {}}),
+    (checkers.score_disagreement_checker, {}),
+    (checkers.score_disagreement_checker, {"llm_opinion": {"score": 10}}),
+    (checkers.score_disagreement_checker, {"llm_opinion": {"score": 10},
+                                           "retries": {"llm_opinion": 2, "score_disagreement": 1}}),
+])
+def test_checkers_return_deltas(node, overrides):
+    state = _state(**overrides)
+    update = _run(node, state)
+
+    assert "current_car" not in update and "car_reports" not in update
+    assert find_echoed_keys(state, update) == []
+    # Counters go through merge_dict: only the changed one is sent, state is untouched
+    assert set(update.get("retries", {})) <= {"price_research", "llm_opinion", "score_disagreement"}
+    assert state["analysis_errors"] == ["EARLIER: kept"]
+    if "analysis_errors" in update:
+        assert update["analysis_errors"][0] == "EARLIER: kept" and len(update["analysis_errors"]) == 2
+
+
+def test_checked_node_flags_echoes(monkeypatch, caplog):
+    async def echoing(state):
+        return {**state, "research_ok": True}
+
+    async def minimal(state):
+        return {"research_ok": True}
+
+    state = _state()
+    monkeypatch.delenv("CAR_DEBUG_STATE_UPDATES", raising=False)
+    assert checked_node("echoing", echoing) is echoing
+
+    monkeypatch.setenv("CAR_DEBUG_STATE_UPDATES", "1")
+    asyncio.run(checked_node("echoing", echoing)(state))
+    assert "echoing" in caplog.text and "current_car" in caplog.text
+    assert asyncio.run(checked_node("minimal", minimal)(state)) == {"research_ok": True}
+
+    monkeypatch.setenv("CAR_DEBUG_STATE_UPDATES", "strict")
+    with pytest.raises(EchoedStateError, match="dbg_logs"):
+        asyncio.run(checked_node("echoing", echoing)(state))
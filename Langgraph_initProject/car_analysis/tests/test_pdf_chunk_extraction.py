@@ -0,0 +1,117 @@
+"""Tests for chunked, concurrent LLM car extraction.
+
+Usage:
+  python -m pytest car_analysis/tests/test_pdf_chunk_extraction.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fitz")
+
+from car_analysis.utils.pdf_extractor import (  # noqa: E402
+    ChunkedCarExtractor,
+    car_dedupe_key,
+    parse_llm_cars,
+    split_into_chunks,
+)
+
+
+LISTING = re.compile(r"(\d{4}) (\w+) (\w+) (\d+) mi \$(\d+)")
+
+
+class _FakeLLM:
+    """Parses ``YEAR MAKE MODEL N mi $P`` lines; tracks peak concurrency."""
+
+    def __init__(self, fail_on=None):
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self.fail_on = fail_on
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            text = messages[-1][1]
+            if self.fail_on and self.fail_on in text:
+                raise RuntimeError("model timeout")
+            cars = [
+                {"year": int(y), "make": make, "model": model, "mileage": int(mi), "price_paid": float(p)}
+                for y, make, model, mi, p in LISTING.findall(text)
+            ]
+            return SimpleNamespace(content="```json\n" + json.dumps(cars) + "\n```")
+        finally:
+            self.active -= 1
+
+
+def _pages(count, per_page=5):
+    pages = []
+    for page in range(count):
+        lines = [f"{2010 + (page + i) % 12} Toyota Camry {page * 1000 + i} mi ${15000 + i}" for i in range(per_page)]
+        pages.append("\n".join(lines))
+    return pages
+
+
+def test_split_into_chunks_respects_budget_and_overlaps():
+    pages = _pages(6)
+    chunks = split_into_chunks(pages, max_chars=250, overlap_chars=60)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 250 + 60 for chunk in chunks)
+    # Every listing line survives, and the tail of each chunk reappears in the next
+    for line in "\n".join(pages).splitlines():
+        assert any(line in chunk for chunk in chunks)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert prev.splitlines()[-1] in nxt
+
+
+def test_oversized_page_splits_at_listing_boundaries():
+    page = "\n".join(f"2015 Honda Civic {i} mi $9000" for i in range(50))
+    chunks = split_into_chunks([page], max_chars=200, overlap_chars=0)
+    assert all(chunk.strip().startswith("2015 Honda Civic") for chunk in chunks)
+
+
+def test_dedupe_key_normalises_fields():
+    a = {"year": "2019", "make": "Toyota ", "model": "camry", "mileage": "31,000", "price_paid": "$18,000"}
+    b = {"year": 2019, "make": "toyota", "model": "Camry", "mileage": 31000, "price_paid": 18000.0}
+    assert car_dedupe_key(a) == car_dedupe_key(b)
+    assert parse_llm_cars('```json\n[{"make": "Kia"}]\n```') == [{"make": "Kia"}]
+
+
+def test_stream_dedupes_overlap_and_caps_concurrency():
+    pages = _pages(12)
+    llm = _FakeLLM()
+    extractor = ChunkedCarExtractor(llm=llm, max_concurrency=3, chunk_chars=250, overlap_chars=60,
+                                    use_rules=False)
+
+    async def collect():
+        return [car async for car in extractor.stream_text(pages)]
+
+    cars = asyncio.run(collect())
+    assert extractor.chunk_count == llm.calls > 3
+    assert llm.peak == 3
+    assert len(cars) == 12 * 5
+    assert len({car_dedupe_key(car) for car in cars}) == len(cars)
+    assert extractor.duplicates > 0  # overlap lines were extracted twice
+    assert [car["index"] for car in cars] == list(range(len(cars)))
+
+
+def test_failed_chunk_does_not_abort_stream():
+    pages = _pages(4)
+    extractor = ChunkedCarExtractor(llm=_FakeLLM(fail_on="2000 mi"), chunk_chars=200, overlap_chars=0,
+                                    use_rules=False)
+
+    async def collect():
+        return [car async for car in extractor.stream_text(pages)]
+
+    cars = asyncio.run(collect())
+    assert len(extractor.failed_chunks) == 1
+    assert 0 < len(cars) < 4 * 5
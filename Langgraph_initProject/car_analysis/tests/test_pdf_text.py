@@ -0,0 +1,113 @@
+"""Tests for parallel PDF text extraction and the content-hash text cache.
+
+Usage:
+  python -m pytest car_analysis/tests/test_pdf_text.py -q
+"""
+
+from __future__ import annotations
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from car_analysis.tools import pdf_functions, pdf_processor as pdf_processor_module  # noqa: E402
+from car_analysis.tools.pdf_functions import read_pdf_text, split_page_ranges  # noqa: E402
+from car_analysis.tools.pdf_processor import PDFProcessor  # noqa: E402
+
+
+def _write_pdf(path, pages, tag="car"):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((36, 40), f"{tag} page {i + 1}\n2019 Toyota Camry 31,000 mi $18,000")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_split_page_ranges_covers_range():
+    assert split_page_ranges(1, 10, 3) == [(1, 4), (5, 7), (8, 10)]
+    assert split_page_ranges(3, 4, 8) == [(3, 3), (4, 4)]
+
+
+def test_parallel_extraction_matches_serial(tmp_path, monkeypatch):
+    path = tmp_path / "listing.pdf"
+    _write_pdf(path, 9)
+    monkeypatch.setattr(pdf_functions, "PARALLEL_MIN_PAGES", 1)
+
+    serial = read_pdf_text(str(path), 2, 8, workers=1)
+    pooled = read_pdf_text(str(path), 2, 8, workers=3)
+    assert pooled == serial
+    assert [p["page_number"] for p in pooled["pages"]] == list(range(2, 9))
+    assert pooled["page_count"] == 9
+
+
+def test_text_cache_keyed_by_content_hash(tmp_path, monkeypatch):
+    path = tmp_path / "listing.pdf"
+    _write_pdf(path, 3)
+    calls = []
+    real_read = pdf_processor_module.read_pdf_text
+
+    def counting_read(*args, **kwargs):
+        calls.append(args)
+        return real_read(*args, **kwargs)
+
+    monkeypatch.setattr(pdf_processor_module, "read_pdf_text", counting_read)
+    processor = PDFProcessor(workers=1, cache_path=str(tmp_path / "text_cache.db"))
+
+    first = processor.extract_text(str(path))
+    second = processor.extract_text(str(path))
+    assert first == second and first["success"]
+    assert len(calls) == 1
+
+    # A different page range and changed file contents are both cache misses
+    processor.extract_text(str(path), 2, 3)
+    _write_pdf(path, 3, tag="updated")
+    updated = processor.extract_text(str(path))
+    assert len(calls) == 3
+    assert "updated page 1" in updated["combined_text"]
+
+
+def _write_mixed_pdf(path, layout):
+    """``layout`` is a string: ``t`` = text page, ``s`` = image-only "scanned" page."""
+    doc = fitz.open()
+    for i, kind in enumerate(layout):
+        page = doc.new_page()
+        if kind == "t":
+            page.insert_text((36, 40), f"text page {i + 1}\n2019 Toyota Camry 31,000 mi $18,000")
+        else:
+            pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 600, 400), False)
+            pix.set_rect(pix.irect, (i * 20 % 255, 200, 200))
+            page.insert_image(fitz.Rect(36, 36, 36 + 216, 36 + 144), pixmap=pix)  # 600px over 3in
+    doc.save(str(path))
+    doc.close()
+
+
+def test_page_needs_ocr_detects_missing_and_garbage_text():
+    assert pdf_functions.page_needs_ocr("")
+    assert pdf_functions.page_needs_ocr("   \n  ")
+    assert pdf_functions.page_needs_ocr("�" * 40)
+    assert pdf_functions.page_needs_ocr("□■•" * 15)
+    assert not pdf_functions.page_needs_ocr("2019 Toyota Camry 31,000 mi $18,000")
+
+
+def test_selective_ocr_only_touches_scanned_pages(tmp_path, monkeypatch):
+    path = tmp_path / "mixed.pdf"
+    _write_mixed_pdf(path, "tstts")
+    ocr_calls = []
+
+    def fake_ocr(page, dpi, language):
+        ocr_calls.append((page.number + 1, dpi))
+        return f"OCR 2018 Honda Civic 45,000 mi $15,500 page {page.number + 1}"
+
+    monkeypatch.setattr(pdf_functions, "_ocr_page", fake_ocr)
+    processor = PDFProcessor(workers=1, cache_path=str(tmp_path / "cache.db"))
+
+    result = processor.process_financial_document(str(path))
+    assert result["success"] and result["extraction_method"] == "mixed"
+    assert result["ocr_pages"] == [2, 5]
+    assert ocr_calls == [(2, 200), (5, 200)]
+    assert "text page 1" in result["content"] and "page 5" in result["content"]
+
+    # OCR output is cached by page image hash
+    again = processor.process_financial_document(str(path))
+    assert again["content"] == result["content"]
+    assert len(ocr_calls) == 2
@@ -0,0 +1,123 @@
+"""Tests for RAGSystem's prebuilt chains and async (ainvoke) generation.
+
+Usage:
+  python -m pytest car_analysis/tests/test_rag_async.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+import zlib
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from car_analysis.rag import rag_system as rag_module  # noqa: E402
+
+LLM_DELAY = 0.2
+
+
+class _Stub:
+    """Minimal DB / vector / embedding managers (no retrieval hits)."""
+
+    def embed_text(self, text):
+        rng = random.Random(zlib.crc32(text.encode()))
+        return [rng.uniform(-1, 1) for _ in range(16)]
+
+    def collection_version(self, collections):
+        return ()
+
+    def create_car_description(self, car):
+        return f"{car.get('year')} {car.get('make')} {car.get('model')}"
+
+    def search_knowledge(self, query_text, limit=3):
+        return []
+
+    def search_similar_analyses(self, query_text, limit=3):
+        return []
+
+    def search_similar_cars(self, query_car, limit=10, similarity_threshold=0.7):
+        return []
+
+    def semantic_search(self, query_text, collections=None, limit=5, query_embedding=None):
+        return {}
+
+
+def _fake_llm(calls):
+    def reply(prompt):
+        calls.append(prompt)
+        return AIMessage(content=f"reply {len(calls)}")
+
+    def invoke(prompt):
+        time.sleep(LLM_DELAY)
+        return reply(prompt)
+
+    async def ainvoke(prompt):
+        await asyncio.sleep(LLM_DELAY)
+        return reply(prompt)
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    calls = []
+    monkeypatch.setattr(rag_module, "ChatOpenAI", lambda **kwargs: _fake_llm(calls))
+    monkeypatch.setattr(rag_module, "GraphService", lambda: (_ for _ in ()).throw(RuntimeError("no graph")))
+    stub = _Stub()
+    system = rag_module.RAGSystem(db_manager=stub, vector_manager=stub, embedding_manager=stub)
+    return system, calls
+
+
+def test_chains_are_prebuilt_per_template(rag):
+    system, _ = rag
+    assert len(system._chains) == 3
+    chain = system._chain_for(system.qa_template)
+    assert system._chain_for(system.qa_template) is chain
+    system.answer_question("Is a 2019 Civic at $18k fair?")
+    assert len(system._chains) == 3
+
+
+def test_async_variants_match_sync_results(rag):
+    system, _ = rag
+    car = {"year": 2019, "make": "Honda", "model": "Civic", "price_paid": 18000, "mileage": 40000}
+
+    sync = system.enhance_car_analysis(car, analysis_context="Market median $19,000")
+    async_ = asyncio.run(system.aenhance_car_analysis(car, analysis_context="Market median $19,000"))
+    assert set(sync) == set(async_) and async_["enhanced_analysis"].startswith("reply")
+    assert async_["rag_confidence"] == sync["rag_confidence"]
+
+    cases = asyncio.run(system.afind_similar_cases(car))
+    assert cases["cases_count"] == 0 and cases["analysis"].startswith("reply")
+    answer = asyncio.run(system.aanswer_question("What matters for Civic resale?"))
+    assert answer["answer"].startswith("reply")
+
+
+def test_concurrent_callers_overlap_llm_waits(rag):
+    system, calls = rag
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.02)
+
+    async def run():
+        tick_task = asyncio.ensure_future(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(*[system.aanswer_question(f"question {i}") for i in range(5)])
+        elapsed = time.perf_counter() - start
+        tick_task.cancel()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    assert len(calls) == 5
+    assert elapsed < 2 * LLM_DELAY  # sequential would be 5 x LLM_DELAY
+    # The event loop kept running while the LLM calls were pending
+    assert len(ticks) >= int(LLM_DELAY / 0.02) // 2
@@ -0,0 +1,123 @@
+"""Tests for the RAG context builder: dedupe, reliability ranking, token budget, per-car cache.
+
+Usage:
+  python -m pytest car_analysis/tests/test_rag_context.py -q
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from car_analysis.rag.context_builder import ContextBuilder, car_context_key, count_tokens
+
+
+def _item(item_id, text, similarity, reliability=None, kind="knowledge"):
+    metadata = {"type": kind, "title": f"doc {item_id}"}
+    if reliability is not None:
+        metadata["reliability_score"] = reliability
+    return {"id": item_id, "document": text, "metadata": metadata, "similarity": similarity}
+
+
+def _fmt(i, item):
+    return f"[{item['id']}] {item['document']}"
+
+
+def test_dedupes_by_id_and_near_duplicate_text():
+    builder = ContextBuilder(token_budget=10_000)
+    text = "The 2019 Toyota Camry holds its value well; typical resale after five years is about 60%."
+    items = [
+        _item("k1", text, 0.9),
+        _item("k1", text, 0.8),                      # same id, hit by a second query
+        _item("k2", text.replace("60%", "61%"), 0.7),  # near-duplicate text
+        _item("k3", "Hybrid batteries rarely fail before 150k miles.", 0.6),
+    ]
+    kept = builder.deduplicate(items)
+    assert [item["id"] for item in kept] == ["k1", "k3"]
+    assert kept[0]["similarity"] == 0.9
+    assert builder.stats["duplicates"] == 2
+
+
+def test_ranks_by_similarity_times_reliability():
+    builder = ContextBuilder(token_budget=10_000)
+    items = [
+        _item("forum", "Owners forum says prices are dropping fast.", 0.9, reliability=0.3),
+        _item("kbb", "Kelley Blue Book valuation for the trim and mileage.", 0.7, reliability=1.0),
+        _item("plain", "Dealer listing summary without a reliability score.", 0.5),
+    ]
+    packed = builder.pack(items, _fmt)
+    assert packed.splitlines() == [
+        "[kbb] Kelley Blue Book valuation for the trim and mileage.",
+        "[plain] Dealer listing summary without a reliability score.",
+        "[forum] Owners forum says prices are dropping fast.",
+    ]
+
+
+def test_greedy_packing_respects_budget():
+    long_text = "market data " * 200
+    items = [
+        _item("a", "short high-ranked note about depreciation", 0.95),
+        _item("b", long_text, 0.9),
+        _item("c", "another short note on insurance costs", 0.5),
+    ]
+    budget = count_tokens(_fmt(1, items[0])) + count_tokens(_fmt(2, items[2])) + 5
+    builder = ContextBuilder(token_budget=budget)
+    packed = builder.pack(items, _fmt)
+    assert count_tokens(packed) <= budget
+    assert "[a]" in packed and "[c]" in packed and "[b]" not in packed
+    assert builder.stats["dropped_for_budget"] == 1
+
+
+def test_cache_is_keyed_per_car_with_lru_and_ttl():
+    builder = ContextBuilder(cache_size=2)
+    camry = car_context_key({"year": 2019, "make": "Toyota", "model": "Camry", "mileage": 40000})
+    assert camry == car_context_key({"year": 2019, "make": " toyota", "model": "CAMRY", "mileage": 90000})
+    builder.put_cached(camry, "camry context")
+    builder.put_cached(("2018", "honda", "civic"), "civic context")
+    assert builder.get_cached(camry) == "camry context"
+    builder.put_cached(("2020", "ford", "f-150"), "f150 context")  # evicts civic (least recent)
+    assert builder.get_cached(("2018", "honda", "civic")) is None
+    assert builder.get_cached(camry) == "camry context"
+
+    builder.cache_ttl = 0.0
+    assert builder.get_cached(camry) is None
+    builder.cache_ttl = 600.0
+    builder.put_cached(camry, "camry context")
+    builder.invalidate()
+    assert builder.get_cached(camry) is None
+
+
+class _VersionedStore:
+    """Vector store stand-in whose version stamp moves when something writes to it."""
+
+    def __init__(self):
+        self.writes = 0
+        self.searches = 0
+
+    def collection_version(self, collections):
+        return tuple((name, self.writes, 10 + self.writes) for name in collections)
+
+    def search_knowledge(self, query_text, limit=3):
+        self.searches += 1
+        return [_item(f"k{self.writes}", f"guide revision {self.writes}", 0.8)]
+
+    def search_similar_analyses(self, query_text, limit=3):
+        return []
+
+
+def test_car_context_cache_follows_vector_store_writes():
+    pytest.importorskip("langchain_core")
+    from car_analysis.rag.rag_system import RAGSystem
+
+    system = RAGSystem.__new__(RAGSystem)  # retrieval path only, no DB / LLM clients
+    system.vector_manager = store = _VersionedStore()
+    system.graph_service = None
+    system.context_builder = ContextBuilder()
+    car = {"year": 2019, "make": "Toyota", "model": "Camry"}
+
+    first = system._retrieve_for_car_analysis(car)
+    assert system._retrieve_for_car_analysis(car) == first and store.searches == 4
+
+    # e.g. the ingest pipeline writing straight to the vector manager, without invalidate()
+    store.writes += 1
+    refreshed = system._retrieve_for_car_analysis(car)
+    assert "revision 1" in refreshed and "revision 0" not in refreshed and store.searches == 8
@@ -0,0 +1,111 @@
+"""Tests for the incremental ReportSummary shared by the orchestrator's reports.
+
+Usage:
+  python -m pytest car_analysis/tests/test_report_summary.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from car_analysis.core import orchestrator
+from car_analysis.core.report_summary import ReportSummary
+
+
+def _report(score=None, llm=None, errors=(), error=None):
+    if error:
+        return {"car": {}, "error": error}
+    report = {
+        "deal_score": {"success": score is not None, "score": score or 0,
+                       "verdict": "Good Deal" if (score or 0) >= 60 else "Fair Deal"},
+        "analysis_status": {"success": score is not None, "errors": list(errors)},
+    }
+    if llm is not None:
+        report["llm_opinion"] = {"score": llm, "verdict": "Fair Deal"}
+    return report
+
+
+REPORTS = [
+    _report(72, 70),
+    _report(55, 90),
+    _report(errors=["PRICE_LOOKUP: no comps", "timeout"]),
+    _report(81),
+    _report(error="TimeoutError: graph timed out"),
+]
+
+
+def test_final_report_summary():
+    summary = asyncio.run(orchestrator.generate_final_report(REPORTS))["summary"]
+    assert summary == {
+        "total_cars_analyzed": 5,
+        "successful_analyses": 3,
+        "failed_analyses": 2,
+        "success_rate": 60.0,
+        "average_deal_score": 69.3,
+        "deal_categories": {"Good Deal": 2, "Fair Deal": 2, "Unknown": 1},
+        "scoring_comparison": {"average_rule_score": 69.3, "average_llm_score": 80.0,
+                               "agreement_rate": 50.0, "agreements": 1, "disagreements": 1},
+        "rule_based_categories": {"Good Deal": 2, "Fair Deal": 2, "Unknown": 1},
+        "llm_opinion_categories": {"Fair Deal": 2, "Unknown": 3},
+        "error_analysis": {
+            "total_errors": 3,
+            "error_types": {"PRICE_LOOKUP": 1, "timeout": 1, "TimeoutError": 1},
+            "detailed_errors": ["PRICE_LOOKUP: no comps", "timeout", "TimeoutError: graph timed out"],
+        },
+    }
+
+
+def test_by_status_summary_survives_state_round_trips():
+    expected = {
+        "total_cars_analyzed": 5,
+        "successful_analyses": 3,
+        "failed_analyses": 2,
+        "success_rate": 60.0,
+        "scoring_comparison": {"average_rule_score": 69.3, "average_llm_score": 80.0},
+        "rule_based_categories": {"Good Deal": 2, "Fair Deal": 1},
+        "llm_opinion_categories": {"Fair Deal": 2, "Unknown": 1},
+        "error_analysis": {
+            "total_errors": 2,
+            "error_types": {"PRICE_LOOKUP": 1, "UNKNOWN_ERROR": 1},
+        },
+    }
+
+    state = None
+    for report in REPORTS:
+        summary = ReportSummary.from_state(state, by_status=True)
+        summary.add(report)
+        state = json.loads(json.dumps(summary.to_state()))
+        # Counts only: the state a fold copies does not grow with the error messages
+        assert not any(isinstance(value, list) for value in state.values())
+    assert ReportSummary.from_state(state, by_status=True).to_dict() == expected
+
+    # Built once over all reports, the same summary also lists the errors
+    full = ReportSummary(by_status=True)
+    for report in REPORTS:
+        full.add(report)
+    expected["error_analysis"]["detailed_errors"] = ["PRICE_LOOKUP: no comps", "timeout"]
+    assert full.to_dict() == expected
+
+
+def test_aggregate_car_reports_folds_only_the_new_report():
+    prior = ReportSummary(by_status=True)
+    for report in REPORTS[:2]:
+        prior.add(report)
+    state = {
+        "current_car": {"year": 2021, "make": "Honda", "model": "Fit"},
+        "deal_score": {"success": True, "score": 64, "verdict": "Good Deal"},
+        "llm_opinion": {"score": 30, "verdict": "Bad Deal"},
+        "analysis_errors": [],
+        "car_reports": REPORTS[:2],
+        "report_summary": prior.to_state(),
+    }
+
+    result = asyncio.run(orchestrator.aggregate_car_reports(state))
+    assert len(result["car_reports"]) == 1 and "agg_report" not in result
+    summary = ReportSummary.from_state(result["report_summary"], by_status=True).to_dict()
+    assert summary["total_cars_analyzed"] == 3
+    assert summary["scoring_comparison"] == {"average_rule_score": 63.7, "average_llm_score": 63.3}
+    assert summary["llm_opinion_categories"] == {"Fair Deal": 2, "Bad Deal": 1}
+    # The caller's counters are not mutated
+    assert prior.to_state()["total_cars"] == 2
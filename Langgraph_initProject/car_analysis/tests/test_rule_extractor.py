@@ -0,0 +1,112 @@
+"""Tests for the rule-based car extractor and its LLM fallback routing.
+
+Usage:
+  python -m pytest car_analysis/tests/test_rule_extractor.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from car_analysis.utils.pdf_extractor import ChunkedCarExtractor  # noqa: E402
+from car_analysis.utils.rule_extractor import (  # noqa: E402
+    extract_page,
+    extract_pages,
+    layout_lines,
+    parse_listing_text,
+    read_layout_pages,
+)
+
+
+SAMPLE_PDF = Path(__file__).resolve().parents[1] / "sample_cars_textual.pdf"
+
+
+def _fields(car):
+    return (car["year"], car["make"], car["model"], car["mileage"], car["price_paid"])
+
+
+@pytest.mark.skipif(not SAMPLE_PDF.exists(), reason="sample PDF not present")
+def test_sample_prose_pdf_is_fully_rule_parsed():
+    (page,) = extract_pages(read_layout_pages(str(SAMPLE_PDF)))
+    assert page.confident()
+    assert [_fields(car) for car in page.cars] == [
+        (2020, "Toyota", "Camry", 35000, 22500.0),
+        (2019, "Honda", "Civic", 42000, 18200.0),
+        (2021, "Ford", "F-150", 28000, 31800.0),
+        (2018, "BMW", "3 Series", 50000, 27400.0),
+        (2021, "Tesla", "Model 3", 15000, 39900.0),
+        (2017, "Chevrolet", "Malibu", 60000, 14800.0),
+        (2018, "Nissan", "Altima", 45000, 16700.0),
+        (2022, "Mercedes-Benz", "C-Class", 12000, 44500.0),
+    ]
+
+
+def test_line_listings_aliases_and_monthly_prices():
+    cars = parse_listing_text(
+        "2019 Toyota Camry LE - 31,000 mi - $18,000\n"
+        "2020 Chevy Silverado 1500, 45k miles, $32,500 ($450/mo)\n"
+    )
+    assert [_fields(car) for car in cars] == [
+        (2019, "Toyota", "Camry", 31000, 18000.0),
+        (2020, "Chevrolet", "Silverado", 45000, 32500.0),
+    ]
+    assert all(car["confidence"] == 1.0 for car in cars)
+
+
+def test_table_rows_from_spans_and_coverage_penalty():
+    doc = fitz.open()
+    page = doc.new_page()
+    rows = [
+        ["Year", "Make", "Model", "Mileage", "Price"],
+        ["2019", "Toyota", "Camry", "31,000", "$18,000"],
+        ["2018", "Honda", "CR-V", "45,500", "$19,250"],
+    ]
+    for r, values in enumerate(rows):
+        for x, value in zip([36, 90, 170, 260, 340], values):
+            page.insert_text((x, 60 + r * 14), value, fontsize=10)
+    lines = layout_lines(page)
+    assert lines[1] == "2019 | Toyota | Camry | 31,000 | $18,000"
+
+    result, columns = extract_page("\n".join(lines))
+    assert result.confident() and columns["price_paid"] == 4
+    assert [_fields(car) for car in result.cars][1] == (2018, "Honda", "CR-V", 45500, 19250.0)
+
+    # A listing the rules cannot read (unknown make in prose) drags coverage down
+    missed, _ = extract_page("2019 Toyota Camry 31,000 mi $18,000\n2017 Zastava Yugo 80,000 mi $4,000")
+    assert len(missed.cars) == 1 and not missed.confident()
+
+
+def test_only_low_confidence_pages_reach_the_llm():
+    class _LLM:
+        def __init__(self):
+            self.prompts = []
+
+        async def ainvoke(self, messages):
+            self.prompts.append(messages[-1][1])
+            return SimpleNamespace(content=json.dumps([
+                {"year": 2017, "make": "Zastava", "model": "Yugo", "mileage": 80000, "price_paid": 4000}
+            ]))
+
+    pages = [
+        "2019 Toyota Camry 31,000 mi $18,000\n2018 Honda Civic 42,000 mi $16,500",
+        "Call us! 2017 Zastava Yugo, 80k, asking $4,000",
+        "2021 Ford F-150 28,000 miles $31,800",
+    ]
+    llm = _LLM()
+    extractor = ChunkedCarExtractor(llm=llm)
+
+    async def collect():
+        return [car async for car in extractor.stream_text(pages)]
+
+    cars = asyncio.run(collect())
+    assert extractor.rule_pages == 2 and extractor.chunk_count == 1
+    assert len(llm.prompts) == 1 and "Zastava" in llm.prompts[0] and "31,000 mi" not in llm.prompts[0]
+    assert {car["extraction_method"] for car in cars} == {"rules", "llm"}
+    assert sorted(car["source_page"] for car in cars) == [1, 1, 2, 3]
@@ -0,0 +1,129 @@
+"""Tests for the streaming analysis pipeline and its online summary.
+
+Usage:
+  python -m pytest car_analysis/tests/test_streaming_pipeline.py -q
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from car_analysis.core import orchestrator
+from car_analysis.core.agents import residual
+from car_analysis.core.report_summary import ReportSummary
+
+
+def _report(i, score=None, llm=None, error=None):
+    car = {"index": i, "year": 2020, "make": "Toyota", "model": f"M{i}", "price_paid": 20000 + i}
+    if error:
+        return {"car": car, "error": error}
+    report = {
+        "car": car,
+        "deal_score": {"success": score is not None, "score": score or 0,
+                       "verdict": "Good Deal" if (score or 0) >= 60 else "Fair Deal"},
+        "analysis_status": {"success": score is not None,
+                            "errors": [] if score is not None else ["PRICE_LOOKUP: no comps"]},
+    }
+    if llm is not None:
+        report["llm_opinion"] = {"score": llm, "verdict": "Fair Deal"}
+    return report
+
+
+REPORTS = [
+    _report(0, 72, 70),
+    _report(1, 55, 90),
+    _report(2),
+    _report(3, 81),
+    _report(4, error="TimeoutError: graph timed out"),
+]
+
+
+class _SlowExtractor:
+    """Yields cars with a delay between them and records the yield times."""
+
+    def __init__(self, cars, delay):
+        self.cars = cars
+        self.delay = delay
+        self.finished = False
+
+    async def stream(self, pdf_path):
+        for car in self.cars:
+            await asyncio.sleep(self.delay)
+            yield dict(car)
+        self.finished = True
+
+
+def test_streaming_writes_reports_before_extraction_ends(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    by_index = {r["car"]["index"]: r for r in REPORTS}
+    extractor = _SlowExtractor([r["car"] for r in REPORTS], delay=0.05)
+    lines_seen_early = []
+
+    async def fake_process(car):
+        await asyncio.sleep(0.01)
+        report = by_index[car["index"]]
+        if "error" in report:
+            raise RuntimeError(report["error"])
+        if not extractor.finished:
+            path = tmp_path / "outputs"
+            lines_seen_early.append(sum(len(p.read_text().splitlines()) for p in path.glob("*.jsonl")))
+        return report
+
+    monkeypatch.setattr(orchestrator, "process_single_car_langgraph", fake_process)
+
+    out = tmp_path / "outputs" / "run.jsonl"
+    result = asyncio.run(orchestrator.analyze_car_deals_streaming(
+        "unused.pdf", output_path=str(out), extractor=extractor))
+
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(lines) == len(REPORTS)
+    # Earlier cars were already on disk while later ones were still being extracted
+    assert max(lines_seen_early) >= 2
+    assert result["timing"]["time_to_first_result_seconds"] < result["timing"]["total_seconds"]
+
+    summary = ReportSummary()
+    for report in lines:
+        summary.add(report)
+    assert result["summary"] == summary.to_dict()
+    assert result["summary"]["total_cars_analyzed"] == 5
+    assert result["summary"]["error_analysis"]["total_errors"] == 2
+    assert json.loads((tmp_path / "outputs" / "run_summary.json").read_text())["summary"] == result["summary"]
+
+
+def test_streaming_bounds_cars_in_flight(tmp_path, monkeypatch):
+    cars = [{"index": i, "year": 2020, "make": "Toyota", "model": f"M{i}"} for i in range(12)]
+    finished = []
+    ahead = []
+    in_flight = [0, 0]  # current, peak
+
+    class _FastExtractor:
+        async def stream(self, pdf_path):
+            for car in cars:
+                ahead.append(car["index"] - len(finished))
+                yield dict(car)
+
+    batchers = set()
+
+    async def fake_process(car):
+        batchers.add(residual._batcher)
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight)
+        await asyncio.sleep(0.01 * (1 + car["index"] % 3))
+        in_flight[0] -= 1
+        finished.append(car["index"])
+        return _report(car["index"], 70)
+
+    monkeypatch.setattr(orchestrator, "process_single_car_langgraph", fake_process)
+
+    out = tmp_path / "run.jsonl"
+    previous = residual._batcher
+    result = asyncio.run(orchestrator.analyze_car_deals_streaming(
+        "unused.pdf", output_path=str(out), extractor=_FastExtractor(), max_concurrent_cars=3))
+
+    assert in_flight[1] == 3
+    # Residual batching was on for the run only
+    assert previous not in batchers and residual._batcher is previous
+    # The extractor is never more than the concurrency limit ahead of finished cars
+    assert max(ahead) == 3
+    assert len(out.read_text().splitlines()) == result["summary"]["total_cars_analyzed"] == 12
@@ -0,0 +1,120 @@
+"""Tests for the write-behind persistence queue.
+
+Usage:
+  python -m pytest car_analysis/tests/test_write_behind.py -q
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import time
+from types import SimpleNamespace
+
+from car_analysis.database.write_behind import WriteBehindQueue
+
+
+def test_put_returns_before_sink_and_flush_drains(tmp_path):
+    delivered = []
+
+    def slow_sink(records):
+        time.sleep(0.2)
+        delivered.extend(records)
+
+    queue = WriteBehindQueue(slow_sink, journal_path=str(tmp_path / "journal.jsonl"), flush_interval=0.01)
+
+    started = time.perf_counter()
+    for i in range(5):
+        queue.put({"car": {"index": i}})
+    enqueue_time = time.perf_counter() - started
+
+    assert enqueue_time < 0.2
+    assert queue.flush(timeout=5)
+    assert [r["car"]["index"] for r in delivered] == [0, 1, 2, 3, 4]
+    assert queue.stats["batches"] < 5  # records were batched
+    queue.close()
+
+
+def test_replay_after_crash(tmp_path):
+    journal = str(tmp_path / "journal.jsonl")
+
+    def failing_sink(records):
+        raise RuntimeError("database down")
+
+    # Simulate a crash: records journalled but never acknowledged
+    crashed = WriteBehindQueue(failing_sink, journal_path=journal, autostart=False)
+    crashed.put({"car": {"make": "Toyota"}})
+    crashed.put({"car": {"make": "Honda"}})
+    assert not crashed.flush()
+
+    delivered = []
+    recovered = WriteBehindQueue(delivered.extend, journal_path=journal, autostart=False)
+    assert recovered.stats["replayed"] == 2
+    assert recovered.flush()
+    assert [r["car"]["make"] for r in delivered] == ["Toyota", "Honda"]
+
+    # Acknowledged records are not replayed again
+    again = WriteBehindQueue(delivered.extend, journal_path=journal, autostart=False)
+    assert again.stats["replayed"] == 0
+    assert again.flush()
+    assert len(delivered) == 2
+
+
+def test_failed_batch_is_retried(tmp_path):
+    attempts = []
+
+    def flaky_sink(records):
+        attempts.append(len(records))
+        if len(attempts) == 1:
+            raise RuntimeError("transient")
+
+    queue = WriteBehindQueue(flaky_sink, journal_path=str(tmp_path / "journal.jsonl"), flush_interval=0.01)
+    queue.put({"car": {"make": "Mazda"}})
+    assert queue.flush(timeout=5)
+    assert len(attempts) == 2
+    assert queue.stats["failures"] == 1
+    assert queue.close(timeout=5)
+
+
+class _FlakyVectors:
+    """Vector manager stand-in that swallows errors like VectorStoreManager does."""
+
+    def __init__(self):
+        self.down = True
+        self.cars = {}
+
+    def add_cars_batch(self, cars):
+        if self.down:
+            return 0
+        self.cars.update(cars)
+        return len(cars)
+
+    def add_analyses_batch(self, analyses):
+        return 0 if self.down else len(analyses)
+
+
+def test_sink_keeps_batch_when_vectors_fail_and_replay_is_idempotent(tmp_path, monkeypatch):
+    from car_analysis.core import rag_enhanced_workers as workers
+    from car_analysis.database.manager import DatabaseManager
+    from car_analysis.database.models import Car
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = DatabaseManager(db_path=str(tmp_path / "cars.db"))
+    vectors = _FlakyVectors()
+    monkeypatch.setattr(workers, "rag_enhanced",
+                        SimpleNamespace(rag_system=SimpleNamespace(db_manager=db, vector_manager=vectors)))
+
+    journal = str(tmp_path / "journal.jsonl")
+    queue = WriteBehindQueue(workers._persist_analysis_batch, journal_path=journal, autostart=False)
+    record = workers._build_persist_record({"current_car": {"make": "Kia", "model": "Soul", "year": 2020}})
+    queue.put(record)
+    assert not queue.flush()  # SQL committed, vector write failed: still journalled
+    queue.close()
+
+    vectors.down = False
+    replayed = WriteBehindQueue(workers._persist_analysis_batch, journal_path=journal, autostart=False)
+    assert replayed.stats["replayed"] == 1
+    assert replayed.flush()
+    with db.get_session() as session:
+        assert session.query(Car).count() == 1  # replay skipped the committed row
+    assert len(vectors.cars) == 1
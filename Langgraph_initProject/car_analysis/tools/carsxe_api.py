@@ -7,28 +7,49 @@ The REST quickstart from CarsXE looks like::
     requests.get("https://api.carsxe.com/v1/ymm", params=params)
 
 This module wraps that HTTP flow with some convenience helpers and graceful
-fallbacks when the API key is missing.
+fallbacks when the API key is missing.  ``AsyncCarsXEClient`` is the
+non-blocking variant used from async graph nodes: pooled connections, jittered
+retries on 429/5xx, a circuit breaker and per-endpoint latency histograms.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import time
 from typing import Any, Dict, Optional
 
 import requests
 
+try:
+    import httpx
+except Exception:  # pragma: no cover - optional
+    httpx = None
+
+from car_analysis.tools.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyHistogram,
+    backoff_delay,
+)
+
 logger = logging.getLogger(__name__)
 
 
-YMM_ENDPOINT = "https://api.carsxe.com/v1/ymm"
-VIN_ENDPOINT = "https://api.carsxe.com/v1/vin"
+DEFAULT_BASE_URL = "https://api.carsxe.com"
+YMM_ENDPOINT = f"{DEFAULT_BASE_URL}/v1/ymm"
+VIN_ENDPOINT = f"{DEFAULT_BASE_URL}/v1/vin"
 
 
 class CarsXENotConfigured(RuntimeError):
     """Raised when the CarsXE client is unavailable."""
 
 
+class CarsXEUnavailable(CircuitOpenError):
+    """Raised when the circuit breaker short-circuits a CarsXE call."""
+
+
 class CarsXEClient:
     """Thin wrapper around the CarsXE API client.
 
@@ -37,8 +58,10 @@ class CarsXEClient:
     errors, so callers should wrap invocations accordingly.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         self.api_key = api_key or os.getenv("CARSXE_API_KEY")
+        # CARSXE_BASE_URL lets tests point the client at a local stub server
+        self.base_url = (base_url or os.getenv("CARSXE_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
         self._session: Optional[requests.Session] = None
 
         if not self.api_key:
@@ -77,7 +100,7 @@ class CarsXEClient:
         params = {"key": self.api_key, "vin": vin}
         params.update(kwargs)
 
-        resp = self._session.get(VIN_ENDPOINT, params=params, timeout=15)
+        resp = self._session.get(f"{self.base_url}/v1/vin", params=params, timeout=15)
         if resp.status_code != 200:
             raise RuntimeError(f"CarsXE VIN lookup failed ({resp.status_code}): {resp.text}")
         return resp.json()
@@ -114,11 +137,201 @@ class CarsXEClient:
             params["mileage"] = mileage
         params.update(kwargs)
 
-        resp = self._session.get(YMM_ENDPOINT, params=params, timeout=15)
+        resp = self._session.get(f"{self.base_url}/v1/ymm", params=params, timeout=15)
         if resp.status_code != 200:
             raise RuntimeError(f"CarsXE YMM lookup failed ({resp.status_code}): {resp.text}")
         return resp.json()
 
 
-# Singleton helper for quick imports
+class AsyncCarsXEClient:
+    """Non-blocking CarsXE client built on ``httpx.AsyncClient``.
+
+    * at most ``max_connections`` sockets are pooled per event loop;
+    * 429 / 5xx responses and transport errors are retried up to
+      ``max_retries`` times with full-jitter exponential backoff (a
+      ``Retry-After`` header takes precedence);
+    * a call that still fails counts against the circuit breaker; while it is
+      open calls raise :class:`CarsXEUnavailable` without touching the network;
+    * every HTTP attempt is timed into a per-endpoint :class:`LatencyHistogram`.
+
+    Other 4xx responses raise ``RuntimeError`` immediately and do not trip the
+    breaker, since retrying them cannot help.
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        *,
+        max_connections: int = 10,
+        timeout: float = 15.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.api_key = api_key or os.getenv("CARSXE_API_KEY")
+        self.base_url = (base_url or os.getenv("CARSXE_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self.latency: Dict[str, LatencyHistogram] = {}
+        # httpx pools are bound to the loop that created them
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        if httpx is None:
+            logger.info("httpx not installed; AsyncCarsXEClient disabled")
+        elif not self.api_key:
+            logger.info("CARSXE_API_KEY not set; AsyncCarsXEClient disabled")
+
+    @property
+    def available(self) -> bool:
+        """Whether an API key is configured and httpx is installed."""
+
+        return httpx is not None and bool(self.api_key)
+
+    def _guard(self):
+        if not self.available:
+            raise CarsXENotConfigured(
+                "Async CarsXE client unavailable. Install httpx and set CARSXE_API_KEY."
+            )
+
+    async def _client(self) -> "httpx.AsyncClient":
+        loop = asyncio.get_running_loop()
+        if self._http is not None and self._loop is not loop:
+            stale, stale_loop = self._http, self._loop
+            self._http = None
+            await self._close_stale(stale, stale_loop)
+        if self._http is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            )
+            self._http = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+            self._loop = loop
+        return self._http
+
+    @staticmethod
+    async def _close_stale(client: "httpx.AsyncClient", loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a client created on another event loop before it is replaced."""
+
+        if loop is not None and loop.is_running():
+            # its connections belong to that loop, so close it there
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            await client.aclose()
+        except Exception as exc:  # the old loop is gone; drop what is left of the pool
+            logger.debug("Closing stale CarsXE client failed: %s", exc)
+
+    def latency_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint latency histograms as plain dicts."""
+
+        return {endpoint: hist.snapshot() for endpoint, hist in self.latency.items()}
+
+    async def _get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        self._guard()
+        if not self.breaker.allow():
+            raise CarsXEUnavailable(f"CarsXE unavailable (circuit open) for {endpoint}")
+
+        settled = False
+        try:
+            histogram = self.latency.setdefault(endpoint, LatencyHistogram())
+            client = await self._client()
+            url = f"{self.base_url}{endpoint}"
+            last_error: Optional[BaseException] = None
+            delay = 0.0
+
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(delay)
+                started = time.perf_counter()
+                try:
+                    resp = await client.get(url, params=params)
+                except httpx.TransportError as exc:
+                    histogram.observe(time.perf_counter() - started)
+                    last_error = exc
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                    continue
+                histogram.observe(time.perf_counter() - started)
+
+                if resp.status_code == 200:
+                    settled = True
+                    self.breaker.record_success()
+                    return resp.json()
+                if resp.status_code not in self.RETRY_STATUSES:
+                    settled = True
+                    self.breaker.record_success()
+                    raise RuntimeError(f"CarsXE {endpoint} lookup failed ({resp.status_code}): {resp.text}")
+
+                last_error = RuntimeError(f"CarsXE {endpoint} lookup failed ({resp.status_code}): {resp.text}")
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                retry_after = resp.headers.get("Retry-After")
+                if retry_after:
+                    try:
+                        delay = min(self.backoff_cap, float(retry_after))
+                    except ValueError:
+                        pass
+
+            settled = True
+            self.breaker.record_failure()
+            assert last_error is not None
+            raise last_error
+        except BaseException as exc:
+            # every admitted call must settle the breaker, or a half-open probe
+            # that dies here would keep it rejecting calls forever
+            if not settled:
+                if isinstance(exc, Exception):
+                    self.breaker.record_failure()
+                else:  # cancelled: says nothing about CarsXE's health
+                    self.breaker.release()
+            raise
+
+    async def fetch_market_value_by_vin(self, vin: str, **kwargs: Any) -> Dict[str, Any]:
+        """Async counterpart of :meth:`CarsXEClient.fetch_market_value_by_vin`."""
+
+        params = {"key": self.api_key, "vin": vin}
+        params.update(kwargs)
+        return await self._get("/v1/vin", params)
+
+    async def fetch_market_value_by_trim(
+        self,
+        *,
+        make: str,
+        model: str,
+        year: int,
+        trim: Optional[str] = None,
+        mileage: Optional[int] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Async counterpart of :meth:`CarsXEClient.fetch_market_value_by_trim`."""
+
+        params: Dict[str, Any] = {
+            "key": self.api_key,
+            "year": year,
+            "make": make,
+            "model": model,
+        }
+        if trim:
+            params["trim"] = trim
+        if mileage is not None:
+            params["mileage"] = mileage
+        params.update(kwargs)
+        return await self._get("/v1/ymm", params)
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._loop = None
+
+
+# Singleton helpers for quick imports
 carsxe_client = CarsXEClient()
+async_carsxe_client = AsyncCarsXEClient()
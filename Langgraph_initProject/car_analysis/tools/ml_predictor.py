@@ -14,15 +14,44 @@ Workflow summary:
 The adapter assumes the training target was ``log1p(price)`` and therefore
 applies ``np.expm1`` to recover the final dollar estimate. Adjust if your model
 uses a different target transformation.
+
+For many cars at once use :meth:`PricePredictor.predict_many`: the features
+are built column-wise in one DataFrame, the pipeline is called once per chunk
+and ``expm1`` is applied to the whole array.  :class:`PredictionBatcher`
+coalesces concurrent single-car requests (e.g. the residual agent running for
+several cars of a PDF) into such batches.
+
+Uncompressed artefacts are loaded with ``joblib.load(mmap_mode="r")`` (numpy
+buffers are mapped from the page cache instead of copied out of the pickle
+stream), :meth:`PricePredictor.preload` starts the load in a background
+thread at startup, and :meth:`PricePredictor.process_pool` forks workers that
+share the parent's loaded model copy-on-write.
+
+When :mod:`car_analysis.tools.model_export` has written an ONNX or
+``.compact.npz`` export next to the artefact, :meth:`PricePredictor.load`
+uses it instead of unpickling the sklearn pipeline (``CAR_ML_MODEL_FORMAT``:
+``auto`` | ``onnx`` | ``compact`` | ``joblib``).  An export is only used if it
+reproduces the stored probe predictions; otherwise the joblib file is loaded.
+
+For forest models :meth:`PricePredictor.predict_quantiles` (and therefore
+``predict_price``) also reports p10/p50/p90 of the individual trees' price
+predictions.  They come from the same per-tree pass that produces the mean,
+so no second model call is needed.  The spread reflects how much the trees
+disagree; it is not a calibrated prediction interval.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import multiprocessing
 import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +60,15 @@ try:
 except Exception:  # pragma: no cover - optional dependency
     joblib = None  # type: ignore
 
+try:
+    import pandas as pd
+except Exception:  # pragma: no cover - optional dependency
+    pd = None  # type: ignore
+
 import numpy as np
 
+from . import model_export
+
 
 DEFAULT_MODEL_PATH = (
     Path(__file__).resolve().parent.parent
@@ -40,6 +76,42 @@ DEFAULT_MODEL_PATH = (
     / "used_car_price_xgb_pipeline.joblib"
 )
 
+DEFAULT_PREDICT_CHUNK_SIZE = int(os.getenv("CAR_ML_PREDICT_CHUNK_SIZE", "4096"))
+# joblib mmap mode for uncompressed artefacts ("" or "none" disables)
+DEFAULT_MMAP_MODE: Optional[str] = os.getenv("CAR_ML_MMAP_MODE", "r").strip().lower() or None
+if DEFAULT_MMAP_MODE == "none":
+    DEFAULT_MMAP_MODE = None
+
+# auto: ONNX export (when onnxruntime is installed), then compact export, then joblib
+DEFAULT_MODEL_FORMAT = os.getenv("CAR_ML_MODEL_FORMAT", "auto").strip().lower() or "auto"
+MODEL_FORMATS = ("auto", "onnx", "compact", "joblib")
+
+# Per-tree price quantiles reported next to the point prediction
+DEFAULT_QUANTILES: Tuple[float, ...] = (0.1, 0.5, 0.9)
+
+_PICKLE_PROTO = 0x80  # first byte of an uncompressed joblib/pickle file
+
+# Feature columns in pipeline order with the defaults feature_adapter uses for missing keys
+FEATURE_DEFAULTS: Dict[str, Any] = {
+    "hp": 0.0,
+    "engine displacement": 0.0,
+    "Vehicle_Age": 0,
+    "Mileage_per_Year": 0.0,
+    "fuel_type": "OTHER",
+    "transmission": "OTHER",
+    "is_v_engine": 0,
+    "clean_title": 0,
+}
+# feature column -> raw input key for the pass-through fields
+_PASSTHROUGH = {
+    "hp": "hp",
+    "engine displacement": "engine_displacement",
+    "fuel_type": "fuel_type",
+    "transmission": "transmission",
+    "is_v_engine": "is_v_engine",
+    "clean_title": "clean_title",
+}
+
 
 def feature_adapter(raw: Dict[str, Any]) -> Dict[str, Any]:
     """Adapt raw input fields into the engineered feature schema.
@@ -83,37 +155,296 @@ def feature_adapter(raw: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def build_feature_frame(rows: Union[Sequence[Dict[str, Any]], "pd.DataFrame"],
+                        current_year: Optional[int] = None) -> "pd.DataFrame":
+    """Vectorized :func:`feature_adapter` over a list of dicts or a DataFrame.
+
+    Produces one row per input with the same values ``feature_adapter`` gives
+    for that row: non-numeric (or NaN) year/mileage count as missing, absent
+    columns take the defaults in ``FEATURE_DEFAULTS`` and categorical columns
+    are object arrays with ``None`` for missing values.
+    """
+
+    if pd is None:
+        raise RuntimeError("pandas is not installed. Install optional dependencies first.")
+
+    records = None if isinstance(rows, pd.DataFrame) else list(rows)
+    raw = rows if records is None else pd.DataFrame.from_records(records)
+    n = len(raw)
+    current_year = current_year or datetime.utcnow().year
+
+    def numeric(column: str) -> np.ndarray:
+        if column not in raw:
+            return np.full(n, np.nan)
+        values = raw[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            # feature_adapter ignores strings/None, so only real numbers survive
+            values = values.where(values.map(_is_number), np.nan)
+        return values.to_numpy(dtype=float, na_value=np.nan)
+
+    year = numeric("year")
+    mileage = numeric("mileage")
+
+    has_year = year > 0  # NaN compares False
+    vehicle_age = np.where(has_year, np.maximum(current_year - np.trunc(np.where(has_year, year, 0)), 0), 0)
+    vehicle_age = vehicle_age.astype(np.int64)
+    has_mileage = ~np.isnan(mileage)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mileage_per_year = np.where(has_mileage & (vehicle_age > 0), mileage / np.maximum(vehicle_age, 1),
+                                    np.where(has_mileage, mileage, 0.0))
+
+    features: Dict[str, Any] = {}
+    for column, default in FEATURE_DEFAULTS.items():
+        if column == "Vehicle_Age":
+            features[column] = vehicle_age
+        elif column == "Mileage_per_Year":
+            features[column] = mileage_per_year
+        else:
+            source = _PASSTHROUGH[column]
+            if source in raw:
+                values = raw[source].to_numpy(dtype=object)
+                values = np.where(pd.isna(values), None, values)
+                if records is not None:
+                    # a key absent from a dict takes the default, an explicit None stays None
+                    present = np.fromiter((source in record for record in records), dtype=bool, count=n)
+                    values = np.where(present, values, default)
+            else:
+                values = np.full(n, default, dtype=object)
+            features[column] = pd.Series(values, dtype=object) if isinstance(default, str) else pd.to_numeric(values)
+    return pd.DataFrame(features, index=range(n))
+
+
+def is_compressed_artefact(path: Union[str, Path]) -> bool:
+    """Whether a joblib file was written with compression (mmap_mode does not apply)."""
+
+    with open(path, "rb") as handle:
+        head = handle.read(1)
+    return not head or head[0] != _PICKLE_PROTO
+
+
+# Predictor inherited by forked pool workers (see PricePredictor.process_pool)
+_WORKER_PREDICTOR: Optional["PricePredictor"] = None
+
+
+def _init_pool_worker(model_path: str, mmap_mode: Optional[str]) -> None:
+    """Spawn-start fallback: each worker maps the artefact itself."""
+
+    global _WORKER_PREDICTOR
+    _WORKER_PREDICTOR = PricePredictor(model_path, mmap_mode=mmap_mode)
+    _WORKER_PREDICTOR.load()
+
+
+def quantile_key(q: float) -> str:
+    """Report key for a quantile: 0.1 -> ``"p10"``."""
+
+    return f"p{round(q * 100):d}"
+
+
+def tree_predictions(pipeline: Any, frame: "pd.DataFrame") -> Optional[np.ndarray]:
+    """Per-tree outputs, shape ``(n_trees, n_rows)``, or ``None`` if the model is no forest.
+
+    Supports :class:`~car_analysis.tools.model_export.CompactPipeline` and
+    sklearn pipelines that end in a RandomForest / ExtraTrees regressor; the
+    trees see exactly the float32 input the forest's own ``predict`` gives
+    them, so their mean equals ``pipeline.predict``.
+    """
+
+    if isinstance(pipeline, model_export.CompactPipeline):
+        return pipeline.tree_values(pipeline.transform(frame)) if pipeline.n_trees > 1 else None
+
+    steps = getattr(pipeline, "steps", None)
+    model = steps[-1][1] if steps else pipeline
+    if type(model).__name__ not in model_export.FOREST_TYPES or len(model.estimators_) < 2:
+        return None
+    X = pipeline[:-1].transform(frame) if steps and len(steps) > 1 else frame
+    if hasattr(X, "tocsr"):
+        X = X.tocsr().astype(np.float32)
+        X.sort_indices()
+    else:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+    return np.stack([tree.predict(X, check_input=False) for tree in model.estimators_])
+
+
+def _predict_chunk(pipeline: Any, chunk: "pd.DataFrame",
+                   quantiles: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Model output for a chunk as column 0; with ``quantiles``, per-tree price quantiles after it.
+
+    The quantile columns are NaN when the model does not expose its trees.
+    """
+
+    per_tree = tree_predictions(pipeline, chunk) if quantiles else None
+    if per_tree is None:
+        out = np.asarray(pipeline.predict(chunk), dtype=float).reshape(-1, 1)
+        if quantiles:
+            out = np.hstack([out, np.full((len(out), len(quantiles)), np.nan)])
+        return out
+    # the forest mean, summed tree by tree in estimator order like sklearn does
+    mean = per_tree.sum(axis=0) / len(per_tree)
+    return np.column_stack([mean, _price_quantiles(per_tree, quantiles)])
+
+
+def _price_quantiles(per_tree: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """``np.quantile(np.expm1(per_tree), quantiles, axis=0).T`` at a fraction of the cost.
+
+    Rows are sorted as contiguous (row, tree) arrays and ``expm1`` (monotone)
+    is applied only to the order statistics the linear interpolation needs.
+    """
+
+    ordered = np.ascontiguousarray(per_tree.T)
+    ordered.sort(axis=1)
+    position = np.asarray(quantiles, dtype=float) * (ordered.shape[1] - 1)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, ordered.shape[1] - 1)
+    below, above = np.expm1(ordered[:, lower]), np.expm1(ordered[:, upper])
+    return below + (above - below) * (position - lower)
+
+
+def _predict_chunk_in_worker(chunk: "pd.DataFrame", quantiles: Optional[Sequence[float]] = None) -> np.ndarray:
+    assert _WORKER_PREDICTOR is not None and _WORKER_PREDICTOR._pipeline is not None
+    return _predict_chunk(_WORKER_PREDICTOR._pipeline, chunk, quantiles)
+
+
 class PricePredictor:
     """Wrapper around a scikit-learn regression pipeline."""
 
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, mmap_mode: Optional[str] = DEFAULT_MMAP_MODE,
+                 model_format: str = DEFAULT_MODEL_FORMAT):
+        if model_format not in MODEL_FORMATS:
+            raise ValueError(f"model_format must be one of {MODEL_FORMATS}, got {model_format!r}")
         self.model_path = Path(
             model_path or os.getenv("CAR_ML_MODEL_PATH", str(DEFAULT_MODEL_PATH))
         )
+        self.mmap_mode = mmap_mode
+        self.model_format = model_format
+        self.loaded_format: Optional[str] = None
         self._pipeline: Optional[Any] = None
+        self._load_lock = threading.Lock()
+        self._preload_thread: Optional[threading.Thread] = None
+        self.load_seconds: Optional[float] = None
+        self.mmap_used = False
 
     # ------------------------------------------------------------------
     # Loading helpers
     # ------------------------------------------------------------------
 
     def load(self) -> None:
-        """Load the persisted pipeline from disk if available."""
+        """Load the persisted pipeline from disk if available.
+
+        Concurrent callers (e.g. the first agent call racing a background
+        :meth:`preload`) wait for the one in-flight load.
+        """
 
         if self._pipeline is not None:
             return
 
-        if joblib is None:
-            raise RuntimeError(
-                "joblib is not installed. Install optional dependencies first."
-            )
+        with self._load_lock:
+            if self._pipeline is not None:
+                return
+
+            if self.model_format != "joblib" and self._load_exported():
+                return
+
+            if joblib is None:
+                raise RuntimeError(
+                    "joblib is not installed. Install optional dependencies first."
+                )
 
-        if not self.model_path.exists():
-            raise FileNotFoundError(
-                f"Model file not found at {self.model_path}. Set CAR_ML_MODEL_PATH."
+            if not self.model_path.exists():
+                raise FileNotFoundError(
+                    f"Model file not found at {self.model_path}. Set CAR_ML_MODEL_PATH."
+                )
+
+            mmap_mode = self.mmap_mode
+            if mmap_mode and is_compressed_artefact(self.model_path):
+                logger.debug("%s is compressed; loading without mmap", self.model_path)
+                mmap_mode = None
+
+            logger.info("Loading ML predictor from %s (mmap_mode=%s)", self.model_path, mmap_mode)
+            started = time.perf_counter()
+            self._pipeline = joblib.load(self.model_path, mmap_mode=mmap_mode)
+            self.load_seconds = time.perf_counter() - started
+            self.mmap_used = mmap_mode is not None
+            self.loaded_format = "joblib"
+
+    def _load_exported(self) -> bool:
+        """Load an ONNX / compact export if one exists, is current and passes the probe."""
+
+        paths = model_export.exported_paths(self.model_path)
+        if not paths["probe"].exists():
+            return False
+        candidates = ("onnx", "compact") if self.model_format == "auto" else (self.model_format,)
+        for fmt in candidates:
+            path = paths[fmt]
+            if not path.exists() or (fmt == "onnx" and model_export.onnxruntime is None):
+                continue
+            if self.model_path.exists() and self.model_path.stat().st_mtime > path.stat().st_mtime:
+                logger.warning("%s is older than %s; re-run model_export", path, self.model_path)
+                continue
+            started = time.perf_counter()
+            try:
+                model = (model_export.OnnxPipeline(path) if fmt == "onnx"
+                         else model_export.CompactPipeline.load(path))
+                drift = model_export.check_parity(model, paths["probe"])
+            except Exception as exc:
+                logger.warning("Ignoring %s export %s: %s", fmt, path, exc)
+                continue
+            logger.info("Loaded ML predictor from %s (%s, max rel diff %.1e)", path, fmt, drift)
+            self._pipeline = model
+            self.load_seconds = time.perf_counter() - started
+            self.mmap_used = False
+            self.loaded_format = fmt
+            return True
+        return False
+
+    def preload(self, background: bool = True) -> Optional[threading.Thread]:
+        """Start loading the pipeline now so the first prediction does not pay for it.
+
+        With ``background=True`` the load runs in a daemon thread (failures are
+        logged; :attr:`available` reports them later) and the thread is returned.
+        """
+
+        if self._pipeline is not None:
+            return None
+        if not background:
+            self.load()
+            return None
+        if self._preload_thread is None or not self._preload_thread.is_alive():
+            self._preload_thread = threading.Thread(
+                target=self._preload_quietly, name="ml-predictor-preload", daemon=True
             )
+            self._preload_thread.start()
+        return self._preload_thread
+
+    def _preload_quietly(self) -> None:
+        try:
+            self.load()
+        except Exception as exc:
+            logger.warning("ML predictor preload failed: %s", exc)
+
+    def process_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Worker processes sharing one read-only copy of the loaded pipeline.
 
-        logger.info("Loading ML predictor from %s", self.model_path)
-        self._pipeline = joblib.load(self.model_path)
+        The pipeline is loaded here and the workers are forked afterwards, so
+        they inherit it copy-on-write; prediction never writes to the tree
+        buffers, so those pages stay shared.  Where ``fork`` is unavailable
+        each worker loads the artefact itself (sharing the mmap'ed page cache
+        for uncompressed files).  Pass the pool to :meth:`predict_many`.
+        """
+
+        global _WORKER_PREDICTOR
+        self.load()
+        if "fork" in multiprocessing.get_all_start_methods():
+            _WORKER_PREDICTOR = self
+            return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_pool_worker,
+            initargs=(str(self.model_path), self.mmap_mode),
+        )
 
     @property
     def available(self) -> bool:
@@ -149,27 +480,146 @@ class PricePredictor:
         ```
         """
 
-        if self._pipeline is None:
+        adapted_features = feature_adapter(features)
+        predictions = self.predict_quantiles([features])
+        return {
+            "success": True,
+            "predicted_price": float(predictions["predicted_price"][0]),
+            "price_quantiles": row_quantiles(predictions, 0),
+            "model_path": str(self.model_path),
+            "features_used": adapted_features,
+        }
+
+    def predict_many(self,
+                     rows: Union[Sequence[Dict[str, Any]], "pd.DataFrame"],
+                     chunk_size: Optional[int] = None,
+                     workers: int = 1,
+                     pool: Optional[Executor] = None) -> np.ndarray:
+        """Predict prices for many cars; returns an array aligned with ``rows``.
+
+        Features are built once for all rows (:func:`build_feature_frame`),
+        the pipeline is called once per ``chunk_size`` rows and ``expm1`` is
+        applied to the concatenated output.  ``workers > 1`` predicts chunks
+        in a thread pool (tree ensembles release the GIL while predicting);
+        ``pool`` (from :meth:`process_pool`) predicts them in worker processes.
+        """
+
+        return np.expm1(self._predict_frame(rows, chunk_size, workers, pool)[:, 0])
+
+    def predict_quantiles(self,
+                          rows: Union[Sequence[Dict[str, Any]], "pd.DataFrame"],
+                          quantiles: Sequence[float] = DEFAULT_QUANTILES,
+                          chunk_size: Optional[int] = None,
+                          workers: int = 1,
+                          pool: Optional[Executor] = None) -> Dict[str, np.ndarray]:
+        """:meth:`predict_many` plus per-tree price quantiles from the same model pass.
+
+        Returns ``{"predicted_price": ..., "p10": ..., "p50": ..., "p90": ...}``
+        (one array per key, aligned with ``rows``).  ``predicted_price`` is
+        identical to :meth:`predict_many`; the quantile arrays are NaN when
+        the model is not a tree forest (e.g. XGBoost or an ONNX export).
+        """
+
+        out = self._predict_frame(rows, chunk_size, workers, pool, tuple(quantiles))
+        result = {"predicted_price": np.expm1(out[:, 0])}
+        for i, q in enumerate(quantiles, start=1):
+            result[quantile_key(q)] = out[:, i]
+        return result
+
+    def _predict_frame(self, rows, chunk_size, workers, pool, quantiles=None) -> np.ndarray:
+        if pool is None:
             self.load()
+            assert self._pipeline is not None
 
-        assert self._pipeline is not None
+        frame = build_feature_frame(rows)
+        width = 1 + len(quantiles or ())
+        if frame.empty:
+            return np.empty((0, width), dtype=float)
 
-        adapted_features = feature_adapter(features)
-        # Most sklearn pipelines accept a list of dicts (converted to DataFrame).
+        chunk_size = max(1, chunk_size or DEFAULT_PREDICT_CHUNK_SIZE)
+        chunks = [frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size)]
         try:
-            prediction: Iterable[float] = self._pipeline.predict([adapted_features])
+            if pool is not None:
+                outputs = list(pool.map(_predict_chunk_in_worker, chunks, [quantiles] * len(chunks)))
+            elif workers > 1 and len(chunks) > 1:
+                with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                    outputs = list(pool.map(lambda chunk: _predict_chunk(self._pipeline, chunk, quantiles), chunks))
+            else:
+                outputs = [_predict_chunk(self._pipeline, chunk, quantiles) for chunk in chunks]
         except Exception as exc:
             logger.error("Prediction failed: %s", exc)
             raise
 
-        raw_pred = float(list(prediction)[0])
-        predicted_price = float(np.expm1(raw_pred))
-        return {
-            "success": True,
-            "predicted_price": predicted_price,
-            "model_path": str(self.model_path),
-            "features_used": adapted_features,
-        }
+        return np.concatenate(outputs)
+
+
+def row_quantiles(predictions: Dict[str, np.ndarray], i: int) -> Optional[Dict[str, float]]:
+    """Quantiles of row ``i`` as a report dict, or ``None`` when the model has none."""
+
+    values = {key: float(column[i]) for key, column in predictions.items() if key != "predicted_price"}
+    if not values or any(np.isnan(v) for v in values.values()):
+        return None
+    return values
+
+
+class PredictionBatcher:
+    """Coalesce concurrent ``predict_price`` calls into ``predict_many`` batches.
+
+    The first request opens a ``window_s`` collection window; everything that
+    arrives before it closes (or until ``max_batch`` requests) is predicted in
+    one pipeline call off the event loop.  Results match ``predict_price``.
+    """
+
+    def __init__(self,
+                 predictor: "PricePredictor",
+                 window_s: float = 0.005,
+                 max_batch: int = 256):
+        self.predictor = predictor
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Dict[str, Any], "asyncio.Future"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.requests = 0
+
+    async def predict_price(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future))
+        self.requests += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], "asyncio.Future"]]) -> None:
+        rows = [features for features, _ in batch]
+        try:
+            predictions = await asyncio.to_thread(self.predictor.predict_quantiles, rows)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for i, (features, future) in enumerate(batch):
+            if not future.done():
+                future.set_result({
+                    "success": True,
+                    "predicted_price": float(predictions["predicted_price"][i]),
+                    "price_quantiles": row_quantiles(predictions, i),
+                    "model_path": str(self.predictor.model_path),
+                    "features_used": feature_adapter(features),
+                })
 
 
 # Singleton predictor for quick access
@@ -0,0 +1,474 @@
+"""Export the residual-value pipeline to lightweight inference formats.
+
+Two targets, both written next to the joblib artefact and picked up by
+:class:`car_analysis.tools.ml_predictor.PricePredictor`:
+
+* ``<stem>.compact.npz`` - the fitted encoders (StandardScaler statistics,
+  OneHotEncoder categories) and every tree of the forest flattened into a
+  handful of NumPy arrays, evaluated by :class:`CompactPipeline` with
+  vectorized node traversal.  Needs only numpy/pandas at inference time (no
+  scikit-learn import, no pickle) and stores nodes in 29 bytes instead of the
+  64-byte sklearn node struct.  Supports ``ColumnTransformer`` (scaler /
+  one-hot / passthrough) in front of a ``RandomForestRegressor``,
+  ``ExtraTreesRegressor`` or ``DecisionTreeRegressor``.
+* ``<stem>.onnx`` - via ``skl2onnx`` (plus ``onnxmltools`` for an XGBoost final
+  estimator), run with ``onnxruntime``.  Optional; skipped when the packages
+  are missing.
+
+Each export also writes ``<stem>.probe.json``: probe feature rows drawn from
+the fitted encoders and the joblib pipeline's predictions for them.  The
+predictor re-predicts the probe after loading an exported model and falls back
+to joblib when the results differ by more than ``PARITY_RTOL``.
+
+Usage:
+  python -m car_analysis.tools.model_export --model car_analysis/models/used_car_price_rf.joblib --format all
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import pandas as pd
+except Exception:  # pragma: no cover - optional dependency
+    pd = None  # type: ignore
+
+try:
+    import onnxruntime
+except Exception:  # pragma: no cover - optional dependency
+    onnxruntime = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+COMPACT_SUFFIX = ".compact.npz"
+ONNX_SUFFIX = ".onnx"
+PROBE_SUFFIX = ".probe.json"
+COMPACT_VERSION = 1
+PARITY_RTOL = 1e-4  # onnxruntime evaluates trees in float32
+DEFAULT_PROBE_ROWS = 256
+
+_TREE_LEAF = -1
+_TRAVERSAL_BLOCK = 1 << 16  # (tree, row) pairs walked per numpy pass
+FOREST_TYPES = ("RandomForestRegressor", "ExtraTreesRegressor")
+
+
+class ExportError(ValueError):
+    """The fitted pipeline uses a component the compact format cannot represent."""
+
+
+def exported_paths(model_path: Union[str, Path]) -> Dict[str, Path]:
+    """Sidecar paths for a joblib artefact: compact, onnx and probe."""
+
+    model_path = Path(model_path)
+    stem = model_path.with_suffix("")
+    return {
+        "compact": stem.with_name(stem.name + COMPACT_SUFFIX),
+        "onnx": stem.with_name(stem.name + ONNX_SUFFIX),
+        "probe": stem.with_name(stem.name + PROBE_SUFFIX),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Compact format
+# ---------------------------------------------------------------------------
+
+def _split_pipeline(pipeline: Any) -> Tuple[Optional[Any], Any]:
+    steps = getattr(pipeline, "steps", None)
+    if steps is None:
+        return None, pipeline
+    if len(steps) == 1:
+        return None, steps[0][1]
+    if len(steps) != 2:
+        raise ExportError("Expected a [preprocessor, estimator] pipeline")
+    return steps[0][1], steps[1][1]
+
+
+def _preprocessor_spec(preprocessor: Any) -> List[Dict[str, Any]]:
+    if preprocessor is None:
+        return []
+    if type(preprocessor).__name__ != "ColumnTransformer":
+        raise ExportError(f"Unsupported preprocessor {type(preprocessor).__name__}")
+
+    names_in = list(getattr(preprocessor, "feature_names_in_", []))
+    spec: List[Dict[str, Any]] = []
+    for name, transformer, columns in preprocessor.transformers_:
+        columns = [names_in[c] if isinstance(c, (int, np.integer)) else c for c in np.atleast_1d(columns)]
+        if transformer == "drop" or not columns:
+            continue
+        if transformer == "passthrough":
+            spec.append({"kind": "passthrough", "columns": columns})
+            continue
+        kind = type(transformer).__name__
+        if kind == "StandardScaler":
+            spec.append({
+                "kind": "scale",
+                "columns": columns,
+                "mean": None if transformer.mean_ is None else np.asarray(transformer.mean_, float).tolist(),
+                "scale": None if transformer.scale_ is None else np.asarray(transformer.scale_, float).tolist(),
+            })
+        elif kind == "OneHotEncoder":
+            if transformer.drop is not None or getattr(transformer, "infrequent_categories_", None) is not None:
+                raise ExportError("OneHotEncoder with drop/infrequent categories is not supported")
+            spec.append({
+                "kind": "onehot",
+                "columns": columns,
+                "categories": [[None if _is_missing(c) else c for c in cats.tolist()]
+                               for cats in transformer.categories_],
+                "handle_unknown": transformer.handle_unknown,
+            })
+        else:
+            raise ExportError(f"Unsupported transformer {kind} in step {name!r}")
+    return spec
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _tree_arrays(estimator: Any) -> Tuple[List[Any], int]:
+    """Fitted sklearn trees of the estimator and the divisor of their summed output."""
+
+    kind = type(estimator).__name__
+    if kind in FOREST_TYPES:
+        trees = [e.tree_ for e in estimator.estimators_]
+        return trees, len(trees)
+    if kind == "DecisionTreeRegressor":
+        return [estimator.tree_], 1
+    raise ExportError(f"Unsupported estimator {kind}; export it to ONNX instead")
+
+
+def export_compact(pipeline: Any, path: Union[str, Path]) -> Path:
+    """Write the fitted pipeline as a ``.compact.npz`` file (no pickle inside)."""
+
+    preprocessor, estimator = _split_pipeline(pipeline)
+    spec = _preprocessor_spec(preprocessor)
+    trees, divisor = _tree_arrays(estimator)
+    if any(t.n_outputs != 1 for t in trees):
+        raise ExportError("Only single-output regressors are supported")
+
+    sizes = np.array([t.node_count for t in trees], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+    children, feature, threshold, value, missing_left = [], [], [], [], []
+    for root, tree in zip(roots, trees):
+        # leaves point at themselves with an infinite threshold, so traversal
+        # needs no leaf test: a row is done once its node stops changing
+        is_leaf = tree.children_left == _TREE_LEAF
+        own = np.arange(tree.node_count) + root
+        children.append(np.column_stack([np.where(is_leaf, own, tree.children_right + root),
+                                         np.where(is_leaf, own, tree.children_left + root)]))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        value.append(tree.value[:, 0, 0])
+        missing_left.append(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)))
+
+    path = Path(path)
+    meta = {
+        "version": COMPACT_VERSION,
+        "preprocessor": spec,
+        "columns": list(getattr(pipeline, "feature_names_in_", [])) or
+                   [c for step in spec for c in step["columns"]],
+        "estimator": type(estimator).__name__,
+        "divisor": divisor,
+    }
+    with open(path, "wb") as handle:
+        np.savez(
+            handle,
+            meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            roots=roots,
+            children=np.concatenate(children).astype(np.int32),  # [:, 0] right, [:, 1] left
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            value=np.concatenate(value).astype(np.float64),
+            missing_left=np.concatenate(missing_left).astype(bool),
+        )
+    return path
+
+
+class CompactPipeline:
+    """Numpy evaluator for ``.compact.npz`` files; ``predict`` matches the sklearn pipeline."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.meta = json.loads(bytes(arrays["meta"]).decode("utf-8"))
+        if self.meta.get("version") != COMPACT_VERSION:
+            raise ValueError(f"Unsupported compact model version {self.meta.get('version')}")
+        self.roots = arrays["roots"]
+        self.children = arrays["children"]
+        self.feature = arrays["feature"].astype(np.intp)
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.missing_left = arrays["missing_left"]
+        self.divisor = int(self.meta["divisor"])
+        self.categorical_columns = [c for step in self.meta["preprocessor"] if step["kind"] == "onehot"
+                                    for c in step["columns"]]
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CompactPipeline":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.roots, self.children, self.feature,
+                                      self.threshold, self.value, self.missing_left))
+
+    def transform(self, frame: "pd.DataFrame") -> np.ndarray:
+        """Encoded design matrix, column order as ``ColumnTransformer.transform``."""
+
+        if not self.meta["preprocessor"]:
+            return np.asarray(frame, dtype=float)
+        blocks = []
+        for step in self.meta["preprocessor"]:
+            columns = step["columns"]
+            if step["kind"] == "onehot":
+                blocks.append(self._one_hot(frame, columns, step["categories"]))
+                continue
+            block = frame[columns].to_numpy(dtype=float, na_value=np.nan)
+            if step["kind"] == "scale":
+                if step["mean"] is not None:
+                    block = block - np.asarray(step["mean"])
+                if step["scale"] is not None:
+                    block = block / np.asarray(step["scale"])
+            blocks.append(block)
+        return np.hstack(blocks) if len(blocks) > 1 else blocks[0]
+
+    @staticmethod
+    def _one_hot(frame: "pd.DataFrame", columns: Sequence[str], categories: Sequence[Sequence[Any]]) -> np.ndarray:
+        n = len(frame)
+        width = sum(len(c) for c in categories)
+        out = np.zeros((n, width))
+        offset = 0
+        rows = np.arange(n)
+        for column, cats in zip(columns, categories):
+            index = {c: i for i, c in enumerate(cats) if c is not None}
+            missing_slot = next((i for i, c in enumerate(cats) if c is None), None)
+            values = frame[column]
+            codes = values.map(index).to_numpy(dtype=float, na_value=np.nan)
+            if missing_slot is not None:
+                codes = np.where(values.isna().to_numpy(), missing_slot, codes)
+            known = ~np.isnan(codes)
+            out[rows[known], offset + codes[known].astype(np.int64)] = 1.0
+            offset += len(cats)
+        return out
+
+    def tree_values(self, X: np.ndarray) -> np.ndarray:
+        """Leaf value of every tree for every row, shape ``(n_trees, n_rows)``."""
+
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, width = X.shape
+        flat = X.ravel()
+        offsets = np.arange(n) * width
+        out = np.empty((self.n_trees, n))
+        # a few rows walk all trees together (per-level numpy overhead dominates);
+        # many rows walk a few trees at a time (their nodes stay in cache)
+        group = max(1, _TRAVERSAL_BLOCK // max(n, 1))
+        for start in range(0, self.n_trees, group):
+            roots = self.roots[start:start + group]
+            node = np.repeat(roots.astype(np.intp), n)
+            active, current, base = np.arange(node.size), node.copy(), np.tile(offsets, len(roots))
+            while active.size:
+                x = flat[base + self.feature[current]]
+                go_left = x <= self.threshold[current]
+                missing = np.isnan(x)
+                if missing.any():
+                    go_left = np.where(missing, self.missing_left[current], go_left)
+                following = self.children[current, go_left.view(np.int8)]
+                moved = following != current
+                node[active] = following
+                active, current, base = active[moved], following[moved], base[moved]
+            out[start:start + len(roots)] = self.value[node].reshape(len(roots), n)
+        return out
+
+    def predict(self, frame: "pd.DataFrame") -> np.ndarray:
+        # sequential per-tree accumulation then one division, as sklearn's forest does
+        return self.tree_values(self.transform(frame)).sum(axis=0) / self.divisor
+
+
+# ---------------------------------------------------------------------------
+# ONNX (optional)
+# ---------------------------------------------------------------------------
+
+def export_onnx(pipeline: Any, path: Union[str, Path], sample: "pd.DataFrame") -> Path:
+    """Convert the pipeline with skl2onnx; one named input per feature column."""
+
+    from skl2onnx import to_onnx, update_registered_converter
+    from skl2onnx.common.data_types import FloatTensorType, Int64TensorType, StringTensorType
+
+    _, estimator = _split_pipeline(pipeline)
+    if type(estimator).__name__ == "XGBRegressor":
+        from onnxmltools.convert.xgboost.operator_converters.XGBoost import convert_xgboost
+        from skl2onnx.common.shape_calculator import calculate_linear_regressor_output_shapes
+
+        update_registered_converter(type(estimator), "XGBoostXGBRegressor",
+                                    calculate_linear_regressor_output_shapes, convert_xgboost)
+
+    initial_types = []
+    for column in sample.columns:
+        dtype = sample[column].dtype
+        if pd.api.types.is_integer_dtype(dtype):
+            initial_types.append((column, Int64TensorType([None, 1])))
+        elif pd.api.types.is_numeric_dtype(dtype):
+            initial_types.append((column, FloatTensorType([None, 1])))
+        else:
+            initial_types.append((column, StringTensorType([None, 1])))
+
+    model = to_onnx(pipeline, initial_types=initial_types)
+    path = Path(path)
+    path.write_bytes(model.SerializeToString())
+    return path
+
+
+class OnnxPipeline:
+    """onnxruntime session with the sklearn ``predict(frame)`` interface."""
+
+    def __init__(self, path: Union[str, Path]):
+        if onnxruntime is None:
+            raise RuntimeError("onnxruntime is not installed. Install optional dependencies first.")
+        self.session = onnxruntime.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+        self.inputs = {i.name: i.type for i in self.session.get_inputs()}
+
+    def predict(self, frame: "pd.DataFrame") -> np.ndarray:
+        feeds = {}
+        for name, kind in self.inputs.items():
+            values = frame[name]
+            if kind == "tensor(string)":
+                column = values.astype(object).where(values.notna(), "").astype(str).to_numpy()
+            elif kind == "tensor(int64)":
+                column = values.to_numpy(dtype=np.int64)
+            else:
+                column = values.to_numpy(dtype=np.float32, na_value=np.nan)
+            feeds[name] = column.reshape(-1, 1)
+        return np.asarray(self.session.run(None, feeds)[0], dtype=float).ravel()
+
+
+# ---------------------------------------------------------------------------
+# Probe / parity
+# ---------------------------------------------------------------------------
+
+def probe_frame(pipeline: Any, rows: int = DEFAULT_PROBE_ROWS, seed: int = 0) -> "pd.DataFrame":
+    """Feature rows spread over the fitted encoders' ranges and categories (plus missing values)."""
+
+    preprocessor, _ = _split_pipeline(pipeline)
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, Any] = {}
+    for step in _preprocessor_spec(preprocessor):
+        for i, column in enumerate(step["columns"]):
+            if step["kind"] == "onehot":
+                choices = list(step["categories"][i]) + ["__unseen__", None]
+                columns[column] = pd.Series([choices[j] for j in rng.integers(0, len(choices), rows)], dtype=object)
+            else:
+                mean = step.get("mean")[i] if step.get("mean") else 0.0
+                scale = step.get("scale")[i] if step.get("scale") else 1.0
+                columns[column] = mean + scale * rng.normal(0, 1.5, rows)
+    ordered = list(getattr(pipeline, "feature_names_in_", [])) or list(columns)
+    return pd.DataFrame({c: columns[c] for c in ordered})
+
+
+def write_probe(pipeline: Any, path: Union[str, Path], rows: int = DEFAULT_PROBE_ROWS) -> Path:
+    frame = probe_frame(pipeline, rows)
+    expected = np.asarray(pipeline.predict(frame), dtype=float).ravel()
+    categorical = [c for c in frame.columns if frame[c].dtype == object]
+    payload = {
+        "columns": list(frame.columns),
+        "categorical": categorical,
+        "rows": frame.astype(object).where(frame.notna(), None).values.tolist(),
+        "expected": expected.tolist(),
+    }
+    path = Path(path)
+    path.write_text(json.dumps(payload))
+    return path
+
+
+def load_probe(path: Union[str, Path]) -> Tuple["pd.DataFrame", np.ndarray]:
+    payload = json.loads(Path(path).read_text())
+    frame = pd.DataFrame(payload["rows"], columns=payload["columns"])
+    for column in payload["columns"]:
+        if column in payload["categorical"]:
+            frame[column] = pd.Series(frame[column].tolist(), dtype=object)
+        else:
+            frame[column] = pd.to_numeric(frame[column])
+    return frame, np.asarray(payload["expected"], dtype=float)
+
+
+def check_parity(model: Any, probe_path: Union[str, Path], rtol: float = PARITY_RTOL) -> float:
+    """Max relative difference between ``model`` and the stored joblib predictions.
+
+    Raises ``ValueError`` when it exceeds ``rtol``.
+    """
+
+    frame, expected = load_probe(probe_path)
+    got = np.asarray(model.predict(frame), dtype=float)
+    drift = float(np.max(np.abs(got - expected) / np.maximum(np.abs(expected), 1e-12))) if expected.size else 0.0
+    if not np.isfinite(drift) or drift > rtol:
+        raise ValueError(f"Exported model drifts from the joblib pipeline (max rel diff {drift:.2e} > {rtol:.0e})")
+    return drift
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def export_model(model_path: Union[str, Path], formats: Sequence[str] = ("compact",),
+                 probe_rows: int = DEFAULT_PROBE_ROWS) -> Dict[str, Any]:
+    """Export ``model_path`` to the requested formats and verify each against the probe."""
+
+    import joblib
+
+    pipeline = joblib.load(model_path)
+    paths = exported_paths(model_path)
+    write_probe(pipeline, paths["probe"], probe_rows)
+    result: Dict[str, Any] = {"probe": str(paths["probe"])}
+
+    if "compact" in formats:
+        try:
+            export_compact(pipeline, paths["compact"])
+            drift = check_parity(CompactPipeline.load(paths["compact"]), paths["probe"])
+            result["compact"] = {"path": str(paths["compact"]), "max_rel_diff": drift}
+        except (ExportError, ValueError) as exc:
+            paths["compact"].unlink(missing_ok=True)
+            result["compact"] = {"error": str(exc)}
+
+    if "onnx" in formats:
+        try:
+            export_onnx(pipeline, paths["onnx"], probe_frame(pipeline, 8))
+            drift = check_parity(OnnxPipeline(paths["onnx"]), paths["probe"])
+            result["onnx"] = {"path": str(paths["onnx"]), "max_rel_diff": drift}
+        except ImportError as exc:
+            result["onnx"] = {"error": f"skl2onnx/onnxruntime not installed ({exc.name})"}
+        except Exception as exc:
+            paths["onnx"].unlink(missing_ok=True)
+            result["onnx"] = {"error": str(exc)}
+    return result
+
+
+def main() -> None:
+    from car_analysis.tools.ml_predictor import DEFAULT_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Export the residual pipeline to compact inference formats")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL_PATH), help="joblib pipeline to export")
+    parser.add_argument("--format", choices=("compact", "onnx", "all"), default="compact")
+    parser.add_argument("--probe-rows", type=int, default=DEFAULT_PROBE_ROWS, help="Rows used for the parity check")
+    args = parser.parse_args()
+
+    formats = ("compact", "onnx") if args.format == "all" else (args.format,)
+    result = export_model(args.model, formats, args.probe_rows)
+    for name in formats:
+        info = result[name]
+        if "error" in info:
+            print(f"❌ {name}: {info['error']}")
+        else:
+            print(f"✅ {name}: {info['path']} (max rel diff {info['max_rel_diff']:.1e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,74 @@
 """Direct PDF processing functions copied from the working pdf_server.py"""
-from typing import Optional, List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple
 import os
-import json
 import base64
+import hashlib
 import fitz  # PyMuPDF
 import logging
 
 logger = logging.getLogger(__name__)
 
-def read_pdf_text(file_path: str, start_page: int = 1, end_page: Optional[int] = None) -> Dict[str, Any]:
+# Below this many pages a process pool costs more than it saves
+PARALLEL_MIN_PAGES = 32
+
+# Selective OCR: a page whose text layer is shorter than this, or mostly
+# non-word characters, is treated as scanned
+MIN_TEXT_CHARS = 20
+MIN_TEXT_QUALITY = 0.6
+OCR_DPI_MIN = 150
+OCR_DPI_MAX = 400
+OCR_DPI_DEFAULT = 300
+_TEXT_PUNCTUATION = set("$,.-/#:%()'\"&+")
+
+
+def _clamp_pages(total_pages: int, start_page: int, end_page: Optional[int]) -> Tuple[int, int]:
+    if start_page < 1:
+        start_page = 1
+    if end_page is None or end_page > total_pages:
+        end_page = total_pages
+    if start_page > end_page:
+        start_page, end_page = end_page, start_page
+    return start_page, end_page
+
+
+def file_content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of the file bytes, used to key extraction caches."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_page_range(file_path: str, start_page: int, end_page: int) -> List[Dict[str, Any]]:
+    """Worker: open a private fitz handle and extract pages ``start_page..end_page`` (1-based, inclusive)."""
+    doc = fitz.open(file_path)
+    try:
+        return [
+            {"page_number": page_num + 1, "text": doc[page_num].get_text().strip()}
+            for page_num in range(start_page - 1, end_page)
+        ]
+    finally:
+        doc.close()
+
+
+def split_page_ranges(start_page: int, end_page: int, parts: int) -> List[Tuple[int, int]]:
+    """Split ``start_page..end_page`` into at most ``parts`` contiguous, near-equal ranges."""
+    total = end_page - start_page + 1
+    parts = max(1, min(parts, total))
+    size, extra = divmod(total, parts)
+    ranges = []
+    first = start_page
+    for idx in range(parts):
+        last = first + size - 1 + (1 if idx < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def read_pdf_text(file_path: str, start_page: int = 1, end_page: Optional[int] = None,
+        workers: int = 1) -> Dict[str, Any]:
     """
     Read normal text from a PDF file, one text per page.
 
@@ -16,6 +76,8 @@ def read_pdf_text(file_path: str, start_page: int = 1, end_page: Optional[int] =
         file_path: Path to the PDF file
         start_page: Start page (1-based)
         end_page: End page (inclusive)
+        workers: Processes to split the page range across (each opens its own
+            fitz handle); ranges shorter than PARALLEL_MIN_PAGES run inline
 
     Returns:
         Dict containing:
@@ -27,25 +89,28 @@ def read_pdf_text(file_path: str, start_page: int = 1, end_page: Optional[int] =
 
     doc = fitz.open(file_path)
     total_pages = len(doc)
+    start_page, end_page = _clamp_pages(total_pages, start_page, end_page)
+    page_total = end_page - start_page + 1 if total_pages else 0
 
-    if start_page < 1:
-        start_page = 1
-    if end_page is None or end_page > total_pages:
-        end_page = total_pages
-    if start_page > end_page:
-        start_page, end_page = end_page, start_page
-
-    pages = []
-
-    for page_num in range(start_page - 1, end_page):
-        page = doc[page_num]
-        page_text = page.get_text()
-
-        pages.append({"page_number": page_num + 1, "text": page_text.strip()})
+    if workers <= 1 or page_total < PARALLEL_MIN_PAGES:
+        try:
+            pages = [
+                {"page_number": page_num + 1, "text": doc[page_num].get_text().strip()}
+                for page_num in range(start_page - 1, end_page)
+            ]
+        finally:
+            doc.close()
+        return {"page_count": total_pages, "pages": pages}
 
     doc.close()
+    ranges = split_page_ranges(start_page, end_page, workers)
+    pages = []
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        for chunk in pool.map(_extract_page_range, [file_path] * len(ranges),
+                [first for first, _ in ranges], [last for _, last in ranges]):
+            pages.extend(chunk)
 
-    return json.loads(json.dumps({"page_count": total_pages, "pages": pages}, ensure_ascii=False))
+    return {"page_count": total_pages, "pages": pages}
 
 
 def read_by_ocr(file_path: str, start_page: int = 1, end_page: Optional[int] = None,
@@ -66,20 +131,13 @@ def read_by_ocr(file_path: str, start_page: int = 1, end_page: Optional[int] = N
 
     doc = fitz.open(file_path)
     total_pages = len(doc)
-
-    if start_page < 1:
-        start_page = 1
-    if end_page is None or end_page > total_pages:
-        end_page = total_pages
-    if start_page > end_page:
-        start_page, end_page = end_page, start_page
+    start_page, end_page = _clamp_pages(total_pages, start_page, end_page)
 
     text_content = ""
     for page_num in range(start_page - 1, end_page):
         page = doc[page_num]
         try:
-            textpage = page.get_textpage_ocr(flags=3, language=language, dpi=dpi, full=True)
-            page_text = page.get_text(textpage=textpage)
+            page_text = _ocr_page(page, dpi, language)
         except Exception as e:
             logger.warning(f"OCR failed on page {page_num + 1}, fallback to normal text: {e}")
             page_text = page.get_text()
@@ -92,6 +150,134 @@ def read_by_ocr(file_path: str, start_page: int = 1, end_page: Optional[int] = N
         "extracted_pages": list(range(start_page, end_page + 1))}
 
 
+def page_needs_ocr(text: str, min_chars: int = MIN_TEXT_CHARS, min_quality: float = MIN_TEXT_QUALITY) -> bool:
+    """
+    Whether a page's native text layer is missing or garbage.
+
+    Garbage means replacement characters or a low share of letters, digits and
+    common listing punctuation among the non-space characters (typical of
+    broken font encodings).
+    """
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < min_chars:
+        return True
+    if text.count("\ufffd") > 0.05 * len(chars):
+        return True
+    wordish = sum(1 for c in chars if c.isalnum() or c in _TEXT_PUNCTUATION)
+    return wordish / len(chars) < min_quality
+
+
+def choose_ocr_dpi(page: "fitz.Page") -> int:
+    """
+    Pick the render DPI from the native resolution of the page's images.
+
+    Rendering above the scan resolution adds pixels but no detail, and very
+    low resolution scans are upsampled to OCR_DPI_MIN; pages without images
+    use OCR_DPI_DEFAULT.
+    """
+    native = None
+    for img in page.get_images(full=True):
+        xref, width = img[0], img[2]
+        for rect in page.get_image_rects(xref):
+            if rect.width > 0:
+                native = max(native or 0.0, width / (rect.width / 72.0))
+    if native is None:
+        return OCR_DPI_DEFAULT
+    return int(min(OCR_DPI_MAX, max(OCR_DPI_MIN, round(native))))
+
+
+def page_image_hash(doc: "fitz.Document", page: "fitz.Page") -> str:
+    """SHA-256 of a page's content stream and the raw bytes of its images."""
+    digest = hashlib.sha256(page.read_contents())
+    for img in page.get_images(full=True):
+        digest.update(doc.xref_stream_raw(img[0]) or b"")
+    return digest.hexdigest()
+
+
+def _ocr_page(page: "fitz.Page", dpi: int, language: str) -> str:
+    textpage = page.get_textpage_ocr(flags=3, language=language, dpi=dpi, full=True)
+    return page.get_text(textpage=textpage)
+
+
+def _ocr_page_jobs(file_path: str, jobs: List[Tuple[int, int]], language: str) -> List[Tuple[int, Optional[str]]]:
+    """Worker: OCR ``(page_number, dpi)`` jobs with a private fitz handle; ``None`` marks a failed page."""
+    doc = fitz.open(file_path)
+    results = []
+    try:
+        for page_number, dpi in jobs:
+            try:
+                results.append((page_number, _ocr_page(doc[page_number - 1], dpi, language).strip()))
+            except Exception as e:
+                logger.warning(f"OCR failed on page {page_number}: {e}")
+                results.append((page_number, None))
+    finally:
+        doc.close()
+    return results
+
+
+def ocr_missing_pages(file_path: str, pages: List[Dict[str, Any]], language: str = "eng",
+        workers: int = 1, cache: Optional[Any] = None) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    OCR only the pages whose native text layer is missing or garbage.
+
+    Args:
+        file_path: Path to the PDF file
+        pages: ``read_pdf_text`` pages ({page_number, text})
+        language: OCR language code
+        workers: Processes to spread OCR jobs across
+        cache: Optional object with ``get(key)`` / ``put(key, value)`` (e.g.
+            ResponseCache); OCR text is keyed by page image hash, DPI and language
+
+    Returns:
+        (pages with OCR text substituted where it is longer, OCR'd page numbers)
+    """
+    candidates = [p["page_number"] for p in pages if page_needs_ocr(p.get("text", ""))]
+    if not candidates:
+        return pages, []
+
+    ocr_text: Dict[int, str] = {}
+    jobs: List[Tuple[int, int]] = []
+    keys: Dict[int, str] = {}
+    doc = fitz.open(file_path)
+    try:
+        for page_number in candidates:
+            page = doc[page_number - 1]
+            dpi = choose_ocr_dpi(page)
+            if cache is not None:
+                keys[page_number] = f"pdf_ocr:{page_image_hash(doc, page)}:{dpi}:{language}"
+                cached = cache.get(keys[page_number])
+                if cached is not None:
+                    ocr_text[page_number] = cached
+                    continue
+            jobs.append((page_number, dpi))
+    finally:
+        doc.close()
+
+    if jobs:
+        parts = max(1, min(workers, len(jobs)))
+        batches = [jobs[idx::parts] for idx in range(parts)]
+        if parts == 1:
+            results = [_ocr_page_jobs(file_path, batches[0], language)]
+        else:
+            with ProcessPoolExecutor(max_workers=parts) as pool:
+                results = list(pool.map(_ocr_page_jobs, [file_path] * parts, batches, [language] * parts))
+        for batch in results:
+            for page_number, text in batch:
+                if text is None:
+                    continue
+                ocr_text[page_number] = text
+                if cache is not None:
+                    cache.put(keys[page_number], text)
+
+    merged = []
+    for page in pages:
+        text = ocr_text.get(page["page_number"])
+        if text is not None and len(text) > len(page.get("text", "")):
+            page = {**page, "text": text, "ocr": True}
+        merged.append(page)
+    return merged, sorted(ocr_text)
+
+
 def read_pdf_images(file_path: str, page_number: int = 1) -> Dict[str, List[Dict[str, Any]]]:
     """
     Extract images from a specific page in PDF.
@@ -6,29 +6,59 @@ import base64
 import logging
 
 # Import the PDF functions from our local copy
-from .pdf_functions import read_pdf_text, read_by_ocr, read_pdf_images
+from .pdf_functions import file_content_hash, ocr_missing_pages, read_pdf_text, read_by_ocr, read_pdf_images
+from .response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TEXT_CACHE_PATH = "database/pdf_text_cache.db"
+
+
 class PDFProcessor:
-    """Direct PDF processing without MCP wrapper"""
+    """Direct PDF processing without MCP wrapper
 
-    def __init__(self):
+    Text extraction is spread over ``workers`` processes for long documents and
+    cached by (file content hash, page range) in ``cache_path`` (``None``
+    disables the cache), so re-analysing the same PDF skips PyMuPDF entirely.
+    """
+
+    def __init__(self, workers: Optional[int] = None, cache_path: Optional[str] = DEFAULT_TEXT_CACHE_PATH):
         self.logger = logger
+        self.workers = workers if workers is not None else min(4, os.cpu_count() or 1)
+        self.cache_path = cache_path
+        self._cache: Optional[ResponseCache] = None
+
+    def _text_cache(self) -> Optional[ResponseCache]:
+        if self._cache is None and self.cache_path:
+            try:
+                self._cache = ResponseCache(self.cache_path)
+            except Exception as e:
+                self.logger.warning(f"PDF text cache disabled ({self.cache_path}): {e}")
+                self.cache_path = None
+        return self._cache
+
+    def _read_text(self, file_path: str, start_page: int, end_page: Optional[int]) -> Dict[str, Any]:
+        cache = self._text_cache()
+        if cache is None:
+            return read_pdf_text(file_path, start_page, end_page, workers=self.workers)
+
+        key = f"pdf_text:{file_content_hash(file_path)}:{start_page}:{end_page if end_page is not None else 'end'}"
+        result = cache.get(key)
+        if result is None:
+            result = read_pdf_text(file_path, start_page, end_page, workers=self.workers)
+            cache.put(key, result)
+        return result
 
     def extract_text(self, file_path: str, start_page: int = 1, end_page: Optional[int] = None) -> Dict[str, Any]:
         """Extract text from PDF pages"""
         try:
-            result = read_pdf_text(file_path, start_page, end_page)
+            if not os.path.exists(file_path):
+                raise ValueError(f"File not found: {file_path}")
+            result = self._read_text(file_path, start_page, end_page)
 
             # Convert to a consistent format
-            pages_text = []
-            combined_text = ""
-
-            for page_data in result.get('pages', []):
-                page_text = page_data.get('text', '')
-                pages_text.append(page_text)
-                combined_text += page_text + "\n\n"
+            pages_text = [page_data.get('text', '') for page_data in result.get('pages', [])]
+            combined_text = "\n\n".join(pages_text)
 
             return {
                 "success": True,
@@ -57,6 +87,31 @@ class PDFProcessor:
             self.logger.error(f"Error extracting OCR text from {file_path}: {e}")
             return {"success": False, "error": str(e)}
 
+    def extract_text_selective_ocr(self, file_path: str, start_page: int = 1, end_page: Optional[int] = None,
+                                   language: str = "eng") -> Dict[str, Any]:
+        """Extract native text, then OCR only the pages without a usable text layer"""
+        try:
+            if not os.path.exists(file_path):
+                raise ValueError(f"File not found: {file_path}")
+            result = self._read_text(file_path, start_page, end_page)
+            pages, ocr_pages = ocr_missing_pages(
+                file_path, result.get('pages', []), language=language,
+                workers=self.workers, cache=self._text_cache(),
+            )
+            pages_text = [page_data.get('text', '') for page_data in pages]
+
+            return {
+                "success": True,
+                "page_count": result.get('page_count', 0),
+                "pages_text": pages_text,
+                "combined_text": "\n\n".join(pages_text).strip(),
+                "extracted_pages": [page_data["page_number"] for page_data in pages],
+                "ocr_pages": ocr_pages,
+            }
+        except Exception as e:
+            self.logger.error(f"Error extracting text with OCR from {file_path}: {e}")
+            return {"success": False, "error": str(e)}
+
     def extract_images(self, file_path: str, page_number: int = 1) -> Dict[str, Any]:
         """Extract images from PDF page"""
         try:
@@ -74,26 +129,31 @@ class PDFProcessor:
     def process_financial_document(self, file_path: str) -> Dict[str, Any]:
         """Process a financial document and extract all relevant information"""
         try:
-            # Extract text from all pages
-            text_result = self.extract_text(file_path)
+            # Extract text from all pages, OCR-ing only pages without a text layer
+            text_result = self.extract_text_selective_ocr(file_path)
 
             if not text_result["success"]:
                 return text_result
 
-            # Try OCR as backup if text extraction yields poor results
             combined_text = text_result["combined_text"]
-            if len(combined_text.strip()) < 100:  # If very little text extracted
-                self.logger.info("Text extraction yielded minimal content, trying OCR...")
-                ocr_result = self.extract_text_ocr(file_path)
-                if ocr_result["success"] and len(ocr_result["text"]) > len(combined_text):
-                    combined_text = ocr_result["text"]
+            ocr_pages = text_result["ocr_pages"]
+            if ocr_pages:
+                self.logger.info(f"OCR applied to {len(ocr_pages)} of {len(text_result['pages_text'])} pages")
+            if not ocr_pages:
+                method = "text"
+            elif len(ocr_pages) == len(text_result["pages_text"]):
+                method = "ocr"
+            else:
+                method = "mixed"
 
             return {
                 "success": True,
                 "file_path": file_path,
                 "page_count": text_result["page_count"],
                 "content": combined_text,
-                "extraction_method": "text" if len(text_result["combined_text"]) > 100 else "ocr",
+                "pages_text": text_result["pages_text"],
+                "extraction_method": method,
+                "ocr_pages": ocr_pages,
                 "content_length": len(combined_text)
             }
 
@@ -0,0 +1,42 @@
+"""Async request throttling helpers for external APIs."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """Space calls so at most ``rate`` start per second (``burst`` may start back-to-back).
+
+    ``rate`` of ``None`` or ``0`` disables limiting.  Safe to share between
+    tasks of one event loop.
+    """
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        self.rate = rate if rate and rate > 0 else None
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate is None:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
@@ -0,0 +1,399 @@
+"""Columnar (pandas) fast path for CSV ingestion.
+
+The row parsers in ``ingest_csv.py`` clean every cell with chained
+``str.replace`` calls and derive the MMR deal category one row at a time.
+Here each chunk is loaded as a DataFrame of strings, numeric columns are
+cleaned with vectorized string ops and ``price_delta`` / ``price_delta_percent``
+/ ``deal_category`` are computed as array expressions.  Each chunk comes back
+as a :class:`ColumnBatch` of per-table column lists that
+``DatabaseManager.save_analysis_columns`` inserts as-is; the stored values,
+including ``raw_text`` and ``source_key``, match the row parsers.
+
+pandas is optional; callers should check :func:`columnar_available` first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from car_analysis.utils.ingest_pipeline import ColumnBatch
+
+try:
+    import numpy as np
+    import pandas as pd
+except Exception:  # pragma: no cover - optional dependency
+    np = None  # type: ignore
+    pd = None  # type: ignore
+
+
+logger = logging.getLogger("csv_ingest")
+
+# Same substrings _parse_float strips, as a single regex pass
+_NUMERIC_NOISE = r"\$|,| mi\.| miles"
+# Characters json.dumps escapes (with ensure_ascii=False)
+_JSON_ESCAPED = r'["\\\x00-\x1f]'
+
+DEAL_CATEGORIES = [
+    "Exceptional Deal",
+    "Good Deal",
+    "Fair Deal",
+    "Slightly Overpriced",
+    "Overpriced",
+]
+
+
+def columnar_available() -> bool:
+    return pd is not None
+
+
+def read_frames(path: Path, *, limit: int, offset: int, batch_size: int) -> Iterator["pd.DataFrame"]:
+    """Yield DataFrame chunks of raw string cells honouring offset / limit.
+
+    The frame index is the absolute data-row number, matching ``read_chunks``.
+    """
+
+    reader = pd.read_csv(
+        path,
+        dtype=str,
+        keep_default_na=False,
+        skiprows=range(1, offset + 1) if offset else None,
+        nrows=limit,
+        chunksize=batch_size,
+        encoding="utf-8",
+    )
+    with reader:
+        for frame in reader:
+            if offset:
+                frame.index = frame.index + offset
+            yield frame
+
+
+def clean_numeric(series: "pd.Series") -> "pd.Series":
+    """Vectorized ``_parse_float``: strip currency/unit noise, NaN when empty or invalid."""
+
+    cleaned = series.str.replace(_NUMERIC_NOISE, "", regex=True).str.strip()
+    cleaned = cleaned.where(cleaned != "")
+    numeric = pd.to_numeric(cleaned, errors="coerce").astype("float64")
+    # to_numeric can be an ulp off on long decimals; astype rounds like float()
+    valid = numeric.notna()
+    if valid.any():
+        numeric[valid] = cleaned[valid].astype("float64")
+    return numeric
+
+
+def deal_category_array(price_delta_pct: Any) -> "np.ndarray":
+    """Vectorized MMR deal category; ``None`` where the percentage is NaN."""
+
+    pct = np.asarray(price_delta_pct, dtype=float)
+    conditions = [
+        pct <= -10,
+        pct <= -3,
+        np.abs(pct) <= 5,
+        pct <= 10,
+        ~np.isnan(pct),
+    ]
+    choices = [np.full(pct.shape, label, dtype=object) for label in DEAL_CATEGORIES]
+    return np.select(conditions, choices, default=None)
+
+
+def _column(frame: "pd.DataFrame", name: str) -> "pd.Series":
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series("", index=frame.index, dtype=object)
+
+
+def _column_or_none(frame: "pd.DataFrame", name: str) -> List[Any]:
+    if name in frame.columns:
+        return frame[name].tolist()
+    return [None] * len(frame)
+
+
+def _money(values: "pd.Series") -> "pd.Series":
+    # astype keeps an empty chunk's result a string column
+    return values.map("{:,.0f}".format).astype(str)
+
+
+def _nullable(values: "pd.Series") -> List[Any]:
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _text(frame: "pd.DataFrame", name: str) -> "pd.Series":
+    """Cell text as an f-string of ``row.get(name)`` renders it ("None" when absent)."""
+
+    if name in frame.columns:
+        return frame[name].fillna("None")
+    return pd.Series("None", index=frame.index, dtype=object)
+
+
+def _grouped(values: "pd.Series") -> "pd.Series":
+    return values.map("{:,}".format).astype(str)
+
+
+def _json_strings(values: "pd.Series") -> "pd.Series":
+    """Vectorized ``json.dumps(value, ensure_ascii=False)`` for a string column (``null`` when missing)."""
+
+    quoted = '"' + values + '"'
+    escaped = values.str.contains(_JSON_ESCAPED, regex=True, na=False)
+    if escaped.any():
+        quoted[escaped] = [json.dumps(value, ensure_ascii=False) for value in values[escaped].tolist()]
+    return quoted.where(values.notna(), "null")
+
+
+def _json_objects(frame: "pd.DataFrame", columns: Sequence[str]) -> "pd.Series":
+    """Vectorized ``json.dumps(row, ensure_ascii=False)`` of each row restricted to ``columns``."""
+
+    text = pd.Series("{", index=frame.index)
+    for i, name in enumerate(columns):
+        text = text + (", " if i else "") + json.dumps(name, ensure_ascii=False) + ": " + _json_strings(frame[name])
+    return text + "}"
+
+
+def _source_keys(dataset: str, frame: "pd.DataFrame", fields: Sequence[str] = ()) -> List[str]:
+    """Vectorized ``natural_key``: identity columns where all present, else a hash of the row."""
+
+    keys = pd.Series(None, index=frame.index, dtype=object)
+    complete = pd.Series(bool(fields), index=frame.index)
+    if fields:
+        parts = [_column(frame, name).fillna("").str.strip().str.upper() for name in fields]
+        for part in parts:
+            complete &= part != ""
+        joined = parts[0]
+        for part in parts[1:]:
+            joined = joined + "|" + part
+        keys = (dataset + ":" + joined).astype(object)
+    if not complete.all():
+        canonical = _json_objects(frame.loc[~complete], sorted(frame.columns))
+        keys[~complete] = [
+            f"{dataset}:sha1:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+            for text in canonical.tolist()
+        ]
+    return keys.tolist()
+
+
+def _valid_years(frame: "pd.DataFrame", name: str) -> Tuple["pd.DataFrame", "pd.Series"]:
+    """Vectorized ``int(row.get(name) or 0)``; drops the rows where that would raise."""
+
+    raw = _column(frame, name).fillna("")
+    stripped = raw.str.strip()
+    valid = (raw == "") | stripped.str.fullmatch(r"[+-]?\d+(?:_\d+)*")
+    if not valid.all():
+        logger.warning("Skipping %s rows with invalid year", int((~valid).sum()))
+        frame, raw, stripped = frame[valid], raw[valid], stripped[valid]
+    year = pd.to_numeric(stripped.str.replace("_", "", regex=False).where(raw != "", "0"))
+    return frame, year.astype("int64")
+
+
+def _knowledge_columns(title: "pd.Series", content: "pd.Series", make: "pd.Series", model: "pd.Series",
+                       year_str: "pd.Series", tag: str, reliability: float) -> Dict[str, Any]:
+    return {
+        "title": title.tolist(),
+        "content": content.tolist(),
+        "content_type": "csv_dataset",
+        "category": make.tolist(),
+        "tags": [[md, ys, tag] for md, ys in zip(model.tolist(), year_str.tolist())],
+        "source": "csv_ingest",
+        "reliability_score": reliability,
+    }
+
+
+def _listing_analysis(reasoning: str, data_source: str, quality: str, version: str) -> Dict[str, Any]:
+    """Analysis columns of the listing datasets (no MMR, nothing to score yet)."""
+
+    return {
+        "rule_based_score": None,
+        "rule_based_verdict": None,
+        "llm_score": None,
+        "llm_verdict": None,
+        "llm_reasoning": reasoning,
+        "market_median_price": None,
+        "price_delta": None,
+        "price_delta_percent": None,
+        "deal_category": None,
+        "data_source": data_source,
+        "comparable_count": None,
+        "research_quality": quality,
+        "success": False,
+        "analysis_version": version,
+    }
+
+
+def parse_car_prices_frame(source: str, frame: "pd.DataFrame") -> ColumnBatch:
+    """Columnar equivalent of ``ingest_csv.parse_car_prices_row`` for one chunk."""
+
+    frame, year = _valid_years(frame, "year")
+
+    make = _column(frame, "make").str.strip()
+    model = _column(frame, "model").str.strip()
+    trim = _column(frame, "trim").str.strip()
+    vin = _column(frame, "vin").str.strip().str.upper()
+    mileage = np.trunc(clean_numeric(_column(frame, "odometer")).fillna(0)).astype("int64")
+    price_paid = clean_numeric(_column(frame, "sellingprice")).fillna(0.0)
+    mmr = clean_numeric(_column(frame, "mmr"))
+
+    has_mmr = mmr.notna() & (mmr > 0)
+    price_delta = (price_paid - mmr).where(has_mmr)
+    price_delta_pct = (price_delta / mmr * 100).where(has_mmr)
+    deal_category = deal_category_array(price_delta_pct).tolist()
+
+    # Text fields are assembled column-wise as well
+    year_str = year.astype(str)
+    title = (
+        "Historical sale: " + year_str + " " + make + " " + model
+        + " (" + vin.where(vin != "", "no VIN") + ")"
+    )
+    summary = (
+        "Historical sale on " + _text(frame, "saledate") + " for "
+        + year_str + " " + make + " " + model + " " + trim + "."
+    )
+    summary = summary.where(
+        mmr.isna(),
+        summary + " Selling price $" + _money(price_paid) + ", MMR $" + _money(mmr.fillna(0)),
+    )
+
+    return ColumnBatch(
+        rows=frame.index.tolist(),
+        source_keys=_source_keys("car_prices", frame, ("vin", "saledate")),
+        cars={
+            "make": make.tolist(),
+            "model": model.tolist(),
+            "year": year.tolist(),
+            "mileage": mileage.tolist(),
+            "price_paid": price_paid.astype(float).tolist(),
+            "trim": trim.tolist(),
+            "color": _column_or_none(frame, "color"),
+            "engine": _column_or_none(frame, "body"),
+            "transmission": _column_or_none(frame, "transmission"),
+            "condition": _column_or_none(frame, "condition"),
+            "location": _column_or_none(frame, "state"),
+            "pdf_source": source,
+            "raw_text": _json_objects(frame, list(frame.columns)).tolist(),
+        },
+        analyses={
+            "rule_based_score": None,
+            "rule_based_verdict": deal_category,
+            "llm_score": None,
+            "llm_verdict": deal_category,
+            "llm_reasoning": "MMR-based dataset entry",
+            "market_median_price": _nullable(mmr),
+            "price_delta": _nullable(price_delta),
+            "price_delta_percent": _nullable(price_delta_pct),
+            "deal_category": deal_category,
+            "data_source": "car_prices_csv",
+            "comparable_count": None,
+            "research_quality": "mmr_history",
+            "success": mmr.notna().tolist(),
+            "analysis_version": "car_prices_v1",
+        },
+        knowledge=_knowledge_columns(title, summary, make, model, year_str, "car_prices_csv", 0.7),
+    )
+
+
+def parse_used_cars_frame(source: str, frame: "pd.DataFrame") -> ColumnBatch:
+    """Columnar equivalent of ``ingest_csv.parse_used_cars_row`` for one chunk.
+
+    ``clean_title`` is not a ``cars`` column, so only the summary carries it.
+    """
+
+    frame, year = _valid_years(frame, "model_year")
+
+    make = _column(frame, "brand").str.strip()
+    model = _column(frame, "model").str.strip()
+    mileage = np.trunc(clean_numeric(_column(frame, "milage")).fillna(0)).astype("int64")
+    price_paid = clean_numeric(_column(frame, "price")).fillna(0.0)
+
+    year_str = year.astype(str)
+    summary = (
+        "Listing: " + year_str + " " + make + " " + model + ", " + _grouped(mileage) + " miles, price $"
+        + _money(price_paid) + ". Accident info: " + _text(frame, "accident")
+        + ". Clean title: " + _text(frame, "clean_title")
+    )
+
+    return ColumnBatch(
+        rows=frame.index.tolist(),
+        source_keys=_source_keys("used_cars", frame),
+        cars={
+            "make": make.tolist(),
+            "model": model.tolist(),
+            "year": year.tolist(),
+            "mileage": mileage.tolist(),
+            "price_paid": price_paid.astype(float).tolist(),
+            "color": _column_or_none(frame, "ext_col"),
+            "engine": _column_or_none(frame, "engine"),
+            "fuel_type": _column_or_none(frame, "fuel_type"),
+            "transmission": _column_or_none(frame, "transmission"),
+            "condition": _column_or_none(frame, "accident"),
+            "pdf_source": source,
+            "raw_text": _json_objects(frame, list(frame.columns)).tolist(),
+        },
+        analyses=_listing_analysis("Raw used_cars CSV entry", "used_cars_csv", "raw_listing", "used_cars_v1"),
+        knowledge=_knowledge_columns(
+            "Used car listing " + year_str + " " + make + " " + model,
+            summary, make, model, year_str, "used_cars_csv", 0.5,
+        ),
+    )
+
+
+def parse_used_cars_data_frame(source: str, frame: "pd.DataFrame") -> ColumnBatch:
+    """Columnar equivalent of ``ingest_csv.parse_used_cars_data_row`` for one chunk.
+
+    ``clean_title`` / ``hp`` / ``engine_displacement`` have no ``cars`` columns
+    and are left out, as the bulk writer drops them on the row path too.
+    """
+
+    frame, year = _valid_years(frame, "year")
+
+    make = _column(frame, "make_name").str.strip()
+    model = _column(frame, "model_name").str.strip()
+    mileage = np.trunc(clean_numeric(_column(frame, "mileage")).fillna(0)).astype("int64")
+    price_paid = clean_numeric(_column(frame, "price")).fillna(0.0)
+    days_on_market = np.trunc(clean_numeric(_column(frame, "daysonmarket")))
+    seller_rating = clean_numeric(_column(frame, "seller_rating"))
+
+    year_str = year.astype(str)
+    summary = (
+        "Listing: " + year_str + " " + make + " " + model + "; Price $" + _money(price_paid)
+        + "; Mileage " + _grouped(mileage) + " mi."
+    )
+    summary = summary + ("; Days on market: " + days_on_market.fillna(0).astype("int64").astype(str)).where(
+        days_on_market.notna(), ""
+    )
+    summary = summary + ("; Seller rating: " + seller_rating.map(str).astype(str)).where(seller_rating.notna(), "")
+
+    return ColumnBatch(
+        rows=frame.index.tolist(),
+        source_keys=_source_keys("used_cars_data", frame, ("vin", "listing_id")),
+        cars={
+            "make": make.tolist(),
+            "model": model.tolist(),
+            "year": year.tolist(),
+            "mileage": mileage.tolist(),
+            "price_paid": price_paid.astype(float).tolist(),
+            "trim": _column_or_none(frame, "trim_name"),
+            "color": _column_or_none(frame, "exterior_color"),
+            "engine": _column_or_none(frame, "engine_type"),
+            "fuel_type": _column_or_none(frame, "fuel_type"),
+            "transmission": _column_or_none(frame, "transmission_display"),
+            "condition": _column_or_none(frame, "vehicle_damage_category"),
+            "location": _column_or_none(frame, "city"),
+            "pdf_source": source,
+            "raw_text": _json_objects(frame, list(frame.columns)).tolist(),
+        },
+        analyses=_listing_analysis(
+            "used_cars_data CSV entry", "used_cars_data_csv", "rich_listing", "used_cars_data_v1",
+        ),
+        knowledge=_knowledge_columns(
+            "Rich listing " + year_str + " " + make + " " + model,
+            summary, make, model, year_str, "used_cars_data_csv", 0.6,
+        ),
+    )
+
+
+COLUMNAR_PARSERS = {
+    "car_prices": parse_car_prices_frame,
+    "used_cars": parse_used_cars_frame,
+    "used_cars_data": parse_used_cars_data_frame,
+}
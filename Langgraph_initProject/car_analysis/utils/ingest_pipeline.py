@@ -0,0 +1,533 @@
+"""Staged, streaming CSV ingestion pipeline.
+
+Stages (each connected by a bounded queue, so a slow stage throttles the ones
+upstream instead of buffering the whole file in memory)::
+
+    read (chunks of CSV rows)
+      -> parse/validate (process pool)
+      -> bulk DB insert (cars + analyses + knowledge, one transaction per chunk)
+      -> batched embedding + vector upsert
+
+Dataset specifics live in ``ingest_csv.py`` as pure row parsers that return
+``{"car": ..., "analysis": ..., "knowledge": ...}`` records (or ``None`` to
+skip a row).  Parsers must be module-level functions so they can be pickled
+into worker processes.  The columnar mode (``ingest_columnar.py``) swaps the
+reader and chunk parser for DataFrame-based ones that return a
+:class:`ColumnBatch`; the DB stage hands its column lists straight to
+``DatabaseManager.save_analysis_columns`` and only the embedding stage builds
+per-row dicts.
+
+Runs are resumable: when a ``dataset`` name is given, every DB transaction
+also advances a per-file ``committed_row`` checkpoint and each finished
+embedding batch advances ``embedded_row``.  Records carry a natural
+``source_key`` (VIN-based or a row hash) stored in ``ingested_rows``, so rows
+replayed after a crash are recognised and never inserted twice; only rows
+past ``embedded_row`` get their vectors re-upserted.  A row that fails to
+insert, or a vector write that does not report every row, holds the
+checkpoints at that point so a resumed run retries it.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+from car_analysis.database.manager import DatabaseManager
+from car_analysis.rag.vector_store import VectorStoreManager
+
+
+logger = logging.getLogger("csv_ingest")
+
+Row = Tuple[int, Dict[str, str]]
+RowParser = Callable[[int, Dict[str, str], str], Optional[Dict[str, Any]]]
+ChunkReader = Callable[..., Iterator[Any]]
+ChunkParser = Callable[[Any], Union[List[Dict[str, Any]], "ColumnBatch"]]
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_QUEUE_DEPTH = 4
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    """Row count and busy time for one pipeline stage."""
+
+    name: str
+    rows: int = 0
+    seconds: float = 0.0
+    errors: int = 0
+    skipped: int = 0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def record(self, rows: int, started: float) -> None:
+        self.rows += rows
+        self.seconds += time.perf_counter() - started
+
+
+@dataclass
+class PipelineReport:
+    """Per-stage statistics plus end-to-end wall time."""
+
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    def log(self) -> None:
+        for stats in self.stages.values():
+            logger.info(
+                "stage=%-7s rows=%-7d busy=%.2fs rows/sec=%.0f errors=%d skipped=%d",
+                stats.name, stats.rows, stats.seconds, stats.rows_per_sec, stats.errors, stats.skipped,
+            )
+        loaded = self.stages["embed"].rows if "embed" in self.stages else 0
+        logger.info(
+            "pipeline rows=%d wall=%.2fs end-to-end rows/sec=%.0f",
+            loaded, self.wall_seconds, loaded / self.wall_seconds if self.wall_seconds > 0 else 0.0,
+        )
+
+
+@dataclass
+class ColumnBatch:
+    """A parsed chunk kept as columns (the columnar mode's record type).
+
+    ``cars`` / ``analyses`` / ``knowledge`` map table column names to lists
+    aligned with ``rows`` (or to one value shared by every row).  After the DB
+    stage ``ids`` holds the saved ``car_id`` / ``analysis_id`` /
+    ``knowledge_id`` / ``duplicate`` columns.
+    """
+
+    rows: List[int]
+    source_keys: List[Optional[str]]
+    cars: Dict[str, Any]
+    analyses: Dict[str, Any]
+    knowledge: Dict[str, Any]
+    ids: Dict[str, List[Any]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row_dicts(self, columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Per-row dicts of one column group, for APIs that take one row at a time."""
+
+        values = [v if isinstance(v, list) else repeat(v, len(self)) for v in columns.values()]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    def take(self, positions: List[int]) -> "ColumnBatch":
+        def pick(columns: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                name: [values[i] for i in positions] if isinstance(values, list) else values
+                for name, values in columns.items()
+            }
+
+        return ColumnBatch(
+            rows=[self.rows[i] for i in positions],
+            source_keys=[self.source_keys[i] for i in positions],
+            cars=pick(self.cars),
+            analyses=pick(self.analyses),
+            knowledge=pick(self.knowledge),
+            ids=pick(self.ids),
+        )
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Row-shaped records, for the row-by-row fallback after a failed bulk insert."""
+
+        knowledge = self.row_dicts(self.knowledge) if self.knowledge else repeat(None)
+        return [
+            {"car": car, "analysis": analysis, "knowledge": entry, "source_key": key, "row": row}
+            for car, analysis, entry, key, row in zip(
+                self.row_dicts(self.cars), self.row_dicts(self.analyses), knowledge,
+                self.source_keys, self.rows,
+            )
+        ]
+
+
+def natural_key(dataset: str, row: Dict[str, Any], fields: Tuple[str, ...] = ()) -> str:
+    """Stable identity for a source row.
+
+    Uses the given identity columns (e.g. VIN + sale date) when all are
+    present, otherwise a hash of the whole row.
+    """
+
+    values = [str(row.get(name) or "").strip().upper() for name in fields]
+    if fields and all(values):
+        return f"{dataset}:" + "|".join(values)
+    canonical = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{dataset}:sha1:" + hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def chunk_end(chunk: Any) -> int:
+    """Row number just past the last row of a chunk (row list or DataFrame)."""
+
+    if isinstance(chunk, list):
+        return chunk[-1][0] + 1
+    return int(chunk.index[-1]) + 1
+
+
+def read_chunks(path: Path, *, limit: int, offset: int, batch_size: int) -> Iterator[List[Row]]:
+    """Yield ``(row_index, row)`` chunks honouring ``--offset`` / ``--limit``."""
+
+    with path.open(newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        chunk: List[Row] = []
+        for idx, row in enumerate(reader):
+            if idx < offset:
+                continue
+            if (idx - offset) >= limit:
+                break
+            chunk.append((idx, row))
+            if len(chunk) >= batch_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def parse_chunk(parse_row: RowParser, source: str, chunk: List[Row]) -> List[Dict[str, Any]]:
+    """Run a dataset row parser over one chunk (executed in a worker process)."""
+
+    records = []
+    for idx, row in chunk:
+        try:
+            record = parse_row(idx, row, source)
+        except Exception as exc:
+            logger.warning("Skipping row %s: %s", idx, exc)
+            continue
+        if record is not None:
+            record.setdefault("row", idx)
+            records.append(record)
+    return records
+
+
+def _parse_with_end(chunk_parser: ChunkParser, chunk: Any) -> Tuple[List[Dict[str, Any]], int]:
+    return chunk_parser(chunk), chunk_end(chunk)
+
+
+class _InlineExecutor(Executor):
+    """Executor used for ``--workers 0/1``: parse in the calling thread."""
+
+    def submit(self, fn, *args, **kwargs):  # type: ignore[override]
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+def _put(q: "queue.Queue[Any]", item: Any, stop: threading.Event) -> None:
+    """Blocking put that gives up once another stage has failed."""
+
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: "queue.Queue[Any]", stop: threading.Event) -> Any:
+    while True:
+        try:
+            return q.get(timeout=0.2)
+        except queue.Empty:
+            if stop.is_set():
+                return _DONE
+
+
+def _save_records(
+    db_manager: DatabaseManager,
+    records: List[Dict[str, Any]],
+    stats: StageStats,
+    checkpoint: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], Optional[int]]:
+    """Bulk insert a chunk (and advance the checkpoint) in one transaction; on
+    failure fall back to row-by-row so one bad row does not drop the chunk.
+
+    Returns the saved ``(record, saved)`` pairs and the first row that could
+    not be inserted (``None`` when every row was saved).  After a failure the
+    checkpoint only advances up to that row, so a resumed run retries it.
+    """
+
+    try:
+        saved = db_manager.save_analysis_records(records, checkpoint=checkpoint)
+        return list(zip(records, saved)), None
+    except Exception as exc:
+        logger.warning("Bulk insert failed (%s); retrying %s rows individually", exc, len(records))
+
+    results = []
+    failed_rows: List[int] = []
+    for record in records:
+        try:
+            results.append((record, db_manager.save_analysis_records([record])[0]))
+        except Exception as exc:
+            stats.errors += 1
+            failed_rows.append(record.get("row", -1))  # -1: position unknown, do not advance
+            car = record.get("car", {})
+            logger.error(
+                "Failed to save car %s %s %s: %s",
+                car.get("year"), car.get("make"), car.get("model"), exc,
+            )
+    first_failed = min(failed_rows) if failed_rows else None
+    committed_row = checkpoint["committed_row"] if checkpoint else None
+    if committed_row is not None and first_failed is not None:
+        committed_row = min(committed_row, first_failed)
+    if checkpoint and committed_row is not None and committed_row >= 0:
+        db_manager.update_ingest_checkpoint(checkpoint["source"], checkpoint["dataset"], committed_row=committed_row)
+    return results, first_failed
+
+
+def _save_batch(
+    db_manager: DatabaseManager,
+    batch: ColumnBatch,
+    stats: StageStats,
+    checkpoint: Optional[Dict[str, Any]] = None,
+) -> Tuple[Union[ColumnBatch, List[Tuple[Dict[str, Any], Dict[str, Any]]]], Optional[int]]:
+    """Columnar counterpart of :func:`_save_records`.
+
+    Returns the batch with its ``ids`` filled in, or, when the bulk insert
+    fails, the ``(record, saved)`` pairs of the row-by-row fallback.
+    """
+
+    try:
+        batch.ids = db_manager.save_analysis_columns(
+            batch.cars, batch.analyses, batch.knowledge, batch.source_keys, checkpoint=checkpoint,
+        )
+        return batch, None
+    except Exception as exc:
+        logger.warning("Columnar bulk insert failed (%s); retrying %s rows as records", exc, len(batch))
+    return _save_records(db_manager, batch.records(), stats, checkpoint)
+
+
+def _embed_records(
+    vector_manager: VectorStoreManager,
+    rows: Union[ColumnBatch, List[Tuple[Dict[str, Any], Dict[str, Any]]]],
+) -> None:
+    """Embed a saved chunk; raises unless every vector write reports all of its rows.
+
+    ``VectorStoreManager.add_*_batch`` log and return 0 instead of raising, so
+    the counts are checked here before the caller advances ``embedded_row``.
+    """
+
+    if isinstance(rows, ColumnBatch):
+        ids = rows.ids
+        knowledge = rows.row_dicts(rows.knowledge) if rows.knowledge else []
+        items = (
+            [(kid, entry) for kid, entry in zip(ids["knowledge_id"], knowledge) if kid],
+            list(zip(ids["car_id"], rows.row_dicts(rows.cars))),
+            [(aid, cid, analysis) for aid, cid, analysis in zip(
+                ids["analysis_id"], ids["car_id"], rows.row_dicts(rows.analyses)) if aid],
+        )
+    else:
+        items = (
+            [(saved["knowledge_id"], record["knowledge"]) for record, saved in rows if saved.get("knowledge_id")],
+            [(saved["car_id"], saved["car"]) for _, saved in rows],
+            [(saved["analysis_id"], saved["car_id"], saved["analysis"]) for _, saved in rows
+             if saved.get("analysis_id")],
+        )
+    batches = zip(
+        ("knowledge", "cars", "analyses"),
+        (vector_manager.add_knowledge_batch, vector_manager.add_cars_batch, vector_manager.add_analyses_batch),
+        items,
+    )
+    for name, add_batch, items in batches:
+        written = add_batch(items)
+        if written != len(items):
+            raise RuntimeError(f"Vector store wrote {written}/{len(items)} {name}")
+
+
+def run_ingest_pipeline(
+    path: Path,
+    *,
+    parse_row: Optional[RowParser] = None,
+    limit: int,
+    offset: int,
+    db_manager: DatabaseManager,
+    vector_manager: VectorStoreManager,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    queue_depth: int = DEFAULT_QUEUE_DEPTH,
+    reader: Optional[ChunkReader] = None,
+    chunk_parser: Optional[ChunkParser] = None,
+    dataset: Optional[str] = None,
+    resume: bool = True,
+) -> PipelineReport:
+    """Stream ``path`` through the read -> parse -> db -> embed stages.
+
+    Either ``parse_row`` (row-at-a-time parser over ``read_chunks``) or a
+    ``reader`` + ``chunk_parser`` pair must be given.  ``chunk_parser`` runs in
+    the process pool and must be picklable.
+
+    With ``dataset`` set the run is checkpointed; ``resume`` continues from
+    the stored checkpoint instead of ``offset`` when it is further along.
+    """
+
+    if chunk_parser is None:
+        if parse_row is None:
+            raise ValueError("run_ingest_pipeline needs parse_row or chunk_parser")
+        chunk_parser = partial(parse_chunk, parse_row, str(path))
+    reader = reader or read_chunks
+
+    source = str(path.resolve())
+    replay_from: Optional[int] = None  # duplicates from this row on are re-embedded
+    if dataset:
+        saved_checkpoint = db_manager.get_ingest_checkpoint(source, dataset) if resume else None
+        if saved_checkpoint:
+            end_row = offset + limit
+            embedded, committed = saved_checkpoint["embedded_row"], saved_checkpoint["committed_row"]
+            if embedded > offset:
+                logger.info("Resuming %s from row %s (committed through row %s)", path, embedded, committed)
+                offset, limit = embedded, max(0, end_row - embedded)
+            # Committed-but-not-embedded rows; rows past committed_row can also be
+            # committed when an earlier row failed to insert and held the checkpoint
+            replay_from = embedded
+
+    report = PipelineReport(stages={
+        name: StageStats(name) for name in ("read", "parse", "db", "embed")
+    })
+    stages = report.stages
+    stop = threading.Event()
+    errors: List[BaseException] = []
+
+    raw_q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_depth)
+    parsed_q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_depth)
+    saved_q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_depth)
+
+    def guarded(fn: Callable[[], None], downstream: "queue.Queue[Any]") -> Callable[[], None]:
+        def runner() -> None:
+            try:
+                fn()
+            except BaseException as exc:  # surface to the caller, unblock peers
+                errors.append(exc)
+                stop.set()
+            finally:
+                _put(downstream, _DONE, stop)
+        return runner
+
+    def read_stage() -> None:
+        chunks = reader(path, limit=limit, offset=offset, batch_size=batch_size)
+        while not stop.is_set():
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                return
+            stages["read"].record(len(chunk), started)
+            _put(raw_q, chunk, stop)
+
+    def parse_stage() -> None:
+        executor: Executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else _InlineExecutor()
+        in_flight: Deque[Tuple[float, Future]] = deque()
+
+        def emit_oldest() -> None:
+            started, future = in_flight.popleft()
+            records, end_row = future.result()
+            stages["parse"].record(len(records), started)
+            _put(parsed_q, (records, end_row), stop)
+
+        try:
+            while True:
+                chunk = _get(raw_q, stop)
+                if chunk is _DONE:
+                    break
+                in_flight.append((time.perf_counter(), executor.submit(_parse_with_end, chunk_parser, chunk)))
+                # Bound outstanding work so the pool cannot run ahead of the DB stage
+                while len(in_flight) >= max(2, workers * 2):
+                    emit_oldest()
+            while in_flight and not stop.is_set():
+                emit_oldest()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    # First row that failed to insert; checkpoints never move past it in this run
+    db_frontier: List[Optional[int]] = [None]
+
+    def db_stage() -> None:
+        while True:
+            item = _get(parsed_q, stop)
+            if item is _DONE:
+                return
+            records, end_row = item
+            if db_frontier[0] is not None:
+                end_row = min(end_row, db_frontier[0])
+            checkpoint = (
+                {"source": source, "dataset": dataset, "committed_row": end_row} if dataset else None
+            )
+            started = time.perf_counter()
+            rows: Any = []
+            if records or checkpoint:
+                save = _save_batch if isinstance(records, ColumnBatch) else _save_records
+                rows, failed_row = save(db_manager, records, stages["db"], checkpoint)
+                if failed_row is not None and db_frontier[0] is None:
+                    db_frontier[0] = max(failed_row, 0)
+                    end_row = min(end_row, db_frontier[0])
+                    logger.warning("Row %s failed to insert; checkpoints stay at it so a rerun retries it",
+                                   failed_row)
+            if isinstance(rows, ColumnBatch):
+                keep = [
+                    i for i, (row, duplicate) in enumerate(zip(rows.rows, rows.ids["duplicate"]))
+                    if not duplicate or (replay_from is not None and row >= replay_from)
+                ]
+                stages["db"].skipped += len(rows) - len(keep)
+                fresh = rows if len(keep) == len(rows) else rows.take(keep)
+            else:
+                fresh = []
+                for record, saved in rows:
+                    if not saved.get("duplicate"):
+                        fresh.append((record, saved))
+                    elif replay_from is not None and record.get("row", -1) >= replay_from:
+                        # Committed before the crash but possibly never embedded
+                        fresh.append((record, saved))
+                    else:
+                        stages["db"].skipped += 1
+            stages["db"].record(len(fresh), started)
+            _put(saved_q, (fresh, end_row), stop)
+
+    threads = [
+        threading.Thread(target=guarded(read_stage, raw_q), name="ingest-read", daemon=True),
+        threading.Thread(target=guarded(parse_stage, parsed_q), name="ingest-parse", daemon=True),
+        threading.Thread(target=guarded(db_stage, saved_q), name="ingest-db", daemon=True),
+    ]
+
+    wall_started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Embedding runs on the calling thread
+    try:
+        while True:
+            item = _get(saved_q, stop)
+            if item is _DONE:
+                break
+            rows, end_row = item
+            started = time.perf_counter()
+            if rows:
+                _embed_records(vector_manager, rows)  # raises (checkpoint untouched) on a failed write
+            if dataset:
+                db_manager.update_ingest_checkpoint(source, dataset, embedded_row=end_row)
+            stages["embed"].record(len(rows), started)
+    except BaseException as exc:
+        errors.append(exc)
+        stop.set()
+    finally:
+        for thread in threads:
+            thread.join()
+        report.wall_seconds = time.perf_counter() - wall_started
+
+    report.log()
+    if errors:
+        raise errors[0]
+    return report
@@ -1,36 +1,30 @@
 """PDF extraction for car data"""
 
+import asyncio
 import json
-from typing import Dict, Any
+import re
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from tools.pdf_processor import pdf_processor
 from nodes.tools import get_llm
 from core.models import CarAnalysisState
+from utils.rule_extractor import RULE_CONFIDENCE_THRESHOLD, extract_pages, read_layout_pages
 
 
-async def extract_cars_from_pdf(state: CarAnalysisState) -> CarAnalysisState:
-    """Extract car information from PDF"""
-    print("📄 Extracting car data from PDF...")
-
-    pdf_path = state.get("pdf_path", "")
-    if not pdf_path:
-        return {"cars": [], "dbg_logs": ["No PDF path provided"]}
-
-    # Extract PDF content
-    result = pdf_processor.process_financial_document(pdf_path)
-
-    if not result["success"]:
-        return {"cars": [], "dbg_logs": [f"PDF extraction failed: {result.get('error')}"]}
+# Chunk budget per extraction prompt (characters) and the overlap carried into
+# the next chunk so a listing cut at a boundary is seen whole at least once
+CHUNK_CHARS = 6000
+CHUNK_OVERLAP_CHARS = 400
+MAX_CONCURRENT_EXTRACTIONS = 4
 
-    content = result["content"]
-    print(f"✅ Extracted {len(content)} characters from PDF")
+# A blank line or a line opening with a model year starts a new listing
+_LISTING_BOUNDARY = re.compile(r"\n\s*\n|\n(?=\s*(?:19|20)\d{2}\b)")
 
-    # Parse car data using LLM
-    llm = get_llm()
+CAR_EXTRACTION_SYSTEM = "You are a car data extraction expert. Extract car information accurately from text."
 
-    car_extraction_prompt = f"""
+CAR_EXTRACTION_PROMPT = """
 Extract car information from this text. Find all cars mentioned with their details.
 
 Text:
@@ -50,37 +44,233 @@ Return as JSON array:
 ]
 """
 
-    try:
-        response = await llm.ainvoke([
-            ("system", "You are a car data extraction expert. Extract car information accurately from text."),
-            ("user", car_extraction_prompt)
-        ])
 
-        # Parse LLM response
-        car_data_text = response.content.strip()
-        if car_data_text.startswith("```json"):
-            car_data_text = car_data_text.replace("```json", "").replace("```", "").strip()
+def _split_long_text(text: str, max_chars: int) -> List[str]:
+    """Split text longer than ``max_chars`` at listing boundaries (hard cut as a last resort)."""
+    pieces: List[str] = []
+    start = 0
+    while len(text) - start > max_chars:
+        window = text[start:start + max_chars]
+        cuts = [m.start() for m in _LISTING_BOUNDARY.finditer(window) if m.start() > 0]
+        cut = cuts[-1] if cuts else max_chars
+        pieces.append(text[start:start + cut])
+        start += cut
+    pieces.append(text[start:])
+    return [p for p in pieces if p.strip()]
 
-        cars = json.loads(car_data_text)
 
-        # Add index to each car
-        for i, car in enumerate(cars):
-            car["index"] = i
-            car["raw_text"] = content[:500]  # First 500 chars for context
+def _overlap_tail(text: str, overlap_chars: int) -> str:
+    """Last ``overlap_chars`` of ``text``, advanced to the next line start when possible."""
+    if overlap_chars <= 0 or not text:
+        return ""
+    tail = text[-overlap_chars:]
+    newline = tail.find("\n")
+    return tail[newline + 1:] if 0 <= newline < len(tail) - 1 else tail
 
-        print(f"✅ Extracted {len(cars)} cars from PDF")
-        for i, car in enumerate(cars):
-            print(f"   Car {i+1}: {car['year']} {car['make']} {car['model']} - ${car['price_paid']:,.0f}")
 
-        return {
-            "cars": cars,
-            "pdf_content": content,
-            "dbg_logs": [f"Extracted {len(cars)} cars from PDF"]
-        }
+def split_into_chunks(pages: List[str], max_chars: int = CHUNK_CHARS,
+                      overlap_chars: int = CHUNK_OVERLAP_CHARS) -> List[str]:
+    """Pack page texts into prompt-sized chunks with overlap between neighbours."""
+    pieces: List[str] = []
+    for page in pages:
+        pieces.extend(_split_long_text(page, max_chars))
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = _overlap_tail(current, overlap_chars)
+        current = f"{current}\n\n{piece}" if current else piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def car_dedupe_key(car: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Identity of an extracted car: (year, make, model, mileage, price)."""
+
+    def _num(value: Any) -> Optional[int]:
+        try:
+            return int(round(float(str(value).replace(",", "").replace("$", ""))))
+        except (TypeError, ValueError):
+            return None
+
+    return (
+        _num(car.get("year")),
+        str(car.get("make") or "").strip().lower(),
+        str(car.get("model") or "").strip().lower(),
+        _num(car.get("mileage")),
+        _num(car.get("price_paid")),
+    )
+
+
+def parse_llm_cars(text: str) -> List[Dict[str, Any]]:
+    """Parse the JSON array returned by the extraction prompt."""
+    car_data_text = text.strip()
+    if car_data_text.startswith("```"):
+        car_data_text = re.sub(r"^```(?:json)?|```$", "", car_data_text).strip()
+    cars = json.loads(car_data_text)
+    if isinstance(cars, dict):
+        cars = [cars]
+    return [car for car in cars if isinstance(car, dict)]
+
+
+class ChunkedCarExtractor:
+    """Extract cars chunk by chunk with bounded LLM concurrency.
+
+    Pages the rule-based extractor (``utils/rule_extractor.py``) parses with
+    confidence >= ``rule_threshold`` are emitted without a model call; the
+    remaining pages are grouped into runs of consecutive pages, chunked and
+    sent to the LLM.  ``stream()`` yields each car as soon as its page or
+    chunk is parsed, dropping duplicates (by ``car_dedupe_key``) produced by
+    chunk overlap or repeated listings.  After the stream ends ``content``,
+    ``rule_pages``, ``chunk_count``, ``failed_chunks`` and ``duplicates``
+    describe the run.
+    """
+
+    def __init__(self, llm: Any = None, max_concurrency: int = MAX_CONCURRENT_EXTRACTIONS,
+                 chunk_chars: int = CHUNK_CHARS, overlap_chars: int = CHUNK_OVERLAP_CHARS,
+                 use_rules: bool = True, rule_threshold: float = RULE_CONFIDENCE_THRESHOLD):
+        self.llm = llm
+        self.max_concurrency = max(1, max_concurrency)
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
+        self.use_rules = use_rules
+        self.rule_threshold = rule_threshold
+        self.content = ""
+        self.rule_pages = 0
+        self.chunk_count = 0
+        self.failed_chunks: List[Dict[str, Any]] = []
+        self.duplicates = 0
+        self._seen: set = set()
+        self._index = 0
 
+    async def _extract_chunk(self, semaphore: asyncio.Semaphore, chunk_idx: int,
+                             chunk: str) -> Tuple[int, str, List[Dict[str, Any]]]:
+        try:
+            async with semaphore:
+                response = await self.llm.ainvoke([
+                    ("system", CAR_EXTRACTION_SYSTEM),
+                    ("user", CAR_EXTRACTION_PROMPT.format(content=chunk)),
+                ])
+            return chunk_idx, chunk, parse_llm_cars(response.content)
+        except Exception as e:
+            self.failed_chunks.append({"chunk": chunk_idx, "error": str(e)})
+            return chunk_idx, chunk, []
+
+    def _accept(self, car: Dict[str, Any], source_page: int, source_chunk: Optional[int],
+                position: int, raw_text: str) -> bool:
+        key = car_dedupe_key(car)
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+        car.setdefault("extraction_method", "llm")
+        car["index"] = self._index
+        car["source_page"] = source_page
+        car["source_chunk"] = source_chunk
+        car["chunk_position"] = position
+        car["raw_text"] = raw_text[:500]  # First 500 chars of the page / chunk for context
+        self._index += 1
+        return True
+
+    async def stream_text(self, pages: List[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield cars extracted from already-read page texts."""
+        self.content = "\n\n".join(pages).strip()
+
+        # Split pages into rule-confident ones and runs of consecutive LLM pages
+        confident = []
+        llm_runs: List[Tuple[int, List[str]]] = []
+        rule_results = extract_pages(pages) if self.use_rules else []
+        for idx, text in enumerate(pages):
+            result = rule_results[idx] if rule_results else None
+            if result is not None and result.confident(self.rule_threshold):
+                confident.append((idx, result))
+            elif llm_runs and llm_runs[-1][0] + len(llm_runs[-1][1]) == idx:
+                llm_runs[-1][1].append(text)
+            else:
+                llm_runs.append((idx, [text]))
+        self.rule_pages = len(confident)
+
+        chunks = [(start + 1, chunk) for start, run in llm_runs
+                  for chunk in split_into_chunks(run, self.chunk_chars, self.overlap_chars)]
+        self.chunk_count = len(chunks)
+        if chunks and self.llm is None:
+            self.llm = get_llm()
+
+        # Start the model calls first so rule-parsed cars stream while they run
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [asyncio.ensure_future(self._extract_chunk(semaphore, idx, chunk))
+                 for idx, (_, chunk) in enumerate(chunks)]
+        try:
+            for idx, result in confident:
+                for position, car in enumerate(result.cars):
+                    if self._accept(car, idx + 1, None, position, pages[idx]):
+                        yield car
+            for next_done in asyncio.as_completed(tasks):
+                chunk_idx, chunk, cars = await next_done
+                for position, car in enumerate(cars):
+                    if self._accept(car, chunks[chunk_idx][0], chunk_idx, position, chunk):
+                        yield car
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, pdf_path: str) -> AsyncIterator[Dict[str, Any]]:
+        """Read ``pdf_path`` and yield cars as pages / chunks complete."""
+        result = await asyncio.to_thread(pdf_processor.process_financial_document, pdf_path)
+        if not result["success"]:
+            raise RuntimeError(f"PDF extraction failed: {result.get('error')}")
+        pages = result.get("pages_text") or [result["content"]]
+        if self.use_rules and result.get("pages_text"):
+            # Span-based rows keep table cells aligned; OCR'd pages have no spans
+            layout = await asyncio.to_thread(read_layout_pages, pdf_path)
+            ocr_pages = set(result.get("ocr_pages") or [])
+            pages = [text if (idx + 1) in ocr_pages or idx >= len(layout) else layout[idx]
+                     for idx, text in enumerate(pages)]
+        print(f"✅ Extracted {result['content_length']} characters from PDF")
+        async for car in self.stream_text(pages):
+            yield car
+
+
+async def extract_cars_from_pdf(state: CarAnalysisState) -> CarAnalysisState:
+    """Extract car information from PDF"""
+    print("📄 Extracting car data from PDF...")
+
+    pdf_path = state.get("pdf_path", "")
+    if not pdf_path:
+        return {"cars": [], "dbg_logs": ["No PDF path provided"]}
+
+    extractor = ChunkedCarExtractor()
+    try:
+        cars = [car async for car in extractor.stream(pdf_path)]
     except Exception as e:
         print(f"❌ Error parsing car data: {e}")
         return {
             "cars": [],
             "dbg_logs": [f"Car extraction failed: {e}"]
-        }
\ No newline at end of file
+        }
+
+    # Chunks finish out of order; report cars in document order
+    cars.sort(key=lambda car: (car["source_page"], car["source_chunk"] or 0, car["chunk_position"]))
+    for i, car in enumerate(cars):
+        car["index"] = i
+
+    print(f"✅ Extracted {len(cars)} cars from PDF ({extractor.rule_pages} pages rule-parsed, "
+          f"{extractor.chunk_count} LLM chunks, {extractor.duplicates} duplicates dropped)")
+    for i, car in enumerate(cars):
+        print(f"   Car {i+1}: {car.get('year')} {car.get('make')} {car.get('model')} - ${float(car.get('price_paid') or 0):,.0f}")
+
+    logs = [f"Extracted {len(cars)} cars from PDF ({extractor.rule_pages} rule-parsed pages, "
+            f"{extractor.chunk_count} LLM chunks)"]
+    for failure in extractor.failed_chunks:
+        logs.append(f"Chunk {failure['chunk']} extraction failed: {failure['error']}")
+    if not cars and extractor.chunk_count and len(extractor.failed_chunks) == extractor.chunk_count:
+        return {"cars": [], "dbg_logs": logs}
+
+    return {
+        "cars": cars,
+        "pdf_content": extractor.content,
+        "dbg_logs": logs
+    }
@@ -0,0 +1,109 @@
+"""Re-score every stored CarAnalysis row with the vectorized scoring engine.
+
+Reads (price paid, mileage, year, market median, comparable count, data source,
+price range) in primary-key chunks, runs ``batch_scoring`` over each chunk and
+writes back price_delta, price_delta_percent, rule_based_score and
+rule_based_verdict.  deal_category is only rewritten for rows that carry the
+price range of a graph comparison; ingested sales keep their MMR-based
+category.
+
+Usage:
+  python -m car_analysis.utils.rescore_analyses --dry-run
+  python -m car_analysis.utils.rescore_analyses --db database/car_analysis.db --chunk-size 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from car_analysis.core.batch_scoring import compare_prices, score_deals
+from car_analysis.database.manager import DatabaseManager
+
+
+logger = logging.getLogger("rescore_analyses")
+
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def rescore_chunk(rows: List[Dict[str, Any]], current_year: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Score one chunk from ``DatabaseManager.iter_scoring_inputs`` into update dicts."""
+    if not rows:
+        return []
+    column = lambda name: [row[name] for row in rows]  # noqa: E731
+    has_range = [row["range_min"] is not None for row in rows]
+
+    comparison = compare_prices(column("price_paid"), column("market_median_price"),
+                                column("range_min"), column("range_max"))
+    scores = score_deals(comparison["price_delta_pct"], column("mileage"), column("year"),
+                         column("comparable_count"), column("data_source"), current_year)
+
+    ids = column("analysis_id")
+    deltas = comparison["price_delta"].tolist()
+    delta_pcts = comparison["price_delta_pct"].tolist()
+    categories = comparison["verdict_category"].tolist()
+    score_values = scores["score"].tolist()
+    verdicts = scores["verdict"].tolist()
+
+    updates = []
+    for i in range(len(rows)):
+        update = {
+            "id": ids[i],
+            "price_delta": deltas[i],
+            "price_delta_percent": delta_pcts[i],
+            "rule_based_score": score_values[i],
+            "rule_based_verdict": verdicts[i],
+        }
+        if has_range[i]:
+            update["deal_category"] = categories[i]
+        updates.append(update)
+    return updates
+
+
+def rescore_database(db_manager: DatabaseManager,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     current_year: Optional[int] = None,
+                     dry_run: bool = False) -> Dict[str, Any]:
+    """Re-score all eligible analyses; returns row count, verdict histogram and timing."""
+    started = time.perf_counter()
+    total = 0
+    verdicts: Counter = Counter()
+    for rows in db_manager.iter_scoring_inputs(chunk_size):
+        updates = rescore_chunk(rows, current_year)
+        verdicts.update(u["rule_based_verdict"] for u in updates)
+        if not dry_run:
+            db_manager.update_analysis_scores(updates)
+        total += len(updates)
+        logger.info("Rescored %d analyses", total)
+    return {
+        "rescored": total,
+        "verdicts": dict(verdicts),
+        "dry_run": dry_run,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-score stored analyses with the batch scoring engine")
+    parser.add_argument("--db", default="database/car_analysis.db", help="SQLite database path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Analyses per read/update chunk")
+    parser.add_argument("--current-year", type=int, default=None, help="Reference year for car age (default: this year)")
+    parser.add_argument("--dry-run", action="store_true", help="Score and report without writing")
+    parser.add_argument("--log", default="INFO", help="Logging level (INFO/DEBUG)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log.upper(), logging.INFO), format="%(asctime)s %(levelname)s %(message)s")
+
+    result = rescore_database(DatabaseManager(db_path=args.db), chunk_size=args.chunk_size,
+                              current_year=args.current_year, dry_run=args.dry_run)
+    action = "Scored (dry run)" if result["dry_run"] else "Rescored"
+    print(f"✅ {action} {result['rescored']} analyses in {result['seconds']:.2f}s")
+    for verdict, count in sorted(result["verdicts"].items(), key=lambda kv: -kv[1]):
+        print(f"   {verdict}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""Deterministic, zero-LLM car listing extractor.
+
+Handles the common listing layouts without a model call:
+
+* tables - rows rebuilt from PyMuPDF spans (cells split on wide horizontal
+  gaps) with a header naming the year / make / model / mileage / price columns;
+* line or prose listings - text is segmented at every known make (from the
+  make/model lexicon below) and year, mileage and price are read from each
+  segment with patterns.
+
+Every car carries a ``confidence`` in [0, 1] built from which fields were
+found and how (lexicon hit vs guess, explicit "model year" vs any year).
+Page confidence is the weakest car scaled by coverage (cars found / price
+mentions), so a page where a listing was missed is not trusted either.
+Callers route pages below ``RULE_CONFIDENCE_THRESHOLD`` to the LLM.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fitz  # PyMuPDF
+except Exception:  # pragma: no cover - optional
+    fitz = None
+
+
+RULE_CONFIDENCE_THRESHOLD = 0.85
+TABLE_SEP = " | "
+
+MAKE_MODELS: Dict[str, Sequence[str]] = {
+    "Acura": ("MDX", "RDX", "TLX", "ILX", "Integra"),
+    "Audi": ("A3", "A4", "A6", "Q3", "Q5", "Q7", "e-tron"),
+    "BMW": ("3 Series", "5 Series", "7 Series", "X1", "X3", "X5", "i3"),
+    "Buick": ("Enclave", "Encore", "LaCrosse", "Regal"),
+    "Cadillac": ("Escalade", "CTS", "XT5", "ATS"),
+    "Chevrolet": ("Malibu", "Silverado", "Equinox", "Tahoe", "Camaro", "Cruze", "Impala", "Traverse", "Bolt"),
+    "Chrysler": ("Pacifica", "300", "Town & Country"),
+    "Dodge": ("Charger", "Challenger", "Durango", "Grand Caravan", "Journey"),
+    "Ford": ("F-150", "F-250", "Mustang", "Escape", "Explorer", "Fusion", "Focus", "Edge", "Ranger", "Bronco"),
+    "GMC": ("Sierra", "Yukon", "Acadia", "Terrain", "Canyon"),
+    "Honda": ("Civic", "Accord", "CR-V", "HR-V", "Pilot", "Odyssey", "Fit", "Ridgeline"),
+    "Hyundai": ("Elantra", "Sonata", "Tucson", "Santa Fe", "Kona", "Palisade"),
+    "Infiniti": ("Q50", "QX60", "QX50"),
+    "Jeep": ("Wrangler", "Grand Cherokee", "Cherokee", "Compass", "Renegade", "Gladiator"),
+    "Kia": ("Optima", "Sorento", "Soul", "Sportage", "Forte", "Telluride"),
+    "Land Rover": ("Range Rover", "Discovery", "Defender"),
+    "Lexus": ("RX", "ES", "IS", "NX", "GX"),
+    "Lincoln": ("Navigator", "MKZ", "Aviator"),
+    "Mazda": ("Mazda3", "Mazda6", "CX-5", "CX-9", "CX-30", "MX-5 Miata"),
+    "Mercedes-Benz": ("C-Class", "E-Class", "S-Class", "GLC", "GLE"),
+    "Mitsubishi": ("Outlander", "Lancer", "Mirage"),
+    "Nissan": ("Altima", "Sentra", "Rogue", "Maxima", "Pathfinder", "Frontier", "Leaf", "Versa"),
+    "Porsche": ("911", "Cayenne", "Macan", "Panamera"),
+    "Ram": ("1500", "2500"),
+    "Subaru": ("Outback", "Forester", "Impreza", "Crosstrek", "Legacy", "WRX"),
+    "Tesla": ("Model 3", "Model S", "Model X", "Model Y"),
+    "Toyota": ("Camry", "Corolla", "RAV4", "Highlander", "Tacoma", "Tundra", "Prius", "4Runner", "Sienna"),
+    "Volkswagen": ("Jetta", "Passat", "Golf", "Tiguan", "Atlas"),
+    "Volvo": ("XC90", "XC60", "S60"),
+}
+
+MAKE_ALIASES = {
+    "chevy": "Chevrolet",
+    "vw": "Volkswagen",
+    "mercedes": "Mercedes-Benz",
+    "mercedes benz": "Mercedes-Benz",
+}
+
+_MAKE_LOOKUP = {make.lower(): make for make in MAKE_MODELS}
+_MAKE_LOOKUP.update(MAKE_ALIASES)
+_MAKE_PATTERN = re.compile(
+    r"(?<![\w-])(" + "|".join(re.escape(name).replace(r"\ ", r"[ -]")
+                            for name in sorted(_MAKE_LOOKUP, key=len, reverse=True)) + r")(?![\w-])",
+    re.IGNORECASE,
+)
+
+
+def _model_pattern(model: str) -> str:
+    return re.escape(model).replace(r"\ ", "[ -]?").replace(r"\-", "[ -]?")
+
+
+_MODEL_PATTERNS = {
+    make: re.compile(
+        r"^\W{0,3}(" + "|".join(_model_pattern(m) for m in sorted(models, key=len, reverse=True)) + r")(?![\w])",
+        re.IGNORECASE,
+    )
+    for make, models in MAKE_MODELS.items()
+}
+_MODEL_CANONICAL = {
+    make: {re.sub(r"[ -]", "", m.lower()): m for m in models} for make, models in MAKE_MODELS.items()
+}
+
+_YEAR = r"(?<![\d$,.])(19[89]\d|20[0-4]\d)(?![\d,])"
+_YEAR_ANY = re.compile(_YEAR)
+_YEAR_EXPLICIT = re.compile(rf"{_YEAR}\s+model\s+year|model\s+year[:\s]+{_YEAR}|\byear[:\s]+{_YEAR}", re.IGNORECASE)
+_YEAR_BEFORE = re.compile(rf"{_YEAR}[\s|]+$")
+_MILEAGE = re.compile(
+    r"(\d[\d,]*(?:\.\d+)?)\s*([kK])?\s*(?:miles|mile|mi\b\.?)"
+    r"|(?:odometer|mileage)[:\s]+(\d[\d,]*(?:\.\d+)?)\s*([kK])?",
+    re.IGNORECASE,
+)
+_PRICE = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)(?!\d|,\d|\.\d)\s*([kK])?(?!\s*(?:/\s*mo|per\s+month|/\s*month|a\s+month))")
+
+_HEADER_FIELDS = {
+    "year": ("year", "model year", "yr"),
+    "make": ("make", "brand", "manufacturer"),
+    "model": ("model",),
+    "mileage": ("mileage", "miles", "odometer", "mi"),
+    "price_paid": ("price", "sale price", "price paid", "asking", "asking price", "cost", "amount"),
+    "vehicle": ("vehicle", "car", "description", "year/make/model"),
+}
+
+
+@dataclass
+class PageExtraction:
+    """Rule-based result for one page (or block of text)."""
+
+    page_number: int
+    cars: List[Dict[str, Any]] = field(default_factory=list)
+    confidence: float = 0.0
+    price_mentions: int = 0
+
+    def confident(self, threshold: float = RULE_CONFIDENCE_THRESHOLD) -> bool:
+        return bool(self.cars) and self.confidence >= threshold
+
+
+def _number(text: str, thousands: Optional[str] = None) -> Optional[float]:
+    try:
+        value = float(text.replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+    return value * 1000 if thousands else value
+
+
+def canonical_make(text: str) -> Optional[str]:
+    return _MAKE_LOOKUP.get(re.sub(r"[ -]+", " ", text.strip().lower())) or _MAKE_LOOKUP.get(text.strip().lower())
+
+
+def _match_model(make: str, text: str) -> Tuple[Optional[str], bool]:
+    """(model, from_lexicon) for the text right after ``make``."""
+    match = _MODEL_PATTERNS[make].match(text)
+    if match:
+        key = re.sub(r"[ -]", "", match.group(1).lower())
+        return _MODEL_CANONICAL[make].get(key, match.group(1)), True
+    guess = re.match(r"^\W{0,3}([A-Z0-9][\w-]*)", text)
+    if guess and not _YEAR_ANY.fullmatch(guess.group(1)):
+        return guess.group(1), False
+    return None, False
+
+
+def _valid_year(value: Optional[int]) -> bool:
+    return value is not None and 1980 <= value <= 2049
+
+
+def _score(year_strong: Optional[bool], model_lexicon: bool, car: Dict[str, Any],
+           make_lexicon: bool = True) -> float:
+    score = 0.2 if make_lexicon else 0.1
+    if car.get("year") is not None:
+        score += 0.2 if year_strong else 0.1
+    if car.get("model"):
+        score += 0.2 if model_lexicon else 0.1
+    if car.get("mileage") is not None:
+        score += 0.2
+    if car.get("price_paid") is not None:
+        score += 0.2
+    return round(score, 2)
+
+
+def _parse_mileage(segment: str) -> Optional[int]:
+    match = _MILEAGE.search(segment)
+    if not match:
+        return None
+    value = _number(match.group(1) or match.group(3), match.group(2) or match.group(4))
+    return int(value) if value is not None and 0 <= value <= 1_000_000 else None
+
+
+def _parse_prices(segment: str) -> List[float]:
+    prices = [_number(m.group(1), m.group(2)) for m in _PRICE.finditer(segment)]
+    return [p for p in prices if p is not None and 500 <= p <= 1_000_000]
+
+
+def count_price_mentions(text: str) -> int:
+    return sum(1 for m in _PRICE.finditer(text) if (_number(m.group(1), m.group(2)) or 0) >= 500)
+
+
+def _make_matches(text: str) -> List[re.Match]:
+    # Makes are proper nouns; skip lowercase hits such as "ram" or "mini"
+    return [m for m in _MAKE_PATTERN.finditer(text) if m.group(1)[0].isupper()]
+
+
+def parse_listing_text(text: str) -> List[Dict[str, Any]]:
+    """Parse line / prose listings by segmenting the text at each make."""
+    matches = _make_matches(text)
+    starts = []
+    for match in matches:
+        before = _YEAR_BEFORE.search(text[max(0, match.start() - 12):match.start()])
+        starts.append(match.start() - (len(before.group(0)) if before else 0))
+
+    cars = []
+    for idx, match in enumerate(matches):
+        end = starts[idx + 1] if idx + 1 < len(matches) else len(text)
+        segment = text[starts[idx]:end]
+        make = canonical_make(match.group(1))
+        model, model_lexicon = _match_model(make, text[match.end():end])
+
+        year, year_strong = None, None
+        explicit = _YEAR_EXPLICIT.search(segment)
+        leading = _YEAR_BEFORE.search(text[max(0, match.start() - 12):match.start()])
+        if explicit:
+            year, year_strong = int(next(g for g in explicit.groups() if g)), True
+        elif leading:
+            year, year_strong = int(leading.group(1)), True
+        else:
+            after_model = segment[match.end() - starts[idx]:]
+            weak = _YEAR_ANY.search(after_model)
+            if weak:
+                year, year_strong = int(weak.group(1)), False
+
+        prices = _parse_prices(segment)
+        car = {
+            "make": make,
+            "model": model,
+            "year": year if _valid_year(year) else None,
+            "mileage": _parse_mileage(segment),
+            "price_paid": prices[0] if prices else None,
+        }
+        if car["price_paid"] is None and car["mileage"] is None:
+            continue  # a passing mention, not a listing
+        car["confidence"] = _score(year_strong, model_lexicon, car)
+        if len(prices) > 1:
+            # Several prices in one segment: likely a listing the lexicon missed ran into this one
+            car["confidence"] = min(car["confidence"], 0.5)
+        car["extraction_method"] = "rules"
+        cars.append(car)
+    return cars
+
+
+def _header_columns(cells: List[str]) -> Optional[Dict[str, int]]:
+    columns: Dict[str, int] = {}
+    for idx, cell in enumerate(cells):
+        name = re.sub(r"[^a-z/ ]", "", cell.lower()).strip()
+        for field_name, labels in _HEADER_FIELDS.items():
+            if name in labels and field_name not in columns:
+                columns[field_name] = idx
+    has_vehicle = "vehicle" in columns or {"make", "model"} <= set(columns)
+    has_values = "price_paid" in columns
+    return columns if has_vehicle and has_values and len(columns) >= 3 else None
+
+
+def _table_row_car(cells: List[str], columns: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    def cell(name: str) -> str:
+        idx = columns.get(name)
+        return cells[idx].strip() if idx is not None and idx < len(cells) else ""
+
+    make_lexicon = True
+    if "vehicle" in columns and not cell("make"):
+        parsed = parse_listing_text(cell("vehicle"))
+        if not parsed:
+            return None
+        base = parsed[0]
+        make, model = base["make"], base["model"]
+        model_lexicon = bool(model) and _MODEL_PATTERNS[make].match(model) is not None
+        year_text = cell("year") or str(base.get("year") or "")
+    else:
+        make_text = cell("make")
+        make = canonical_make(make_text)
+        if make is None:
+            # Trust the "Make" column for makes missing from the lexicon, at lower confidence
+            if not make_text:
+                return None
+            make, make_lexicon = make_text, False
+        model_text = cell("model")
+        model, model_lexicon = _match_model(make, model_text) if make_lexicon else (model_text or None, False)
+        if model and not model_lexicon:
+            model = model_text or model
+        year_text = cell("year")
+
+    year_match = _YEAR_ANY.search(year_text)
+    year = int(year_match.group(1)) if year_match else None
+    mileage_text = cell("mileage")
+    mileage_match = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*([kK])?", mileage_text)
+    mileage = _number(mileage_match.group(1), mileage_match.group(2)) if mileage_match else None
+    price_match = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*([kK])?", cell("price_paid"))
+    price = _number(price_match.group(1), price_match.group(2)) if price_match else None
+
+    car = {
+        "make": make,
+        "model": model,
+        "year": year if _valid_year(year) else None,
+        "mileage": int(mileage) if mileage is not None else None,
+        "price_paid": price,
+    }
+    if car["price_paid"] is None:
+        return None
+    car["confidence"] = _score(True, model_lexicon, car, make_lexicon)
+    car["extraction_method"] = "rules"
+    return car
+
+
+def parse_table_lines(lines: List[str], columns: Optional[Dict[str, int]] = None
+                      ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, int]], int]:
+    """Parse ``TABLE_SEP``-separated rows under a detected header.
+
+    ``columns`` carries a header over from the previous page.  Returns
+    (cars, columns for the next page, number of rows consumed as table rows).
+    """
+    cars = []
+    table_rows = 0
+    for line in lines:
+        if TABLE_SEP not in line:
+            continue
+        cells = [c.strip() for c in line.split(TABLE_SEP.strip())]
+        header = _header_columns(cells)
+        if header:
+            columns = header
+            table_rows += 1
+            continue
+        if columns is None or len(cells) <= max(columns.values()):
+            continue
+        car = _table_row_car(cells, columns)
+        if car:
+            cars.append(car)
+            table_rows += 1
+    return cars, columns, table_rows
+
+
+def layout_lines(page: "fitz.Page", row_tolerance: float = 3.0) -> List[str]:
+    """Rebuild visual rows from PyMuPDF spans; wide gaps between spans become ``TABLE_SEP``."""
+    spans = []
+    for block in page.get_text("dict").get("blocks", []):
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                if span.get("text", "").strip():
+                    spans.append(span)
+    spans.sort(key=lambda s: (round(s["bbox"][3] / row_tolerance), s["bbox"][0]))
+
+    rows: List[List[Dict[str, Any]]] = []
+    for span in spans:
+        if rows and abs(rows[-1][-1]["bbox"][3] - span["bbox"][3]) <= row_tolerance:
+            rows[-1].append(span)
+        else:
+            rows.append([span])
+
+    lines = []
+    for row in rows:
+        row.sort(key=lambda s: s["bbox"][0])
+        text = row[0]["text"]
+        for prev, span in zip(row, row[1:]):
+            gap = span["bbox"][0] - prev["bbox"][2]
+            if gap > 1.5 * max(prev.get("size", 10), 1):
+                text += TABLE_SEP
+            elif gap > 0.5 and not text.endswith(" ") and not span["text"].startswith(" "):
+                text += " "
+            text += span["text"]
+        lines.append(text.strip())
+    return lines
+
+
+def read_layout_pages(pdf_path: str) -> List[str]:
+    """Per-page text rebuilt from spans (tables keep one row per line)."""
+    if fitz is None:
+        raise RuntimeError("PyMuPDF is required for layout-aware extraction")
+    doc = fitz.open(pdf_path)
+    try:
+        return ["\n".join(layout_lines(page)) for page in doc]
+    finally:
+        doc.close()
+
+
+def extract_page(text: str, page_number: int = 1, columns: Optional[Dict[str, int]] = None
+                 ) -> Tuple[PageExtraction, Optional[Dict[str, int]]]:
+    """Rule-based extraction for one page; returns the result and the table header to carry over."""
+    lines = text.splitlines()
+    table_cars, columns, table_rows = parse_table_lines(lines, columns)
+    if table_rows:
+        rest = "\n".join(line for line in lines if TABLE_SEP not in line)
+        cars = table_cars + parse_listing_text(rest)
+    else:
+        cars = parse_listing_text(text.replace(TABLE_SEP, " "))
+
+    mentions = count_price_mentions(text.replace(TABLE_SEP, " "))
+    if table_rows:
+        mentions = max(mentions, len(table_cars))
+    result = PageExtraction(page_number=page_number, cars=cars, price_mentions=mentions)
+    if cars:
+        coverage = min(1.0, len(cars) / mentions) if mentions else 1.0
+        result.confidence = round(min(car["confidence"] for car in cars) * coverage, 3)
+    return result, columns
+
+
+def extract_pages(pages: List[str]) -> List[PageExtraction]:
+    """Rule-based extraction for every page, carrying table headers across pages."""
+    results = []
+    columns = None
+    for idx, text in enumerate(pages):
+        result, columns = extract_page(text, idx + 1, columns)
+        results.append(result)
+    return results
@@ -3,19 +3,23 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
+import inspect
 import json
 import logging
-import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple, Union
 
 from dotenv import load_dotenv
 
 from car_analysis.database.manager import DatabaseManager
 from car_analysis.rag.embeddings import EmbeddingManager
 from car_analysis.rag.vector_store import VectorStoreManager
-from car_analysis.tools.carsxe_api import CarsXEClient
+from car_analysis.tools.carsxe_api import AsyncCarsXEClient, CarsXEClient
+from car_analysis.tools.response_cache import DEFAULT_CACHE_PATH, ResponseCache
+from car_analysis.tools.throttle import AsyncRateLimiter
+from car_analysis.utils.ingest_pipeline import natural_key
 
 
 logger = logging.getLogger("carsxe_seed")
@@ -122,172 +126,436 @@ def _extract_average_price(payload: Any) -> Optional[float]:
     return _search(payload)
 
 
-def seed_from_csv(csv_path: Path, *, limit: int, offset: int, sleep: float) -> None:
-    carsxe_client = CarsXEClient()
+SEED_DATASET = "carsxe_seed"
+
+DEFAULT_WORKERS = 4
+DEFAULT_MILEAGE_BUCKET = 10_000
+
+
+def ymm_cache_key(year: int, make: str, model: str, mileage: Optional[int], bucket_size: int) -> Tuple[str, Optional[int]]:
+    """Normalised cache key plus the mileage actually sent to CarsXE.
+
+    Mileage is snapped to the middle of its bucket, so every row in a bucket
+    issues the identical request and a cached response is exact for its key.
+    """
+
+    if mileage:
+        bucket = int(mileage) // bucket_size
+        request_mileage: Optional[int] = bucket * bucket_size + bucket_size // 2
+    else:
+        bucket, request_mileage = None, None
+    key = "carsxe:ymm:{}:{}:{}:{}".format(
+        year, make.strip().lower(), model.strip().lower(), "na" if bucket is None else bucket
+    )
+    return key, request_mileage
+
+
+class CarsXELookup:
+    """CarsXE YMM lookups behind a persistent cache, a rate limiter and a worker cap.
+
+    Concurrent requests for the same key share one in-flight call.
+    """
+
+    def __init__(
+        self,
+        client: Union[CarsXEClient, AsyncCarsXEClient],
+        *,
+        cache: Optional[ResponseCache] = None,
+        rps: Optional[float] = None,
+        bucket_size: int = DEFAULT_MILEAGE_BUCKET,
+    ):
+        self.client = client
+        self.cache = cache
+        self.limiter = AsyncRateLimiter(rps)
+        self.bucket_size = bucket_size
+        self.api_calls = 0
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def fetch(self, *, make: str, model: str, year: int, mileage: Optional[int]) -> Any:
+        key, request_mileage = ymm_cache_key(year, make, model, mileage, self.bucket_size)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            await self.limiter.acquire()
+            self.api_calls += 1
+            query = dict(make=make, model=model, year=year, mileage=request_mileage)
+            fetch = self.client.fetch_market_value_by_trim
+            if inspect.iscoroutinefunction(fetch):
+                payload = await fetch(**query)
+            else:
+                payload = await asyncio.to_thread(fetch, **query)
+            if self.cache is not None:
+                self.cache.put(key, payload)
+            future.set_result(payload)
+            return payload
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters get the error; nobody else awaits this future otherwise
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+
+class _Watermark:
+    """Contiguous "next row" watermark over rows that may finish out of order."""
+
+    def __init__(self, start: int):
+        self.value = start
+        self._done: set = set()
+
+    def mark(self, idx: int) -> int:
+        self._done.add(idx)
+        while self.value in self._done:
+            self._done.remove(self.value)
+            self.value += 1
+        return self.value
+
+
+def _sync_vectors(vector_manager: VectorStoreManager, saved: Dict[str, Any], knowledge: Optional[Dict[str, Any]]) -> None:
+    """Upsert one seeded row's vectors; raises when a write reports nothing written
+    (``VectorStoreManager.add_*_batch`` return 0 instead of raising)."""
+
+    writes = [(vector_manager.add_cars_batch, [(saved["car_id"], saved["car"])])]
+    if saved.get("analysis_id"):
+        writes.append((vector_manager.add_analyses_batch, [(saved["analysis_id"], saved["car_id"], saved["analysis"])]))
+    if knowledge and saved.get("knowledge_id"):
+        writes.append((vector_manager.add_knowledge_batch, [(saved["knowledge_id"], knowledge)]))
+    for add_batch, items in writes:
+        written = add_batch(items)
+        if written != len(items):
+            raise RuntimeError(f"vector store wrote {written}/{len(items)} rows")
+
+
+def seed_from_csv(
+    csv_path: Path,
+    *,
+    limit: int,
+    offset: int,
+    sleep: float = 0.5,
+    resume: bool = True,
+    workers: int = DEFAULT_WORKERS,
+    rps: Optional[float] = None,
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    client: Optional[Union[CarsXEClient, AsyncCarsXEClient]] = None,
+    db_manager: Optional[DatabaseManager] = None,
+    vector_manager: Optional[VectorStoreManager] = None,
+) -> Dict[str, int]:
+    """Synchronous entry point; see :func:`seed_from_csv_async`."""
+
+    return asyncio.run(seed_from_csv_async(
+        csv_path,
+        limit=limit,
+        offset=offset,
+        sleep=sleep,
+        resume=resume,
+        workers=workers,
+        rps=rps,
+        cache_path=cache_path,
+        client=client,
+        db_manager=db_manager,
+        vector_manager=vector_manager,
+    ))
+
+
+async def seed_from_csv_async(
+    csv_path: Path,
+    *,
+    limit: int,
+    offset: int,
+    sleep: float = 0.5,
+    resume: bool = True,
+    workers: int = DEFAULT_WORKERS,
+    rps: Optional[float] = None,
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    client: Optional[Union[CarsXEClient, AsyncCarsXEClient]] = None,
+    db_manager: Optional[DatabaseManager] = None,
+    vector_manager: Optional[VectorStoreManager] = None,
+) -> Dict[str, int]:
+    """Seed rows with a pool of ``workers`` tasks sharing one rate limiter.
+
+    ``rps`` caps CarsXE requests per second (defaults to ``1 / sleep``).
+    Responses are cached in ``cache_path`` (``None`` disables the cache).
+    DB and vector writes are serialised on a worker thread so the event loop
+    keeps API calls in flight.
+
+    The checkpoint only advances over a contiguous run of rows that were
+    seeded, were duplicates or were unparseable.  A row whose lookup, insert
+    or vector write failed (e.g. CarsXE down or the circuit open) holds it,
+    so a resumed run retries that row; rows after it are recognised by their
+    natural key and cost no API call.
+    """
+
+    owns_client = client is None
+    if client is None:
+        client = AsyncCarsXEClient(max_connections=max(1, workers))
+        if not client.available:
+            client = CarsXEClient()
+    carsxe_client = client
     if not carsxe_client.available:
         raise RuntimeError("CarsXE client unavailable. Install carsxe-api and set CARSXE_API_KEY.")
 
-    db_manager = DatabaseManager()
-    embedding_manager = EmbeddingManager()
-    vector_manager = VectorStoreManager(embedding_manager=embedding_manager)
-
-    processed = 0
-    successes = 0
-
-    with csv_path.open(newline="", encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        for idx, row in enumerate(reader):
-            if idx < offset:
-                continue
-            if processed >= limit:
-                break
-
-            processed += 1
-
-            make = (row.get("brand") or "").strip()
-            model = (row.get("model") or "").strip()
+    if db_manager is None:
+        db_manager = DatabaseManager()
+    if vector_manager is None:
+        vector_manager = VectorStoreManager(embedding_manager=EmbeddingManager())
+
+    if rps is None and sleep > 0:
+        rps = 1.0 / sleep
+    cache = ResponseCache(cache_path) if cache_path else None
+    lookup = CarsXELookup(carsxe_client, cache=cache, rps=rps)
+
+    # Resume from the checkpoint; already-ingested rows from there on get their vectors re-synced
+    source = str(csv_path.resolve())
+    replay_from: Optional[int] = None
+    checkpoint = db_manager.get_ingest_checkpoint(source, SEED_DATASET) if resume else None
+    if checkpoint:
+        end_row = offset + limit
+        if checkpoint["embedded_row"] > offset:
+            offset = checkpoint["embedded_row"]
+            limit = max(0, end_row - offset)
+            logger.info("Resuming %s from row %s", csv_path, offset)
+        replay_from = checkpoint["embedded_row"]
+
+    counts = {"processed": 0, "successes": 0, "duplicates": 0, "skipped": 0, "failures": 0}
+    outcome_counts = {True: "successes", "duplicate": "duplicates", "skipped": "skipped", False: "failures"}
+    done = _Watermark(offset)
+    db_lock = asyncio.Lock()
+    rows: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max(1, workers) * 2)
+
+    async def run_db(fn, *args, **kwargs):
+        async with db_lock:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def worker() -> None:
+        while True:
+            item = await rows.get()
+            if item is None:
+                return
+            idx, row = item
             try:
-                year = int(row.get("model_year", "0") or 0)
-            except ValueError:
-                logger.warning("Skipping row %s due to invalid year: %s", idx, row.get("model_year"))
-                continue
-
-            mileage = _parse_int(row.get("milage")) or 0
-            price_paid = _parse_float(row.get("price"))
-            engine_info = row.get("engine", "") or ""
-
-            hp = _parse_hp(engine_info) or 0.0
-            displacement = _parse_displacement(engine_info) or 0.0
-            fuel_type = (row.get("fuel_type") or "UNKNOWN").strip()
-            transmission = (row.get("transmission") or "UNKNOWN").strip()
-            clean_title = 1 if (row.get("clean_title") or "").strip().lower() == "yes" else 0
-
-            try:
-                carsxe_payload = carsxe_client.fetch_market_value_by_trim(
-                    make=make,
-                    model=model,
-                    year=year,
-                    mileage=mileage or None,
+                outcome = await _seed_row(
+                    idx,
+                    row,
+                    csv_path=csv_path,
+                    replay_from=replay_from,
+                    lookup=lookup,
+                    db_manager=db_manager,
+                    vector_manager=vector_manager,
+                    run_db=run_db,
                 )
             except Exception as exc:
-                logger.error("CarsXE lookup failed for %s %s %s: %s", year, make, model, exc)
-                continue
-
-            market_price = _extract_average_price(carsxe_payload)
-            price_delta = None
-            price_delta_pct = None
-            deal_category = None
-            if price_paid is not None and market_price is not None:
-                price_delta = price_paid - market_price
-                price_delta_pct = price_delta / market_price * 100
-                deal_category = _derive_deal_category(price_paid, market_price)
-
-            car_payload = {
-                "make": make,
-                "model": model,
-                "year": year,
-                "mileage": mileage,
-                "price_paid": price_paid or 0.0,
-                "trim": model,
-                "engine": engine_info,
-                "fuel_type": fuel_type,
-                "transmission": transmission,
-                "hp": hp,
-                "engine_displacement": displacement,
-                "condition": row.get("accident"),
-                "clean_title": clean_title,
-                "pdf_source": str(csv_path),
-                "raw_text": json.dumps(row, ensure_ascii=False),
-            }
-
+                logger.error("Seeding row %s failed: %s", idx, exc)
+                outcome = False
+            counts[outcome_counts[outcome]] += 1
+            if outcome is False:
+                continue  # holds the checkpoint so a resumed run retries this row
             try:
-                car_id = db_manager.save_car(car_payload)
+                watermark = done.mark(idx)
+                await run_db(db_manager.update_ingest_checkpoint, source, SEED_DATASET,
+                             committed_row=watermark, embedded_row=watermark)
             except Exception as exc:
-                logger.error("Failed to save car %s %s %s: %s", year, make, model, exc)
-                continue
-
-            analysis_data = {
-                "rule_based_score": None,
-                "rule_based_verdict": deal_category,
-                "llm_score": None,
-                "llm_verdict": deal_category,
-                "llm_reasoning": json.dumps(carsxe_payload, ensure_ascii=False)[:2000],
-                "market_median_price": market_price,
-                "price_delta": price_delta,
-                "price_delta_percent": price_delta_pct,
-                "deal_category": deal_category,
-                "data_source": "carsxe",
-                "comparable_count": None,
-                "research_quality": "carsxe_api",
-                "success": market_price is not None,
-                "analysis_version": "carsxe_seed_v1",
-            }
+                # Keep the worker alive: the producer blocks on rows.put otherwise
+                logger.error("Checkpoint update after row %s failed: %s", idx, exc)
 
+    tasks = [asyncio.create_task(worker()) for _ in range(max(1, workers))]
+    try:
+        with csv_path.open(newline="", encoding="utf-8") as fh:
+            reader = csv.DictReader(fh)
+            for idx, row in enumerate(reader):
+                if idx < offset:
+                    continue
+                if counts["processed"] >= limit:
+                    break
+                counts["processed"] += 1
+                await rows.put((idx, row))
+        for _ in tasks:
+            await rows.put(None)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        if cache is not None:
+            cache.close()
+        if owns_client and isinstance(carsxe_client, AsyncCarsXEClient):
+            await carsxe_client.aclose()
+
+    counts["api_calls"] = lookup.api_calls
+    logger.info(
+        "Completed CarsXE seeding: processed=%s successes=%s duplicates=%s skipped=%s failures=%s api_calls=%s",
+        counts["processed"], counts["successes"], counts["duplicates"], counts["skipped"], counts["failures"],
+        counts["api_calls"],
+    )
+    return counts
+
+
+async def _seed_row(
+    idx: int,
+    row: Dict[str, str],
+    *,
+    csv_path: Path,
+    replay_from: Optional[int],
+    lookup: CarsXELookup,
+    db_manager: DatabaseManager,
+    vector_manager: VectorStoreManager,
+    run_db,
+):
+    """Seed one CSV row. Returns True on success, "duplicate" when the row was
+    already ingested (no API call is made), "skipped" for rows that can never
+    be seeded (invalid year) and False on a retryable failure."""
+
+    source_key = natural_key(SEED_DATASET, row)
+    existing = (await run_db(db_manager.find_ingested_rows, [source_key])).get(source_key)
+    if existing:
+        if replay_from is not None and idx >= replay_from:
+            # Committed in an earlier run, possibly without its vectors
             try:
-                analysis_id = db_manager.save_analysis(car_id, analysis_data)
+                await run_db(_sync_vectors, vector_manager, existing, existing.get("knowledge"))
             except Exception as exc:
-                logger.error("Failed to save analysis for car ID %s: %s", car_id, exc)
-                continue
+                logger.warning("Vector re-sync failed for car ID %s: %s", existing["car_id"], exc)
+                return False
+        return "duplicate"
 
-            try:
-                car_dict = db_manager.get_car(car_id)
-                if car_dict:
-                    vector_manager.add_car(car_id, car_dict)
+    make = (row.get("brand") or "").strip()
+    model = (row.get("model") or "").strip()
+    try:
+        year = int(row.get("model_year", "0") or 0)
+    except ValueError:
+        logger.warning("Skipping row %s due to invalid year: %s", idx, row.get("model_year"))
+        return "skipped"
 
-                car_with_analysis = db_manager.get_car_with_analysis(car_id)
-                if car_with_analysis and car_with_analysis.get("analysis"):
-                    vector_manager.add_analysis(analysis_id, car_id, car_with_analysis["analysis"])
+    mileage = _parse_int(row.get("milage")) or 0
+    price_paid = _parse_float(row.get("price"))
+    engine_info = row.get("engine", "") or ""
 
-                knowledge_content = (
-                    f"CarsXE valuation for {year} {make} {model} with {mileage:,} miles. "
-                )
-                if market_price is not None:
-                    knowledge_content += f"Average market price ${market_price:,.0f}."
-                else:
-                    knowledge_content += "Average market price unavailable."
-
-                knowledge_content += "\n\nDataset price: "
-                if price_paid is not None:
-                    knowledge_content += f"${price_paid:,.0f}"
-                    if price_delta is not None and price_delta_pct is not None:
-                        knowledge_content += f" (delta ${price_delta:+,.0f}, {price_delta_pct:+.1f}%)."
-                else:
-                    knowledge_content += "unknown."
-
-                knowledge_content += "\n\nCarsXE raw payload:\n" + json.dumps(
-                    carsxe_payload, ensure_ascii=False
-                )[:3000]
-
-                knowledge_data = {
-                    "title": f"{year} {make} {model} CarsXE valuation",
-                    "content": knowledge_content,
-                    "content_type": "carsxe_market",
-                    "category": make,
-                    "tags": [model, str(year), "carsxe"],
-                    "source": "carsxe_api",
-                    "reliability_score": 0.8,
-                }
-
-                knowledge_id = db_manager.add_knowledge(**knowledge_data)
-                vector_manager.add_knowledge(knowledge_id, knowledge_data)
-            except Exception as exc:
-                logger.warning("Vector/knowledge sync failed for car ID %s: %s", car_id, exc)
+    hp = _parse_hp(engine_info) or 0.0
+    displacement = _parse_displacement(engine_info) or 0.0
+    fuel_type = (row.get("fuel_type") or "UNKNOWN").strip()
+    transmission = (row.get("transmission") or "UNKNOWN").strip()
+    clean_title = 1 if (row.get("clean_title") or "").strip().lower() == "yes" else 0
+
+    try:
+        carsxe_payload = await lookup.fetch(make=make, model=model, year=year, mileage=mileage or None)
+    except Exception as exc:
+        logger.error("CarsXE lookup failed for %s %s %s: %s", year, make, model, exc)
+        return False
+
+    market_price = _extract_average_price(carsxe_payload)
+    price_delta = None
+    price_delta_pct = None
+    deal_category = None
+    if price_paid is not None and market_price is not None:
+        price_delta = price_paid - market_price
+        price_delta_pct = price_delta / market_price * 100
+        deal_category = _derive_deal_category(price_paid, market_price)
+
+    car_payload = {
+        "make": make,
+        "model": model,
+        "year": year,
+        "mileage": mileage,
+        "price_paid": price_paid or 0.0,
+        "trim": model,
+        "engine": engine_info,
+        "fuel_type": fuel_type,
+        "transmission": transmission,
+        "hp": hp,
+        "engine_displacement": displacement,
+        "condition": row.get("accident"),
+        "clean_title": clean_title,
+        "pdf_source": str(csv_path),
+        "raw_text": json.dumps(row, ensure_ascii=False),
+    }
+
+    analysis_data = {
+        "rule_based_score": None,
+        "rule_based_verdict": deal_category,
+        "llm_score": None,
+        "llm_verdict": deal_category,
+        "llm_reasoning": json.dumps(carsxe_payload, ensure_ascii=False)[:2000],
+        "market_median_price": market_price,
+        "price_delta": price_delta,
+        "price_delta_percent": price_delta_pct,
+        "deal_category": deal_category,
+        "data_source": "carsxe",
+        "comparable_count": None,
+        "research_quality": "carsxe_api",
+        "success": market_price is not None,
+        "analysis_version": "carsxe_seed_v1",
+    }
 
-            successes += 1
-            logger.info(
-                "Seeded %s %s %s (car_id=%s, analysis_id=%s, market_price=%s)",
-                year,
-                make,
-                model,
-                car_id,
-                analysis_id,
-                f"${market_price:,.0f}" if market_price is not None else "N/A",
-            )
+    knowledge_content = (
+        f"CarsXE valuation for {year} {make} {model} with {mileage:,} miles. "
+    )
+    if market_price is not None:
+        knowledge_content += f"Average market price ${market_price:,.0f}."
+    else:
+        knowledge_content += "Average market price unavailable."
+
+    knowledge_content += "\n\nDataset price: "
+    if price_paid is not None:
+        knowledge_content += f"${price_paid:,.0f}"
+        if price_delta is not None and price_delta_pct is not None:
+            knowledge_content += f" (delta ${price_delta:+,.0f}, {price_delta_pct:+.1f}%)."
+    else:
+        knowledge_content += "unknown."
+
+    knowledge_content += "\n\nCarsXE raw payload:\n" + json.dumps(
+        carsxe_payload, ensure_ascii=False
+    )[:3000]
+
+    knowledge_data = {
+        "title": f"{year} {make} {model} CarsXE valuation",
+        "content": knowledge_content,
+        "content_type": "carsxe_market",
+        "category": make,
+        "tags": [model, str(year), "carsxe"],
+        "source": "carsxe_api",
+        "reliability_score": 0.8,
+    }
 
-            if sleep > 0:
-                time.sleep(sleep)
+    # Car, analysis, knowledge and natural key commit together; the checkpoint
+    # is advanced by the worker once the vectors are written as well
+    try:
+        saved = (await run_db(
+            db_manager.save_analysis_records,
+            [{
+                "car": car_payload,
+                "analysis": analysis_data,
+                "knowledge": knowledge_data,
+                "source_key": source_key,
+            }],
+        ))[0]
+    except Exception as exc:
+        logger.error("Failed to save car %s %s %s: %s", year, make, model, exc)
+        return False
 
-    logger.info("Completed CarsXE seeding: processed=%s successes=%s", processed, successes)
+    try:
+        await run_db(_sync_vectors, vector_manager, saved, knowledge_data)
+    except Exception as exc:
+        # The row is committed; a resumed run finds it by natural key and re-syncs the vectors
+        logger.warning("Vector/knowledge sync failed for car ID %s: %s", saved["car_id"], exc)
+        return False
+
+    logger.info(
+        "Seeded %s %s %s (car_id=%s, analysis_id=%s, market_price=%s)",
+        year,
+        make,
+        model,
+        saved["car_id"],
+        saved["analysis_id"],
+        f"${market_price:,.0f}" if market_price is not None else "N/A",
+    )
+    return True
 
 
 def main() -> None:
@@ -295,7 +563,16 @@ def main() -> None:
     parser.add_argument("--csv", type=Path, default=Path("used_cars.csv"), help="CSV dataset path")
     parser.add_argument("--limit", type=int, default=25, help="Number of rows to process")
     parser.add_argument("--offset", type=int, default=0, help="Number of initial rows to skip")
-    parser.add_argument("--sleep", type=float, default=0.5, help="Delay between CarsXE API calls")
+    parser.add_argument("--sleep", type=float, default=0.5, help="Delay between CarsXE API calls (used when --rps is not set)")
+    parser.add_argument("--rps", type=float, default=None, help="Maximum CarsXE requests per second")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent seeding workers")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Persistent CarsXE response cache path")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Ignore the stored checkpoint and start at --offset (rows already seeded are still skipped)",
+    )
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
@@ -305,7 +582,16 @@ def main() -> None:
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV dataset not found: {csv_path}")
 
-    seed_from_csv(csv_path, limit=args.limit, offset=args.offset, sleep=args.sleep)
+    seed_from_csv(
+        csv_path,
+        limit=args.limit,
+        offset=args.offset,
+        sleep=args.sleep,
+        resume=not args.no_resume,
+        workers=args.workers,
+        rps=args.rps,
+        cache_path=None if args.no_cache else args.cache,
+    )
 
 
 if __name__ == "__main__":